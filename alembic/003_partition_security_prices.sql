@@ -0,0 +1,105 @@
+-- =====================================================
+-- ZSPRD Portfolio Analytics Database - Partitioned Prices
+-- =====================================================
+-- Rebuilds security_prices as a table range-partitioned by
+-- price_date with one partition per calendar year.
+--   * Primary key on (security_id, price_date); the partition key
+--     must be part of every unique constraint
+--   * BRIN index on price_date (prices arrive in date order, so a
+--     BRIN index is a tiny fraction of the b-tree's size)
+--   * Retention drops whole yearly partitions instead of DELETEs
+-- =====================================================
+
+BEGIN;
+
+-- =====================================================
+-- PARTITION MANAGEMENT FUNCTIONS
+-- =====================================================
+
+-- Create the yearly partition covering p_date if it does not exist
+CREATE
+OR REPLACE FUNCTION ensure_security_prices_partition(p_date DATE)
+RETURNS TEXT AS $$
+DECLARE
+    v_year           INTEGER := EXTRACT(YEAR FROM p_date)::INTEGER;
+    v_partition_name TEXT    := format('security_prices_y%s', v_year);
+BEGIN
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF security_prices FOR VALUES FROM (%L) TO (%L)',
+        v_partition_name,
+        make_date(v_year, 1, 1),
+        make_date(v_year + 1, 1, 1)
+    );
+    RETURN v_partition_name;
+END;
+$$
+LANGUAGE plpgsql;
+
+-- Create every yearly partition between two dates (inclusive)
+CREATE
+OR REPLACE FUNCTION ensure_security_prices_partitions(p_from DATE, p_to DATE)
+RETURNS INTEGER AS $$
+DECLARE
+    v_year  INTEGER;
+    v_count INTEGER := 0;
+BEGIN
+    FOR v_year IN EXTRACT(YEAR FROM p_from)::INTEGER..EXTRACT(YEAR FROM p_to)::INTEGER
+    LOOP
+        PERFORM ensure_security_prices_partition(make_date(v_year, 1, 1));
+        v_count := v_count + 1;
+    END LOOP;
+    RETURN v_count;
+END;
+$$
+LANGUAGE plpgsql;
+
+-- =====================================================
+-- PARTITIONED TABLE
+-- =====================================================
+
+ALTER TABLE security_prices RENAME TO security_prices_unpartitioned;
+ALTER INDEX idx_security_prices_security_date RENAME TO idx_security_prices_unpartitioned_security_date;
+ALTER INDEX idx_security_prices_provider RENAME TO idx_security_prices_unpartitioned_provider;
+
+CREATE TABLE security_prices
+(
+    id               UUID           NOT NULL DEFAULT uuid_generate_v4(),
+    security_id      UUID           NOT NULL REFERENCES security_master (id) ON DELETE CASCADE,
+    price_date       DATE           NOT NULL,
+    close_price      DECIMAL(15, 4) NOT NULL,
+    volume           BIGINT,
+
+    -- Provider tracking
+    data_provider_id UUID REFERENCES data_providers (id),
+    data_source      data_source_enum DEFAULT 'calculated',
+
+    created_at       TIMESTAMPTZ      DEFAULT NOW(),
+
+    PRIMARY KEY (security_id, price_date)
+) PARTITION BY RANGE (price_date);
+
+COMMENT ON TABLE security_prices IS 'Daily market prices for account valuation, partitioned by year';
+
+-- Partitions for existing history through next year
+SELECT ensure_security_prices_partitions(
+    COALESCE((SELECT MIN(price_date) FROM security_prices_unpartitioned), CURRENT_DATE),
+    (CURRENT_DATE + INTERVAL '1 year')::DATE
+);
+
+INSERT INTO security_prices (id, security_id, price_date, close_price, volume,
+                             data_provider_id, data_source, created_at)
+SELECT id, security_id, price_date, close_price, volume,
+       data_provider_id, data_source, created_at
+FROM security_prices_unpartitioned;
+
+DROP TABLE security_prices_unpartitioned;
+
+-- =====================================================
+-- INDEXES
+-- =====================================================
+
+-- (security_id, price_date) lookups are served by the primary key
+CREATE INDEX idx_security_prices_date_brin ON security_prices USING BRIN (price_date);
+CREATE INDEX idx_security_prices_provider ON security_prices (data_provider_id);
+
+COMMIT;
@@ -0,0 +1,23 @@
+-- =====================================================
+-- ZSPRD Portfolio Analytics Database - FX Rate Store
+-- =====================================================
+-- Aligns market_rates with the application model and adds
+-- the index used to load a date range of FX rates for all
+-- currency pairs at once.
+-- =====================================================
+
+BEGIN;
+
+ALTER TABLE market_rates
+    ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ DEFAULT NOW(),
+    ADD COLUMN IF NOT EXISTS deleted_at TIMESTAMPTZ;
+
+-- Loading the FX matrix filters by type and date across all pairs
+CREATE INDEX IF NOT EXISTS idx_market_rates_type_date ON market_rates (rate_type, rate_date);
+
+CREATE TRIGGER update_market_rates_updated_at
+    BEFORE UPDATE
+    ON market_rates
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+COMMIT;
@@ -0,0 +1,46 @@
+-- =====================================================
+-- ZSPRD Portfolio Analytics Database - Security Returns
+-- =====================================================
+-- One row per security with trailing returns, volatility
+-- and recent monthly returns, computed from adjusted closes
+-- by the nightly job in app/security/returns/service.py.
+-- =====================================================
+
+BEGIN;
+
+CREATE TABLE security_return_summary
+(
+    id              UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    security_id     UUID           NOT NULL UNIQUE REFERENCES security_master (id) ON DELETE CASCADE,
+    as_of_date      DATE           NOT NULL, -- Last price date included
+    last_close      DECIMAL(15, 4) NOT NULL,
+    observations    INTEGER        NOT NULL,
+
+    -- Trailing total returns (%)
+    return_1d       DECIMAL(12, 6),
+    return_7d       DECIMAL(12, 6),
+    return_30d      DECIMAL(12, 6),
+    return_90d      DECIMAL(12, 6),
+    return_365d     DECIMAL(12, 6),
+
+    -- Annualized volatility of daily returns (%)
+    volatility_30d  DECIMAL(12, 6),
+    volatility_90d  DECIMAL(12, 6),
+
+    monthly_returns JSON,                    -- {"2025-08": 1.23, ...}
+
+    created_at      TIMESTAMPTZ DEFAULT NOW(),
+    updated_at      TIMESTAMPTZ DEFAULT NOW(),
+    deleted_at      TIMESTAMPTZ
+);
+
+COMMENT ON TABLE security_return_summary IS 'Materialized per-security returns and volatility';
+
+CREATE INDEX idx_security_return_summary_as_of_date ON security_return_summary (as_of_date);
+
+CREATE TRIGGER update_security_return_summary_updated_at
+    BEFORE UPDATE
+    ON security_return_summary
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+COMMIT;
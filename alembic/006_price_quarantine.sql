@@ -0,0 +1,39 @@
+-- =====================================================
+-- ZSPRD Portfolio Analytics Database - Price Quarantine
+-- =====================================================
+-- Provider prices rejected by the ingestion quality checks
+-- in app/security/quality/ are kept here for review instead
+-- of being written to security_prices.
+-- =====================================================
+
+BEGIN;
+
+CREATE TABLE security_price_quarantine
+(
+    id              UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    security_id     UUID        NOT NULL REFERENCES security_master (id) ON DELETE CASCADE,
+    price_date      DATE        NOT NULL,
+    close_price     DECIMAL(15, 4),          -- As reported by the provider
+    volume          BIGINT,
+    reference_price DECIMAL(15, 4),          -- Prior close level or other provider's close
+    score           DOUBLE PRECISION,        -- z-score, jump ratio, run length or gap
+    issue           VARCHAR(30) NOT NULL,    -- non_positive, split_glitch, return_outlier, stale, provider_divergence
+    data_source     VARCHAR(50) NOT NULL,
+    status          VARCHAR(20) NOT NULL DEFAULT 'pending', -- pending, released, rejected
+
+    created_at      TIMESTAMPTZ DEFAULT NOW(),
+    updated_at      TIMESTAMPTZ DEFAULT NOW(),
+    deleted_at      TIMESTAMPTZ
+);
+
+COMMENT ON TABLE security_price_quarantine IS 'Suspect provider prices awaiting review';
+
+CREATE INDEX idx_price_quarantine_security_date ON security_price_quarantine (security_id, price_date);
+CREATE INDEX idx_price_quarantine_status ON security_price_quarantine (status);
+
+CREATE TRIGGER update_security_price_quarantine_updated_at
+    BEFORE UPDATE
+    ON security_price_quarantine
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+COMMIT;
@@ -0,0 +1,99 @@
+-- =====================================================
+-- ZSPRD Portfolio Analytics Database - Tax Lots
+-- =====================================================
+-- Tax lots and per-lot realized gains rebuilt from account
+-- transactions by app/account/lots/service.py. Rows for a
+-- security and lot method are replaced whenever its
+-- transactions change; a build row records the transaction
+-- fingerprint each rebuild was made from.
+-- =====================================================
+
+BEGIN;
+
+CREATE TABLE portfolio_tax_lots
+(
+    id                  UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    account_id          UUID           NOT NULL REFERENCES portfolio_accounts (id) ON DELETE CASCADE,
+    security_id         UUID           NOT NULL REFERENCES security_master (id) ON DELETE CASCADE,
+    open_transaction_id UUID           REFERENCES portfolio_transactions (id) ON DELETE SET NULL,
+    lot_method          VARCHAR(20)    NOT NULL, -- fifo, lifo, hifo, specific_id
+    open_date           DATE           NOT NULL,
+    quantity            DECIMAL(15, 6) NOT NULL, -- Split-adjusted shares bought
+    remaining_quantity  DECIMAL(15, 6) NOT NULL,
+    unit_cost           DECIMAL(18, 8) NOT NULL, -- Including fees, split-adjusted
+    currency            CHAR(3)        NOT NULL DEFAULT 'USD',
+    closed_date         DATE,
+
+    created_at          TIMESTAMPTZ DEFAULT NOW(),
+    updated_at          TIMESTAMPTZ DEFAULT NOW(),
+    deleted_at          TIMESTAMPTZ
+);
+
+COMMENT ON TABLE portfolio_tax_lots IS 'Open and closed tax lots rebuilt from account transactions';
+
+CREATE INDEX idx_tax_lots_portfolio_security ON portfolio_tax_lots (account_id, security_id);
+CREATE INDEX idx_tax_lots_open_transaction ON portfolio_tax_lots (open_transaction_id);
+
+CREATE TABLE portfolio_realized_gains
+(
+    id                  UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    account_id          UUID           NOT NULL REFERENCES portfolio_accounts (id) ON DELETE CASCADE,
+    security_id         UUID           NOT NULL REFERENCES security_master (id) ON DELETE CASCADE,
+    lot_id              UUID           NOT NULL REFERENCES portfolio_tax_lots (id) ON DELETE CASCADE,
+    open_transaction_id UUID           REFERENCES portfolio_transactions (id) ON DELETE SET NULL,
+    sell_transaction_id UUID           REFERENCES portfolio_transactions (id) ON DELETE SET NULL,
+    lot_method          VARCHAR(20)    NOT NULL,
+    open_date           DATE           NOT NULL,
+    close_date          DATE           NOT NULL,
+    quantity            DECIMAL(15, 6) NOT NULL,
+    proceeds            DECIMAL(15, 2) NOT NULL, -- Net of sale fees
+    cost_basis          DECIMAL(15, 2) NOT NULL,
+    gain                DECIMAL(15, 2) NOT NULL,
+    term                VARCHAR(10)    NOT NULL, -- short_term, long_term
+    currency            CHAR(3)        NOT NULL DEFAULT 'USD',
+
+    created_at          TIMESTAMPTZ DEFAULT NOW(),
+    updated_at          TIMESTAMPTZ DEFAULT NOW(),
+    deleted_at          TIMESTAMPTZ
+);
+
+COMMENT ON TABLE portfolio_realized_gains IS 'Realized gains and losses per sale and tax lot';
+
+CREATE INDEX idx_realized_gains_portfolio_date ON portfolio_realized_gains (account_id, close_date);
+CREATE INDEX idx_realized_gains_portfolio_security ON portfolio_realized_gains (account_id, security_id);
+CREATE INDEX idx_realized_gains_sell_transaction ON portfolio_realized_gains (sell_transaction_id);
+
+CREATE TABLE portfolio_tax_lot_builds
+(
+    id                UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    account_id        UUID        NOT NULL REFERENCES portfolio_accounts (id) ON DELETE CASCADE,
+    security_id       UUID        NOT NULL REFERENCES security_master (id) ON DELETE CASCADE,
+    lot_method        VARCHAR(20) NOT NULL,
+    transaction_count INTEGER     NOT NULL, -- Replayed transactions, including soft-deleted ones
+    changed_at        TIMESTAMPTZ,          -- Latest updated_at of those transactions
+
+    created_at        TIMESTAMPTZ DEFAULT NOW(),
+    updated_at        TIMESTAMPTZ DEFAULT NOW(),
+    deleted_at        TIMESTAMPTZ,
+
+    CONSTRAINT uq_tax_lot_builds_security_method UNIQUE (account_id, security_id, lot_method)
+);
+
+COMMENT ON TABLE portfolio_tax_lot_builds IS 'Transaction fingerprint of each tax lot rebuild';
+
+CREATE TRIGGER update_portfolio_tax_lots_updated_at
+    BEFORE UPDATE
+    ON portfolio_tax_lots
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+CREATE TRIGGER update_portfolio_realized_gains_updated_at
+    BEFORE UPDATE
+    ON portfolio_realized_gains
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+CREATE TRIGGER update_portfolio_tax_lot_builds_updated_at
+    BEFORE UPDATE
+    ON portfolio_tax_lot_builds
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+COMMIT;
@@ -0,0 +1,60 @@
+-- =====================================================
+-- ZSPRD Portfolio Analytics Database - Positions
+-- =====================================================
+-- Current positions maintained from account transactions
+-- and periodic snapshots used to answer as-of queries
+-- (snapshot + replay of later transactions), both kept by
+-- app/account/positions/service.py.
+-- =====================================================
+
+BEGIN;
+
+CREATE TABLE portfolio_positions
+(
+    id              UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    account_id      UUID           NOT NULL REFERENCES portfolio_accounts (id) ON DELETE CASCADE,
+    security_id     UUID           NOT NULL REFERENCES security_master (id) ON DELETE CASCADE,
+    quantity        DECIMAL(15, 6) NOT NULL,
+    cost_basis      DECIMAL(15, 2) NOT NULL, -- Average cost
+    currency        CHAR(3)        NOT NULL DEFAULT 'USD',
+    last_trade_date DATE,
+
+    created_at      TIMESTAMPTZ DEFAULT NOW(),
+    updated_at      TIMESTAMPTZ DEFAULT NOW(),
+    deleted_at      TIMESTAMPTZ,
+
+    CONSTRAINT uq_position_portfolio_security UNIQUE (account_id, security_id)
+);
+
+COMMENT ON TABLE portfolio_positions IS 'Current positions maintained from account transactions';
+
+CREATE TABLE portfolio_position_snapshots
+(
+    id            UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    account_id    UUID           NOT NULL REFERENCES portfolio_accounts (id) ON DELETE CASCADE,
+    security_id   UUID           NOT NULL REFERENCES security_master (id) ON DELETE CASCADE,
+    snapshot_date DATE           NOT NULL,
+    quantity      DECIMAL(15, 6) NOT NULL,
+    cost_basis    DECIMAL(15, 2) NOT NULL,
+    currency      CHAR(3)        NOT NULL DEFAULT 'USD',
+
+    created_at    TIMESTAMPTZ DEFAULT NOW(),
+    updated_at    TIMESTAMPTZ DEFAULT NOW(),
+    deleted_at    TIMESTAMPTZ,
+
+    CONSTRAINT uq_position_snapshot_portfolio_date_security UNIQUE (account_id, snapshot_date, security_id)
+);
+
+COMMENT ON TABLE portfolio_position_snapshots IS 'Periodic position snapshots for as-of position queries';
+
+CREATE TRIGGER update_portfolio_positions_updated_at
+    BEFORE UPDATE
+    ON portfolio_positions
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+CREATE TRIGGER update_portfolio_position_snapshots_updated_at
+    BEFORE UPDATE
+    ON portfolio_position_snapshots
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+COMMIT;
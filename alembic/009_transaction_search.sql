@@ -0,0 +1,24 @@
+-- =====================================================
+-- ZSPRD Portfolio Analytics Database - Transaction Search
+-- =====================================================
+-- Keyset index for paging transaction listings on
+-- (trade_date, created_at, id) and trigram indexes so the
+-- substring search on description and symbol is served by
+-- an index instead of a scan.
+-- =====================================================
+
+BEGIN;
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Scanned backwards for the newest-first listing
+CREATE INDEX idx_transaction_portfolio_keyset
+    ON portfolio_transactions (account_id, trade_date, created_at, id);
+
+CREATE INDEX idx_transaction_description_trgm
+    ON portfolio_transactions USING gin (description gin_trgm_ops);
+
+CREATE INDEX idx_security_symbol_trgm
+    ON security_master USING gin (symbol gin_trgm_ops);
+
+COMMIT;
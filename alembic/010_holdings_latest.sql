@@ -0,0 +1,21 @@
+-- =====================================================
+-- ZSPRD Portfolio Analytics Database - Latest Holdings
+-- =====================================================
+-- Covering index for the latest holding per (account,
+-- security): DISTINCT ON (account_id, security_id)
+-- ORDER BY as_of_date DESC reads it in order as an
+-- index-only scan and stops after the requested page.
+-- Soft-deleted holdings are left out of the index.
+-- =====================================================
+
+BEGIN;
+
+ALTER TABLE portfolio_holdings
+    ADD COLUMN IF NOT EXISTS deleted_at TIMESTAMPTZ;
+
+CREATE INDEX idx_holding_latest
+    ON portfolio_holdings (account_id, security_id, as_of_date DESC)
+    INCLUDE (id)
+    WHERE deleted_at IS NULL;
+
+COMMIT;
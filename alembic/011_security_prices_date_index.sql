@@ -0,0 +1,16 @@
+-- =====================================================
+-- ZSPRD Portfolio Analytics Database - Price Date Index
+-- =====================================================
+-- Replaces the BRIN index on security_prices.price_date
+-- with a b-tree. Backfills write whole per-security
+-- histories, so rows do not arrive in date order and the
+-- BRIN block ranges overlap until they no longer prune.
+-- =====================================================
+
+BEGIN;
+
+DROP INDEX IF EXISTS idx_security_prices_date_brin;
+
+CREATE INDEX idx_security_prices_date ON security_prices (price_date);
+
+COMMIT;
@@ -0,0 +1,26 @@
+-- =====================================================
+-- ZSPRD Portfolio Analytics Database - Quarantine Dedup
+-- =====================================================
+-- Refetches used to quarantine the same provider close
+-- again on every run. Keep the reviewed (or oldest) row
+-- per security, date and provider and enforce uniqueness
+-- so ingestion can insert with ON CONFLICT DO NOTHING.
+-- =====================================================
+
+BEGIN;
+
+DELETE
+FROM security_price_quarantine q
+    USING (SELECT id,
+                  ROW_NUMBER() OVER (
+                      PARTITION BY security_id, price_date, data_source
+                      ORDER BY (status <> 'pending') DESC, created_at, id
+                      ) AS position
+           FROM security_price_quarantine) ranked
+WHERE q.id = ranked.id
+  AND ranked.position > 1;
+
+ALTER TABLE security_price_quarantine
+    ADD CONSTRAINT uq_price_quarantine_source UNIQUE (security_id, price_date, data_source);
+
+COMMIT;
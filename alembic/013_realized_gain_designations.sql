@@ -0,0 +1,24 @@
+-- =====================================================
+-- ZSPRD Portfolio Analytics Database - Lot Designations
+-- =====================================================
+-- Realized gains under specific identification record
+-- whether the lot was designated by the user or matched
+-- by the FIFO fallback. Only designated rows are replayed
+-- as designations; fallback matches are recomputed on
+-- every rebuild. Existing rows cannot be told apart and
+-- are kept as designated.
+-- =====================================================
+
+BEGIN;
+
+ALTER TABLE portfolio_realized_gains
+    ADD COLUMN designated BOOLEAN NOT NULL DEFAULT FALSE;
+
+COMMENT ON COLUMN portfolio_realized_gains.designated IS
+    'Lot chosen by the user (specific ID); fallback matches are recomputed';
+
+UPDATE portfolio_realized_gains
+SET designated = TRUE
+WHERE lot_method = 'specific_id';
+
+COMMIT;
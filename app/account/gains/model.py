@@ -0,0 +1,111 @@
+import uuid
+from datetime import date
+from decimal import Decimal
+from typing import TYPE_CHECKING, Optional
+
+from sqlalchemy import DECIMAL, Boolean, Date, ForeignKey, Index, String
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.core.model import BaseModel
+
+if TYPE_CHECKING:
+    from app.account.lots.model import AccountTaxLot
+    from app.security.master.model import Security
+
+
+class AccountRealizedGain(BaseModel):
+    """
+    Realized gain or loss from relieving one tax lot in one sale.
+
+    A sale that relieves several lots produces one row per lot, each with its
+    own holding period. Rows are rebuilt together with the lots they relieve.
+    """
+
+    __tablename__ = "portfolio_realized_gains"
+
+    portfolio_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("portfolio_master.id", ondelete="CASCADE"),
+        nullable=False,
+        comment="Reference to the account that made the sale",
+    )
+
+    security_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("security_master.id", ondelete="CASCADE"),
+        nullable=False,
+        comment="Reference to the security sold",
+    )
+
+    lot_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("portfolio_tax_lots.id", ondelete="CASCADE"),
+        nullable=False,
+        comment="Tax lot relieved by the sale",
+    )
+
+    open_transaction_id: Mapped[Optional[uuid.UUID]] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("portfolio_transactions.id", ondelete="SET NULL"),
+        nullable=True,
+        comment="Buy that opened the relieved lot",
+    )
+
+    sell_transaction_id: Mapped[Optional[uuid.UUID]] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("portfolio_transactions.id", ondelete="SET NULL"),
+        nullable=True,
+        comment="Sale that relieved the lot (NULL once it is deleted, which forces a rebuild)",
+    )
+
+    lot_method: Mapped[str] = mapped_column(
+        String(20), nullable=False, comment="LotMethod used to choose the lot"
+    )
+
+    open_date: Mapped[date] = mapped_column(Date, nullable=False, comment="Lot acquisition date")
+
+    close_date: Mapped[date] = mapped_column(Date, nullable=False, comment="Sale trade date")
+
+    quantity: Mapped[Decimal] = mapped_column(
+        DECIMAL(15, 6), nullable=False, comment="Shares relieved from the lot"
+    )
+
+    proceeds: Mapped[Decimal] = mapped_column(
+        DECIMAL(15, 2), nullable=False, comment="Sale proceeds net of fees for these shares"
+    )
+
+    cost_basis: Mapped[Decimal] = mapped_column(
+        DECIMAL(15, 2), nullable=False, comment="Cost of these shares including buy fees"
+    )
+
+    gain: Mapped[Decimal] = mapped_column(
+        DECIMAL(15, 2), nullable=False, comment="Proceeds minus cost basis (negative for a loss)"
+    )
+
+    term: Mapped[str] = mapped_column(
+        String(10), nullable=False, comment="HoldingTerm: short_term or long_term"
+    )
+
+    currency: Mapped[str] = mapped_column(
+        String(3), default="USD", nullable=False, comment="Currency of the amounts"
+    )
+
+    designated: Mapped[bool] = mapped_column(
+        Boolean,
+        default=False,
+        nullable=False,
+        comment="Lot chosen by the user (specific ID); fallback matches are recomputed",
+    )
+
+    # Relationships
+    tax_lot: Mapped["AccountTaxLot"] = relationship("AccountTaxLot")
+
+    security_master: Mapped["Security"] = relationship("Security")
+
+    __table_args__ = (
+        Index("idx_realized_gains_portfolio_date", "portfolio_id", "close_date"),
+        Index("idx_realized_gains_portfolio_security", "portfolio_id", "security_id"),
+        Index("idx_realized_gains_sell_transaction", "sell_transaction_id"),
+        {"comment": "Realized gains and losses per sale and tax lot"},
+    )
@@ -0,0 +1,397 @@
+import csv
+import io
+import json
+import logging
+import time
+from collections import OrderedDict
+from datetime import UTC, date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.account.gains.model import AccountRealizedGain
+from app.account.lots.engine import ReplayResult
+from app.account.lots.enums import HoldingTerm, LotMethod
+from app.account.lots.service import TaxLotService
+from app.account.master.model import Account
+from app.account.transactions.model import AccountTransaction
+from app.core.config import settings
+from app.core.redis import redis_client
+from app.security.master.model import Security
+
+logger = logging.getLogger(__name__)
+
+# Index of each term along the last axis of the summary arrays
+TERMS = (HoldingTerm.SHORT_TERM.value, HoldingTerm.LONG_TERM.value)
+
+# Summed per account, currency and term, in cents
+AMOUNTS = ("proceeds", "cost_basis", "gain", "gains", "losses")
+
+CENT = Decimal("0.01")
+
+REPORT_COLUMNS = (
+    "account",
+    "symbol",
+    "quantity",
+    "date_acquired",
+    "date_sold",
+    "proceeds",
+    "cost_basis",
+    "gain",
+    "term",
+    "currency",
+)
+
+
+class RealizedRow(NamedTuple):
+    """One lot relieved by one sale, read from storage or replayed"""
+
+    portfolio_id: Any
+    account_name: str
+    symbol: Optional[str]
+    sell_transaction_id: Any
+    quantity: Decimal
+    open_date: date
+    close_date: date
+    proceeds: Decimal
+    cost_basis: Decimal
+    gain: Decimal
+    term: str
+    currency: str
+
+    def report_line(self) -> Tuple[Any, ...]:
+        """Values in REPORT_COLUMNS order."""
+        return (
+            self.account_name,
+            self.symbol,
+            self.quantity,
+            self.open_date,
+            self.close_date,
+            self.proceeds,
+            self.cost_basis,
+            self.gain,
+            self.term,
+            self.currency,
+        )
+
+
+class TaxReportCache:
+    """
+    Tax summaries per (user, tax year, lot method).
+
+    Each entry carries a fingerprint of the user's transactions (row count and
+    latest updated_at), so any insert, edit or delete invalidates it without
+    the writers having to know about the cache. Redis is used when available,
+    a small in-memory LRU otherwise.
+    """
+
+    def __init__(self, max_size: int = 256):
+        self.max_size = max_size
+        self._memory: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+
+    def get(self, key: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        raw = None
+        if redis_client.is_available():
+            raw = redis_client.get(key)
+        else:
+            entry = self._memory.get(key)
+            if entry and entry[0] > time.monotonic():
+                self._memory.move_to_end(key)
+                raw = entry[1]
+
+        if raw is None:
+            return None
+        cached = json.loads(raw, parse_float=Decimal)
+        if cached.get("fingerprint") != fingerprint:
+            return None
+        return cached["report"]
+
+    def set(self, key: str, fingerprint: str, report: Dict[str, Any]) -> None:
+        ttl = settings.TAX_REPORT_CACHE_SECONDS
+        raw = json.dumps(
+            {"fingerprint": fingerprint, "report": report},
+            default=lambda value: float(value) if isinstance(value, Decimal) else str(value),
+        )
+        if redis_client.is_available():
+            redis_client.setex(key, ttl, raw)
+            return
+
+        self._memory[key] = (time.monotonic() + ttl, raw)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_size:
+            self._memory.popitem(last=False)
+
+    def clear(self) -> None:
+        self._memory.clear()
+
+
+# Create instance
+tax_report_cache = TaxReportCache()
+
+
+def _money(cents: Any) -> Decimal:
+    return Decimal(int(cents)) * CENT
+
+
+def _cents(amount: Decimal) -> int:
+    return int(amount / CENT)
+
+
+def _term_totals(sums: np.ndarray) -> Dict[str, Dict[str, Decimal]]:
+    """{term: {amount: value}} from an (amount, term) array of cents."""
+    return {
+        term: {amount: _money(sums[a, t]) for a, amount in enumerate(AMOUNTS)}
+        for t, term in enumerate(TERMS)
+    }
+
+
+def _overall(sums: np.ndarray) -> Dict[str, Decimal]:
+    totals = sums.sum(axis=-1)
+    gains = totals[AMOUNTS.index("gains")]
+    losses = totals[AMOUNTS.index("losses")]
+    return {
+        "total_proceeds": _money(totals[AMOUNTS.index("proceeds")]),
+        "total_cost_basis": _money(totals[AMOUNTS.index("cost_basis")]),
+        "realized_gains": _money(gains),
+        "realized_losses": _money(losses),
+        "net_realized": _money(gains - losses),
+    }
+
+
+def _by_currency(sums: np.ndarray, currencies: np.ndarray, present: np.ndarray) -> Dict:
+    """{currency: totals} from an (amount, currency, term) array of cents."""
+    return {
+        str(currency): {**_overall(sums[:, c, :]), "by_term": _term_totals(sums[:, c, :])}
+        for c, currency in enumerate(currencies)
+        if present[c]
+    }
+
+
+def _distinct_sales(group_index: np.ndarray, sell_ids: Sequence[Any], groups: int) -> np.ndarray:
+    """Sales per group; one sale relieving several lots counts once."""
+    known = np.array([sell_id is not None for sell_id in sell_ids], dtype=bool)
+    if not known.any():
+        return np.zeros(groups, dtype=np.int64)
+    sales, sale_index = np.unique(
+        np.array([str(sell_id) for sell_id in sell_ids], dtype=str)[known], return_inverse=True
+    )
+    distinct = np.unique(group_index[known] * len(sales) + sale_index)
+    return np.bincount(distinct // len(sales), minlength=groups)
+
+
+def summarize_realized(rows: Sequence[RealizedRow]) -> Dict[str, Any]:
+    """
+    Per-account and combined totals by currency and holding term.
+
+    Amounts in different currencies are never added together. The sums are
+    bincounts of integer cents over (account, currency, term), so cost does
+    not grow with a Python loop per realized row.
+    """
+    if not rows:
+        return {"by_account": {}, "total_sells": 0, "by_currency": {}}
+
+    accounts, account_index = np.unique(
+        np.array([str(row.portfolio_id) for row in rows], dtype=str), return_inverse=True
+    )
+    currencies, currency_index = np.unique(
+        np.array([row.currency for row in rows], dtype=str), return_inverse=True
+    )
+    term_index = np.fromiter(
+        (TERMS.index(row.term) for row in rows), dtype=np.int64, count=len(rows)
+    )
+    gain = np.fromiter((_cents(row.gain) for row in rows), dtype=np.int64, count=len(rows))
+    columns = (
+        np.fromiter((_cents(row.proceeds) for row in rows), dtype=np.int64, count=len(rows)),
+        np.fromiter((_cents(row.cost_basis) for row in rows), dtype=np.int64, count=len(rows)),
+        gain,
+        np.where(gain > 0, gain, 0),
+        np.where(gain < 0, -gain, 0),
+    )
+
+    shape = (len(accounts), len(currencies), len(TERMS))
+    groups = (account_index * len(currencies) + currency_index) * len(TERMS) + term_index
+    sums = np.stack(
+        [np.bincount(groups, weights=column, minlength=int(np.prod(shape))) for column in columns]
+    )
+    # (amount, account, currency, term); exact while totals stay under 2**53 cents
+    sums = np.rint(sums).astype(np.int64).reshape(len(AMOUNTS), *shape)
+    present = np.zeros(shape[:2], dtype=bool)
+    present[account_index, currency_index] = True
+
+    sell_ids = [row.sell_transaction_id for row in rows]
+    sells_per_account = _distinct_sales(account_index, sell_ids, len(accounts))
+    by_account = {
+        str(portfolio_id): {
+            "total_sells": int(sells_per_account[i]),
+            "by_currency": _by_currency(sums[:, i], currencies, present[i]),
+        }
+        for i, portfolio_id in enumerate(accounts)
+    }
+    return {
+        "by_account": by_account,
+        "total_sells": int(sells_per_account.sum()),
+        "by_currency": _by_currency(sums.sum(axis=1), currencies, present.any(axis=0)),
+    }
+
+
+class TaxReportService:
+    """
+    Realized gains across all of a user's accounts for a tax year.
+
+    Reports never write lots: stored gains are read for securities whose lots
+    under the requested method are current, and the rest are replayed in memory.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.lots = TaxLotService(db)
+
+    async def get_tax_summary(
+        self, user_id: Any, tax_year: int, method: LotMethod = LotMethod.FIFO
+    ) -> Dict[str, Any]:
+        """Totals per account, currency and term, cached until transactions change."""
+        key = f"tax_report:{user_id}:{tax_year}:{method.value}"
+        fingerprint = await self._fingerprint(user_id)
+        cached = tax_report_cache.get(key, fingerprint)
+        if cached is not None:
+            return cached
+
+        rows = await self.realized_rows(user_id, tax_year, method)
+        report = {
+            "user_id": str(user_id),
+            "tax_year": tax_year,
+            "lot_method": method.value,
+            **summarize_realized(rows),
+            "generated_at": datetime.now(UTC).isoformat(),
+        }
+        tax_report_cache.set(key, fingerprint, report)
+        return report
+
+    async def render_report(
+        self, user_id: Any, tax_year: int, method: LotMethod = LotMethod.FIFO
+    ) -> bytes:
+        """CSV with one line per lot relieved, in the layout of a Form 8949 worksheet."""
+        rows = await self.realized_rows(user_id, tax_year, method)
+        rows.sort(key=lambda row: (row.term, row.close_date, row.symbol or "", row.open_date))
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerow(REPORT_COLUMNS)
+        writer.writerows(row.report_line() for row in rows)
+        return buffer.getvalue().encode()
+
+    async def realized_rows(
+        self, user_id: Any, tax_year: int, method: LotMethod
+    ) -> List[RealizedRow]:
+        """Lots relieved in the tax year across the user's accounts."""
+        result = await self.db.execute(
+            select(Account.id, Account.account_name).where(Account.user_id == user_id)
+        )
+        accounts = result.all()
+        account_names = {str(row.id): row.account_name for row in accounts}
+        stale = await self.lots.stale_by_account([row.id for row in accounts], method)
+        stale_pairs = [
+            (portfolio_id, security_id)
+            for portfolio_id, security_ids in stale.items()
+            for security_id in security_ids
+        ]
+
+        rows = await self._stored_rows(user_id, tax_year, method, stale_pairs)
+        if stale_pairs:
+            symbols = await self._symbols({security_id for _, security_id in stale_pairs})
+            for portfolio_id, security_ids in stale.items():
+                account_name = account_names.get(portfolio_id)
+                for result in await self.lots.replay(portfolio_id, security_ids, method):
+                    rows.extend(
+                        _replayed_rows(result, portfolio_id, account_name, symbols, tax_year)
+                    )
+        return rows
+
+    async def _stored_rows(
+        self, user_id: Any, tax_year: int, method: LotMethod, stale_pairs: List[Tuple[str, str]]
+    ) -> List[RealizedRow]:
+        stmt = (
+            select(
+                AccountRealizedGain.portfolio_id,
+                Account.account_name,
+                Security.symbol,
+                AccountRealizedGain.sell_transaction_id,
+                AccountRealizedGain.quantity,
+                AccountRealizedGain.open_date,
+                AccountRealizedGain.close_date,
+                AccountRealizedGain.proceeds,
+                AccountRealizedGain.cost_basis,
+                AccountRealizedGain.gain,
+                AccountRealizedGain.term,
+                AccountRealizedGain.currency,
+            )
+            .join(Account, AccountRealizedGain.portfolio_id == Account.id)
+            .outerjoin(Security, AccountRealizedGain.security_id == Security.id)
+            .where(
+                Account.user_id == user_id,
+                AccountRealizedGain.lot_method == method.value,
+                AccountRealizedGain.close_date >= date(tax_year, 1, 1),
+                AccountRealizedGain.close_date < date(tax_year + 1, 1, 1),
+            )
+        )
+        if stale_pairs:
+            # Replayed in memory instead
+            stmt = stmt.where(
+                tuple_(AccountRealizedGain.portfolio_id, AccountRealizedGain.security_id).not_in(
+                    stale_pairs
+                )
+            )
+        return [RealizedRow(*row) for row in await self.db.execute(stmt)]
+
+    async def _symbols(self, security_ids: set) -> Dict[str, str]:
+        result = await self.db.execute(
+            select(Security.id, Security.symbol).where(Security.id.in_(security_ids))
+        )
+        return {str(row.id): row.symbol for row in result}
+
+    async def _fingerprint(self, user_id: Any) -> str:
+        """Changes whenever one of the user's transactions is added, edited or deleted."""
+        stmt = (
+            select(func.count(), func.max(AccountTransaction.updated_at))
+            .join(Account, AccountTransaction.portfolio_id == Account.id)
+            .where(Account.user_id == user_id)
+        )
+        count, changed_at = (await self.db.execute(stmt)).one()
+        return f"{count}:{changed_at.isoformat() if changed_at else ''}"
+
+
+def _replayed_rows(
+    result: ReplayResult,
+    portfolio_id: Any,
+    account_name: Optional[str],
+    symbols: Dict[str, str],
+    tax_year: int,
+) -> List[RealizedRow]:
+    """Rows for the sales of one replayed security in the tax year, rounded as stored."""
+    return [
+        RealizedRow(
+            portfolio_id=portfolio_id,
+            account_name=account_name,
+            symbol=symbols.get(str(result.security_id)),
+            sell_transaction_id=realized.sell_transaction_id,
+            quantity=Decimal(str(round(realized.quantity, 6))),
+            open_date=realized.open_date,
+            close_date=realized.close_date,
+            proceeds=Decimal(str(round(realized.proceeds, 2))),
+            cost_basis=Decimal(str(round(realized.cost_basis, 2))),
+            gain=Decimal(str(round(realized.gain, 2))),
+            term=realized.term.value,
+            currency=result.currency,
+        )
+        for realized in result.realized
+        if realized.close_date.year == tax_year
+    ]
+
+
+# Convenience function for getting tax report service
+def get_tax_report_service(db: AsyncSession) -> TaxReportService:
+    """Get TaxReportService instance with database session."""
+    return TaxReportService(db)
@@ -0,0 +1,19 @@
+from enum import Enum
+
+
+class HoldingHistoryBucket(str, Enum):
+    """Downsampling of holding history; calendar buckets keep the last value"""
+
+    DAILY = "daily"
+    WEEKLY = "weekly"
+    MONTHLY = "monthly"
+    LTTB = "lttb"  # Largest-Triangle-Three-Buckets over the daily series
+
+    @property
+    def trunc_unit(self) -> str:
+        return {
+            HoldingHistoryBucket.DAILY: "day",
+            HoldingHistoryBucket.WEEKLY: "week",
+            HoldingHistoryBucket.MONTHLY: "month",
+            HoldingHistoryBucket.LTTB: "day",
+        }[self]
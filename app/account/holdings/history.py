@@ -0,0 +1,169 @@
+"""
+Holding history for charts.
+
+Samples are reduced in PostgreSQL to the last holding per calendar bucket and
+account. Accounts are summed with their last value carried forward, in one
+currency, and the daily series can be thinned by Largest-Triangle-Three-Buckets
+to a point budget while keeping its peaks and troughs. The response is
+columnar: one array per field instead of one object per sample.
+"""
+
+from datetime import date
+from itertools import groupby
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.account.holdings.enums import HoldingHistoryBucket
+from app.account.holdings.repository import HoldingRepository
+from app.reference.market_rates.service import FxRateService
+from app.security.master.model import Security
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Indices of the points kept by Largest-Triangle-Three-Buckets.
+
+    The first and last points are always kept; every bucket in between keeps
+    the point forming the largest triangle with the previously kept point and
+    the average of the next bucket.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # Bucket boundaries over the interior points
+    edges = np.floor(np.linspace(1, n - 1, threshold - 1)).astype(int)
+    kept = np.empty(threshold, dtype=int)
+    kept[0], kept[-1] = 0, n - 1
+
+    previous = 0
+    for i in range(threshold - 2):
+        start, stop = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_x = x[edges[i + 1] : edges[i + 2]].mean()
+            next_y = y[edges[i + 1] : edges[i + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+
+        areas = np.abs(
+            (x[previous] - next_x) * (y[start:stop] - y[previous])
+            - (x[previous] - x[start:stop]) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        kept[i + 1] = previous
+    return kept
+
+
+def _column(values: np.ndarray) -> List[Optional[float]]:
+    return [None if np.isnan(value) else float(value) for value in values]
+
+
+def _total(values: np.ndarray) -> float:
+    return np.nan if np.isnan(values).all() else float(np.nansum(values))
+
+
+def _floats(values: List[Any]) -> np.ndarray:
+    return np.array([np.nan if value is None else float(value) for value in values], dtype=float)
+
+
+class HoldingHistoryService:
+    """Downsampled, columnar holding history of one security."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.repo = HoldingRepository(db)
+        self.fx = FxRateService(db)
+
+    async def get_history(
+        self,
+        portfolio_ids: List[UUID],
+        security_id: UUID,
+        bucket: HoldingHistoryBucket = HoldingHistoryBucket.DAILY,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        points: int = 500,
+        currency: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Holding history summed over the accounts, one array per column.
+
+        An account without a snapshot in a bucket counts with its previous
+        one. Values are converted into `currency`, by default the single
+        currency they are held in or, when accounts differ, the security's.
+        `points` is the target sample count for LTTB and ignored by the
+        calendar buckets.
+        """
+        rows = await self.repo.get_holding_history(
+            portfolio_ids, security_id, bucket, start_date, end_date
+        )
+        opening = (
+            await self.repo.get_opening_holdings(portfolio_ids, security_id, start_date)
+            if start_date
+            else []
+        )
+        snapshots = opening + rows
+        currency = await self._report_currency(security_id, snapshots, currency)
+
+        quantity = _floats([row.quantity for row in snapshots])
+        market_value = _floats([row.market_value for row in snapshots])
+        cost_basis = _floats([row.cost_basis for row in snapshots])
+        currencies = [(row.currency or currency or "").upper() for row in snapshots]
+        if currency is not None and any(held != currency for held in currencies):
+            # Each snapshot at the rate of its own date
+            as_of = [row.as_of_date for row in snapshots]
+            matrix = await self.fx.get_matrix(min(as_of), max(as_of))
+            factors = matrix.conversion_factors(currencies, currency, dates=as_of)
+            market_value, cost_basis = market_value * factors, cost_basis * factors
+
+        # Index of each account's latest snapshot, carried across buckets
+        latest = {str(row.portfolio_id): i for i, row in enumerate(opening)}
+        dates, totals = [], []
+        for _, group in groupby(range(len(opening), len(snapshots)), lambda i: snapshots[i].period):
+            group = list(group)
+            latest.update((str(snapshots[i].portfolio_id), i) for i in group)
+            held = list(latest.values())
+            dates.append(max(snapshots[i].as_of_date for i in group))
+            totals.append(
+                [_total(column[held]) for column in (quantity, market_value, cost_basis)]
+            )
+        series = np.array(totals, dtype=float).reshape(-1, 3)
+
+        if bucket == HoldingHistoryBucket.LTTB and len(dates) > points:
+            x = np.array(dates, dtype="datetime64[D]").astype(float)
+            # Chart the value where known, the share count otherwise
+            y = np.where(np.isnan(series[:, 1]), series[:, 0], series[:, 1])
+            kept = lttb_indices(x, y, points)
+            dates, series = [dates[i] for i in kept], series[kept]
+
+        return {
+            "security_id": str(security_id),
+            "bucket": bucket.value,
+            "currency": currency,
+            "count": len(dates),
+            "date": [day.isoformat() for day in dates],
+            "quantity": _column(series[:, 0]),
+            "market_value": _column(series[:, 1]),
+            "cost_basis": _column(series[:, 2]),
+        }
+
+    async def _report_currency(
+        self, security_id: UUID, snapshots: List[Any], currency: Optional[str]
+    ) -> Optional[str]:
+        if currency:
+            return currency.upper()
+        held = {row.currency.upper() for row in snapshots if row.currency}
+        if len(held) <= 1:
+            return held.pop() if held else None
+
+        security_currency = await self.db.scalar(
+            select(Security.currency).where(Security.id == security_id)
+        )
+        if not security_currency:
+            raise ValueError(
+                f"Holdings are in {', '.join(sorted(held))}; pass a currency to convert into"
+            )
+        return security_currency.upper()
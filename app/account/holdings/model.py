@@ -3,7 +3,16 @@ from datetime import date
 from decimal import Decimal
 from typing import TYPE_CHECKING, Optional
 
-from sqlalchemy import CheckConstraint, Date, DECIMAL, ForeignKey, Index, String, UniqueConstraint
+from sqlalchemy import (
+    CheckConstraint,
+    Date,
+    DECIMAL,
+    ForeignKey,
+    Index,
+    String,
+    UniqueConstraint,
+    text,
+)
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -118,6 +127,15 @@ class AccountHolding(BaseModel):
             name="uq_holding_snapshot",
         ),
         Index("idx_holding_date", "as_of_date", "deleted_at"),
+        # Latest holding per (account, security) by DISTINCT ON, as an index-only scan
+        Index(
+            "idx_holding_latest",
+            "portfolio_id",
+            "security_id",
+            text("as_of_date DESC"),
+            postgresql_include=["id"],
+            postgresql_where=text("deleted_at IS NULL"),
+        ),
         CheckConstraint("quantity != 0", name="chk_holding_quantity_not_zero"),
         {"comment": "Portfolio positions at specific points in time"},
     )
@@ -1,13 +1,50 @@
+import logging
 from datetime import date, datetime, timezone
 from decimal import Decimal
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 from uuid import UUID
 
-from sqlalchemy import and_, desc, func, select
+import numpy as np
+from sqlalchemy import Date, Select, cast, desc, func, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
 
+from app.account.holdings.enums import HoldingHistoryBucket
 from app.account.holdings.model import AccountHolding
+from app.account.master.model import Account
+from app.reference.market_rates.service import FxRateService
+
+logger = logging.getLogger(__name__)
+
+# (portfolio_id, security_id) of the last holding of a page
+HoldingKey = Tuple[UUID, UUID]
+
+
+def _to_decimal(value: float) -> Decimal:
+    """Round a converted amount to cents as a Decimal."""
+    return Decimal(str(round(float(value), 2)))
+
+
+def latest_holding_ids(as_of_date: Optional[date] = None) -> Select:
+    """
+    Id of the most recent holding per (account, security), on or before as_of_date.
+
+    DISTINCT ON walks idx_holding_latest in order, and with id included in the
+    index it never touches the heap; full rows are loaded afterwards by id.
+    """
+    stmt = (
+        select(AccountHolding.id)
+        .distinct(AccountHolding.portfolio_id, AccountHolding.security_id)
+        .where(AccountHolding.deleted_at.is_(None))
+        .order_by(
+            AccountHolding.portfolio_id,
+            AccountHolding.security_id,
+            desc(AccountHolding.as_of_date),
+        )
+    )
+    if as_of_date:
+        stmt = stmt.where(AccountHolding.as_of_date <= as_of_date)
+    return stmt
 
 
 class HoldingRepository:
@@ -62,56 +99,55 @@ class HoldingRepository:
         as_of_date: Optional[date] = None,
     ) -> List[AccountHolding]:
         """Get holdings for a specific account, optionally as of a specific date."""
-        stmt = (
-            select(AccountHolding)
-            .options(joinedload(AccountHolding.security_master))
-            .where(AccountHolding.account_id == account_id)
-        )
-
-        if as_of_date:
-            stmt = stmt.where(AccountHolding.as_of_date <= as_of_date)
+        latest = latest_holding_ids(as_of_date).where(AccountHolding.portfolio_id == account_id)
+        return await self._load(latest)
 
-        # Get most recent holdings per securities
-        stmt = stmt.order_by(AccountHolding.security_id, desc(AccountHolding.as_of_date))
-        result = await self.db.execute(stmt)
-        holdings = list(result.scalars().all())
+    async def get_latest_page(
+        self,
+        user_id: Optional[UUID] = None,
+        account_id: Optional[UUID] = None,
+        as_of_date: Optional[date] = None,
+        after: Optional[HoldingKey] = None,
+        limit: int = 100,
+    ) -> Dict[str, Any]:
+        """
+        A page of the latest holding per (account, security) across a user's accounts.
 
-        # Filter to most recent per securities
-        latest_holdings = {}
-        for holding in holdings:
-            if holding.security_id not in latest_holdings:
-                latest_holdings[holding.security_id] = holding
+        Pages seek past the (portfolio_id, security_id) of the previous page's
+        last row, so each page reads only its own groups from the index.
+        """
+        latest = latest_holding_ids(as_of_date)
+        if account_id:
+            latest = latest.where(AccountHolding.portfolio_id == account_id)
+        if user_id:
+            latest = latest.join(Account, AccountHolding.portfolio_id == Account.id).where(
+                Account.user_id == user_id
+            )
+        if after is not None:
+            latest = latest.where(
+                tuple_(AccountHolding.portfolio_id, AccountHolding.security_id) > tuple_(*after)
+            )
 
-        return list(latest_holdings.values())
+        holdings = await self._load(latest.limit(limit + 1))
+        next_after = None
+        if len(holdings) > limit:
+            holdings = holdings[:limit]
+            next_after = (holdings[-1].portfolio_id, holdings[-1].security_id)
+        return {"holdings": holdings, "next_after": next_after}
 
     async def get_current_holdings_by_account(self, account_id: UUID) -> List[AccountHolding]:
         """Get current holdings for an account (latest as_of_date per securities)."""
-        # Subquery to get latest date per securities for the account
-        latest_date_subq = (
-            select(
-                AccountHolding.security_id,
-                func.max(AccountHolding.as_of_date).label("max_date"),
-            )
-            .where(AccountHolding.account_id == account_id)
-            .group_by(AccountHolding.security_id)
-            .subquery()
-        )
+        latest = latest_holding_ids().where(AccountHolding.portfolio_id == account_id)
+        return await self._load(latest, AccountHolding.quantity > 0)
 
-        # Main query to get holdings with latest dates
+    async def _load(self, latest: Select, *criteria: Any) -> List[AccountHolding]:
+        """Holdings for a statement of latest holding ids, in (account, security) order."""
         stmt = (
             select(AccountHolding)
             .options(joinedload(AccountHolding.security_master))
-            .join(
-                latest_date_subq,
-                and_(
-                    AccountHolding.security_id == latest_date_subq.c.security_id,
-                    AccountHolding.as_of_date == latest_date_subq.c.max_date,
-                ),
-            )
-            .where(AccountHolding.account_id == account_id)
-            .where(AccountHolding.quantity > 0)
+            .where(AccountHolding.id.in_(latest.scalar_subquery()), *criteria)
+            .order_by(AccountHolding.portfolio_id, AccountHolding.security_id)
         )
-
         result = await self.db.execute(stmt)
         return list(result.scalars().all())
 
@@ -120,11 +156,40 @@ class HoldingRepository:
         account_id: Union[str, UUID],
         base_currency: str = "USD",
     ) -> Dict[str, Any]:
-        """Get comprehensive holdings summary for an account."""
+        """
+        Get comprehensive holdings summary for an account.
+
+        Market values and cost bases are converted into base_currency with one
+        vectorized multiply per column. Holdings without any FX rate are kept
+        in the totals at their own amounts and listed under
+        unconverted_currencies; those converted with a rate past the fill
+        limit are listed under stale_currencies.
+        """
         holdings = await self.get_current_holdings_by_account(account_id)
+        base_currency = base_currency.upper()
 
-        total_market_value = sum(h.market_value or Decimal("0") for h in holdings)
-        total_cost_basis = sum(h.cost_basis or Decimal("0") for h in holdings)
+        currencies = [(h.currency or base_currency).upper() for h in holdings]
+        factors, stale = await FxRateService(self.db).conversion_factors_with_staleness(
+            currencies, base_currency
+        )
+        convertible = ~np.isnan(factors)
+        factors = np.where(convertible, factors, 1.0)
+
+        market_values = (
+            np.array([float(h.market_value or 0) for h in holdings], dtype=float) * factors
+        )
+        cost_bases = np.array([float(h.cost_basis or 0) for h in holdings], dtype=float) * factors
+
+        unconverted_currencies = sorted({c for c, ok in zip(currencies, convertible) if not ok})
+        if unconverted_currencies:
+            logger.warning(
+                f"No FX rate to {base_currency} for {unconverted_currencies}; "
+                f"summed unconverted in summary of account {account_id}"
+            )
+        stale_currencies = sorted({c for c, old in zip(currencies, stale) if old})
+
+        total_market_value = _to_decimal(market_values.sum())
+        total_cost_basis = _to_decimal(cost_bases.sum())
         unrealized_gain_loss = total_market_value - total_cost_basis
         unrealized_gain_loss_percent = (
             (unrealized_gain_loss / total_cost_basis * 100)
@@ -132,24 +197,23 @@ class HoldingRepository:
             else Decimal("0")
         )
 
-        # Calculate allocation by asset type
+        # Calculate allocation by asset type and currency, in base currency
         allocation_by_type = {}
         allocation_by_currency = {}
 
-        for holding in holdings:
+        for holding, currency, value in zip(holdings, currencies, market_values):
             # Allocation by asset type (from securities)
             asset_type = (
                 holding.security_master.security_type if holding.security_master else "unknown"
             )
-            current_value = allocation_by_type.get(asset_type, Decimal("0"))
-            allocation_by_type[asset_type] = current_value + (holding.market_value or Decimal("0"))
+            allocation_by_type[asset_type] = allocation_by_type.get(
+                asset_type, Decimal("0")
+            ) + _to_decimal(value)
 
             # Allocation by currency
-            currency = holding.currency
-            current_currency_value = allocation_by_currency.get(currency, Decimal("0"))
-            allocation_by_currency[currency] = current_currency_value + (
-                holding.market_value or Decimal("0")
-            )
+            allocation_by_currency[currency] = allocation_by_currency.get(
+                currency, Decimal("0")
+            ) + _to_decimal(value)
 
         # Convert to percentages
         allocation_by_type_percent = {}
@@ -166,6 +230,8 @@ class HoldingRepository:
                     (value / total_market_value * 100), 2
                 )
 
+        largest_positions = [holdings[i] for i in np.argsort(-market_values, kind="stable")[:10]]
+
         return {
             "account_id": str(account_id),
             "base_currency": base_currency,
@@ -178,33 +244,80 @@ class HoldingRepository:
             "allocation_by_type_percent": allocation_by_type_percent,
             "allocation_by_currency": allocation_by_currency,
             "allocation_by_currency_percent": allocation_by_currency_percent,
-            "largest_positions": sorted(
-                holdings, key=lambda h: h.market_value or Decimal("0"), reverse=True
-            )[:10],
+            "unconverted_currencies": unconverted_currencies,
+            "stale_currencies": stale_currencies,
+            "largest_positions": largest_positions,
             "summary_date": datetime.now(timezone.utc).date(),
         }
 
     async def get_holding_history(
         self,
-        account_id: UUID,
+        portfolio_ids: List[UUID],
         security_id: UUID,
+        bucket: HoldingHistoryBucket = HoldingHistoryBucket.DAILY,
         start_date: Optional[date] = None,
         end_date: Optional[date] = None,
-        limit: int = 100,
-    ) -> List[AccountHolding]:
-        """Get historical holdings for a specific securities in an account."""
-        stmt = select(AccountHolding).where(
-            and_(
-                AccountHolding.account_id == account_id,
+    ) -> List[Any]:
+        """
+        Last holding of a security per bucket and account.
+
+        Each account contributes its last holding within the bucket (DISTINCT
+        ON over the bucket and account), ordered by bucket. Accounts without a
+        snapshot in a bucket have no row; summing across accounts is left to
+        the caller, which carries their previous value forward.
+        """
+        as_of_date = AccountHolding.as_of_date
+        if bucket.trunc_unit == "day":
+            period = as_of_date
+        else:
+            period = cast(func.date_trunc(bucket.trunc_unit, as_of_date), Date)
+
+        stmt = (
+            select(
+                period.label("period"),
+                AccountHolding.portfolio_id,
+                as_of_date,
+                AccountHolding.quantity,
+                AccountHolding.market_value,
+                AccountHolding.cost_basis,
+                AccountHolding.currency,
+            )
+            .distinct(period, AccountHolding.portfolio_id)
+            .where(
+                AccountHolding.portfolio_id.in_(portfolio_ids),
                 AccountHolding.security_id == security_id,
+                AccountHolding.deleted_at.is_(None),
             )
+            .order_by(period, AccountHolding.portfolio_id, desc(as_of_date))
         )
-
         if start_date:
-            stmt = stmt.where(AccountHolding.as_of_date >= start_date)
+            stmt = stmt.where(as_of_date >= start_date)
         if end_date:
-            stmt = stmt.where(AccountHolding.as_of_date <= end_date)
+            stmt = stmt.where(as_of_date <= end_date)
+        result = await self.db.execute(stmt)
+        return list(result.all())
 
-        stmt = stmt.order_by(desc(AccountHolding.as_of_date)).limit(limit)
+    async def get_opening_holdings(
+        self, portfolio_ids: List[UUID], security_id: UUID, before: date
+    ) -> List[Any]:
+        """Last holding of a security per account before a date, to carry into a range."""
+        stmt = (
+            select(
+                AccountHolding.portfolio_id,
+                AccountHolding.as_of_date,
+                AccountHolding.quantity,
+                AccountHolding.market_value,
+                AccountHolding.cost_basis,
+                AccountHolding.currency,
+            )
+            .distinct(AccountHolding.portfolio_id)
+            .where(
+                AccountHolding.portfolio_id.in_(portfolio_ids),
+                AccountHolding.security_id == security_id,
+                AccountHolding.as_of_date < before,
+                AccountHolding.deleted_at.is_(None),
+            )
+            .order_by(AccountHolding.portfolio_id, desc(AccountHolding.as_of_date))
+        )
         result = await self.db.execute(stmt)
-        return list(result.scalars().all())
+        return list(result.all())
@@ -6,12 +6,16 @@ from uuid import UUID
 from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, UploadFile, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.account.holdings.enums import HoldingHistoryBucket
+from app.account.holdings.history import HoldingHistoryService
 from app.account.holdings.repository import HoldingRepository
 from app.account.holdings.schemas import HoldingCreate, HoldingRead, HoldingUpdate
 from app.account.holdings.service import PortfolioHoldingsService
 from app.account.master.repository import AccountRepository
+from app.account.valuation.service import ValuationService
 from app.auth.dependencies import get_current_user
 from app.core.database import get_db
+from app.core.pagination import decode_cursor, encode_cursor
 from app.integrations.csv.service import CSVProcessorResult
 from app.user.logs.repository import UserLogRepository
 from app.user.master.model import User
@@ -37,27 +41,47 @@ async def import_holdings_csv(
     )
 
 
-@router.get("/", response_model=List[HoldingRead])
+@router.get("/")
 async def get_user_holdings(
     *,
     db: AsyncSession = Depends(get_db),
     current_user: Annotated[User, Depends(get_current_user)],
     account_id: Optional[str] = Query(None, description="Filter by account ID"),
     as_of_date: Optional[date] = Query(None, description="Holdings as of specific date"),
-    skip: int = Query(0, description="Skip records", ge=0),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     limit: int = Query(100, description="Limit records", ge=1, le=500),
 ):
     """Get holdings for the current users with optional filtering."""
     # Convert account_id to UUID if present
     account_id_uuid = UUID(account_id) if account_id else None
-    return await PortfolioHoldingsService.get_user_holdings(
-        db=db,
+
+    after = None
+    if cursor:
+        try:
+            values = decode_cursor(cursor)
+            after = (UUID(values["portfolio_id"]), UUID(values["security_id"]))
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    page = await PortfolioHoldingsService(db).get_user_holdings(
         user=current_user,
         account_id=account_id_uuid,
         as_of_date=as_of_date,
-        skip=skip,
+        after=after,
         limit=limit,
     )
+    next_after = page["next_after"]
+
+    return {
+        "holdings": page["holdings"],
+        "next_cursor": (
+            encode_cursor(
+                {"portfolio_id": str(next_after[0]), "security_id": str(next_after[1])}
+            )
+            if next_after
+            else None
+        ),
+    }
 
 
 @router.get("/{holding_id}", response_model=HoldingRead)
@@ -278,65 +302,84 @@ async def get_account_holdings_summary(
         )
 
 
+@router.get("/{account_id}/valuation")
+async def get_account_valuation(
+    *,
+    db: AsyncSession = Depends(get_db),
+    current_user: Annotated[User, Depends(get_current_user)],
+    account_id: UUID,
+    live: bool = Query(False, description="Use live intraday quotes where available"),
+):
+    """Value current positions at the latest prices, in the account currency."""
+    # Verify users owns the account
+    account = await AccountRepository(db).get_by_user_and_id(current_user.id, account_id)
+
+    if not account:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied or account not found",
+        )
+
+    try:
+        return await ValuationService(db).value_account(account, live=live)
+    except Exception as e:
+        logger.error(f"Error valuing account {account_id}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error valuing account: {str(e)}",
+        )
+
+
 @router.get("/securities/{security_id}/history")
 async def get_holding_history(
     *,
     db: AsyncSession = Depends(get_db),
     current_user: Annotated[User, Depends(get_current_user)],
-    security_id: str,
-    account_id: Optional[str] = Query(None, description="Filter by account"),
+    security_id: UUID,
+    account_id: Optional[UUID] = Query(None, description="Filter by account"),
     start_date: Optional[date] = Query(None, description="Start date"),
     end_date: Optional[date] = Query(None, description="End date"),
-    limit: int = Query(100, description="Maximum records", ge=1, le=500),
+    bucket: HoldingHistoryBucket = Query(
+        HoldingHistoryBucket.DAILY, description="daily, weekly or monthly last values, or lttb"
+    ),
+    points: int = Query(500, ge=3, le=5000, description="Target sample count for lttb"),
+    currency: Optional[str] = Query(
+        None, min_length=3, max_length=3, description="Currency to report values in"
+    ),
 ):
-    """Get historical holdings for a specific securities."""
-    try:
-        if account_id:
-            # Verify users owns the account
-            account = await AccountRepository.get_by_user_and_id(
-                db, user_id=current_user.id, account_id=account_id
-            )
-            if not account:
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail="Access denied or account not found",
-                )
+    """
+    Get the history of a holding across the user's accounts, or one account.
 
-            holdings = HoldingRepository.get_holding_history(
-                db,
-                account_id=account_id,
-                security_id=security_id,
-                start_date=start_date,
-                end_date=end_date,
-                limit=limit,
+    Samples are downsampled on the server and returned as one array per column.
+    """
+    if account_id:
+        # Verify users owns the account
+        account = await AccountRepository(db).get_by_user_and_id(current_user.id, account_id)
+        if not account:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Access denied or account not found",
             )
-        else:
-            # Get holdings across all users master for this securities
-            from sqlalchemy import select
-
-            from app.account.master.model import PortfolioAccount
-
-            # Get all users account IDs
-            stmt = select(PortfolioAccount.id).where(PortfolioAccount.user_id == current_user.id)
-            result = await db.execute(stmt)
-            account_ids = [str(row[0]) for row in result.fetchall()]
-
-            holdings = []
-            for acc_id in account_ids:
-                acc_holdings = HoldingRepository.get_holding_history(
-                    db,
-                    account_id=acc_id,
-                    security_id=security_id,
-                    start_date=start_date,
-                    end_date=end_date,
-                    limit=limit,
-                )
-                holdings.extend(acc_holdings)
-
-        # Sort by date and limit
-        holdings = sorted(holdings, key=lambda x: x.as_of_date, reverse=True)[:limit]
+        portfolio_ids = [account.id]
+    else:
+        # Closed accounts keep their history
+        accounts = await AccountRepository(db).get_multi_by_user(
+            current_user.id, include_inactive=True
+        )
+        portfolio_ids = [account.id for account in accounts]
 
-        return [HoldingRead.model_validate(holding, from_attributes=True) for holding in holdings]
+    try:
+        return await HoldingHistoryService(db).get_history(
+            portfolio_ids,
+            security_id,
+            bucket=bucket,
+            start_date=start_date,
+            end_date=end_date,
+            points=points,
+            currency=currency,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -1,12 +1,12 @@
 import logging
 from datetime import date
-from typing import List, Optional, Dict, Any
+from typing import Optional, Dict, Any
 from uuid import UUID
 
 from fastapi import HTTPException, status, UploadFile
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.account.holdings.repository import HoldingRepository
+from app.account.holdings.repository import HoldingKey, HoldingRepository
 from app.account.holdings.schemas import HoldingRead
 from app.account.master.repository import AccountRepository
 from app.integrations.csv.service import get_csv_processor
@@ -63,39 +63,29 @@ class PortfolioHoldingsService:
         user: User,
         account_id: Optional[str | UUID] = None,
         as_of_date: Optional[date] = None,
-        skip: int = 0,
+        after: Optional[HoldingKey] = None,
         limit: int = 100,
-    ) -> List[HoldingRead]:
+    ) -> Dict[str, Any]:
         """Retrieve holdings for the current user with optional filtering and pagination."""
-        try:
-            if account_id:
-                if isinstance(account_id, str):
-                    account_id = UUID(account_id)
-                account = await self.portfolio_repo.get_by_user_and_id(user.id, account_id)
-                if not account:
-                    raise HTTPException(
-                        status_code=status.HTTP_403_FORBIDDEN,
-                        detail="Access denied or account not found",
-                    )
-                holdings = self.repo.get_by_account(account_id, as_of_date)
-            else:
-                from sqlalchemy import select
-                from app.account.master.model import PortfolioAccount
+        if account_id:
+            if isinstance(account_id, str):
+                account_id = UUID(account_id)
+            account = await self.portfolio_repo.get_by_user_and_id(user.id, account_id)
+            if not account:
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail="Access denied or account not found",
+                )
 
-                stmt = select(PortfolioAccount.id).where(PortfolioAccount.user_id == user.id)
-                result = await self.db.execute(stmt)
-                account_ids = [row[0] for row in result.fetchall()]
-                if not account_ids:
-                    return []
-                holdings = []
-                for acc_id in account_ids:
-                    acc_holdings = self.repo.get_by_account(acc_id, as_of_date)
-                    holdings.extend(acc_holdings)
-            paginated_holdings = holdings[skip : skip + limit]
-            return [
-                HoldingRead.model_validate(holding, from_attributes=True)
-                for holding in paginated_holdings
-            ]
+        try:
+            # One statement across every account of the user
+            page = await self.repo.get_latest_page(
+                user_id=user.id,
+                account_id=account_id,
+                as_of_date=as_of_date,
+                after=after,
+                limit=limit,
+            )
         except Exception as e:
             logger.error(f"Error retrieving holdings: {str(e)}")
             raise HTTPException(
@@ -103,6 +93,14 @@ class PortfolioHoldingsService:
                 detail=f"Error retrieving holdings: {str(e)}",
             )
 
+        return {
+            "holdings": [
+                HoldingRead.model_validate(holding, from_attributes=True)
+                for holding in page["holdings"]
+            ],
+            "next_after": page["next_after"],
+        }
+
     async def get_holding(
         self,
         user: User,
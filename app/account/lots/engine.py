@@ -0,0 +1,289 @@
+"""
+Tax-lot replay.
+
+Transactions of one security are replayed in trade order: a buy opens a lot,
+a sale relieves open lots in the order given by the lot method and a split
+rescales the quantity and unit cost of every open lot. Open lots live in
+parallel `array` columns with a per-method index (a head pointer for FIFO, a
+stack for LIFO, a max-heap on unit cost for HIFO), so relieving shares costs
+O(lots touched) rather than a scan of the whole lot list.
+
+Buys cost quantity * price plus fees and sales realize quantity * price minus
+fees (the transaction amount is used when there is no price). A split
+transaction's quantity is the change in shares held.
+"""
+
+import heapq
+from array import array
+from datetime import date
+from itertools import groupby
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from app.account.lots.enums import HoldingTerm, LotMethod
+from app.account.transactions.enums import TransactionType
+
+# Quantities below this are treated as zero
+EPSILON = 1e-9
+
+BUY = TransactionType.BUY.value
+SELL = TransactionType.SELL.value
+SPLIT = TransactionType.SPLIT.value
+REPLAYED_TYPES = (BUY, SELL, SPLIT)
+LONG_TERM = HoldingTerm.LONG_TERM
+SHORT_TERM = HoldingTerm.SHORT_TERM
+
+
+class LotRecord(NamedTuple):
+    """A lot as of the end of the replay"""
+
+    index: int
+    open_transaction_id: Any
+    open_date: date
+    quantity: float  # Split-adjusted shares bought
+    remaining_quantity: float
+    unit_cost: float
+    closed_date: Optional[date]
+
+
+class RealizedRecord(NamedTuple):
+    """Shares of one lot relieved by one sale"""
+
+    lot_index: int
+    open_transaction_id: Any
+    sell_transaction_id: Any
+    open_date: date
+    close_date: date
+    quantity: float
+    proceeds: float
+    cost_basis: float
+    term: HoldingTerm
+    designated: bool = False  # Chosen by the sale's designation rather than the fallback
+
+    @property
+    def gain(self) -> float:
+        return self.proceeds - self.cost_basis
+
+
+class ReplayResult(NamedTuple):
+    """Lots and realized gains for one security"""
+
+    security_id: Any
+    currency: str
+    lots: List[LotRecord]
+    realized: List[RealizedRecord]
+    unmatched_quantity: float  # Shares sold with no open lot to relieve
+
+
+def first_anniversary(open_date: date) -> date:
+    """Sales after this date are long term."""
+    try:
+        return open_date.replace(year=open_date.year + 1)
+    except ValueError:  # Acquired on 29 February
+        return date(open_date.year + 1, 3, 1)
+
+
+def holding_term(open_date: date, close_date: date) -> HoldingTerm:
+    """Long term when the sale is more than one year after acquisition."""
+    if close_date > first_anniversary(open_date):
+        return HoldingTerm.LONG_TERM
+    return HoldingTerm.SHORT_TERM
+
+
+class OpenLots:
+    """Lots of one security in parallel arrays, relieved in lot-method order."""
+
+    def __init__(self, method: LotMethod):
+        self.method = method
+        self.quantity = array("d")
+        self.remaining = array("d")
+        self.unit_cost = array("d")
+        self.open_dates: List[date] = []
+        self.anniversaries: List[date] = []
+        self.transaction_ids: List[Any] = []
+        self.closed_dates: List[Optional[date]] = []
+
+        self._head = 0  # FIFO: first lot that may still be open
+        self._stack: List[int] = []  # LIFO: open lots, newest last
+        self._heap: List[Tuple[float, int]] = []  # HIFO: (-unit_cost, index)
+        self._by_transaction: Dict[Any, int] = {}  # Specific ID: open transaction -> index
+
+    def __len__(self) -> int:
+        return len(self.quantity)
+
+    @property
+    def open_quantity(self) -> float:
+        return sum(self.remaining[i] for i in self._open_indexes())
+
+    def open(self, transaction_id: Any, open_date: date, quantity: float, cost: float) -> None:
+        index = len(self.quantity)
+        self.quantity.append(quantity)
+        self.remaining.append(quantity)
+        self.unit_cost.append(cost / quantity)
+        self.open_dates.append(open_date)
+        self.anniversaries.append(first_anniversary(open_date))
+        self.transaction_ids.append(transaction_id)
+        self.closed_dates.append(None)
+
+        if self.method == LotMethod.LIFO:
+            self._stack.append(index)
+        elif self.method == LotMethod.HIFO:
+            heapq.heappush(self._heap, (-self.unit_cost[index], index))
+        self._by_transaction[transaction_id] = index
+
+    def split(self, ratio: float) -> None:
+        """Rescale open lots; the cost of each lot is unchanged."""
+        for i in self._open_indexes():
+            self.quantity[i] *= ratio
+            self.remaining[i] *= ratio
+            self.unit_cost[i] /= ratio
+        if self._heap:
+            # Every cost scales by the same ratio, so heap order holds
+            self._heap = [(cost / ratio, i) for cost, i in self._heap]
+
+    def relieve(
+        self, quantity: float, close_date: date, designations: Optional[Dict[Any, float]] = None
+    ) -> Tuple[List[Tuple[int, float, bool]], float]:
+        """
+        Relieve shares from open lots.
+
+        Returns (lot index, shares, designated) triples and the quantity left
+        unmatched; shares not covered by `designations` fall back to FIFO.
+        """
+        taken: List[Tuple[int, float, bool]] = []
+        if designations:
+            for transaction_id, designated in designations.items():
+                index = self._by_transaction.get(transaction_id)
+                if index is None or quantity <= EPSILON:
+                    continue
+                shares = min(designated, self.remaining[index], quantity)
+                if shares > EPSILON:
+                    self._take(index, shares, close_date)
+                    taken.append((index, shares, True))
+                    quantity -= shares
+
+        while quantity > EPSILON:
+            index = self._next_lot()
+            if index is None:
+                break
+            shares = min(self.remaining[index], quantity)
+            self._take(index, shares, close_date)
+            taken.append((index, shares, False))
+            quantity -= shares
+
+        return taken, max(quantity, 0.0)
+
+    def records(self) -> List[LotRecord]:
+        return [
+            LotRecord(
+                i,
+                self.transaction_ids[i],
+                self.open_dates[i],
+                self.quantity[i],
+                self.remaining[i],
+                self.unit_cost[i],
+                self.closed_dates[i],
+            )
+            for i in range(len(self.quantity))
+        ]
+
+    def _take(self, index: int, shares: float, close_date: date) -> None:
+        self.remaining[index] -= shares
+        if self.remaining[index] <= EPSILON:
+            self.remaining[index] = 0.0
+            self.closed_dates[index] = close_date
+
+    def _next_lot(self) -> Optional[int]:
+        """Next open lot in method order; closed lots are dropped lazily."""
+        if self.method == LotMethod.LIFO:
+            while self._stack and self.remaining[self._stack[-1]] <= EPSILON:
+                self._stack.pop()
+            return self._stack[-1] if self._stack else None
+
+        if self.method == LotMethod.HIFO:
+            while self._heap and self.remaining[self._heap[0][1]] <= EPSILON:
+                heapq.heappop(self._heap)
+            return self._heap[0][1] if self._heap else None
+
+        # FIFO, and undesignated shares under specific ID
+        while self._head < len(self.remaining) and self.remaining[self._head] <= EPSILON:
+            self._head += 1
+        return self._head if self._head < len(self.remaining) else None
+
+    def _open_indexes(self) -> Iterable[int]:
+        start = self._head if self.method in (LotMethod.FIFO, LotMethod.SPECIFIC_ID) else 0
+        return (i for i in range(start, len(self.remaining)) if self.remaining[i] > EPSILON)
+
+
+def _gross(row: Any) -> float:
+    if row.price is not None and row.quantity is not None:
+        return abs(float(row.quantity) * float(row.price))
+    return abs(float(row.amount))
+
+
+def replay_security(
+    security_id: Any,
+    transactions: Iterable[Any],
+    method: LotMethod,
+    designations: Optional[Dict[Any, Dict[Any, float]]] = None,
+) -> ReplayResult:
+    """
+    Replay one security's transactions, sorted by trade date then entry order.
+
+    Rows need id, transaction_type, trade_date, quantity, price, amount, fees
+    and currency. `designations` maps a sale to {opening buy: shares} for
+    specific identification.
+    """
+    lots = OpenLots(method)
+    realized: List[RealizedRecord] = []
+    unmatched = 0.0
+    currency = "USD"
+
+    for row in transactions:
+        if row.quantity is None or abs(float(row.quantity)) <= EPSILON:
+            continue
+        quantity = abs(float(row.quantity))
+        fees = abs(float(row.fees or 0))
+        currency = row.currency or currency
+
+        if row.transaction_type == BUY:
+            lots.open(row.id, row.trade_date, quantity, _gross(row) + fees)
+
+        elif row.transaction_type == SELL:
+            proceeds = _gross(row) - fees
+            chosen = designations.get(row.id) if designations else None
+            taken, left = lots.relieve(quantity, row.trade_date, chosen)
+            unmatched += left
+            for index, shares, designated in taken:
+                realized.append(
+                    RealizedRecord(
+                        index,
+                        lots.transaction_ids[index],
+                        row.id,
+                        lots.open_dates[index],
+                        row.trade_date,
+                        shares,
+                        proceeds * shares / quantity,
+                        lots.unit_cost[index] * shares,
+                        LONG_TERM if row.trade_date > lots.anniversaries[index] else SHORT_TERM,
+                        designated,
+                    )
+                )
+
+        elif row.transaction_type == SPLIT:
+            held = lots.open_quantity
+            if held > EPSILON:
+                lots.split((held + float(row.quantity)) / held)
+
+    return ReplayResult(security_id, currency, lots.records(), realized, unmatched)
+
+
+def replay_transactions(
+    transactions: Iterable[Any],
+    method: LotMethod,
+    designations: Optional[Dict[Any, Dict[Any, float]]] = None,
+) -> List[ReplayResult]:
+    """Replay rows sorted by security, then trade date and entry order."""
+    return [
+        replay_security(security_id, rows, method, designations)
+        for security_id, rows in groupby(transactions, key=lambda row: row.security_id)
+    ]
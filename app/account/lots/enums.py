@@ -0,0 +1,17 @@
+from enum import Enum
+
+
+class LotMethod(str, Enum):
+    """Order in which open lots are relieved by a sale"""
+
+    FIFO = "fifo"  # Oldest lots first
+    LIFO = "lifo"  # Newest lots first
+    HIFO = "hifo"  # Highest cost per share first
+    SPECIFIC_ID = "specific_id"  # Lots designated per sale (FIFO for undesignated shares)
+
+
+class HoldingTerm(str, Enum):
+    """Holding period classification of a realized gain"""
+
+    SHORT_TERM = "short_term"  # Held one year or less
+    LONG_TERM = "long_term"  # Held more than one year
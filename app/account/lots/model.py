@@ -0,0 +1,144 @@
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+from typing import TYPE_CHECKING, Optional
+
+from sqlalchemy import (
+    DECIMAL,
+    Date,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    UniqueConstraint,
+)
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.core.model import BaseModel
+
+if TYPE_CHECKING:
+    from app.account.master.model import Account
+    from app.security.master.model import Security
+
+
+class AccountTaxLot(BaseModel):
+    """
+    Tax lots derived by replaying an account's transactions.
+
+    Each buy opens a lot; sales relieve lots in the order of the account's lot
+    method and splits rescale the open ones. Rows are rebuilt per security by
+    app/account/lots/service.py whenever that security's transactions change,
+    so they are never edited by hand. Each lot method keeps its own rows.
+    """
+
+    __tablename__ = "portfolio_tax_lots"
+
+    portfolio_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("portfolio_master.id", ondelete="CASCADE"),
+        nullable=False,
+        comment="Reference to the account holding the lot",
+    )
+
+    security_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("security_master.id", ondelete="CASCADE"),
+        nullable=False,
+        comment="Reference to the security in the lot",
+    )
+
+    open_transaction_id: Mapped[Optional[uuid.UUID]] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("portfolio_transactions.id", ondelete="SET NULL"),
+        nullable=True,
+        comment="Buy that opened the lot (NULL once it is deleted, which forces a rebuild)",
+    )
+
+    lot_method: Mapped[str] = mapped_column(
+        String(20), nullable=False, comment="LotMethod used when the lots were built"
+    )
+
+    open_date: Mapped[date] = mapped_column(
+        Date, nullable=False, comment="Trade date of the opening buy"
+    )
+
+    quantity: Mapped[Decimal] = mapped_column(
+        DECIMAL(15, 6), nullable=False, comment="Shares bought, adjusted for later splits"
+    )
+
+    remaining_quantity: Mapped[Decimal] = mapped_column(
+        DECIMAL(15, 6), nullable=False, comment="Shares still open"
+    )
+
+    unit_cost: Mapped[Decimal] = mapped_column(
+        DECIMAL(18, 8), nullable=False, comment="Cost per share including fees, split-adjusted"
+    )
+
+    currency: Mapped[str] = mapped_column(
+        String(3), default="USD", nullable=False, comment="Currency of the cost"
+    )
+
+    closed_date: Mapped[Optional[date]] = mapped_column(
+        Date, nullable=True, comment="Trade date of the sale that closed the lot"
+    )
+
+    # Relationships
+    portfolio_master: Mapped["Account"] = relationship("Account")
+
+    security_master: Mapped["Security"] = relationship("Security")
+
+    __table_args__ = (
+        Index("idx_tax_lots_portfolio_security", "portfolio_id", "security_id"),
+        Index("idx_tax_lots_open_transaction", "open_transaction_id"),
+        {"comment": "Open and closed tax lots rebuilt from account transactions"},
+    )
+
+
+class AccountTaxLotBuild(BaseModel):
+    """
+    Marks one security's lots as built under one lot method.
+
+    Records the count and latest updated_at of the security's replayed
+    transactions at build time. Edits and soft deletes bump updated_at and
+    hard deletes lower the count, so either makes the lots stale; securities
+    with only sales or splits have a marker even though they have no lots.
+    """
+
+    __tablename__ = "portfolio_tax_lot_builds"
+
+    portfolio_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("portfolio_master.id", ondelete="CASCADE"),
+        nullable=False,
+        comment="Reference to the account",
+    )
+
+    security_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("security_master.id", ondelete="CASCADE"),
+        nullable=False,
+        comment="Reference to the rebuilt security",
+    )
+
+    lot_method: Mapped[str] = mapped_column(
+        String(20), nullable=False, comment="LotMethod the lots were built with"
+    )
+
+    transaction_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, comment="Replayed transactions, including soft-deleted ones"
+    )
+
+    changed_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+        comment="Latest updated_at of those transactions",
+    )
+
+    __table_args__ = (
+        UniqueConstraint(
+            "portfolio_id", "security_id", "lot_method", name="uq_tax_lot_builds_security_method"
+        ),
+        {"comment": "Transaction fingerprint of each tax lot rebuild"},
+    )
@@ -0,0 +1,408 @@
+import logging
+import uuid
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Select, delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.account.gains.model import AccountRealizedGain
+from app.account.lots.engine import REPLAYED_TYPES, ReplayResult, replay_transactions
+from app.account.lots.enums import LotMethod
+from app.account.lots.model import AccountTaxLot, AccountTaxLotBuild
+from app.account.transactions.model import AccountTransaction
+
+logger = logging.getLogger(__name__)
+
+# Rows per INSERT when persisting lots and gains
+INSERT_BATCH_ROWS = 5000
+
+
+class TaxLotError(Exception):
+    """Custom exception for tax lot errors."""
+
+    pass
+
+
+def _quantity(value: float) -> Decimal:
+    return Decimal(str(round(value, 6)))
+
+
+def _money(value: float) -> Decimal:
+    return Decimal(str(round(value, 2)))
+
+
+class TaxLotService:
+    """
+    Maintains persisted tax lots and realized gains for an account.
+
+    Lots are stored per lot method and rebuilt per security, only for
+    securities whose transactions changed since their lots were last built
+    with that method, so repeat queries read the stored rows without a replay
+    and reading under one method never discards another method's lots.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def refresh(
+        self,
+        portfolio_id: Any,
+        method: LotMethod = LotMethod.FIFO,
+        security_ids: Optional[Sequence[Any]] = None,
+    ) -> List[str]:
+        """Rebuild stale securities of an account; returns the security ids rebuilt."""
+        stale = await self.stale_securities(portfolio_id, method, security_ids)
+        if stale:
+            await self.rebuild(portfolio_id, stale, method)
+        return stale
+
+    async def refresh_accounts(
+        self, portfolio_ids: Sequence[Any], method: LotMethod = LotMethod.FIFO
+    ) -> Dict[str, List[str]]:
+        """Rebuild stale securities of several accounts after one staleness check."""
+        stale = await self.stale_by_account(portfolio_ids, method)
+        for portfolio_id, security_ids in stale.items():
+            await self.rebuild(portfolio_id, security_ids, method)
+        return stale
+
+    async def stale_securities(
+        self,
+        portfolio_id: Any,
+        method: LotMethod,
+        security_ids: Optional[Sequence[Any]] = None,
+    ) -> List[str]:
+        """
+        Securities whose stored lots no longer reflect their transactions.
+
+        Compares each security's transaction fingerprint (count and latest
+        updated_at) with the one recorded at its last build under `method`;
+        edits and soft deletes bump updated_at and hard deletes lower the count.
+        """
+        stale = await self.stale_by_account([portfolio_id], method, security_ids)
+        return stale.get(str(portfolio_id), [])
+
+    async def stale_by_account(
+        self,
+        portfolio_ids: Sequence[Any],
+        method: LotMethod,
+        security_ids: Optional[Sequence[Any]] = None,
+    ) -> Dict[str, List[str]]:
+        """Stale securities per account, checked for all accounts in two queries."""
+        if not portfolio_ids:
+            return {}
+
+        builds = select(
+            AccountTaxLotBuild.portfolio_id,
+            AccountTaxLotBuild.security_id,
+            AccountTaxLotBuild.transaction_count,
+            AccountTaxLotBuild.changed_at,
+        ).where(
+            AccountTaxLotBuild.portfolio_id.in_(portfolio_ids),
+            AccountTaxLotBuild.lot_method == method.value,
+        )
+        if security_ids is not None:
+            builds = builds.where(AccountTaxLotBuild.security_id.in_(security_ids))
+
+        def key(row: Any) -> Tuple[str, str]:
+            return str(row.portfolio_id), str(row.security_id)
+
+        def fingerprint(row: Any) -> Tuple[int, Any]:
+            return row.transaction_count, row.changed_at
+
+        current = {
+            key(row): fingerprint(row)
+            for row in await self.db.execute(self._fingerprints(portfolio_ids, security_ids))
+        }
+        built = {key(row): fingerprint(row) for row in await self.db.execute(builds)}
+
+        by_account: Dict[str, List[str]] = defaultdict(list)
+        for pair in sorted(set(current) | set(built)):
+            if current.get(pair) != built.get(pair):
+                by_account[pair[0]].append(pair[1])
+        return dict(by_account)
+
+    @staticmethod
+    def _fingerprints(
+        portfolio_ids: Sequence[Any], security_ids: Optional[Sequence[Any]] = None
+    ) -> Select:
+        """Count and latest updated_at of the replayed transactions per account and security."""
+        stmt = (
+            select(
+                AccountTransaction.portfolio_id,
+                AccountTransaction.security_id,
+                func.count().label("transaction_count"),
+                func.max(AccountTransaction.updated_at).label("changed_at"),
+            )
+            .where(
+                AccountTransaction.portfolio_id.in_(portfolio_ids),
+                AccountTransaction.security_id.is_not(None),
+                AccountTransaction.transaction_type.in_(REPLAYED_TYPES),
+            )
+            .group_by(AccountTransaction.portfolio_id, AccountTransaction.security_id)
+        )
+        if security_ids is not None:
+            stmt = stmt.where(AccountTransaction.security_id.in_(security_ids))
+        return stmt
+
+    async def rebuild(
+        self,
+        portfolio_id: Any,
+        security_ids: Sequence[Any],
+        method: LotMethod = LotMethod.FIFO,
+        designations: Optional[Dict[Any, Dict[Any, float]]] = None,
+    ) -> List[ReplayResult]:
+        """
+        Replay the securities from scratch and replace their stored lots and
+        gains for `method`; lots stored under other methods are left alone.
+
+        Under specific identification, designations already stored on the
+        realized gains are kept; `designations` ({sale: {buy: shares}}) adds or
+        overrides them. Shares a designation did not cover are matched FIFO
+        again on every rebuild.
+        """
+        if not security_ids:
+            return []
+
+        # Concurrent rebuilds of a security would interleave their delete and
+        # insert; the locks are held until this transaction ends
+        for security_id in sorted(security_ids, key=str):
+            await self.db.execute(
+                select(
+                    func.pg_advisory_xact_lock(
+                        func.hashtext(f"tax_lots:{portfolio_id}"), func.hashtext(str(security_id))
+                    )
+                )
+            )
+        # Read before the replay, so a change landing in between leaves the build stale
+        fingerprints = (
+            await self.db.execute(self._fingerprints([portfolio_id], security_ids))
+        ).all()
+
+        results, replayed = await self._replay(portfolio_id, security_ids, method, designations)
+
+        try:
+            # Gains go with their lots through the lot_id cascade
+            await self.db.execute(
+                delete(AccountTaxLot).where(
+                    AccountTaxLot.portfolio_id == portfolio_id,
+                    AccountTaxLot.security_id.in_(security_ids),
+                    AccountTaxLot.lot_method == method.value,
+                )
+            )
+            await self.db.execute(
+                delete(AccountTaxLotBuild).where(
+                    AccountTaxLotBuild.portfolio_id == portfolio_id,
+                    AccountTaxLotBuild.security_id.in_(security_ids),
+                    AccountTaxLotBuild.lot_method == method.value,
+                )
+            )
+            await self._insert_results(portfolio_id, method, results)
+            if fingerprints:
+                await self.db.execute(
+                    insert(AccountTaxLotBuild),
+                    [
+                        {
+                            "portfolio_id": portfolio_id,
+                            "security_id": row.security_id,
+                            "lot_method": method.value,
+                            "transaction_count": row.transaction_count,
+                            "changed_at": row.changed_at,
+                        }
+                        for row in fingerprints
+                    ],
+                )
+            await self.db.commit()
+        except Exception as e:
+            await self.db.rollback()
+            raise TaxLotError(f"Failed to store tax lots for {portfolio_id}: {str(e)}") from e
+
+        for result in results:
+            if result.unmatched_quantity:
+                logger.warning(
+                    f"Account {portfolio_id} sold {result.unmatched_quantity:g} more shares "
+                    f"of {result.security_id} than it held; the excess has no cost basis"
+                )
+        logger.info(
+            f"Rebuilt tax lots for {len(security_ids)} securities of account {portfolio_id} "
+            f"from {replayed} transactions ({method.value})"
+        )
+        return results
+
+    async def replay(
+        self,
+        portfolio_id: Any,
+        security_ids: Sequence[Any],
+        method: LotMethod = LotMethod.FIFO,
+    ) -> List[ReplayResult]:
+        """Lots and gains of the securities computed in memory; stored rows are not touched."""
+        if not security_ids:
+            return []
+        results, _ = await self._replay(portfolio_id, security_ids, method)
+        return results
+
+    async def _replay(
+        self,
+        portfolio_id: Any,
+        security_ids: Sequence[Any],
+        method: LotMethod,
+        designations: Optional[Dict[Any, Dict[Any, float]]] = None,
+    ) -> Tuple[List[ReplayResult], int]:
+        """Replay results and the number of transactions replayed."""
+        if method == LotMethod.SPECIFIC_ID:
+            designations = {
+                **await self._stored_designations(portfolio_id, security_ids),
+                **(designations or {}),
+            }
+
+        stmt = (
+            select(
+                AccountTransaction.id,
+                AccountTransaction.security_id,
+                AccountTransaction.transaction_type,
+                AccountTransaction.trade_date,
+                AccountTransaction.quantity,
+                AccountTransaction.price,
+                AccountTransaction.amount,
+                AccountTransaction.fees,
+                AccountTransaction.currency,
+            )
+            .where(
+                AccountTransaction.portfolio_id == portfolio_id,
+                AccountTransaction.security_id.in_(security_ids),
+                AccountTransaction.transaction_type.in_(REPLAYED_TYPES),
+                AccountTransaction.deleted_at.is_(None),
+            )
+            .order_by(
+                AccountTransaction.security_id,
+                AccountTransaction.trade_date,
+                AccountTransaction.created_at,
+                AccountTransaction.id,
+            )
+        )
+        rows = (await self.db.execute(stmt)).all()
+        return replay_transactions(rows, method, designations), len(rows)
+
+    async def get_open_lots(
+        self,
+        portfolio_id: Any,
+        security_id: Optional[Any] = None,
+        method: LotMethod = LotMethod.FIFO,
+    ) -> List[AccountTaxLot]:
+        """Open lots, oldest first, rebuilt first if stale."""
+        await self.refresh(portfolio_id, method, [security_id] if security_id else None)
+
+        stmt = select(AccountTaxLot).where(
+            AccountTaxLot.portfolio_id == portfolio_id,
+            AccountTaxLot.lot_method == method.value,
+            AccountTaxLot.remaining_quantity > 0,
+        )
+        if security_id:
+            stmt = stmt.where(AccountTaxLot.security_id == security_id)
+        result = await self.db.execute(stmt.order_by(AccountTaxLot.open_date))
+        return list(result.scalars().all())
+
+    async def get_realized_gains(
+        self,
+        portfolio_id: Any,
+        security_id: Optional[Any] = None,
+        tax_year: Optional[int] = None,
+        method: LotMethod = LotMethod.FIFO,
+    ) -> List[AccountRealizedGain]:
+        """Realized gains by sale date, rebuilt first if stale."""
+        await self.refresh(portfolio_id, method, [security_id] if security_id else None)
+
+        stmt = select(AccountRealizedGain).where(
+            AccountRealizedGain.portfolio_id == portfolio_id,
+            AccountRealizedGain.lot_method == method.value,
+        )
+        if security_id:
+            stmt = stmt.where(AccountRealizedGain.security_id == security_id)
+        if tax_year:
+            stmt = stmt.where(
+                AccountRealizedGain.close_date >= date(tax_year, 1, 1),
+                AccountRealizedGain.close_date < date(tax_year + 1, 1, 1),
+            )
+        result = await self.db.execute(
+            stmt.order_by(AccountRealizedGain.close_date, AccountRealizedGain.open_date)
+        )
+        return list(result.scalars().all())
+
+    async def _stored_designations(
+        self, portfolio_id: Any, security_ids: Sequence[Any]
+    ) -> Dict[Any, Dict[Any, float]]:
+        stmt = select(
+            AccountRealizedGain.sell_transaction_id,
+            AccountRealizedGain.open_transaction_id,
+            AccountRealizedGain.quantity,
+        ).where(
+            AccountRealizedGain.portfolio_id == portfolio_id,
+            AccountRealizedGain.security_id.in_(security_ids),
+            AccountRealizedGain.lot_method == LotMethod.SPECIFIC_ID.value,
+            # Only the user's choices; shares that fell back to FIFO are re-matched
+            AccountRealizedGain.designated.is_(True),
+            AccountRealizedGain.sell_transaction_id.is_not(None),
+            AccountRealizedGain.open_transaction_id.is_not(None),
+        )
+        designations: Dict[Any, Dict[Any, float]] = defaultdict(dict)
+        for row in await self.db.execute(stmt):
+            designations[row.sell_transaction_id][row.open_transaction_id] = float(row.quantity)
+        return dict(designations)
+
+    async def _insert_results(
+        self, portfolio_id: Any, method: LotMethod, results: List[ReplayResult]
+    ) -> None:
+        lot_rows: List[Dict[str, Any]] = []
+        gain_rows: List[Dict[str, Any]] = []
+
+        for result in results:
+            lot_ids = [uuid.uuid4() for _ in result.lots]
+            for lot in result.lots:
+                lot_rows.append(
+                    {
+                        "id": lot_ids[lot.index],
+                        "portfolio_id": portfolio_id,
+                        "security_id": result.security_id,
+                        "open_transaction_id": lot.open_transaction_id,
+                        "lot_method": method.value,
+                        "open_date": lot.open_date,
+                        "quantity": _quantity(lot.quantity),
+                        "remaining_quantity": _quantity(lot.remaining_quantity),
+                        "unit_cost": Decimal(str(round(lot.unit_cost, 8))),
+                        "currency": result.currency,
+                        "closed_date": lot.closed_date,
+                    }
+                )
+            for realized in result.realized:
+                gain_rows.append(
+                    {
+                        "portfolio_id": portfolio_id,
+                        "security_id": result.security_id,
+                        "lot_id": lot_ids[realized.lot_index],
+                        "open_transaction_id": realized.open_transaction_id,
+                        "sell_transaction_id": realized.sell_transaction_id,
+                        "lot_method": method.value,
+                        "open_date": realized.open_date,
+                        "close_date": realized.close_date,
+                        "quantity": _quantity(realized.quantity),
+                        "proceeds": _money(realized.proceeds),
+                        "cost_basis": _money(realized.cost_basis),
+                        "gain": _money(realized.gain),
+                        "term": realized.term.value,
+                        "currency": result.currency,
+                        "designated": realized.designated,
+                    }
+                )
+
+        # executemany in batches keeps statements small for large accounts
+        for model, rows in ((AccountTaxLot, lot_rows), (AccountRealizedGain, gain_rows)):
+            for start in range(0, len(rows), INSERT_BATCH_ROWS):
+                await self.db.execute(insert(model), rows[start : start + INSERT_BATCH_ROWS])
+
+
+# Convenience function for getting tax lot service
+def get_tax_lot_service(db: AsyncSession) -> TaxLotService:
+    """Get TaxLotService instance with database session."""
+    return TaxLotService(db)
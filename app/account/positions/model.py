@@ -0,0 +1,67 @@
+import uuid
+from datetime import date
+from decimal import Decimal
+from typing import TYPE_CHECKING, Optional
+
+from sqlalchemy import DECIMAL, Date, ForeignKey, String, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.core.model import BaseModel
+
+if TYPE_CHECKING:
+    from app.account.master.model import Account
+    from app.security.master.model import Security
+
+
+class AccountPosition(BaseModel):
+    """
+    Current position per account and security, derived from transactions.
+
+    Kept up to date by app/account/positions/service.py as transactions are
+    created, edited and deleted: in-order additions are applied directly and
+    any other change recomputes the affected security. Cost basis uses the
+    average cost method.
+    """
+
+    __tablename__ = "portfolio_positions"
+
+    portfolio_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("portfolio_master.id", ondelete="CASCADE"),
+        nullable=False,
+        comment="Reference to the account holding the position",
+    )
+
+    security_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("security_master.id", ondelete="CASCADE"),
+        nullable=False,
+        comment="Reference to the security held",
+    )
+
+    quantity: Mapped[Decimal] = mapped_column(
+        DECIMAL(15, 6), nullable=False, comment="Shares held (negative for a short position)"
+    )
+
+    cost_basis: Mapped[Decimal] = mapped_column(
+        DECIMAL(15, 2), nullable=False, comment="Average-cost basis of the shares held"
+    )
+
+    currency: Mapped[str] = mapped_column(
+        String(3), default="USD", nullable=False, comment="Currency of the cost basis"
+    )
+
+    last_trade_date: Mapped[Optional[date]] = mapped_column(
+        Date, nullable=True, comment="Trade date of the latest transaction applied"
+    )
+
+    # Relationships
+    portfolio_master: Mapped["Account"] = relationship("Account")
+
+    security_master: Mapped["Security"] = relationship("Security")
+
+    __table_args__ = (
+        UniqueConstraint("portfolio_id", "security_id", name="uq_position_portfolio_security"),
+        {"comment": "Current positions maintained from account transactions"},
+    )
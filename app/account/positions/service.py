@@ -0,0 +1,398 @@
+"""
+Position keeping from account transactions.
+
+Usage:
+    python -m app.account.positions.service [--date 2025-06-30]
+
+Current positions live in portfolio_positions and are maintained as
+transactions change. Positions as of an earlier date start from the latest
+snapshot in portfolio_position_snapshots on or before that date and replay
+only the transactions after it. The module entry point takes the periodic
+snapshot (by default at the end of the previous month) for every account.
+"""
+
+import argparse
+import asyncio
+import logging
+from datetime import date, timedelta
+from decimal import Decimal
+from itertools import groupby
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.account.positions.model import AccountPosition
+from app.account.snapshots.model import AccountPositionSnapshot
+from app.account.transactions.enums import TransactionType
+from app.account.transactions.model import AccountTransaction
+from app.account.valuation.cache import valuation_cache
+from app.core.database import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Direction in which each transaction type moves the share count; splits carry
+# the signed change in shares as their quantity
+SHARE_DIRECTION = {
+    TransactionType.BUY.value: 1,
+    TransactionType.TRANSFER_IN.value: 1,
+    TransactionType.SELL.value: -1,
+    TransactionType.TRANSFER_OUT.value: -1,
+    TransactionType.SPLIT.value: 0,
+}
+POSITION_TYPES = tuple(SHARE_DIRECTION)
+
+# Quantities below this are treated as a closed position
+EPSILON = Decimal("0.000001")
+
+TRANSACTION_COLUMNS = (
+    AccountTransaction.security_id,
+    AccountTransaction.transaction_type,
+    AccountTransaction.trade_date,
+    AccountTransaction.quantity,
+    AccountTransaction.price,
+    AccountTransaction.amount,
+    AccountTransaction.fees,
+    AccountTransaction.currency,
+)
+
+
+class Position(NamedTuple):
+    """Shares and average-cost basis of one security"""
+
+    security_id: Any
+    quantity: Decimal
+    cost_basis: Decimal
+    currency: str
+    last_trade_date: Optional[date] = None
+
+    @property
+    def average_cost(self) -> Optional[Decimal]:
+        if not self.quantity:
+            return None
+        return self.cost_basis / self.quantity
+
+
+def apply_transaction(position: Position, row: Any) -> Position:
+    """Position after one transaction (rows need the TRANSACTION_COLUMNS fields)."""
+    if row.transaction_type not in SHARE_DIRECTION or row.quantity is None:
+        return position
+
+    quantity, cost = position.quantity, position.cost_basis
+    direction = SHARE_DIRECTION[row.transaction_type]
+
+    if direction == 0:
+        # Split: more (or fewer) shares for the same cost
+        quantity += Decimal(row.quantity)
+    elif direction > 0:
+        shares = abs(Decimal(row.quantity))
+        gross = abs(shares * row.price) if row.price is not None else abs(row.amount)
+        fees = abs(row.fees or 0) if row.transaction_type == TransactionType.BUY.value else 0
+        quantity += shares
+        cost += gross + fees
+    else:
+        shares = abs(Decimal(row.quantity))
+        if quantity > 0:
+            # Average cost: the shares leave at the current cost per share
+            cost -= cost * min(shares, quantity) / quantity
+        quantity -= shares
+
+    if abs(quantity) < EPSILON:
+        quantity, cost = Decimal("0"), Decimal("0")
+    return position._replace(
+        quantity=quantity,
+        cost_basis=cost.quantize(Decimal("0.01")),
+        currency=row.currency or position.currency,
+        last_trade_date=row.trade_date,
+    )
+
+
+def replay_positions(
+    rows: Iterable[Any], start: Optional[Dict[Any, Position]] = None
+) -> Dict[Any, Position]:
+    """Apply rows sorted by security, trade date and entry order to starting positions."""
+    positions = dict(start or {})
+    for security_id, security_rows in groupby(rows, key=lambda row: row.security_id):
+        position = positions.get(
+            security_id, Position(security_id, Decimal("0"), Decimal("0"), "USD")
+        )
+        for row in security_rows:
+            position = apply_transaction(position, row)
+        positions[security_id] = position
+    return positions
+
+
+def previous_month_end(today: Optional[date] = None) -> date:
+    return (today or date.today()).replace(day=1) - timedelta(days=1)
+
+
+class PositionService:
+    """Maintains current positions and answers as-of position queries."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    # --- Transaction hooks (the caller commits) ---
+
+    async def on_transaction_created(self, transaction: AccountTransaction) -> None:
+        """Apply a new transaction; out-of-order ones recompute the security."""
+        if transaction.security_id is None or transaction.transaction_type not in POSITION_TYPES:
+            return
+        if transaction.trade_date is None:
+            raise ValueError(f"Transaction {transaction.id} has no trade_date")
+
+        current = await self._current_position(transaction.portfolio_id, transaction.security_id)
+        if (
+            current is not None
+            and current.last_trade_date is not None
+            and transaction.trade_date < current.last_trade_date
+        ):
+            await self.on_transactions_changed(
+                transaction.portfolio_id, [transaction.security_id], transaction.trade_date
+            )
+            return
+
+        start = (
+            Position(
+                current.security_id,
+                current.quantity,
+                current.cost_basis,
+                current.currency,
+                current.last_trade_date,
+            )
+            if current is not None
+            else Position(transaction.security_id, Decimal("0"), Decimal("0"), "USD")
+        )
+        await self._store_positions(
+            transaction.portfolio_id, [apply_transaction(start, transaction)]
+        )
+        await self._drop_snapshots_from(transaction.portfolio_id, transaction.trade_date)
+        valuation_cache.invalidate_on_commit(self.db, transaction.portfolio_id)
+
+    async def on_transactions_changed(
+        self, portfolio_id: Any, security_ids: Sequence[Any], since: Optional[date] = None
+    ) -> None:
+        """
+        Recompute positions of securities after edits or deletes.
+
+        `since` is the earliest trade date affected; snapshots from then on
+        no longer hold and are dropped.
+        """
+        security_ids = [security_id for security_id in security_ids if security_id is not None]
+        if not security_ids:
+            return
+        await self.rebuild_positions(portfolio_id, security_ids)
+        if since is not None:
+            await self._drop_snapshots_from(portfolio_id, since)
+
+    async def rebuild_positions(
+        self, portfolio_id: Any, security_ids: Optional[Sequence[Any]] = None
+    ) -> Dict[Any, Position]:
+        """Recompute current positions from all transactions (of the given securities)."""
+        stmt = self._transactions(portfolio_id)
+        if security_ids is not None:
+            stmt = stmt.where(AccountTransaction.security_id.in_(security_ids))
+        positions = replay_positions((await self.db.execute(stmt)).all())
+
+        existing = delete(AccountPosition).where(AccountPosition.portfolio_id == portfolio_id)
+        if security_ids is not None:
+            existing = existing.where(AccountPosition.security_id.in_(security_ids))
+        await self.db.execute(existing)
+        await self._store_positions(portfolio_id, list(positions.values()))
+        valuation_cache.invalidate_on_commit(self.db, portfolio_id)
+        return positions
+
+    # --- Queries ---
+
+    async def get_positions(
+        self, portfolio_id: Any, as_of_date: Optional[date] = None
+    ) -> List[Position]:
+        """Open positions now, or at the close of `as_of_date`."""
+        if as_of_date is None or not await self._has_transactions_after(portfolio_id, as_of_date):
+            result = await self.db.execute(
+                select(AccountPosition).where(
+                    AccountPosition.portfolio_id == portfolio_id,
+                    AccountPosition.quantity != 0,
+                )
+            )
+            return [
+                Position(p.security_id, p.quantity, p.cost_basis, p.currency, p.last_trade_date)
+                for p in result.scalars()
+            ]
+
+        snapshot_date, start = await self._latest_snapshot(portfolio_id, as_of_date)
+        stmt = self._transactions(portfolio_id).where(
+            AccountTransaction.trade_date <= as_of_date
+        )
+        if snapshot_date is not None:
+            stmt = stmt.where(AccountTransaction.trade_date > snapshot_date)
+
+        positions = replay_positions((await self.db.execute(stmt)).all(), start)
+        return [position for position in positions.values() if position.quantity != 0]
+
+    # --- Snapshots ---
+
+    async def create_snapshot(self, portfolio_id: Any, snapshot_date: date) -> int:
+        """Store the positions at the close of a date; returns rows written."""
+        positions = await self.get_positions(portfolio_id, snapshot_date)
+        await self.db.execute(
+            delete(AccountPositionSnapshot).where(
+                AccountPositionSnapshot.portfolio_id == portfolio_id,
+                AccountPositionSnapshot.snapshot_date == snapshot_date,
+            )
+        )
+        if positions:
+            await self.db.execute(
+                insert(AccountPositionSnapshot),
+                [
+                    {
+                        "portfolio_id": portfolio_id,
+                        "security_id": position.security_id,
+                        "snapshot_date": snapshot_date,
+                        "quantity": position.quantity,
+                        "cost_basis": position.cost_basis,
+                        "currency": position.currency,
+                    }
+                    for position in positions
+                ],
+            )
+        await self.db.commit()
+        return len(positions)
+
+    # --- Internals ---
+
+    @staticmethod
+    def _transactions(portfolio_id: Any):
+        return (
+            select(*TRANSACTION_COLUMNS)
+            .where(
+                AccountTransaction.portfolio_id == portfolio_id,
+                AccountTransaction.security_id.is_not(None),
+                AccountTransaction.transaction_type.in_(POSITION_TYPES),
+                AccountTransaction.deleted_at.is_(None),
+            )
+            .order_by(
+                AccountTransaction.security_id,
+                AccountTransaction.trade_date,
+                AccountTransaction.created_at,
+                AccountTransaction.id,
+            )
+        )
+
+    async def _current_position(
+        self, portfolio_id: Any, security_id: Any
+    ) -> Optional[AccountPosition]:
+        result = await self.db.execute(
+            select(AccountPosition).where(
+                AccountPosition.portfolio_id == portfolio_id,
+                AccountPosition.security_id == security_id,
+            )
+        )
+        return result.scalar_one_or_none()
+
+    async def _store_positions(self, portfolio_id: Any, positions: List[Position]) -> None:
+        if not positions:
+            return
+        stmt = pg_insert(AccountPosition).values(
+            [
+                {
+                    "portfolio_id": portfolio_id,
+                    "security_id": position.security_id,
+                    "quantity": position.quantity,
+                    "cost_basis": position.cost_basis,
+                    "currency": position.currency,
+                    "last_trade_date": position.last_trade_date,
+                }
+                for position in positions
+            ]
+        )
+        await self.db.execute(
+            stmt.on_conflict_do_update(
+                constraint="uq_position_portfolio_security",
+                set_={
+                    "quantity": stmt.excluded.quantity,
+                    "cost_basis": stmt.excluded.cost_basis,
+                    "currency": stmt.excluded.currency,
+                    "last_trade_date": stmt.excluded.last_trade_date,
+                },
+            )
+        )
+
+    async def _drop_snapshots_from(self, portfolio_id: Any, since: date) -> None:
+        await self.db.execute(
+            delete(AccountPositionSnapshot).where(
+                AccountPositionSnapshot.portfolio_id == portfolio_id,
+                AccountPositionSnapshot.snapshot_date >= since,
+            )
+        )
+
+    async def _has_transactions_after(self, portfolio_id: Any, as_of_date: date) -> bool:
+        result = await self.db.execute(
+            select(AccountTransaction.id)
+            .where(
+                AccountTransaction.portfolio_id == portfolio_id,
+                AccountTransaction.trade_date > as_of_date,
+                AccountTransaction.transaction_type.in_(POSITION_TYPES),
+                AccountTransaction.deleted_at.is_(None),
+            )
+            .limit(1)
+        )
+        return result.first() is not None
+
+    async def _latest_snapshot(self, portfolio_id: Any, as_of_date: date):
+        """(snapshot date, positions) of the latest snapshot on or before a date."""
+        latest = (
+            select(func.max(AccountPositionSnapshot.snapshot_date))
+            .where(
+                AccountPositionSnapshot.portfolio_id == portfolio_id,
+                AccountPositionSnapshot.snapshot_date <= as_of_date,
+            )
+            .scalar_subquery()
+        )
+        result = await self.db.execute(
+            select(AccountPositionSnapshot).where(
+                AccountPositionSnapshot.portfolio_id == portfolio_id,
+                AccountPositionSnapshot.snapshot_date == latest,
+            )
+        )
+        rows = list(result.scalars())
+        if not rows:
+            return None, {}
+        return rows[0].snapshot_date, {
+            row.security_id: Position(row.security_id, row.quantity, row.cost_basis, row.currency)
+            for row in rows
+        }
+
+
+async def snapshot_positions(snapshot_date: Optional[date] = None) -> int:
+    """Main entry point: snapshot every account with positions; returns accounts done."""
+    snapshot_date = snapshot_date or previous_month_end()
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(select(AccountPosition.portfolio_id).distinct())
+        portfolio_ids = list(result.scalars())
+
+        service = PositionService(session)
+        for portfolio_id in portfolio_ids:
+            try:
+                await service.create_snapshot(portfolio_id, snapshot_date)
+            except Exception as e:
+                await session.rollback()
+                logger.error(f"Position snapshot failed for account {portfolio_id}: {str(e)}")
+
+    logger.info(f"Snapshotted positions of {len(portfolio_ids)} accounts at {snapshot_date}")
+    return len(portfolio_ids)
+
+
+if __name__ == "__main__":
+    # Configure logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+
+    parser = argparse.ArgumentParser(description="Snapshot account positions")
+    parser.add_argument("--date", type=date.fromisoformat, default=None)
+    args = parser.parse_args()
+
+    asyncio.run(snapshot_positions(args.date))
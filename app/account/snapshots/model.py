@@ -0,0 +1,68 @@
+import uuid
+from datetime import date
+from decimal import Decimal
+from typing import TYPE_CHECKING
+
+from sqlalchemy import DECIMAL, Date, ForeignKey, String, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.core.model import BaseModel
+
+if TYPE_CHECKING:
+    from app.security.master.model import Security
+
+
+class AccountPositionSnapshot(BaseModel):
+    """
+    Positions of an account at the close of a snapshot date.
+
+    Positions as of any date are the latest snapshot on or before it plus the
+    transactions after the snapshot. Snapshots on or after a back-dated
+    transaction change are dropped and taken again by the periodic job.
+    """
+
+    __tablename__ = "portfolio_position_snapshots"
+
+    portfolio_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("portfolio_master.id", ondelete="CASCADE"),
+        nullable=False,
+        comment="Reference to the account",
+    )
+
+    security_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("security_master.id", ondelete="CASCADE"),
+        nullable=False,
+        comment="Reference to the security held",
+    )
+
+    snapshot_date: Mapped[date] = mapped_column(
+        Date, nullable=False, comment="Positions include every transaction up to this date"
+    )
+
+    quantity: Mapped[Decimal] = mapped_column(
+        DECIMAL(15, 6), nullable=False, comment="Shares held at the snapshot date"
+    )
+
+    cost_basis: Mapped[Decimal] = mapped_column(
+        DECIMAL(15, 2), nullable=False, comment="Average-cost basis at the snapshot date"
+    )
+
+    currency: Mapped[str] = mapped_column(
+        String(3), default="USD", nullable=False, comment="Currency of the cost basis"
+    )
+
+    # Relationships
+    security_master: Mapped["Security"] = relationship("Security")
+
+    __table_args__ = (
+        UniqueConstraint(
+            "portfolio_id",
+            "snapshot_date",
+            "security_id",
+            name="uq_position_snapshot_portfolio_date_security",
+        ),
+        {"comment": "Periodic position snapshots for as-of position queries"},
+    )
@@ -52,3 +52,10 @@ class TransactionSubType(str, Enum):
     JOURNAL = "journal"
 
     OTHER = "other"
+
+
+class TransactionExportFormat(str, Enum):
+    """Encodings for streamed transaction exports"""
+
+    NDJSON = "ndjson"
+    CSV = "csv"
@@ -0,0 +1,133 @@
+"""
+Streaming transaction exports.
+
+Rows are read through a server-side cursor in batches and encoded as they
+arrive, so an export of any size holds one batch in memory.
+"""
+
+import csv
+import io
+import json
+from datetime import date
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from sqlalchemy import desc, select
+
+from app.account.transactions.enums import TransactionExportFormat, TransactionType
+from app.account.transactions.model import AccountTransaction
+from app.account.transactions.repository import SORT_KEY, filter_transactions
+from app.core.database import AsyncSessionLocal
+from app.security.master.model import Security
+
+# Rows fetched per round trip from the server-side cursor
+STREAM_BATCH_ROWS = 2000
+
+EXPORT_COLUMNS = (
+    "id",
+    "portfolio_id",
+    "trade_date",
+    "settlement_date",
+    "transaction_type",
+    "transaction_subtype",
+    "symbol",
+    "quantity",
+    "price",
+    "amount",
+    "fees",
+    "currency",
+    "description",
+    "external_transaction_id",
+)
+
+MEDIA_TYPES = {
+    TransactionExportFormat.NDJSON: "application/x-ndjson",
+    TransactionExportFormat.CSV: "text/csv",
+}
+
+
+def export_query(user_id: Any, **filters: Any):
+    """Export columns for a user's transactions, in listing order."""
+    stmt = select(
+        AccountTransaction.id,
+        AccountTransaction.portfolio_id,
+        AccountTransaction.trade_date,
+        AccountTransaction.settlement_date,
+        AccountTransaction.transaction_type,
+        AccountTransaction.transaction_subtype,
+        Security.symbol,
+        AccountTransaction.quantity,
+        AccountTransaction.price,
+        AccountTransaction.amount,
+        AccountTransaction.fees,
+        AccountTransaction.currency,
+        AccountTransaction.description,
+        AccountTransaction.external_transaction_id,
+    ).outerjoin(Security, AccountTransaction.security_id == Security.id)
+
+    stmt = filter_transactions(stmt, user_id=user_id, **filters)
+    return stmt.order_by(*(desc(column) for column in SORT_KEY))
+
+
+async def stream_transactions(
+    user_id: Any,
+    fmt: TransactionExportFormat,
+    account_id: Optional[Any] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    transaction_type: Optional[TransactionType] = None,
+    search: Optional[str] = None,
+) -> AsyncIterator[bytes]:
+    """
+    Encode every matching transaction in batches read through a server-side cursor.
+
+    Uses its own session because the response body is produced after the
+    request's session has been released.
+    """
+    stmt = export_query(
+        user_id,
+        account_id=account_id,
+        start_date=start_date,
+        end_date=end_date,
+        transaction_type=transaction_type,
+        search=search,
+    ).execution_options(yield_per=STREAM_BATCH_ROWS)
+
+    async with AsyncSessionLocal() as session:
+        result = await session.stream(stmt)
+
+        encoder = _ENCODERS[fmt]()
+        yield encoder.start()
+        async for rows in result.partitions():
+            yield encoder.encode([_record(row) for row in rows])
+
+
+def _record(row: Any) -> Dict[str, Any]:
+    return {
+        column: None if value is None else str(value)
+        for column, value in zip(EXPORT_COLUMNS, row)
+    }
+
+
+class _NdjsonEncoder:
+    def start(self) -> bytes:
+        return b""
+
+    def encode(self, records: List[dict]) -> bytes:
+        return "".join(json.dumps(record) + "\n" for record in records).encode()
+
+
+class _CsvEncoder:
+    def start(self) -> bytes:
+        return (",".join(EXPORT_COLUMNS) + "\n").encode()
+
+    def encode(self, records: List[dict]) -> bytes:
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS, lineterminator="\n")
+        writer.writerows(records)
+        return buffer.getvalue().encode()
+
+
+_ENCODERS = {
+    TransactionExportFormat.NDJSON: _NdjsonEncoder,
+    TransactionExportFormat.CSV: _CsvEncoder,
+}
@@ -154,5 +154,15 @@ class AccountTransaction(BaseModel):
         ),
         Index("idx_transaction_date_type", "portfolio_id", "trade_date", "transaction_type"),
         Index("idx_transaction_security", "security_id", "trade_date"),
+        # Keyset pagination on (trade_date, created_at, id)
+        Index(
+            "idx_transaction_portfolio_keyset", "portfolio_id", "trade_date", "created_at", "id"
+        ),
+        Index(
+            "idx_transaction_description_trgm",
+            "description",
+            postgresql_using="gin",
+            postgresql_ops={"description": "gin_trgm_ops"},
+        ),
         {"comment": "Complete transaction history for account activity"},
     )
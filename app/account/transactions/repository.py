@@ -1,12 +1,272 @@
-from datetime import date
-from decimal import Decimal
-from typing import Any, Dict, List, Optional
-
-from sqlalchemy import and_, desc, extract, select
+import hashlib
+import logging
+import re
+import uuid
+from collections import Counter
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from enum import Enum
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import Select, desc, func, or_, select, text, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import joinedload
 
+from app.account.lots.enums import HoldingTerm, LotMethod
+from app.account.lots.service import TaxLotService
+from app.account.master.model import Account
+from app.account.positions.service import PositionService
+from app.account.transactions.enums import TransactionType
 from app.account.transactions.model import AccountTransaction
+from app.security.master.model import Security
+
+logger = logging.getLogger(__name__)
+
+
+# Listing order, newest first; id breaks ties so the key is unique
+SORT_KEY = (
+    AccountTransaction.trade_date,
+    AccountTransaction.created_at,
+    AccountTransaction.id,
+)
+
+# (trade_date, created_at, id) of the last row of a page
+TransactionKey = Tuple[date, datetime, uuid.UUID]
+
+# Staging table for COPY imports, dropped at commit
+IMPORT_TABLE = "transaction_import"
+
+# external_transaction_id prefix of keys derived from the row contents
+IMPORT_KEY_PREFIX = "import:"
+
+# Columns written by a bulk import, in COPY record order
+IMPORT_COLUMNS = (
+    "id",
+    "portfolio_id",
+    "security_id",
+    "transaction_type",
+    "transaction_subtype",
+    "quantity",
+    "price",
+    "amount",
+    "fees",
+    "currency",
+    "trade_date",
+    "settlement_date",
+    "description",
+    "external_transaction_id",
+)
+
+# TransactionCreate/TransactionUpdate fields and the columns they are stored in;
+# plaid_account_id, cancel_transaction_id, data_source and as_of_date are not stored
+SCHEMA_COLUMNS = {
+    "account_id": "portfolio_id",
+    "security_id": "security_id",
+    "transaction_type": "transaction_type",
+    "transaction_subtype": "transaction_subtype",
+    "quantity": "quantity",
+    "price": "price",
+    "amount": "amount",
+    "fees": "fees",
+    "currency": "currency",
+    "trade_date": "trade_date",
+    "settlement_date": "settlement_date",
+    "name": "description",
+    "plaid_transaction_id": "external_transaction_id",
+}
+
+# func.grouping() bitmask for a row of GROUPING SETS over two columns
+GROUPED_BY_FIRST = 1
+GROUPED_BY_SECOND = 2
+
+
+def _amount_where(transaction_type: TransactionType):
+    return func.coalesce(
+        func.sum(func.abs(AccountTransaction.amount)).filter(
+            AccountTransaction.transaction_type == transaction_type.value
+        ),
+        0,
+    )
+
+
+def _activity_columns() -> List[Any]:
+    """Aggregate columns shared by the transaction summaries."""
+    return [
+        func.count().label("transactions"),
+        _amount_where(TransactionType.BUY).label("invested"),
+        _amount_where(TransactionType.SELL).label("divested"),
+        _amount_where(TransactionType.DIVIDEND).label("dividends"),
+        _amount_where(TransactionType.INTEREST).label("interest"),
+        func.coalesce(func.sum(func.abs(AccountTransaction.fees)), 0).label("fees"),
+        func.min(AccountTransaction.trade_date).label("first_date"),
+        func.max(AccountTransaction.trade_date).label("last_date"),
+    ]
+
+
+def filter_transactions(
+    stmt: Select,
+    *,
+    account_id: Optional[Any] = None,
+    user_id: Optional[Any] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    transaction_type: Optional[TransactionType] = None,
+    search: Optional[str] = None,
+) -> Select:
+    """
+    Apply the listing filters to a statement over AccountTransaction.
+
+    `search` matches the description or security symbol by substring (served
+    by the trigram indexes from 009_transaction_search.sql), the transaction
+    type by name, and the amount when the term is a number.
+    """
+    stmt = stmt.where(AccountTransaction.deleted_at.is_(None))
+    if account_id:
+        stmt = stmt.where(AccountTransaction.portfolio_id == account_id)
+    if user_id:
+        stmt = stmt.join(Account, AccountTransaction.portfolio_id == Account.id).where(
+            Account.user_id == user_id
+        )
+    if transaction_type:
+        stmt = stmt.where(AccountTransaction.transaction_type == transaction_type.value)
+    stmt = _date_range(stmt, start_date, end_date)
+
+    term = search.strip() if search else ""
+    if term:
+        pattern = "%" + re.sub(r"([\\%_])", r"\\\1", term) + "%"
+        matching_securities = select(Security.id).where(Security.symbol.ilike(pattern))
+        conditions = [
+            AccountTransaction.description.ilike(pattern),
+            AccountTransaction.security_id.in_(matching_securities),
+            AccountTransaction.transaction_type == term.lower(),
+        ]
+        try:
+            amount = Decimal(term)
+        except InvalidOperation:
+            amount = None
+        if amount is not None and amount.is_finite():
+            conditions.append(func.abs(AccountTransaction.amount) == abs(amount))
+        stmt = stmt.where(or_(*conditions))
+    return stmt
+
+
+def _date_range(stmt: Select, start_date: Optional[date], end_date: Optional[date]) -> Select:
+    if start_date:
+        stmt = stmt.where(AccountTransaction.trade_date >= start_date)
+    if end_date:
+        stmt = stmt.where(AccountTransaction.trade_date <= end_date)
+    return stmt
+
+
+def _activity_totals(row: Optional[Any]) -> Dict[str, Any]:
+    """Overall totals from an aggregate row (None when there are no transactions)."""
+    if row is None:
+        zero = Decimal("0")
+        return {
+            "total_transactions": 0,
+            "total_invested": zero,
+            "total_divested": zero,
+            "net_invested": zero,
+            "total_fees": zero,
+            "total_dividends": zero,
+        }
+    return {
+        "total_transactions": row.transactions,
+        "total_invested": row.invested,
+        "total_divested": row.divested,
+        "net_invested": row.invested - row.divested,
+        "total_fees": row.fees,
+        "total_dividends": row.dividends,
+    }
+
+
+def _date_bounds(row: Optional[Any]) -> Dict[str, Optional[date]]:
+    return {
+        "start": row.first_date if row else None,
+        "end": row.last_date if row else None,
+    }
+
+
+class TransactionImportError(Exception):
+    """Custom exception for transaction import errors."""
+
+    pass
+
+
+def _optional(value: Any, convert: Any) -> Any:
+    if value is None or value == "":
+        return None
+    return convert(value)
+
+
+def _as_date(value: Any) -> date:
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _column_values(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Model column values for the schema fields in `data`."""
+    values = {
+        SCHEMA_COLUMNS[field]: value.value if isinstance(value, Enum) else value
+        for field, value in data.items()
+        if field in SCHEMA_COLUMNS
+    }
+    if "fees" in values and values["fees"] is None:
+        values["fees"] = Decimal("0")
+    return values
+
+
+def _fallback_external_id(record: Tuple[Any, ...], occurrences: Counter) -> str:
+    """
+    Deterministic dedup key for a row without a provider id.
+
+    Hashes the account, trade date, security, type, quantity and amount; the
+    nth identical row of a file gets its own key, so genuine repeats in one
+    file are kept while uploading the same file again inserts nothing.
+    """
+    portfolio_id, security_id, transaction_type = record[1:4]
+    quantity, amount, trade_date = record[5], record[7], record[10]
+    identity = "|".join(
+        str(value)
+        for value in (
+            portfolio_id,
+            trade_date,
+            security_id,
+            transaction_type,
+            quantity.normalize() if quantity is not None else None,
+            amount.normalize(),
+        )
+    )
+    occurrences[identity] += 1
+    digest = hashlib.sha1(f"{identity}|{occurrences[identity]}".encode()).hexdigest()
+    return f"{IMPORT_KEY_PREFIX}{digest}"
+
+
+def _import_record(data: Dict[str, Any], line: int, occurrences: Counter) -> Tuple[Any, ...]:
+    """A COPY record in IMPORT_COLUMNS order from one import row."""
+    try:
+        portfolio_id = data.get("portfolio_id") or data.get("account_id")
+        if not portfolio_id:
+            raise ValueError("portfolio_id is required")
+        record = (
+            uuid.uuid4(),
+            _optional(portfolio_id, lambda v: uuid.UUID(str(v))),
+            _optional(data.get("security_id"), lambda v: uuid.UUID(str(v))),
+            TransactionType(data["transaction_type"]).value,
+            _optional(data.get("transaction_subtype"), str),
+            _optional(data.get("quantity"), lambda v: Decimal(str(v))),
+            _optional(data.get("price"), lambda v: Decimal(str(v))),
+            Decimal(str(data["amount"])),
+            Decimal(str(data.get("fees") or 0)),
+            str(data.get("currency") or "USD")[:3],
+            _as_date(data["trade_date"]),
+            _optional(data.get("settlement_date"), _as_date),
+            _optional(data.get("description"), str),
+        )
+        external_id = _optional(data.get("external_transaction_id"), str)
+        return record + (external_id or _fallback_external_id(record, occurrences),)
+    except (KeyError, TypeError, ValueError, InvalidOperation) as e:
+        raise TransactionImportError(f"Row {line}: invalid transaction ({e!r})") from e
 
 
 class TransactionRepository:
@@ -14,252 +274,301 @@ class TransactionRepository:
 
     def __init__(self, db: AsyncSession):
         self.db = db
+        self.positions = PositionService(db)
+
+    async def get(self, transaction_id: Any) -> Optional[AccountTransaction]:
+        """Get a transaction by ID."""
+        result = await self.db.execute(
+            select(AccountTransaction).where(
+                AccountTransaction.id == transaction_id,
+                AccountTransaction.deleted_at.is_(None),
+            )
+        )
+        return result.scalar_one_or_none()
+
+    async def create(self, obj_in) -> AccountTransaction:
+        """Create a transaction and apply it to the account's positions."""
+        try:
+            data = obj_in.model_dump() if hasattr(obj_in, "model_dump") else dict(obj_in)
+            values = _column_values(data)
+            # Provider feeds only report the as-of date for some transactions
+            if values.get("trade_date") is None:
+                values["trade_date"] = data.get("as_of_date")
+            transaction = AccountTransaction(**values)
+            self.db.add(transaction)
+            await self.db.flush()
+
+            await self.positions.on_transaction_created(transaction)
+            await self.db.commit()
+            await self.db.refresh(transaction)
+            return transaction
+
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"Failed to create transaction: {str(e)}")
+            raise
+
+    async def update(self, db_obj: AccountTransaction, obj_in) -> AccountTransaction:
+        """Update a transaction and recompute the positions it touches."""
+        try:
+            if hasattr(obj_in, "model_dump"):
+                obj_data = obj_in.model_dump(exclude_unset=True)
+            else:
+                obj_data = dict(obj_in)
+
+            before = (db_obj.security_id, db_obj.trade_date)
+            for column, value in _column_values(obj_data).items():
+                if column == "trade_date" and value is None:
+                    continue
+                setattr(db_obj, column, value)
+            await self.db.flush()
+
+            await self.positions.on_transactions_changed(
+                db_obj.portfolio_id,
+                list({before[0], db_obj.security_id}),
+                min(before[1], db_obj.trade_date),
+            )
+            await self.db.commit()
+            await self.db.refresh(db_obj)
+            return db_obj
+
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"Failed to update transaction {db_obj.id}: {str(e)}")
+            raise
+
+    async def delete(self, transaction_id: Any) -> bool:
+        """Soft delete a transaction and recompute its position."""
+        transaction = await self.get(transaction_id)
+        if not transaction:
+            return False
+        try:
+            transaction.deleted_at = func.now()
+            await self.db.flush()
+
+            await self.positions.on_transactions_changed(
+                transaction.portfolio_id, [transaction.security_id], transaction.trade_date
+            )
+            await self.db.commit()
+            return True
+
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"Failed to delete transaction {transaction_id}: {str(e)}")
+            raise
 
-    def get_by_account(
+    async def get_by_account(
         self,
-        account_id: str,
-        skip: int = 0,
+        account_id: Any,
         limit: int = 100,
+        after: Optional[TransactionKey] = None,
         start_date: Optional[date] = None,
         end_date: Optional[date] = None,
-        transaction_category: Optional[str] = None,
-    ) -> List[AccountTransaction]:
-        """Get transactions for a specific account with filtering."""
-        stmt = (
-            select(AccountTransaction)
-            .options(joinedload(AccountTransaction.security))
-            .where(AccountTransaction.account_id == account_id)
-        )
-
-        if start_date:
-            stmt = stmt.where(AccountTransaction.trade_date >= start_date)
-        if end_date:
-            stmt = stmt.where(AccountTransaction.trade_date <= end_date)
-        if transaction_category:
-            stmt = stmt.where(AccountTransaction.transaction_category == transaction_category)
-
-        stmt = stmt.order_by(
-            desc(AccountTransaction.trade_date), desc(AccountTransaction.created_at)
+        transaction_type: Optional[TransactionType] = None,
+        search: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Get a page of an account's transactions, newest first."""
+        stmt = filter_transactions(
+            select(AccountTransaction),
+            account_id=account_id,
+            start_date=start_date,
+            end_date=end_date,
+            transaction_type=transaction_type,
+            search=search,
         )
-        stmt = stmt.offset(skip).limit(limit)
-
-        result = self.db.execute(stmt)
-        return list(result.scalars().all())
+        return await self._page(stmt, after, limit)
 
-    def get_by_user(
+    async def get_by_user(
         self,
-        user_id: str,
-        skip: int = 0,
+        user_id: Any,
         limit: int = 100,
+        after: Optional[TransactionKey] = None,
         start_date: Optional[date] = None,
         end_date: Optional[date] = None,
-    ) -> List[AccountTransaction]:
-        """Get transactions for all users master."""
-        from app.account.master.model import PortfolioAccount
-
-        stmt = (
-            select(AccountTransaction)
-            .join(PortfolioAccount, AccountTransaction.account_id == PortfolioAccount.id)
-            .options(joinedload(AccountTransaction.security))
-            .where(PortfolioAccount.user_id == user_id)
+        transaction_type: Optional[TransactionType] = None,
+        search: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Get a page of transactions across all of a user's accounts, newest first."""
+        stmt = filter_transactions(
+            select(AccountTransaction),
+            user_id=user_id,
+            start_date=start_date,
+            end_date=end_date,
+            transaction_type=transaction_type,
+            search=search,
         )
+        return await self._page(stmt, after, limit)
 
-        if start_date:
-            stmt = stmt.where(AccountTransaction.trade_date >= start_date)
-        if end_date:
-            stmt = stmt.where(AccountTransaction.trade_date <= end_date)
+    async def _page(
+        self, stmt: Select, after: Optional[TransactionKey], limit: int
+    ) -> Dict[str, Any]:
+        """
+        Seek past `after` instead of OFFSET so every page costs the same.
 
-        stmt = stmt.order_by(
-            desc(AccountTransaction.trade_date), desc(AccountTransaction.created_at)
-        )
-        stmt = stmt.offset(skip).limit(limit)
+        One extra row is read to tell whether another page follows; next_after
+        is the sort key of the last row returned.
+        """
+        if after is not None:
+            stmt = stmt.where(tuple_(*SORT_KEY) < tuple_(*after))
+        stmt = stmt.order_by(*(desc(column) for column in SORT_KEY)).limit(limit + 1)
 
-        result = self.db.execute(stmt)
-        return list(result.scalars().all())
+        result = await self.db.execute(stmt)
+        transactions = list(result.scalars().all())
+        next_after = None
+        if len(transactions) > limit:
+            transactions = transactions[:limit]
+            last = transactions[-1]
+            next_after = (last.trade_date, last.created_at, last.id)
 
-    def get_transaction_summary(
+        return {"transactions": transactions, "next_after": next_after}
+
+    async def get_transaction_summary(
         self,
         account_id: str,
         start_date: Optional[date] = None,
         end_date: Optional[date] = None,
     ) -> Dict[str, Any]:
         """Get transaction summary for an account."""
-        stmt = select(AccountTransaction).where(AccountTransaction.account_id == account_id)
-
-        if start_date:
-            stmt = stmt.where(AccountTransaction.trade_date >= start_date)
-        if end_date:
-            stmt = stmt.where(AccountTransaction.trade_date <= end_date)
-
-        result = self.db.execute(stmt)
-        transactions = list(result.scalars().all())
+        # One pass over the account's rows: per type, per symbol and overall
+        stmt = (
+            select(
+                AccountTransaction.transaction_type,
+                Security.symbol,
+                func.grouping(AccountTransaction.transaction_type, Security.symbol).label(
+                    "grouping"
+                ),
+                *_activity_columns(),
+            )
+            .outerjoin(Security, AccountTransaction.security_id == Security.id)
+            .where(
+                AccountTransaction.portfolio_id == account_id,
+                AccountTransaction.deleted_at.is_(None),
+            )
+            .group_by(
+                func.grouping_sets(
+                    tuple_(AccountTransaction.transaction_type),
+                    tuple_(Security.symbol),
+                    tuple_(),
+                )
+            )
+        )
+        stmt = _date_range(stmt, start_date, end_date)
 
-        # Initialize counters
-        total_invested = Decimal("0")
-        total_divested = Decimal("0")
-        total_fees = Decimal("0")
-        total_dividends = Decimal("0")
-        total_interest = Decimal("0")
+        result = await self.db.execute(stmt)
+        totals = None
         by_category = {}
         by_security = {}
-
-        for t in transactions:
-            category = t.transaction_category
-            by_category[category] = by_category.get(category, 0) + 1
-
-            if t.security_id:
-                security_symbol = t.security.symbol if t.security else "Unknown"
-                by_security[security_symbol] = by_security.get(security_symbol, 0) + 1
-
-            # Calculate totals based on transaction type
-            if t.transaction_side == "buy":
-                total_invested += abs(t.amount)
-            elif t.transaction_side == "sell":
-                total_divested += abs(t.amount)
-            elif category == "dividend":
-                total_dividends += abs(t.amount)
-            elif category == "interest":
-                total_interest += abs(t.amount)
-
-            # Add fees
-            if t.fees:
-                total_fees += abs(t.fees)
+        for row in result:
+            if row.grouping == GROUPED_BY_FIRST:
+                by_category[row.transaction_type] = row.transactions
+            elif row.grouping == GROUPED_BY_SECOND:
+                # Cash-only transactions have no security
+                if row.symbol is not None:
+                    by_security[row.symbol] = row.transactions
+            else:
+                totals = row
 
         # Recent transactions (last 10)
-        recent_transactions = sorted(transactions, key=lambda x: x.trade_date, reverse=True)[:10]
+        recent = await self.db.execute(
+            _date_range(
+                select(AccountTransaction).where(
+                    AccountTransaction.portfolio_id == account_id,
+                    AccountTransaction.deleted_at.is_(None),
+                ),
+                start_date,
+                end_date,
+            )
+            .order_by(desc(AccountTransaction.trade_date), desc(AccountTransaction.created_at))
+            .limit(10)
+        )
 
         return {
             "account_id": account_id,
-            "total_transactions": len(transactions),
-            "total_invested": total_invested,
-            "total_divested": total_divested,
-            "net_invested": total_invested - total_divested,
-            "total_fees": total_fees,
-            "total_dividends": total_dividends,
-            "total_interest": total_interest,
+            **_activity_totals(totals),
+            "total_interest": totals.interest if totals else Decimal("0"),
             "by_category": by_category,
             "by_security": by_security,
-            "date_range": {
-                "start": (min(t.trade_date for t in transactions) if transactions else None),
-                "end": (max(t.trade_date for t in transactions) if transactions else None),
-            },
-            "recent_transactions": recent_transactions,
+            "date_range": _date_bounds(totals),
+            "recent_transactions": list(recent.scalars().all()),
         }
 
-    def get_portfolio_summary(
+    async def get_portfolio_summary(
         self,
         user_id: str,
         start_date: Optional[date] = None,
         end_date: Optional[date] = None,
     ) -> Dict[str, Any]:
         """Get transaction summary across all users master."""
-        from app.account.master.model import PortfolioAccount
-
+        # ROLLUP gives one row per account plus the grand total
         stmt = (
-            select(AccountTransaction)
-            .join(PortfolioAccount, AccountTransaction.account_id == PortfolioAccount.id)
-            .where(PortfolioAccount.user_id == user_id)
+            select(
+                AccountTransaction.portfolio_id,
+                func.grouping(AccountTransaction.portfolio_id).label("grouping"),
+                *_activity_columns(),
+            )
+            .join(Account, AccountTransaction.portfolio_id == Account.id)
+            .where(Account.user_id == user_id, AccountTransaction.deleted_at.is_(None))
+            .group_by(func.rollup(AccountTransaction.portfolio_id))
         )
+        stmt = _date_range(stmt, start_date, end_date)
 
-        if start_date:
-            stmt = stmt.where(AccountTransaction.trade_date >= start_date)
-        if end_date:
-            stmt = stmt.where(AccountTransaction.trade_date <= end_date)
-
-        result = self.db.execute(stmt)
-        transactions = list(result.scalars().all())
-
-        # Group by account
+        result = await self.db.execute(stmt)
+        totals = None
         by_account = {}
-        total_invested = Decimal("0")
-        total_divested = Decimal("0")
-        total_fees = Decimal("0")
-        total_dividends = Decimal("0")
-
-        for t in transactions:
-            account_id = str(t.account_id)
-            if account_id not in by_account:
-                by_account[account_id] = {
-                    "transactions": 0,
-                    "invested": Decimal("0"),
-                    "divested": Decimal("0"),
-                    "fees": Decimal("0"),
-                    "dividends": Decimal("0"),
-                }
-
-            by_account[account_id]["transactions"] += 1
-
-            if t.transaction_side == "buy":
-                by_account[account_id]["invested"] += abs(t.amount)
-                total_invested += abs(t.amount)
-            elif t.transaction_side == "sell":
-                by_account[account_id]["divested"] += abs(t.amount)
-                total_divested += abs(t.amount)
-            elif t.transaction_category == "dividend":
-                by_account[account_id]["dividends"] += abs(t.amount)
-                total_dividends += abs(t.amount)
-
-            if t.fees:
-                by_account[account_id]["fees"] += abs(t.fees)
-                total_fees += abs(t.fees)
+        for row in result:
+            if row.grouping:
+                totals = row
+                continue
+            by_account[str(row.portfolio_id)] = {
+                "transactions": row.transactions,
+                "invested": row.invested,
+                "divested": row.divested,
+                "fees": row.fees,
+                "dividends": row.dividends,
+            }
 
         return {
             "user_id": user_id,
-            "total_transactions": len(transactions),
-            "total_invested": total_invested,
-            "total_divested": total_divested,
-            "net_invested": total_invested - total_divested,
-            "total_fees": total_fees,
-            "total_dividends": total_dividends,
+            **_activity_totals(totals),
             "by_account": by_account,
-            "date_range": {
-                "start": (min(t.trade_date for t in transactions) if transactions else None),
-                "end": (max(t.trade_date for t in transactions) if transactions else None),
-            },
+            "date_range": _date_bounds(totals),
         }
 
-    def get_monthly_activity(
+    async def get_monthly_activity(
         self, account_id: str, year: int, month: Optional[int] = None
     ) -> Dict[str, Any]:
         """Get monthly transaction activity for an account."""
-        stmt = select(AccountTransaction).where(
-            and_(
-                AccountTransaction.account_id == account_id,
-                extract("year", AccountTransaction.trade_date) == year,
-            )
-        )
-
+        # Plain date bounds rather than EXTRACT so the (portfolio_id, trade_date) index applies
         if month:
-            stmt = stmt.where(extract("month", AccountTransaction.trade_date) == month)
-
-        result = self.db.execute(stmt)
-        transactions = list(result.scalars().all())
-
-        # Group by month
-        monthly_data = {}
-        for t in transactions:
-            month_key = f"{t.trade_date.year}-{t.trade_date.month:02d}"
-
-            if month_key not in monthly_data:
-                monthly_data[month_key] = {
-                    "transactions": 0,
-                    "invested": Decimal("0"),
-                    "divested": Decimal("0"),
-                    "dividends": Decimal("0"),
-                    "fees": Decimal("0"),
-                }
-
-            monthly_data[month_key]["transactions"] += 1
+            start_date = date(year, month, 1)
+            end_date = date(year + month // 12, month % 12 + 1, 1)
+        else:
+            start_date, end_date = date(year, 1, 1), date(year + 1, 1, 1)
 
-            if t.transaction_side == "buy":
-                monthly_data[month_key]["invested"] += abs(t.amount)
-            elif t.transaction_side == "sell":
-                monthly_data[month_key]["divested"] += abs(t.amount)
-            elif t.transaction_category == "dividend":
-                monthly_data[month_key]["dividends"] += abs(t.amount)
+        period = func.date_trunc("month", AccountTransaction.trade_date).label("period")
+        stmt = (
+            select(period, *_activity_columns())
+            .where(
+                AccountTransaction.portfolio_id == account_id,
+                AccountTransaction.trade_date >= start_date,
+                AccountTransaction.trade_date < end_date,
+                AccountTransaction.deleted_at.is_(None),
+            )
+            .group_by(period)
+            .order_by(period)
+        )
 
-            if t.fees:
-                monthly_data[month_key]["fees"] += abs(t.fees)
+        result = await self.db.execute(stmt)
+        monthly_data = {
+            f"{row.period.year}-{row.period.month:02d}": {
+                "transactions": row.transactions,
+                "invested": row.invested,
+                "divested": row.divested,
+                "dividends": row.dividends,
+                "fees": row.fees,
+            }
+            for row in result
+        }
 
         return {
             "account_id": account_id,
@@ -298,80 +607,145 @@ class TransactionRepository:
         result = self.db.execute(stmt)
         return list(result.scalars().all())
 
-    def calculate_realized_gains_losses(
+    async def calculate_realized_gains_losses(
         self,
         account_id: str,
         security_id: Optional[str] = None,
         tax_year: Optional[int] = None,
+        method: LotMethod = LotMethod.FIFO,
     ) -> Dict[str, Any]:
-        """Calculate realized gains/losses for tax reporting."""
-        stmt = select(AccountTransaction).where(
-            and_(
-                AccountTransaction.account_id == account_id,
-                AccountTransaction.transaction_side == "sell",
-            )
+        """Calculate realized gains/losses for tax reporting from the account's tax lots."""
+        realized = await TaxLotService(self.db).get_realized_gains(
+            account_id, security_id=security_id, tax_year=tax_year, method=method
         )
 
-        if security_id:
-            stmt = stmt.where(AccountTransaction.security_id == security_id)
-
-        if tax_year:
-            stmt = stmt.where(extract("year", AccountTransaction.trade_date) == tax_year)
-
-        result = self.db.execute(stmt)
-        sell_transactions = list(result.scalars().all())
-
+        by_term = {
+            term.value: {"proceeds": Decimal("0"), "cost_basis": Decimal("0"), "gain": Decimal("0")}
+            for term in HoldingTerm
+        }
         realized_gains = Decimal("0")
         realized_losses = Decimal("0")
-        total_proceeds = Decimal("0")
-        total_cost_basis = Decimal("0")
-
-        for sell_tx in sell_transactions:
-            proceeds = abs(sell_tx.amount)
-            total_proceeds += proceeds
-
-            # For proper cost basis calculation, you'd need to implement
-            # FIFO, LIFO, or specific lot identification methods
-            # This is a simplified calculation
-            if sell_tx.price and sell_tx.quantity:
-                cost_basis = abs(sell_tx.quantity * sell_tx.price)
-                total_cost_basis += cost_basis
-
-                gain_loss = proceeds - cost_basis
-                if gain_loss > 0:
-                    realized_gains += gain_loss
-                else:
-                    realized_losses += abs(gain_loss)
-
-        net_realized = realized_gains - realized_losses
+        for row in realized:
+            term = by_term[row.term]
+            term["proceeds"] += row.proceeds
+            term["cost_basis"] += row.cost_basis
+            term["gain"] += row.gain
+            if row.gain > 0:
+                realized_gains += row.gain
+            else:
+                realized_losses += abs(row.gain)
 
         return {
             "account_id": account_id,
             "security_id": security_id,
             "tax_year": tax_year,
-            "total_sells": len(sell_transactions),
-            "total_proceeds": total_proceeds,
-            "total_cost_basis": total_cost_basis,
+            "lot_method": method.value,
+            "total_sells": len({row.sell_transaction_id for row in realized}),
+            "total_proceeds": sum((t["proceeds"] for t in by_term.values()), Decimal("0")),
+            "total_cost_basis": sum((t["cost_basis"] for t in by_term.values()), Decimal("0")),
             "realized_gains": realized_gains,
             "realized_losses": realized_losses,
-            "net_realized": net_realized,
-            "transactions": sell_transactions,
+            "net_realized": realized_gains - realized_losses,
+            "by_term": by_term,
+            "realized": [
+                {
+                    "security_id": str(row.security_id),
+                    "sell_transaction_id": (
+                        str(row.sell_transaction_id) if row.sell_transaction_id else None
+                    ),
+                    "open_date": row.open_date,
+                    "close_date": row.close_date,
+                    "quantity": row.quantity,
+                    "proceeds": row.proceeds,
+                    "cost_basis": row.cost_basis,
+                    "gain": row.gain,
+                    "term": row.term,
+                }
+                for row in realized
+            ],
         }
 
-    def bulk_import_transactions(
-        self, transactions_data: List[Dict[str, Any]]
-    ) -> List[AccountTransaction]:
-        """Bulk import transactions efficiently."""
-        transactions = []
-
-        for tx_data in transactions_data:
-            transaction = AccountTransaction(**tx_data)
-            transactions.append(transaction)
-
-        self.db.add_all(transactions)
-        self.db.commit()
-
-        for transaction in transactions:
-            self.db.refresh(transaction)
-
-        return transactions
+    async def bulk_import_transactions(
+        self, transactions_data: Iterable[Dict[str, Any]], return_ids: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Bulk import transactions through COPY into a staging table.
+
+        Rows whose (portfolio_id, external_transaction_id) already exists are
+        skipped by ON CONFLICT; rows without a provider id are keyed on a hash
+        of their contents so re-uploading a file does not duplicate them.
+        Positions are recomputed once per account for the securities touched;
+        tax lots pick the rows up on their next staleness check. IDs of
+        inserted rows are returned only when asked.
+        """
+        occurrences: Counter = Counter()
+        records = (
+            _import_record(row, line, occurrences)
+            for line, row in enumerate(transactions_data, start=1)
+        )
+        try:
+            await self.db.execute(
+                text(
+                    f"CREATE TEMP TABLE {IMPORT_TABLE} "
+                    "(LIKE portfolio_transactions INCLUDING DEFAULTS) ON COMMIT DROP"
+                )
+            )
+            connection = await self.db.connection()
+            raw = await connection.get_raw_connection()
+            status = await raw.driver_connection.copy_records_to_table(
+                IMPORT_TABLE, records=records, columns=IMPORT_COLUMNS
+            )
+            received = int(status.split()[-1])
+
+            columns = ", ".join(IMPORT_COLUMNS)
+            ids = ", array_agg(id) AS ids" if return_ids else ""
+            result = await self.db.execute(
+                text(
+                    f"""
+                    WITH inserted AS (
+                        INSERT INTO portfolio_transactions ({columns})
+                        SELECT {columns} FROM {IMPORT_TABLE}
+                        ON CONFLICT (portfolio_id, external_transaction_id) DO NOTHING
+                        RETURNING id, portfolio_id, security_id, trade_date
+                    )
+                    SELECT portfolio_id, security_id, min(trade_date) AS since,
+                           count(*) AS inserted{ids}
+                    FROM inserted
+                    GROUP BY portfolio_id, security_id
+                    """
+                )
+            )
+            changes = result.all()
+
+            touched: Dict[Any, List[Any]] = {}
+            since: Dict[Any, date] = {}
+            for row in changes:
+                touched.setdefault(row.portfolio_id, []).append(row.security_id)
+                since[row.portfolio_id] = min(since.get(row.portfolio_id, row.since), row.since)
+            for portfolio_id, security_ids in touched.items():
+                await self.positions.on_transactions_changed(
+                    portfolio_id, security_ids, since[portfolio_id]
+                )
+            await self.db.commit()
+
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"Failed to bulk import transactions: {str(e)}")
+            raise
+
+        imported = sum(row.inserted for row in changes)
+        logger.info(
+            f"Bulk imported {imported} of {received} transactions "
+            f"into {len(touched)} accounts"
+        )
+        summary = {
+            "received": received,
+            "imported": imported,
+            "skipped": received - imported,
+            "account_ids": [str(portfolio_id) for portfolio_id in touched],
+        }
+        if return_ids:
+            summary["transaction_ids"] = [
+                str(transaction_id) for row in changes for transaction_id in row.ids
+            ]
+        return summary
@@ -1,15 +1,26 @@
 import logging
 from datetime import UTC, date, datetime
-from decimal import Decimal
 from typing import Annotated
 from typing import Any, Dict, List, Optional
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, Form, HTTPException, status
 from fastapi import File, UploadFile, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.account.gains.service import TaxReportService
+from app.account.lots.enums import LotMethod
 from app.account.master.repository import AccountRepository
+from app.account.positions.service import PositionService
+from app.account.transactions.enums import TransactionExportFormat, TransactionType
+from app.account.transactions.export import MEDIA_TYPES as EXPORT_MEDIA_TYPES
+from app.account.transactions.export import stream_transactions
+from app.account.transactions.repository import (
+    TransactionImportError,
+    TransactionKey,
+    TransactionRepository,
+)
 from app.account.transactions.schemas import (
     TransactionCreate,
     TransactionResponse,
@@ -17,6 +28,7 @@ from app.account.transactions.schemas import (
 )
 from app.auth.dependencies import get_current_user
 from app.core.database import get_db
+from app.core.pagination import decode_cursor, encode_cursor
 from app.integrations.csv.service import CSVProcessorResult
 from app.integrations.csv.service import get_csv_processor
 from app.user.logs.repository import UserLogRepository
@@ -80,7 +92,7 @@ async def import_transactions_csv(
     return result.to_dict()
 
 
-@router.get("/", response_model=List[TransactionResponse])
+@router.get("/")
 async def get_user_transactions(
     *,
     db: AsyncSession = Depends(get_db),
@@ -88,52 +100,123 @@ async def get_user_transactions(
     account_id: Optional[str] = Query(None, description="Filter by account ID"),
     start_date: Optional[date] = Query(None, description="Start date filter"),
     end_date: Optional[date] = Query(None, description="End date filter"),
-    transaction_category: Optional[str] = Query(
-        None, description="Filter by transaction security_type"
+    transaction_type: Optional[TransactionType] = Query(
+        None, description="Filter by transaction type"
     ),
-    skip: int = Query(0, description="Skip records", ge=0),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     limit: int = Query(100, description="Limit records", ge=1, le=500),
 ):
-    """Get transactions for the current users with filtering and pagination."""
+    """Get transactions for the current users with filtering and keyset pagination."""
+    if account_id:
+        await _get_owned_account(db, current_user.id, account_id)
+    after = _decode_after(cursor)
+
     try:
-        if account_id:
-            # Verify users owns the account
-            account = await AccountRepository.get_by_user_and_id(
-                db, user_id=current_user.id, account_id=account_id
-            )
-            if not account:
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail="Access denied or account not found",
-                )
+        page = await _transaction_page(
+            db,
+            current_user.id,
+            account_id,
+            after=after,
+            limit=limit,
+            start_date=start_date,
+            end_date=end_date,
+            transaction_type=transaction_type,
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error retrieving transactions: {str(e)}",
+        )
 
-            transactions = await transaction_crud.get_by_account(
-                db,
-                account_id=account_id,
-                skip=skip,
-                limit=limit,
-                start_date=start_date,
-                end_date=end_date,
-                transaction_category=transaction_category,
-            )
-        else:
-            # Get transactions across all users master
-            transactions = await transaction_crud.get_by_user(
-                db,
-                user_id=current_user.id,
-                skip=skip,
-                limit=limit,
-                start_date=start_date,
-                end_date=end_date,
-            )
+    return {
+        "transactions": [
+            TransactionResponse.model_validate(tx, from_attributes=True)
+            for tx in page["transactions"]
+        ],
+        "next_cursor": _encode_after(page["next_after"]),
+    }
 
-        return [TransactionResponse.model_validate(tx, from_attributes=True) for tx in transactions]
+
+@router.get("/export")
+async def export_transactions(
+    *,
+    db: AsyncSession = Depends(get_db),
+    current_user: Annotated[User, Depends(get_current_user)] = None,
+    output_format: TransactionExportFormat = Query(
+        TransactionExportFormat.NDJSON, alias="format", description="ndjson or csv"
+    ),
+    account_id: Optional[str] = Query(None, description="Filter by account ID"),
+    start_date: Optional[date] = Query(None, description="Start date filter"),
+    end_date: Optional[date] = Query(None, description="End date filter"),
+    transaction_type: Optional[TransactionType] = Query(
+        None, description="Filter by transaction type"
+    ),
+    q: Optional[str] = Query(None, description="Search term", min_length=2),
+):
+    """Stream every matching transaction without paging."""
+    if account_id:
+        await _get_owned_account(db, current_user.id, account_id)
+
+    filename = f"transactions_{date.today().isoformat()}.{output_format.value}"
+    return StreamingResponse(
+        stream_transactions(
+            current_user.id,
+            output_format,
+            account_id=account_id,
+            start_date=start_date,
+            end_date=end_date,
+            transaction_type=transaction_type,
+            search=q,
+        ),
+        media_type=EXPORT_MEDIA_TYPES[output_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/search")
+async def search_transactions(
+    *,
+    db: AsyncSession = Depends(get_db),
+    current_user: Annotated[User, Depends(get_current_user)] = None,
+    q: str = Query(..., description="Search term", min_length=2),
+    account_id: Optional[str] = Query(None, description="Filter by account"),
+    start_date: Optional[date] = Query(None, description="Start date"),
+    end_date: Optional[date] = Query(None, description="End date"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(50, description="Maximum results", ge=1, le=200),
+):
+    """Search transactions by description, symbol, type or amount."""
+    if account_id:
+        await _get_owned_account(db, current_user.id, account_id)
+    after = _decode_after(cursor)
+
+    try:
+        page = await _transaction_page(
+            db,
+            current_user.id,
+            account_id,
+            after=after,
+            limit=limit,
+            start_date=start_date,
+            end_date=end_date,
+            search=q,
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error retrieving transactions: {str(e)}",
+            detail=f"Error searching transactions: {str(e)}",
         )
 
+    transactions = page["transactions"]
+    return {
+        "transactions": [
+            TransactionResponse.model_validate(tx, from_attributes=True) for tx in transactions
+        ],
+        "query": q,
+        "count": len(transactions),
+        "next_cursor": _encode_after(page["next_after"]),
+    }
+
 
 @router.get("/{transaction_id}", response_model=TransactionResponse)
 async def get_transaction(
@@ -143,7 +226,7 @@ async def get_transaction(
     transaction_id: str,
 ):
     """Get a specific transaction by ID."""
-    transaction = await transaction_crud.get(db, id=transaction_id)
+    transaction = await TransactionRepository(db).get(transaction_id)
 
     if not transaction:
         raise HTTPException(
@@ -151,8 +234,8 @@ async def get_transaction(
         )
 
     # Verify users owns the account
-    account = await AccountRepository.get_by_user_and_id(
-        db, user_id=current_user.id, account_id=str(transaction.account_id)
+    account = await AccountRepository(db).get_by_user_and_id(
+        user_id=current_user.id, account_id=transaction.portfolio_id
     )
 
     if not account:
@@ -170,8 +253,8 @@ async def create_transaction(
 ):
     """Create a new transaction."""
     # Verify users owns the account
-    account = await AccountRepository.get_by_user_and_id(
-        db, user_id=current_user.id, account_id=str(transaction_data.account_id)
+    account = await AccountRepository(db).get_by_user_and_id(
+        user_id=current_user.id, account_id=transaction_data.account_id
     )
 
     if not account:
@@ -181,16 +264,15 @@ async def create_transaction(
         )
 
     try:
-        transaction = await transaction_crud.create(db, obj_in=transaction_data)
+        transaction = await TransactionRepository(db).create(transaction_data)
 
         # Log the creation
-        await UserLogRepository.log_user_action(
-            db,
+        await UserLogRepository(db).log_user_action(
             user_id=current_user.id,
             action="create",
             target_category="transaction",
             target_id=str(transaction.id),
-            description=f"Created {transaction.transaction_category} transaction",
+            description=f"Created {transaction.transaction_type} transaction",
         )
 
         return TransactionResponse.model_validate(transaction, from_attributes=True)
@@ -210,7 +292,7 @@ async def update_transaction(
     transaction_update: TransactionUpdate,
 ):
     """Update an existing transaction."""
-    transaction = await transaction_crud.get(db, id=transaction_id)
+    transaction = await TransactionRepository(db).get(transaction_id)
 
     if not transaction:
         raise HTTPException(
@@ -218,21 +300,20 @@ async def update_transaction(
         )
 
     # Verify users owns the account
-    account = await AccountRepository.get_by_user_and_id(
-        db, user_id=current_user.id, account_id=str(transaction.account_id)
+    account = await AccountRepository(db).get_by_user_and_id(
+        user_id=current_user.id, account_id=transaction.portfolio_id
     )
 
     if not account:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Access denied")
 
     try:
-        updated_transaction = await transaction_crud.update(
-            db, db_obj=transaction, obj_in=transaction_update
+        updated_transaction = await TransactionRepository(db).update(
+            transaction, transaction_update
         )
 
         # Log the update
-        await UserLogRepository.log_data_change(
-            db,
+        await UserLogRepository(db).log_data_change(
             user_id=current_user.id,
             action="update",
             target_category="transaction",
@@ -256,7 +337,7 @@ async def delete_transaction(
     transaction_id: str,
 ):
     """Delete a transaction."""
-    transaction = await transaction_crud.get(db, id=transaction_id)
+    transaction = await TransactionRepository(db).get(transaction_id)
 
     if not transaction:
         raise HTTPException(
@@ -264,24 +345,23 @@ async def delete_transaction(
         )
 
     # Verify users owns the account
-    account = await AccountRepository.get_by_user_and_id(
-        db, user_id=current_user.id, account_id=str(transaction.account_id)
+    account = await AccountRepository(db).get_by_user_and_id(
+        user_id=current_user.id, account_id=transaction.portfolio_id
     )
 
     if not account:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Access denied")
 
     try:
-        await transaction_crud.delete(db, id=transaction_id)
+        await TransactionRepository(db).delete(transaction_id)
 
         # Log the deletion
-        await UserLogRepository.log_user_action(
-            db,
+        await UserLogRepository(db).log_user_action(
             user_id=current_user.id,
             action="delete",
             target_category="transaction",
             target_id=transaction_id,
-            description=f"Deleted {transaction.transaction_category} transaction",
+            description=f"Deleted {transaction.transaction_type} transaction",
         )
 
         return {
@@ -307,8 +387,8 @@ async def get_account_transaction_summary(
 ):
     """Get transaction summary for a specific account."""
     # Verify users owns the account
-    account = await AccountRepository.get_by_user_and_id(
-        db, user_id=current_user.id, account_id=account_id
+    account = await AccountRepository(db).get_by_user_and_id(
+        user_id=current_user.id, account_id=account_id
     )
 
     if not account:
@@ -318,8 +398,8 @@ async def get_account_transaction_summary(
         )
 
     try:
-        summary = await transaction_crud.get_transaction_summary(
-            db, account_id=account_id, start_date=start_date, end_date=end_date
+        summary = await TransactionRepository(db).get_transaction_summary(
+            account_id=account_id, start_date=start_date, end_date=end_date
         )
         return summary
     except Exception as e:
@@ -339,8 +419,8 @@ async def get_portfolio_transaction_summary(
 ):
     """Get transaction summary across all users master."""
     try:
-        summary = await transaction_crud.get_portfolio_summary(
-            db, user_id=current_user.id, start_date=start_date, end_date=end_date
+        summary = await TransactionRepository(db).get_portfolio_summary(
+            user_id=current_user.id, start_date=start_date, end_date=end_date
         )
         return summary
     except Exception as e:
@@ -361,8 +441,8 @@ async def get_monthly_transaction_activity(
 ):
     """Get monthly transaction activity for an account."""
     # Verify users owns the account
-    account = await AccountRepository.get_by_user_and_id(
-        db, user_id=current_user.id, account_id=account_id
+    account = await AccountRepository(db).get_by_user_and_id(
+        user_id=current_user.id, account_id=account_id
     )
 
     if not account:
@@ -372,8 +452,8 @@ async def get_monthly_transaction_activity(
         )
 
     try:
-        activity = await transaction_crud.get_monthly_activity(
-            db, account_id=account_id, year=year, month=month
+        activity = await TransactionRepository(db).get_monthly_activity(
+            account_id=account_id, year=year, month=month
         )
         return activity
     except Exception as e:
@@ -383,6 +463,49 @@ async def get_monthly_transaction_activity(
         )
 
 
+@router.get("/{account_id}/positions")
+async def get_account_positions(
+    *,
+    db: AsyncSession = Depends(get_db),
+    current_user: Annotated[User, Depends(get_current_user)] = None,
+    account_id: str,
+    as_of_date: Optional[date] = Query(None, description="Positions at the close of this date"),
+):
+    """Get positions derived from the account's transactions, now or as of a date."""
+    # Verify users owns the account
+    account = await AccountRepository(db).get_by_user_and_id(
+        user_id=current_user.id, account_id=account_id
+    )
+
+    if not account:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied or account not found",
+        )
+
+    try:
+        positions = await PositionService(db).get_positions(account_id, as_of_date)
+        return {
+            "account_id": account_id,
+            "as_of_date": as_of_date,
+            "positions": [
+                {
+                    "security_id": str(position.security_id),
+                    "quantity": position.quantity,
+                    "cost_basis": position.cost_basis,
+                    "average_cost": position.average_cost,
+                    "currency": position.currency,
+                }
+                for position in positions
+            ],
+        }
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error retrieving positions: {str(e)}",
+        )
+
+
 @router.get("/securities/{security_id}")
 async def get_security_transactions(
     *,
@@ -431,11 +554,12 @@ async def get_realized_gains_losses(
     account_id: str,
     tax_year: Optional[int] = Query(None, description="Tax year filter"),
     security_id: Optional[str] = Query(None, description="Filter by securities"),
+    method: LotMethod = Query(LotMethod.FIFO, description="Lot relief method"),
 ):
     """Calculate realized gains/losses for tax reporting."""
     # Verify users owns the account
-    account = await AccountRepository.get_by_user_and_id(
-        db, user_id=current_user.id, account_id=account_id
+    account = await AccountRepository(db).get_by_user_and_id(
+        user_id=current_user.id, account_id=account_id
     )
 
     if not account:
@@ -445,13 +569,12 @@ async def get_realized_gains_losses(
         )
 
     try:
-        gains_losses = await transaction_crud.calculate_realized_gains_losses(
-            db, account_id=account_id, security_id=security_id, tax_year=tax_year
+        gains_losses = await TransactionRepository(db).calculate_realized_gains_losses(
+            account_id=account_id, security_id=security_id, tax_year=tax_year, method=method
         )
 
         # Log tax report access
-        await UserLogRepository.log_user_action(
-            db,
+        await UserLogRepository(db).log_user_action(
             user_id=current_user.id,
             action="tax_report",
             target_category="transaction",
@@ -473,45 +596,14 @@ async def get_tax_summary(
     db: AsyncSession = Depends(get_db),
     current_user: Annotated[User, Depends(get_current_user)] = None,
     tax_year: int,
+    method: LotMethod = Query(LotMethod.FIFO, description="Lot relief method"),
 ):
     """Get comprehensive tax summary across all master."""
     try:
-        # Get all users master
-        from sqlalchemy import select
-
-        from app.account.master.model import PortfolioAccount
-
-        stmt = select(PortfolioAccount.id).where(PortfolioAccount.user_id == current_user.id)
-        result = await db.execute(stmt)
-        account_ids = [str(row[0]) for row in result.fetchall()]
-
-        if not account_ids:
-            return {
-                "tax_year": tax_year,
-                "total_realized_gains": Decimal("0"),
-                "total_realized_losses": Decimal("0"),
-                "net_realized": Decimal("0"),
-                "by_account": {},
-            }
-
-        total_gains = Decimal("0")
-        total_losses = Decimal("0")
-        by_account = {}
-
-        for account_id in account_ids:
-            gains_losses = await transaction_crud.calculate_realized_gains_losses(
-                db, account_id=account_id, tax_year=tax_year
-            )
-
-            by_account[account_id] = gains_losses
-            total_gains += gains_losses.get("realized_gains", Decimal("0"))
-            total_losses += gains_losses.get("realized_losses", Decimal("0"))
-
-        net_realized = total_gains - total_losses
+        summary = await TaxReportService(db).get_tax_summary(current_user.id, tax_year, method)
 
         # Log tax summary access
-        await UserLogRepository.log_user_action(
-            db,
+        await UserLogRepository(db).log_user_action(
             user_id=current_user.id,
             action="tax_summary",
             target_category="transaction",
@@ -519,14 +611,7 @@ async def get_tax_summary(
             metadata={"tax_year": tax_year},
         )
 
-        return {
-            "tax_year": tax_year,
-            "total_realized_gains": total_gains,
-            "total_realized_losses": total_losses,
-            "net_realized": net_realized,
-            "by_account": by_account,
-            "generated_at": datetime.now(UTC).isoformat(),
-        }
+        return summary
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -534,67 +619,98 @@ async def get_tax_summary(
         )
 
 
+@router.get("/tax-summary/{tax_year}/report")
+async def download_tax_report(
+    *,
+    db: AsyncSession = Depends(get_db),
+    current_user: Annotated[User, Depends(get_current_user)] = None,
+    tax_year: int,
+    method: LotMethod = Query(LotMethod.FIFO, description="Lot relief method"),
+):
+    """Download every lot relieved during the tax year as CSV."""
+    report = await TaxReportService(db).render_report(current_user.id, tax_year, method)
+
+    await UserLogRepository(db).log_user_action(
+        user_id=current_user.id,
+        action="tax_report",
+        target_category="transaction",
+        description=f"Downloaded tax report for {tax_year}",
+        metadata={"tax_year": tax_year},
+    )
+
+    filename = f"realized_gains_{tax_year}_{method.value}.csv"
+    return StreamingResponse(
+        iter([report]),
+        media_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
 @router.post("/bulk-import")
 async def bulk_import_transactions(
     *,
     db: AsyncSession = Depends(get_db),
     current_user: Annotated[User, Depends(get_current_user)] = None,
     transactions_data: List[Dict[str, Any]],
+    return_ids: bool = Query(False, description="Include the IDs of inserted transactions"),
 ):
-    """Bulk import transactions."""
+    """Bulk import transactions; rows already imported (same provider id or contents) are skipped."""
     if not transactions_data:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="No transaction data provided",
         )
 
-    try:
-        # Verify users owns all master referenced
-        account_ids = set()
-        for tx_data in transactions_data:
-            account_id = tx_data.get("account_id")
-            if account_id:
-                account_ids.add(account_id)
-
-        for account_id in account_ids:
-            account = await AccountRepository.get_by_user_and_id(
-                db, user_id=current_user.id, account_id=account_id
-            )
-            if not account:
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail=f"Access denied for account {account_id}",
-                )
-
-        transactions = await transaction_crud.bulk_import_transactions(
-            db, transactions_data=transactions_data
+    # Verify users owns all master referenced
+    account_ids = {
+        str(tx_data.get("portfolio_id") or tx_data.get("account_id"))
+        for tx_data in transactions_data
+        if tx_data.get("portfolio_id") or tx_data.get("account_id")
+    }
+    for account_id in account_ids:
+        account = await AccountRepository(db).get_by_user_and_id(
+            user_id=current_user.id, account_id=account_id
         )
+        if not account:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"Access denied for account {account_id}",
+            )
 
-        # Log bulk import
-        await UserLogRepository.log_user_action(
-            db,
-            user_id=current_user.id,
-            action="bulk_import",
-            target_category="transaction",
-            description=f"Bulk imported {len(transactions)} transactions",
-            metadata={
-                "imported_count": len(transactions),
-                "account_ids": list(account_ids),
-            },
+    try:
+        result = await TransactionRepository(db).bulk_import_transactions(
+            transactions_data, return_ids=return_ids
         )
-
-        return {
-            "message": "Transactions imported successfully",
-            "imported_count": len(transactions),
-            "account_ids": list(account_ids),
-            "imported_at": datetime.now(UTC).isoformat(),
-        }
+    except TransactionImportError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error importing transactions: {str(e)}",
         )
 
+    # Log bulk import
+    await UserLogRepository(db).log_user_action(
+        user_id=current_user.id,
+        action="bulk_import",
+        target_category="transaction",
+        description=f"Bulk imported {result['imported']} transactions",
+        metadata={
+            "imported_count": result["imported"],
+            "skipped_count": result["skipped"],
+            "account_ids": sorted(account_ids),
+        },
+    )
+
+    return {
+        "message": "Transactions imported successfully",
+        "imported_count": result["imported"],
+        "skipped_count": result["skipped"],
+        "account_ids": sorted(account_ids),
+        "transaction_ids": result.get("transaction_ids"),
+        "imported_at": datetime.now(UTC).isoformat(),
+    }
+
 
 @router.post("/upload-csv")
 async def upload_transactions_csv(
@@ -603,149 +719,78 @@ async def upload_transactions_csv(
     current_user: Annotated[User, Depends(get_current_user)] = None,
     account_id: str = Query(..., description="Target account ID"),
     file: UploadFile = File(..., description="CSV file with transactions"),
+    return_ids: bool = Query(False, description="Include the IDs of inserted transactions"),
 ):
     """Upload and process transactions from CSV file."""
     # Verify users owns the account
-    account = await AccountRepository.get_by_user_and_id(
-        db, user_id=current_user.id, account_id=account_id
-    )
-
-    if not account:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Access denied or account not found",
-        )
+    await _get_owned_account(db, current_user.id, account_id)
 
     if not file.filename or not file.filename.endswith(".csv"):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="File must be a CSV")
 
-    try:
-        # Read CSV content
-        import csv
-        import io
-
-        content = await file.read()
-        csv_content = content.decode("utf-8")
-        csv_reader = csv.DictReader(io.StringIO(csv_content))
-
-        transactions_data = []
-        for row in csv_reader:
-            # Basic CSV parsing - you may need to customize based on CSV format
-            tx_data = {
-                "account_id": account_id,
-                "transaction_category": row.get("security_type", "other"),
-                "transaction_side": row.get("side", "buy"),
-                "amount": Decimal(row.get("amount", "0")),
-                "trade_date": datetime.strptime(row.get("date") or "1970-01-01", "%Y-%m-%d").date(),
-                "transaction_currency": row.get("currency", "USD"),
-                "description": row.get("description"),
-                # Add other fields as needed
-            }
-            transactions_data.append(tx_data)
-
-        if not transactions_data:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="No valid transactions found in CSV",
-            )
-
-        transactions = await transaction_crud.bulk_import_transactions(
-            db, transactions_data=transactions_data
-        )
+    # Read CSV content
+    import csv
+    import io
+
+    content = await file.read()
+    csv_reader = csv.DictReader(io.StringIO(content.decode("utf-8")))
+
+    # Rows are converted lazily as COPY consumes them
+    transactions_data = (
+        {
+            "portfolio_id": account_id,
+            "security_id": row.get("security_id"),
+            "transaction_type": row.get("type") or row.get("side") or "other",
+            "quantity": row.get("quantity"),
+            "price": row.get("price"),
+            "amount": row.get("amount") or "0",
+            "fees": row.get("fees"),
+            "trade_date": row.get("date") or row.get("trade_date"),
+            "currency": row.get("currency"),
+            "description": row.get("description"),
+            "external_transaction_id": row.get("id") or row.get("external_id"),
+        }
+        for row in csv_reader
+    )
 
-        # Log CSV import
-        await UserLogRepository.log_user_action(
-            db,
-            user_id=current_user.id,
-            action="csv_import",
-            target_category="transaction",
-            target_id=account_id,
-            description=f"Imported {len(transactions)} transactions from CSV",
-            metadata={"filename": file.filename, "imported_count": len(transactions)},
+    try:
+        result = await TransactionRepository(db).bulk_import_transactions(
+            transactions_data, return_ids=return_ids
         )
-
-        return {
-            "message": "CSV transactions imported successfully",
-            "filename": file.filename,
-            "imported_count": len(transactions),
-            "account_id": account_id,
-            "imported_at": datetime.now(UTC).isoformat(),
-        }
+    except TransactionImportError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error processing CSV: {str(e)}",
         )
 
-
-@router.get("/search")
-async def search_transactions(
-    *,
-    db: AsyncSession = Depends(get_db),
-    current_user: Annotated[User, Depends(get_current_user)] = None,
-    q: str = Query(..., description="Search term", min_length=2),
-    account_id: Optional[str] = Query(None, description="Filter by account"),
-    start_date: Optional[date] = Query(None, description="Start date"),
-    end_date: Optional[date] = Query(None, description="End date"),
-    limit: int = Query(50, description="Maximum results", ge=1, le=200),
-):
-    """Search transactions by description, amount, or other criteria."""
-    try:
-        if account_id:
-            # Verify users owns the account
-            account = await AccountRepository.get_by_user_and_id(
-                db, user_id=current_user.id, account_id=account_id
-            )
-            if not account:
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail="Access denied or account not found",
-                )
-
-            transactions = await transaction_crud.get_by_account(
-                db,
-                account_id=account_id,
-                start_date=start_date,
-                end_date=end_date,
-                skip=0,
-                limit=limit,
-            )
-        else:
-            transactions = await transaction_crud.get_by_user(
-                db,
-                user_id=current_user.id,
-                start_date=start_date,
-                end_date=end_date,
-                skip=0,
-                limit=limit,
-            )
-
-        # Filter by search term (simple text matching)
-        filtered_transactions = []
-        search_lower = q.lower()
-
-        for tx in transactions:
-            if (
-                (tx.transaction_category and search_lower in tx.transaction_category.lower())
-                or (tx.transaction_side and search_lower in tx.transaction_side.lower())
-                or str(tx.amount) == q
-            ):
-                filtered_transactions.append(tx)
-
-        return {
-            "transactions": [
-                TransactionResponse.model_validate(tx, from_attributes=True)
-                for tx in filtered_transactions
-            ],
-            "query": q,
-            "count": len(filtered_transactions),
-        }
-    except Exception as e:
+    if not result["received"]:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error searching transactions: {str(e)}",
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No valid transactions found in CSV",
         )
 
+    # Log CSV import
+    await UserLogRepository(db).log_user_action(
+        user_id=current_user.id,
+        action="csv_import",
+        target_category="transaction",
+        target_id=account_id,
+        description=f"Imported {result['imported']} transactions from CSV",
+        metadata={"filename": file.filename, "imported_count": result["imported"]},
+    )
+
+    return {
+        "message": "CSV transactions imported successfully",
+        "filename": file.filename,
+        "imported_count": result["imported"],
+        "skipped_count": result["skipped"],
+        "account_id": account_id,
+        "transaction_ids": result.get("transaction_ids"),
+        "imported_at": datetime.now(UTC).isoformat(),
+    }
+
 
 @router.post("/accounts/{account_id}/csv-upload")
 async def upload_transactions_csv(
@@ -794,8 +839,7 @@ async def upload_transactions_csv(
         content = await file.read()
 
         # Log the upload attempt
-        await UserLogRepository.log_user_action(
-            db,
+        await UserLogRepository(db).log_user_action(
             user_id=current_user.id,
             action="csv_upload_attempt",
             target_category="transactions",
@@ -818,8 +862,7 @@ async def upload_transactions_csv(
             )
 
             # Log the result
-            await UserLogRepository.log_user_action(
-                db,
+            await UserLogRepository(db).log_user_action(
                 user_id=current_user.id,
                 action="csv_import_completed",
                 target_category="transactions",
@@ -850,8 +893,7 @@ async def upload_transactions_csv(
         logger.error(error_msg)
 
         # Log the error
-        await UserLogRepository.log_user_action(
-            db,
+        await UserLogRepository(db).log_user_action(
             user_id=current_user.id,
             action="csv_upload_error",
             target_category="transactions",
@@ -905,3 +947,51 @@ async def transactions_health():
             "search_and_filtering",
         ],
     }
+
+
+async def _get_owned_account(db: AsyncSession, user_id: Any, account_id: Any):
+    account = await AccountRepository(db).get_by_user_and_id(
+        user_id=user_id, account_id=account_id
+    )
+    if not account:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied or account not found",
+        )
+    return account
+
+
+async def _transaction_page(
+    db: AsyncSession, user_id: Any, account_id: Optional[str], **kwargs: Any
+) -> Dict[str, Any]:
+    repository = TransactionRepository(db)
+    if account_id:
+        return await repository.get_by_account(account_id, **kwargs)
+    return await repository.get_by_user(user_id, **kwargs)
+
+
+def _decode_after(cursor: Optional[str]) -> Optional[TransactionKey]:
+    if not cursor:
+        return None
+    try:
+        values = decode_cursor(cursor)
+        return (
+            date.fromisoformat(values["trade_date"]),
+            datetime.fromisoformat(values["created_at"]),
+            UUID(values["id"]),
+        )
+    except (KeyError, TypeError, ValueError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def _encode_after(after: Optional[TransactionKey]) -> Optional[str]:
+    if after is None:
+        return None
+    trade_date, created_at, transaction_id = after
+    return encode_cursor(
+        {
+            "trade_date": trade_date.isoformat(),
+            "created_at": created_at.isoformat(),
+            "id": str(transaction_id),
+        }
+    )
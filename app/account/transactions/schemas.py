@@ -3,7 +3,7 @@ from decimal import Decimal
 from typing import Optional
 from uuid import UUID
 
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import AliasChoices, BaseModel, ConfigDict, Field
 
 from .enums import TransactionSubType, TransactionType
 
@@ -58,5 +58,12 @@ class TransactionResponse(TransactionBase):
     model_config = ConfigDict(from_attributes=True)
 
     id: UUID
+    # Read from the columns these fields are stored in (see SCHEMA_COLUMNS)
+    account_id: UUID = Field(validation_alias=AliasChoices("account_id", "portfolio_id"))
+    as_of_date: date = Field(validation_alias=AliasChoices("as_of_date", "trade_date"))
+    name: Optional[str] = Field(None, validation_alias=AliasChoices("name", "description"))
+    plaid_transaction_id: Optional[str] = Field(
+        None, validation_alias=AliasChoices("plaid_transaction_id", "external_transaction_id")
+    )
     created_at: datetime
     updated_at: datetime
@@ -0,0 +1,112 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.versions import SharedVersions
+from app.security.prices.latest import latest_price_cache
+
+# (account id, whether live quotes were applied)
+ValuationKey = Tuple[str, bool]
+
+# (expires at, account version, {security id: latest-price version}, valuation)
+CacheEntry = Tuple[float, int, Dict[str, int], Dict[str, Any]]
+
+# Session.info key collecting accounts whose positions changed in the transaction
+_CHANGED_ACCOUNTS = "valuation_changes"
+
+
+class ValuationCache:
+    """
+    Account valuations kept for a short TTL.
+
+    Each entry remembers the version of its account and the latest-price
+    version of every security it used. Both are shared through Redis, so a
+    new close or a position change committed by any process drops it.
+    """
+
+    def __init__(self, max_size: Optional[int] = None, ttl_seconds: Optional[int] = None):
+        self.max_size = max_size or settings.VALUATION_CACHE_SIZE
+        self.ttl_seconds = ttl_seconds or settings.VALUATION_CACHE_SECONDS
+
+        self._entries: "OrderedDict[ValuationKey, CacheEntry]" = OrderedDict()
+        self._versions = SharedVersions("valuation_version")
+        self._lock = threading.Lock()
+
+    def get(self, key: ValuationKey) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, account_version, versions, valuation = entry
+        if (
+            expires <= time.monotonic()
+            or self.account_version(key[0]) != account_version
+            or latest_price_cache.versions(versions) != versions
+        ):
+            with self._lock:
+                self._entries.pop(key, None)
+            return None
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+        return valuation
+
+    def account_version(self, account_id: Any) -> int:
+        """Read before loading positions, so a change during valuation drops the entry."""
+        return self._versions.get(account_id)
+
+    def set(
+        self,
+        key: ValuationKey,
+        valuation: Dict[str, Any],
+        account_version: int,
+        price_versions: Dict[str, int],
+    ) -> None:
+        with self._lock:
+            self._entries[key] = (
+                time.monotonic() + self.ttl_seconds,
+                account_version,
+                price_versions,
+                valuation,
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, account_id: Any) -> None:
+        """Drop every valuation of an account, in every process."""
+        account_id = str(account_id)
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == account_id]:
+                del self._entries[key]
+        self._versions.bump([account_id])
+
+    def invalidate_on_commit(self, db: AsyncSession, account_id: Any) -> None:
+        """Invalidate the account once the session's transaction commits."""
+        db.info.setdefault(_CHANGED_ACCOUNTS, set()).add(str(account_id))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+# Create instance
+valuation_cache = ValuationCache()
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_accounts(session: Session) -> None:
+    # After the commit, so a concurrent read cannot re-cache the old positions
+    for account_id in session.info.pop(_CHANGED_ACCOUNTS, ()):
+        valuation_cache.invalidate(account_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_account_changes(session: Session) -> None:
+    session.info.pop(_CHANGED_ACCOUNTS, None)
@@ -0,0 +1,183 @@
+"""
+Account valuation from current positions and latest prices.
+
+Positions come from the table maintained by PositionService, closes from the
+shared latest-price map (optionally overlaid with live intraday quotes) and
+FX factors from the rate matrix, so a whole account is valued in one
+vectorized pass without reading the imported, quickly stale
+AccountHolding.market_value.
+"""
+
+import logging
+from datetime import UTC, datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.account.master.model import Account
+from app.account.positions.service import PositionService
+from app.account.valuation.cache import valuation_cache
+from app.reference.market_rates.service import FxRateService
+from app.security.master.model import Security
+from app.security.prices.latest import latest_price_cache
+from app.security.quotes.service import get_live_quote_service
+
+logger = logging.getLogger(__name__)
+
+
+def _amount(value: float) -> Optional[float]:
+    return None if np.isnan(value) else round(float(value), 2)
+
+
+def _percent(numerator: float, denominator: float) -> Optional[float]:
+    if np.isnan(numerator) or np.isnan(denominator) or not denominator:
+        return None
+    return round(float(numerator / abs(denominator) * 100), 4)
+
+
+class ValuationService:
+    """Values accounts at their latest prices in the account currency."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.positions = PositionService(db)
+        self.fx = FxRateService(db)
+
+    async def value_account(self, account: Account, live: bool = False) -> Dict[str, Any]:
+        """
+        Market value, unrealized P&L and day change of every open position.
+
+        Positions without a price or FX rate are listed under `unpriced` and
+        left out of the totals. Results are cached per account for a short
+        TTL and dropped when a new close or position change arrives.
+        """
+        key = (str(account.id), live)
+        cached = valuation_cache.get(key)
+        if cached is not None:
+            return cached
+
+        account_version = valuation_cache.account_version(account.id)
+        positions = await self.positions.get_positions(account.id)
+        security_ids = [position.security_id for position in positions]
+        result = await self.db.execute(
+            select(Security.id, Security.symbol, Security.currency, Security.exchange).where(
+                Security.id.in_(security_ids)
+            )
+        )
+        securities = {str(row.id): row for row in result}
+        price_versions = latest_price_cache.versions(security_ids)
+        prices = await latest_price_cache.get_many(self.db, security_ids)
+
+        quotes = {}
+        if live and securities:
+            quotes = await get_live_quote_service().get_quotes(
+                (row.symbol, row.currency, row.exchange)
+                for row in securities.values()
+                if row.symbol
+            )
+
+        symbols: List[Optional[str]] = []
+        price_currencies: List[str] = []
+        price_dates: List[Optional[str]] = []
+        sources: List[Optional[str]] = []
+        price = np.full(len(positions), np.nan)
+        previous = np.full(len(positions), np.nan)
+        for i, position in enumerate(positions):
+            security = securities.get(str(position.security_id))
+            symbol = security.symbol if security is not None else None
+            symbols.append(symbol)
+            price_currencies.append(
+                (security.currency if security is not None else None) or position.currency
+            )
+
+            quote = quotes.get(symbol.upper()) if symbol else None
+            close = prices.get(str(position.security_id))
+            if quote is not None:
+                price[i] = quote.price
+                previous[i] = quote.previous_close if quote.previous_close is not None else np.nan
+                price_dates.append(quote.quoted_at)
+                sources.append("live")
+            elif close is not None:
+                price[i] = close.close
+                previous[i] = close.previous_close if close.previous_close is not None else np.nan
+                price_dates.append(close.price_date.isoformat())
+                sources.append("close")
+            else:
+                price_dates.append(None)
+                sources.append(None)
+
+        # One matrix lookup for price and cost currencies together, skipped for
+        # amounts already in the account currency
+        cost_currencies = [position.currency for position in positions]
+        currencies = np.array(
+            [(c or "").upper() for c in price_currencies + cost_currencies], dtype=object
+        )
+        foreign = currencies != account.currency.upper()
+        factors = np.ones(len(currencies))
+        if foreign.any():
+            factors[foreign] = await self.fx.conversion_factors(
+                list(currencies[foreign]), account.currency
+            )
+        price_factor, cost_factor = factors[: len(positions)], factors[len(positions) :]
+
+        quantity = np.array([float(p.quantity) for p in positions], dtype=float)
+        cost = np.array([float(p.cost_basis) for p in positions], dtype=float) * cost_factor
+        market_value = quantity * price * price_factor
+        unrealized = market_value - cost
+        day_change = quantity * (price - previous) * price_factor
+
+        valued = ~np.isnan(market_value) & ~np.isnan(cost)
+        total_value = market_value[valued].sum()
+        total_cost = cost[valued].sum()
+        total_unrealized = unrealized[valued].sum()
+        total_day_change = np.nansum(day_change[valued])
+        weights = market_value / total_value if total_value else np.full(len(positions), np.nan)
+
+        valuation = {
+            "account_id": str(account.id),
+            "currency": account.currency,
+            "market_value": _amount(total_value),
+            "cost_basis": _amount(total_cost),
+            "unrealized_pnl": _amount(total_unrealized),
+            "unrealized_pnl_percent": _percent(total_unrealized, total_cost),
+            "day_change": _amount(total_day_change),
+            "day_change_percent": _percent(total_day_change, total_value - total_day_change),
+            "positions": [
+                {
+                    "security_id": str(position.security_id),
+                    "symbol": symbols[i],
+                    "quantity": float(quantity[i]),
+                    "price": None if np.isnan(price[i]) else float(price[i]),
+                    "price_currency": price_currencies[i],
+                    "price_date": price_dates[i],
+                    "price_source": sources[i],
+                    "fx_rate": None if np.isnan(price_factor[i]) else float(price_factor[i]),
+                    "market_value": _amount(market_value[i]),
+                    "cost_basis": _amount(cost[i]),
+                    "unrealized_pnl": _amount(unrealized[i]),
+                    "unrealized_pnl_percent": _percent(unrealized[i], cost[i]),
+                    "day_change": _amount(day_change[i]),
+                    "weight_percent": (
+                        None if np.isnan(weights[i]) else round(float(weights[i]) * 100, 4)
+                    ),
+                }
+                for i, position in enumerate(positions)
+            ],
+            "unpriced": [
+                symbols[i] or str(position.security_id)
+                for i, position in enumerate(positions)
+                if not valued[i]
+            ],
+            "valued_at": datetime.now(UTC).isoformat(),
+        }
+
+        valuation_cache.set(key, valuation, account_version, price_versions)
+        return valuation
+
+
+# Convenience function for getting valuation service
+def get_valuation_service(db: AsyncSession) -> ValuationService:
+    """Get ValuationService instance with database session."""
+    return ValuationService(db)
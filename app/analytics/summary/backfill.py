@@ -0,0 +1,476 @@
+"""
+Daily account value history, built set-based.
+
+Usage:
+    python -m app.analytics.summary.backfill --start 2025-01-01 [--end 2025-06-30]
+        [--account <uuid> ...]
+
+For a set of accounts and a date range the inputs are read once: positions
+at the day before the range, the position-moving transactions inside it,
+cash and external flows aggregated per day and currency, the closes of every
+security involved and the FX matrix. Each account then becomes a
+days x securities quantity and cost matrix, valued against the forward-filled
+close matrix in one pass, and the rows are upserted into analytics_summary
+in batches.
+"""
+
+import argparse
+import asyncio
+import logging
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import and_, case, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.account.master.model import Account
+from app.account.positions.service import (
+    POSITION_TYPES,
+    TRANSACTION_COLUMNS,
+    Position,
+    PositionService,
+    apply_transaction,
+)
+from app.account.transactions.enums import TransactionType
+from app.account.transactions.model import AccountTransaction
+from app.analytics.summary.model import AnalyticsSummary
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.reference.market_rates.service import FxRateService
+from app.security.master.model import Security
+from app.security.prices.model import SecurityPrice
+
+logger = logging.getLogger(__name__)
+
+# Rows per INSERT ... ON CONFLICT statement
+WRITE_BATCH_ROWS = 1000
+
+# Money entering or leaving the account; excluded from the daily return
+EXTERNAL_FLOW_TYPES = (
+    TransactionType.DEPOSIT.value,
+    TransactionType.WITHDRAWAL.value,
+    TransactionType.CASH.value,
+    TransactionType.TRANSFER.value,
+    TransactionType.TRANSFER_IN.value,
+    TransactionType.TRANSFER_OUT.value,
+)
+
+# Transfers of shares move positions, not cash; their amount is still a flow
+SECURITY_TRANSFER_TYPES = (
+    TransactionType.TRANSFER_IN.value,
+    TransactionType.TRANSFER_OUT.value,
+)
+
+# Cash direction by type, as in the activity summaries: amounts are stored either
+# way round, so only types without a direction keep their stored sign
+CASH_IN_TYPES = (
+    TransactionType.SELL.value,
+    TransactionType.DIVIDEND.value,
+    TransactionType.INTEREST.value,
+    TransactionType.DEPOSIT.value,
+    TransactionType.TRANSFER_IN.value,
+)
+CASH_OUT_TYPES = (
+    TransactionType.BUY.value,
+    TransactionType.FEE.value,
+    TransactionType.TAX.value,
+    TransactionType.WITHDRAWAL.value,
+    TransactionType.TRANSFER_OUT.value,
+)
+TRADE_TYPES = (TransactionType.BUY.value, TransactionType.SELL.value)
+
+
+def _decimal(value: float, places: int = 2) -> Optional[Decimal]:
+    if value is None or np.isnan(value) or np.isinf(value):
+        return None
+    return Decimal(str(round(float(value), places)))
+
+
+def _position_matrices(days: pd.DatetimeIndex, start: List[Position], rows: Sequence[Any]):
+    """
+    Days x securities quantity and cost frames, plus each security's currency.
+
+    `start` holds the positions at the close of days[0]; `rows` are the
+    account's transactions after it, sorted as PositionService replays them.
+    """
+    positions = {position.security_id: position for position in start}
+    events = [(days[0], p.security_id, p.quantity, p.cost_basis) for p in start]
+    for row in rows:
+        position = positions.get(
+            row.security_id, Position(row.security_id, Decimal("0"), Decimal("0"), "USD")
+        )
+        position = apply_transaction(position, row)
+        positions[row.security_id] = position
+        events.append(
+            (pd.Timestamp(row.trade_date), row.security_id, position.quantity, position.cost_basis)
+        )
+
+    if not events:
+        empty = pd.DataFrame(index=days)
+        return empty, empty, {}
+
+    # Only the position at the close of each day matters
+    frame = pd.DataFrame(events, columns=["day", "security_id", "quantity", "cost_basis"])
+    frame["security_id"] = frame["security_id"].astype(str)
+    frame = frame.drop_duplicates(["day", "security_id"], keep="last")
+
+    def _matrix(values: str) -> pd.DataFrame:
+        matrix = frame.pivot(index="day", columns="security_id", values=values).astype(float)
+        return matrix.reindex(days).ffill().fillna(0.0)
+
+    currencies = {str(s): p.currency for s, p in positions.items()}
+    return _matrix("quantity"), _matrix("cost_basis"), currencies
+
+
+class SummaryBackfill:
+    """Computes and stores daily analytics_summary rows for accounts and a date range."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.positions = PositionService(db)
+        self.fx = FxRateService(db)
+
+    async def backfill(
+        self, account_ids: Sequence[Any], start_date: date, end_date: date
+    ) -> int:
+        """Market value, cost basis, cash and daily return for every day; returns rows written."""
+        if not account_ids or end_date < start_date:
+            return 0
+
+        # One leading day supplies the opening value for the first daily return
+        opening = start_date - timedelta(days=1)
+        days = pd.date_range(opening, end_date, freq="D")
+
+        result = await self.db.execute(
+            select(Account.id, Account.currency).where(Account.id.in_(account_ids))
+        )
+        currencies = {str(row.id): row.currency for row in result}
+
+        starts = {
+            portfolio_id: await self.positions.get_positions(portfolio_id, opening)
+            for portfolio_id in currencies
+        }
+        rows: Dict[str, List[Any]] = {}
+        for row in await self._position_rows(list(currencies), start_date, end_date):
+            rows.setdefault(str(row.portfolio_id), []).append(row)
+        cash = await self._cash_flows(list(currencies), opening, end_date)
+
+        matrices = {
+            portfolio_id: _position_matrices(
+                days, starts[portfolio_id], rows.get(portfolio_id, [])
+            )
+            for portfolio_id in currencies
+        }
+        security_ids = sorted({s for _, _, held in matrices.values() for s in held})
+        closes, close_dates = await self._close_matrix(security_ids, days)
+        price_currencies = await self._price_currencies(security_ids)
+        fx = await self.fx.get_matrix(opening, end_date)
+
+        written = 0
+        for portfolio_id, (quantity, cost, held) in matrices.items():
+            summary = self._summarize(
+                days,
+                currencies[portfolio_id],
+                quantity,
+                cost,
+                held,
+                closes,
+                close_dates,
+                price_currencies,
+                cash[cash["portfolio_id"] == portfolio_id],
+                fx,
+            )
+            written += await self._write(portfolio_id, currencies[portfolio_id], summary)
+            await self.db.commit()
+            logger.info(
+                f"Backfilled {len(summary)} days for account {portfolio_id} "
+                f"({start_date}..{end_date})"
+            )
+        return written
+
+    # --- Valuation ---
+
+    def _summarize(
+        self,
+        days: pd.DatetimeIndex,
+        currency: str,
+        quantity: pd.DataFrame,
+        cost: pd.DataFrame,
+        held: Dict[str, str],
+        closes: pd.DataFrame,
+        close_dates: pd.DataFrame,
+        price_currencies: Dict[str, str],
+        cash: pd.DataFrame,
+        fx: Any,
+    ) -> pd.DataFrame:
+        """Days x metrics frame for one account, without the leading day."""
+        columns = list(quantity.columns)
+        open_ = quantity.ne(0)
+
+        close = closes.reindex(columns=columns)
+        value = (quantity * close).where(open_, 0.0)
+        value = fx.convert_frame(
+            value, [price_currencies.get(s) or held[s] for s in columns], currency
+        )
+        basis = fx.convert_frame(cost.where(open_, 0.0), [held[s] for s in columns], currency)
+
+        # A position with no close yet is carried at cost: the cash that bought it
+        # has already left cash_balance
+        value = value.fillna(basis)
+
+        # Open positions without an FX rate stay out of the totals
+        valued = (value.notna() & basis.notna()) | ~open_
+        market_value = value.where(valued).sum(axis=1)
+        cost_basis = basis.where(valued).sum(axis=1)
+
+        cash_balance = self._in_currency(cash, "amount", days, currency, fx).cumsum()
+        flows = self._in_currency(cash, "flow", days, currency, fx)
+
+        total = market_value + cash_balance
+        previous = total.shift(1)
+        # No return across a day on which a position enters or leaves the totals
+        comparable = valued.eq(valued.shift(1, fill_value=True)).all(axis=1)
+        daily_return = ((total - previous - flows) / previous.abs() * 100).where(
+            (previous != 0) & comparable
+        )
+
+        summary = pd.DataFrame(
+            {
+                "market_value": market_value,
+                "cost_basis": cost_basis,
+                "cash_balance": cash_balance,
+                "daily_return": daily_return,
+                "holdings_count": open_.sum(axis=1),
+                "last_price_date": close_dates.reindex(columns=columns).where(open_).max(axis=1),
+            },
+            index=days,
+        )
+        return summary.iloc[1:]
+
+    @staticmethod
+    def _in_currency(
+        cash: pd.DataFrame, column: str, days: pd.DatetimeIndex, currency: str, fx: Any
+    ) -> pd.Series:
+        """Daily sums of a cash column converted into the account currency."""
+        if cash.empty:
+            return pd.Series(0.0, index=days)
+        matrix = (
+            cash.pivot_table(index="day", columns="currency", values=column, aggfunc="sum")
+            .reindex(days)
+            .fillna(0.0)
+        )
+        converted = fx.convert_frame(matrix, list(matrix.columns), currency)
+        return converted.sum(axis=1)
+
+    # --- Loading ---
+
+    async def _position_rows(
+        self, portfolio_ids: List[str], start_date: date, end_date: date
+    ) -> List[Any]:
+        stmt = (
+            select(AccountTransaction.portfolio_id, *TRANSACTION_COLUMNS)
+            .where(
+                AccountTransaction.portfolio_id.in_(portfolio_ids),
+                AccountTransaction.security_id.is_not(None),
+                AccountTransaction.transaction_type.in_(POSITION_TYPES),
+                AccountTransaction.trade_date >= start_date,
+                AccountTransaction.trade_date <= end_date,
+                AccountTransaction.deleted_at.is_(None),
+            )
+            .order_by(
+                AccountTransaction.portfolio_id,
+                AccountTransaction.security_id,
+                AccountTransaction.trade_date,
+                AccountTransaction.created_at,
+                AccountTransaction.id,
+            )
+        )
+        return (await self.db.execute(stmt)).all()
+
+    async def _cash_flows(
+        self, portfolio_ids: List[str], opening: date, end_date: date
+    ) -> pd.DataFrame:
+        """Cash movements and external flows per account, day and currency.
+
+        Amounts are signed from the transaction type. Everything before the
+        range is folded into the leading day, so the cumulative sum starts
+        from the opening balance.
+        """
+        day = func.greatest(AccountTransaction.trade_date, opening).label("day")
+        transaction_type = AccountTransaction.transaction_type
+        security_transfer = and_(
+            transaction_type.in_(SECURITY_TRANSFER_TYPES),
+            AccountTransaction.security_id.is_not(None),
+        )
+        amount = func.coalesce(AccountTransaction.amount, 0)
+        signed = case(
+            (transaction_type.in_(CASH_IN_TYPES), func.abs(amount)),
+            (transaction_type.in_(CASH_OUT_TYPES), -func.abs(amount)),
+            else_=amount,
+        )
+        # Commissions come out of the cash a trade moves
+        fees = case(
+            (
+                transaction_type.in_(TRADE_TYPES),
+                func.abs(func.coalesce(AccountTransaction.fees, 0)),
+            ),
+            else_=0,
+        )
+        stmt = (
+            select(
+                AccountTransaction.portfolio_id,
+                day,
+                AccountTransaction.currency,
+                func.sum(case((security_transfer, 0), else_=signed - fees)).label("amount"),
+                func.sum(case((transaction_type.in_(EXTERNAL_FLOW_TYPES), signed), else_=0)).label(
+                    "flow"
+                ),
+            )
+            .where(
+                AccountTransaction.portfolio_id.in_(portfolio_ids),
+                AccountTransaction.trade_date <= end_date,
+                AccountTransaction.deleted_at.is_(None),
+            )
+            .group_by(AccountTransaction.portfolio_id, day, AccountTransaction.currency)
+        )
+        rows = (await self.db.execute(stmt)).all()
+
+        frame = pd.DataFrame(
+            [
+                (str(row.portfolio_id), pd.Timestamp(row.day), row.currency)
+                + (float(row.amount), float(row.flow))
+                for row in rows
+            ],
+            columns=["portfolio_id", "day", "currency", "amount", "flow"],
+        )
+        # The leading day's flows are history, not part of its return
+        frame.loc[frame["day"] == pd.Timestamp(opening), "flow"] = 0.0
+        return frame
+
+    async def _close_matrix(self, security_ids: List[str], days: pd.DatetimeIndex):
+        """Forward-filled days x securities closes and the date each close is from."""
+        empty = pd.DataFrame(index=days)
+        if not security_ids:
+            return empty, empty
+
+        # Closes from shortly before the range carry into its first days
+        lookback = days[0] - pd.Timedelta(days=settings.LATEST_PRICE_LOOKBACK_DAYS)
+        result = await self.db.execute(
+            select(SecurityPrice.security_id, SecurityPrice.price_date, SecurityPrice.close_price)
+            .where(
+                SecurityPrice.security_id.in_(security_ids),
+                SecurityPrice.price_date >= lookback.date(),
+                SecurityPrice.price_date <= days[-1].date(),
+            )
+            .order_by(SecurityPrice.security_id, SecurityPrice.price_date)
+        )
+        prices = pd.DataFrame(
+            [
+                (str(row.security_id), pd.Timestamp(row.price_date), float(row.close_price))
+                for row in result
+            ],
+            columns=["security_id", "price_date", "close_price"],
+        )
+        if prices.empty:
+            return empty, empty
+
+        prices = prices.drop_duplicates(["price_date", "security_id"], keep="last")
+        closes = prices.pivot(index="price_date", columns="security_id", values="close_price")
+        dates = pd.DataFrame(
+            {column: closes.index for column in closes.columns}, index=closes.index
+        ).where(closes.notna())
+
+        calendar = closes.index.union(days)
+        closes = closes.reindex(calendar).ffill().reindex(days)
+        dates = dates.reindex(calendar).ffill().reindex(days)
+        return closes, dates
+
+    async def _price_currencies(self, security_ids: List[str]) -> Dict[str, str]:
+        if not security_ids:
+            return {}
+        result = await self.db.execute(
+            select(Security.id, Security.currency).where(Security.id.in_(security_ids))
+        )
+        return {str(row.id): row.currency for row in result if row.currency}
+
+    # --- Writing ---
+
+    async def _write(self, portfolio_id: str, currency: str, summary: pd.DataFrame) -> int:
+        records = [
+            {
+                "account_id": portfolio_id,
+                "as_of_date": day.date(),
+                "market_value": _decimal(row.market_value),
+                "cost_basis": _decimal(row.cost_basis),
+                "cash_balance": _decimal(row.cash_balance),
+                "cash_value": _decimal(row.cash_balance),
+                "unrealized_gain": _decimal(row.market_value - row.cost_basis),
+                "daily_return": _decimal(row.daily_return, 6),
+                "currency": currency,
+                "holdings_count": int(row.holdings_count),
+                "last_price_date": (
+                    None if pd.isna(row.last_price_date) else row.last_price_date.date()
+                ),
+            }
+            for day, row in summary.iterrows()
+        ]
+
+        for offset in range(0, len(records), WRITE_BATCH_ROWS):
+            stmt = pg_insert(AnalyticsSummary).values(records[offset : offset + WRITE_BATCH_ROWS])
+            await self.db.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=["account_id", "as_of_date"],
+                    set_={
+                        column: stmt.excluded[column]
+                        for column in (
+                            "market_value",
+                            "cost_basis",
+                            "cash_balance",
+                            "cash_value",
+                            "unrealized_gain",
+                            "daily_return",
+                            "currency",
+                            "holdings_count",
+                            "last_price_date",
+                        )
+                    }
+                    | {"updated_at": func.now()},
+                )
+            )
+        return len(records)
+
+
+async def backfill_summaries(
+    start_date: date, end_date: Optional[date] = None, account_ids: Optional[List[Any]] = None
+) -> int:
+    """Main entry point: backfill the given (by default all active) accounts; returns rows."""
+    end_date = end_date or date.today() - timedelta(days=1)
+    async with AsyncSessionLocal() as session:
+        if not account_ids:
+            result = await session.execute(select(Account.id).where(Account.deleted_at.is_(None)))
+            account_ids = list(result.scalars())
+
+        written = await SummaryBackfill(session).backfill(account_ids, start_date, end_date)
+
+    logger.info(f"Backfilled {written} summary rows for {len(account_ids)} accounts")
+    return written
+
+
+if __name__ == "__main__":
+    # Configure logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+
+    parser = argparse.ArgumentParser(description="Backfill daily account value history")
+    parser.add_argument("--start", type=date.fromisoformat, required=True)
+    parser.add_argument("--end", type=date.fromisoformat, default=None)
+    parser.add_argument("--account", action="append", default=None)
+    args = parser.parse_args()
+
+    asyncio.run(backfill_summaries(args.start, args.end, args.account))
@@ -3,7 +3,7 @@ from decimal import Decimal
 from typing import TYPE_CHECKING, Any, Dict, Optional
 from uuid import UUID
 
-from sqlalchemy import DECIMAL, JSON, Date, ForeignKey, Integer, String
+from sqlalchemy import DECIMAL, JSON, Date, ForeignKey, Integer, String, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID as PGUUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -155,4 +155,9 @@ class AnalyticsSummary(BaseModel):
     )
 
     # Composite unique constraint on account_id + as_of_date
-    __table_args__ = ({"comment": "Daily account summary metrics and asset allocation"},)
+    __table_args__ = (
+        UniqueConstraint(
+            "account_id", "as_of_date", name="analytics_summary_account_id_as_of_date_key"
+        ),
+        {"comment": "Daily account summary metrics and asset allocation"},
+    )
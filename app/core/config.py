@@ -106,6 +106,65 @@ class Settings(BaseSettings):
     # External API Keys
     ALPHA_VANTAGE_API_KEY: str = ""
 
+    # Alpha Vantage Client (defaults match the free plan quotas)
+    ALPHA_VANTAGE_BASE_URL: str = "https://www.alphavantage.co/query"
+    ALPHA_VANTAGE_REQUESTS_PER_MINUTE: int = 5  # Per-minute quota for the API key
+    ALPHA_VANTAGE_REQUESTS_PER_DAY: int = 25  # Per-day quota for the API key
+    ALPHA_VANTAGE_MAX_CONNECTIONS: int = 10  # Pooled keep-alive connections
+    ALPHA_VANTAGE_KEEPALIVE_SECONDS: int = 60  # Idle time before a connection is closed
+    ALPHA_VANTAGE_TIMEOUT_SECONDS: int = 30  # Total timeout per HTTP request
+    ALPHA_VANTAGE_MAX_RETRIES: int = 3  # Retries on throttling or transient errors
+
+    # Market Data Provider Response Cache (Redis, or local disk when Redis is unavailable)
+    PROVIDER_CACHE_ENABLED: bool = True
+    PROVIDER_CACHE_DIR: str = ".cache/providers"  # Disk fallback location
+    PROVIDER_CACHE_OVERVIEW_TTL_DAYS: int = 7  # Company overviews and ticker info
+
+    # yfinance Ticker Cache (in-process, shared by all service instances)
+    YFINANCE_TICKER_CACHE_SIZE: int = 1000  # Symbols kept in memory
+    YFINANCE_TICKER_CACHE_MAX_MB: int = 256  # Approximate memory budget
+    YFINANCE_INFO_TTL_SECONDS: int = 6 * 3600  # Age after which ticker info is fetched again
+    YFINANCE_FAST_INFO_TTL_SECONDS: int = 60  # Age after which fast_info is fetched again
+    YFINANCE_HISTORY_TTL_SECONDS: int = 900  # Age after which a history frame is fetched again
+
+    # Market Data Provider Routing
+    PROVIDER_HEALTH_WINDOW: int = 50  # Recent calls scored per provider and security type
+    PROVIDER_FAILURE_THRESHOLD: int = 5  # Consecutive failures that open the circuit
+    PROVIDER_CIRCUIT_COOLDOWN_SECONDS: int = 120  # Time an open circuit skips the provider
+
+    # FX Rates
+    FX_PIVOT_CURRENCY: str = "USD"  # Cross rates are triangulated through this currency
+    FX_MATRIX_CACHE_SECONDS: int = 3600  # How long a loaded rate matrix is reused
+    FX_MATRIX_HISTORY_DAYS: int = 365  # Minimum history loaded into the matrix
+    FX_MAX_FILL_DAYS: int = 7  # Carry a rate forward at most this many days
+    FX_REFRESH_SECONDS: int = 86400  # Interval between FX refreshes by the orchestrator
+
+    # Tax Reports
+    TAX_REPORT_CACHE_SECONDS: int = 86400  # Upper bound on a cached summary's age
+
+    # Live Quotes (in-memory LRU with Redis as a shared tier)
+    LIVE_QUOTES_ENABLED: bool = False  # Refresh hot symbols in the background
+    LIVE_QUOTE_CACHE_SIZE: int = 2000  # Quotes kept in process memory
+    LIVE_QUOTE_TTL_SECONDS: int = 120  # Age after which a quote is fetched again
+    LIVE_QUOTE_REFRESH_SECONDS: int = 300  # Interval between hot-symbol refreshes
+    LIVE_QUOTE_HOT_SYMBOLS: int = 20  # Most requested symbols refreshed per cycle
+    LIVE_QUOTE_DAILY_REQUESTS: int = 12  # Alpha Vantage requests/day background refreshes may use
+    LIVE_QUOTE_INTERVAL: str = "5min"  # Alpha Vantage intraday bar size
+
+    # Account Valuation (latest closes and valuations cached in process memory)
+    LATEST_PRICE_CACHE_SIZE: int = 20000  # Securities kept in the latest-price map
+    LATEST_PRICE_TTL_SECONDS: int = 300  # Age after which a latest close is read again
+    LATEST_PRICE_LOOKBACK_DAYS: int = 14  # Recent window searched first for the latest close
+    VALUATION_CACHE_SIZE: int = 1000  # Account valuations kept in memory
+    VALUATION_CACHE_SECONDS: int = 30  # Age after which a valuation is recomputed
+
+    # Market Data Refresh Orchestrator
+    MARKET_DATA_WORKERS: int = 4  # Concurrent refresh/enrichment workers
+    MARKET_DATA_YFINANCE_CONCURRENCY: int = 4  # Jobs in flight against yfinance
+    MARKET_DATA_ALPHAVANTAGE_CONCURRENCY: int = 1  # Jobs in flight against Alpha Vantage
+    MARKET_DATA_SCHEDULE_SECONDS: int = 3600  # Interval between scheduling passes
+    MARKET_DATA_SCHEDULE_BATCH: int = 500  # Securities enqueued per job type and pass
+
     # Logging and Monitoring
     LOG_LEVEL: str = "INFO"
     LOG_FORMAT: str = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
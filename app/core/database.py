@@ -1,8 +1,9 @@
 from typing import AsyncGenerator
 
+from sqlalchemy import create_engine
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
-from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.orm import DeclarativeBase, Session, sessionmaker
 
 from app.core.config import settings
 
@@ -32,6 +33,19 @@ AsyncSessionLocal = async_sessionmaker(
     expire_on_commit=False,  # Prevent attribute expiration on commit
 )
 
+# Synchronous engine for the market data services and background jobs,
+# which work with a plain Session (same URL conversion as Alembic)
+sync_engine = create_engine(
+    settings.DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://", 1),
+    pool_pre_ping=True,
+    pool_size=settings.POOL_SIZE,
+    max_overflow=settings.MAX_OVERFLOW,
+    pool_timeout=settings.POOL_TIMEOUT,
+    pool_recycle=settings.POOL_RECYCLE,
+)
+
+SessionLocal = sessionmaker(sync_engine, class_=Session, expire_on_commit=False)
+
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """Dependency for FastAPI routes to get database sessions."""
@@ -48,4 +62,6 @@ __all__ = [
     "get_db",
     "engine",
     "AsyncSessionLocal",
+    "sync_engine",
+    "SessionLocal",
 ]
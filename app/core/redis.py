@@ -6,7 +6,7 @@ and graceful degradation when Redis is unavailable.
 """
 
 import logging
-from typing import Any, Optional
+from typing import Any, List, Optional
 
 import redis
 from redis.connection import ConnectionPool
@@ -169,6 +169,26 @@ class RedisClient:
             logger.error(f"Redis SETEX error for key '{key}': {e}")
             return False
 
+    def incr(self, key: str) -> Optional[int]:
+        """Increment a counter, returning the new value."""
+        if not self.is_available():
+            return None
+        try:
+            return self._client.incr(key)
+        except Exception as e:
+            logger.error(f"Redis INCR error for key '{key}': {e}")
+            return None
+
+    def mget(self, *keys: str) -> Optional[List[Optional[str]]]:
+        """Get several values in one round trip."""
+        if not self.is_available():
+            return None
+        try:
+            return self._client.mget(keys)
+        except Exception as e:
+            logger.error(f"Redis MGET error for keys {keys}: {e}")
+            return None
+
 
 # Global Redis client instance
 redis_client = RedisClient()
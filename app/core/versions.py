@@ -0,0 +1,47 @@
+"""
+Invalidation counters shared between processes.
+
+In-process caches remember the version of every key they were filled at and
+compare it on read. Counters live in Redis so a bump from any worker (or the
+market data orchestrator) reaches all of them; without Redis each process
+falls back to its own counters.
+"""
+
+import threading
+from typing import Any, Dict, Iterable
+
+from app.core.redis import redis_client
+
+
+class SharedVersions:
+    """Per-key counters in Redis with an in-process fallback."""
+
+    def __init__(self, key_prefix: str):
+        self.key_prefix = key_prefix
+
+        self._local: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: Iterable[Any]) -> Dict[str, int]:
+        """Current version of every key, in one round trip."""
+        keys = [str(key) for key in keys]
+        if not keys:
+            return {}
+        shared = redis_client.mget(*(self._redis_key(key) for key in keys))
+        if shared is None:
+            with self._lock:
+                return {key: self._local.get(key, 0) for key in keys}
+        return {key: int(value or 0) for key, value in zip(keys, shared)}
+
+    def get(self, key: Any) -> int:
+        return self.get_many([key])[str(key)]
+
+    def bump(self, keys: Iterable[Any]) -> None:
+        """Invalidate everything cached under the keys, in every process."""
+        for key in {str(key) for key in keys}:
+            with self._lock:
+                self._local[key] = self._local.get(key, 0) + 1
+            redis_client.incr(self._redis_key(key))
+
+    def _redis_key(self, key: str) -> str:
+        return f"{self.key_prefix}:{key}"
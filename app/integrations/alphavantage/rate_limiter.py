@@ -0,0 +1,145 @@
+"""
+Async token-bucket rate limiting for the Alpha Vantage API.
+
+Alpha Vantage enforces two quotas per API key: a per-minute burst limit and a
+per-day total. Each quota is modelled as a token bucket; a request must take a
+token from both buckets before it is sent.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import UTC, datetime, timedelta
+from typing import Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Async token bucket with continuous refill."""
+
+    def __init__(self, capacity: int, refill_period_seconds: float):
+        """
+        Args:
+            capacity: Maximum number of tokens (burst size)
+            refill_period_seconds: Time taken to refill an empty bucket
+        """
+        self.capacity = float(capacity)
+        self.refill_rate = capacity / refill_period_seconds  # tokens per second
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._updated_at
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.refill_rate)
+        self._updated_at = now
+
+    @property
+    def available(self) -> float:
+        """Tokens currently available (after refill)."""
+        self._refill()
+        return self._tokens
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Take tokens if available without waiting."""
+        self._refill()
+        if self._tokens >= tokens:
+            self._tokens -= tokens
+            return True
+        return False
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        """Wait until tokens are available, then take them."""
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait_seconds = (tokens - self._tokens) / self.refill_rate
+                await asyncio.sleep(wait_seconds)
+
+    def drain(self) -> None:
+        """Empty the bucket, e.g. after the server reports throttling."""
+        self._refill()
+        self._tokens = 0.0
+
+
+class AlphaVantageQuotaExceeded(Exception):
+    """Raised when the daily Alpha Vantage request quota has been used up."""
+
+    pass
+
+
+class AlphaVantageRateLimiter:
+    """Combined per-minute and per-day limiter for one Alpha Vantage API key."""
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[int] = None,
+        requests_per_day: Optional[int] = None,
+    ):
+        self.requests_per_minute = (
+            requests_per_minute or settings.ALPHA_VANTAGE_REQUESTS_PER_MINUTE
+        )
+        self.requests_per_day = requests_per_day or settings.ALPHA_VANTAGE_REQUESTS_PER_DAY
+
+        self._minute_bucket = TokenBucket(self.requests_per_minute, 60)
+        self._day_bucket = TokenBucket(self.requests_per_day, 86400)
+        # Set when the API reports the daily quota used up (the key may be shared)
+        self._exhausted_until: Optional[datetime] = None
+
+    @property
+    def min_interval_seconds(self) -> float:
+        """Average spacing between requests allowed by the per-minute quota."""
+        return 60 / self.requests_per_minute
+
+    async def wait_if_needed(self) -> None:
+        """
+        Block until a request may be sent.
+
+        Waits on the per-minute bucket; the per-day bucket is checked without
+        waiting because sleeping for hours inside a request is never useful.
+
+        Raises:
+            AlphaVantageQuotaExceeded: If the daily quota is exhausted
+        """
+        if self._exhausted_until is not None:
+            if datetime.now(UTC) < self._exhausted_until:
+                raise AlphaVantageQuotaExceeded(
+                    "Alpha Vantage daily quota reported exhausted until "
+                    f"{self._exhausted_until.isoformat()}"
+                )
+            self._exhausted_until = None
+        if not self._day_bucket.try_acquire():
+            raise AlphaVantageQuotaExceeded(
+                f"Alpha Vantage daily quota of {self.requests_per_day} requests reached"
+            )
+        await self._minute_bucket.acquire()
+
+    def on_throttled(self) -> None:
+        """Drain the minute bucket when the API reports we are over the limit."""
+        logger.debug("Alpha Vantage throttled request, draining minute bucket")
+        self._minute_bucket.drain()
+
+    def on_daily_quota_exhausted(self) -> None:
+        """Refuse requests until the next UTC day after the API reports the daily quota used."""
+        tomorrow = datetime.now(UTC).date() + timedelta(days=1)
+        self._exhausted_until = datetime(tomorrow.year, tomorrow.month, tomorrow.day, tzinfo=UTC)
+        self._day_bucket.drain()
+
+    def get_stats(self) -> dict:
+        """Remaining capacity in each bucket."""
+        return {
+            "minute_tokens_available": round(self._minute_bucket.available, 2),
+            "day_tokens_available": round(self._day_bucket.available, 2),
+            "requests_per_minute": self.requests_per_minute,
+            "requests_per_day": self.requests_per_day,
+            "exhausted_until": (
+                self._exhausted_until.isoformat() if self._exhausted_until else None
+            ),
+        }
@@ -1,31 +1,106 @@
 import asyncio
 import logging
-from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional
+import random
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
 
 import aiohttp
+import pandas as pd
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
 from app.core.repository import BaseRepository
+from app.integrations.alphavantage.rate_limiter import (
+    AlphaVantageQuotaExceeded,
+    AlphaVantageRateLimiter,
+)
+from app.integrations.cache import ProviderResponseCache, provider_cache
 from app.security.master.model import Security
+from app.security.prices.enums import RefreshBucket
+from app.security.prices.latest import latest_price_cache
+from app.security.prices.market_summary import invalidate_summaries
 from app.security.prices.model import SecurityPrice
+from app.security.prices.partitions import price_partition_manager
+from app.security.prices.refresh import RefreshPlan, price_refresh_planner
+from app.security.prices.repository import market_data_crud
+from app.security.quality.service import PriceQualityGate
 
 logger = logging.getLogger(__name__)
 
+# Alpha Vantage signals throttling with a 200 response carrying only a message
+THROTTLE_KEYS = ("Note", "Information")
+THROTTLE_PHRASES = ("call frequency", "rate limit", "requests per")
+
+# The daily quota notice ("...rate limit is 25 requests per day") names only the
+# day; the per-minute notice names the minute (and sometimes the day as well)
+DAILY_QUOTA_PHRASES = ("per day",)
+PER_MINUTE_PHRASES = ("per minute",)
+
+
+def _throttle_message(data: Dict[str, Any]) -> Optional[str]:
+    """Return the throttling message if the response is a rate-limit notice."""
+    for key in THROTTLE_KEYS:
+        message = data.get(key)
+        if isinstance(message, str) and (
+            key == "Note" or any(p in message.lower() for p in THROTTLE_PHRASES)
+        ):
+            return message
+    return None
+
+
+def _is_daily_quota_notice(message: str) -> bool:
+    """Whether a throttling message reports the daily quota rather than the per-minute one."""
+    message = message.lower()
+    return any(p in message for p in DAILY_QUOTA_PHRASES) and not any(
+        p in message for p in PER_MINUTE_PHRASES
+    )
+
 
 class AlphaVantageClient:
     """
     Alpha Vantage API client with rate limiting and caching.
     Handles stock, ETF, and cryptocurrency data fetching.
+
+    A single pooled aiohttp session is reused for all requests, every request
+    passes through a token-bucket limiter matching the API plan quotas, and
+    concurrent callers asking for the same data share one in-flight request.
+    Successful responses are kept in the provider response cache so repeat
+    fetches within an endpoint's TTL never reach the API.
     """
 
-    def __init__(self):
+    PROVIDER = "alphavantage"
+
+    def __init__(
+        self,
+        rate_limiter: Optional[AlphaVantageRateLimiter] = None,
+        max_connections: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        response_cache: Optional[ProviderResponseCache] = None,
+    ):
         self.api_key = settings.ALPHA_VANTAGE_API_KEY
         self.base_url = settings.ALPHA_VANTAGE_BASE_URL
+        self.rate_limiter = rate_limiter or AlphaVantageRateLimiter()
+        self.response_cache = response_cache or provider_cache
+        self.max_connections = max_connections or settings.ALPHA_VANTAGE_MAX_CONNECTIONS
+        self.max_retries = (
+            max_retries if max_retries is not None else settings.ALPHA_VANTAGE_MAX_RETRIES
+        )
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_lock = asyncio.Lock()
+        self._inflight: Dict[Tuple[Tuple[str, str], ...], asyncio.Future] = {}
+
+        self._stats = {
+            "requests": 0,
+            "coalesced": 0,
+            "throttled": 0,
+            "retries": 0,
+            "errors": 0,
+            "quota_exceeded": 0,
+        }
 
     async def fetch_daily_data(
-        self, symbol: str, outputsize: str = "compact"
+        self, symbol: str, outputsize: str = "compact", refresh: bool = False
     ) -> Optional[Dict[str, Any]]:
         """
         Fetch daily time series data for a stock/ETF.
@@ -33,6 +108,7 @@ class AlphaVantageClient:
         Args:
             symbol: Stock symbol (e.g., 'AAPL', 'SPY')
             outputsize: 'compact' (last 100 days) or 'full' (20+ years)
+            refresh: Skip the response cache and refetch
         """
         params = {
             "function": "TIME_SERIES_DAILY_ADJUSTED",
@@ -41,7 +117,7 @@ class AlphaVantageClient:
             "apikey": self.api_key,
         }
 
-        return await self._make_request(params)
+        return await self._make_request(params, refresh=refresh)
 
     async def fetch_intraday_data(
         self, symbol: str, interval: str = "5min"
@@ -62,13 +138,16 @@ class AlphaVantageClient:
 
         return await self._make_request(params)
 
-    async def fetch_crypto_data(self, symbol: str, market: str = "USD") -> Optional[Dict[str, Any]]:
+    async def fetch_crypto_data(
+        self, symbol: str, market: str = "USD", refresh: bool = False
+    ) -> Optional[Dict[str, Any]]:
         """
         Fetch cryptocurrency data.
 
         Args:
             symbol: Crypto symbol (e.g., 'BTC', 'ETH')
             market: Market currency (default: 'USD')
+            refresh: Skip the response cache and refetch
         """
         params = {
             "function": "DIGITAL_CURRENCY_DAILY",
@@ -77,7 +156,7 @@ class AlphaVantageClient:
             "apikey": self.api_key,
         }
 
-        return await self._make_request(params)
+        return await self._make_request(params, refresh=refresh)
 
     async def fetch_fx_rate(self, from_currency: str, to_currency: str) -> Optional[Dict[str, Any]]:
         """
@@ -122,40 +201,173 @@ class AlphaVantageClient:
 
         return await self._make_request(params)
 
-    async def _make_request(self, params: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    async def _make_request(
+        self, params: Dict[str, str], refresh: bool = False
+    ) -> Optional[Dict[str, Any]]:
         """
         Make HTTP request to Alpha Vantage API with rate limiting.
 
+        Cached responses are returned without touching the network. Identical
+        concurrent requests are coalesced: the first caller performs the HTTP
+        call and every other caller awaits the same result.
+
         Args:
             params: Query parameters for the API call
+            refresh: Skip the cached response; the new one replaces it
         """
-        # Wait for rate limiter
-        await self.rate_limiter.wait_if_needed()
+        function = params.get("function", "")
+        cached = None if refresh else self.response_cache.get(self.PROVIDER, function, params)
+        if cached is not None:
+            return cached
+
+        key = self._request_key(params)
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self._stats["coalesced"] += 1
+            return await asyncio.shield(inflight)
+
+        task = asyncio.ensure_future(self._fetch_and_cache(params))
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+        # Shield so one cancelled caller does not cancel the shared request
+        return await asyncio.shield(task)
+
+    async def _fetch_and_cache(self, params: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        """Fetch from the API and store successful responses in the response cache."""
+        data = await self._request_with_retry(params)
+        if data is not None:
+            self.response_cache.set(self.PROVIDER, params.get("function", ""), params, data)
+        return data
+
+    async def _request_with_retry(self, params: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        """Send a request, retrying throttled and transient failures with jittered backoff."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                await self.rate_limiter.wait_if_needed()
+            except AlphaVantageQuotaExceeded as e:
+                self._stats["quota_exceeded"] += 1
+                logger.warning(str(e))
+                return None
 
-        try:
-            async with aiohttp.ClientSession() as session:
+            self._stats["requests"] += 1
+
+            try:
+                session = await self._get_session()
                 async with session.get(self.base_url, params=params) as response:
                     if response.status == 200:
-                        data = await response.json()
+                        data = await response.json(content_type=None)
 
                         # Check for API errors
                         if "Error Message" in data:
                             logger.error(f"Alpha Vantage API error: {data['Error Message']}")
                             return None
 
-                        if "Note" in data:
-                            logger.warning(f"Alpha Vantage API note: {data['Note']}")
-                            # This typically means we've hit the rate limit
+                        throttle_message = _throttle_message(data)
+                        if throttle_message is None:
+                            if "Information" in data and len(data) == 1:
+                                # e.g. premium-only endpoint; retrying will not help
+                                logger.error(f"Alpha Vantage API info: {data['Information']}")
+                                return None
+                            return data
+
+                        if _is_daily_quota_notice(throttle_message):
+                            # Retrying only burns calls until the quota resets
+                            self._stats["quota_exceeded"] += 1
+                            self.rate_limiter.on_daily_quota_exhausted()
+                            logger.warning(f"Alpha Vantage daily quota reached: {throttle_message}")
                             return None
 
-                        return data
+                        # Over the per-minute limit despite local accounting
+                        # (e.g. the key is shared with another process)
+                        self._stats["throttled"] += 1
+                        self.rate_limiter.on_throttled()
+                        logger.warning(f"Alpha Vantage API note: {throttle_message}")
+
+                    elif response.status == 429 or response.status >= 500:
+                        logger.warning(f"Alpha Vantage HTTP {response.status}, will retry")
                     else:
                         logger.error(f"HTTP error {response.status}: {await response.text()}")
                         return None
 
-        except Exception as e:
-            logger.error(f"Request failed: {str(e)}")
-            return None
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.warning(f"Alpha Vantage request failed: {str(e)}")
+            except Exception as e:
+                self._stats["errors"] += 1
+                logger.error(f"Request failed: {str(e)}")
+                return None
+
+            if attempt < self.max_retries:
+                self._stats["retries"] += 1
+                await asyncio.sleep(self._backoff_delay(attempt))
+
+        self._stats["errors"] += 1
+        logger.error(
+            f"Alpha Vantage request for {params.get('function')} failed "
+            f"after {self.max_retries + 1} attempts"
+        )
+        return None
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """Exponential backoff with full jitter, based on the per-minute spacing."""
+        base = self.rate_limiter.min_interval_seconds
+        return random.uniform(base, base * (2**attempt) + base)
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared keep-alive session, creating it on first use."""
+        if self._session is not None and not self._session.closed:
+            return self._session
+
+        async with self._session_lock:
+            if self._session is None or self._session.closed:
+                connector = aiohttp.TCPConnector(
+                    limit=self.max_connections,
+                    keepalive_timeout=settings.ALPHA_VANTAGE_KEEPALIVE_SECONDS,
+                )
+                self._session = aiohttp.ClientSession(
+                    connector=connector,
+                    timeout=aiohttp.ClientTimeout(total=settings.ALPHA_VANTAGE_TIMEOUT_SECONDS),
+                )
+        return self._session
+
+    async def close(self) -> None:
+        """Close the pooled HTTP session."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    @staticmethod
+    def _request_key(params: Dict[str, str]) -> Tuple[Tuple[str, str], ...]:
+        """Identity of a request for coalescing (API key excluded)."""
+        return tuple(sorted((k, str(v)) for k, v in params.items() if k != "apikey"))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get request and rate limiter statistics."""
+        return {
+            **self._stats,
+            "inflight": len(self._inflight),
+            "rate_limiter": self.rate_limiter.get_stats(),
+            "response_cache": self.response_cache.get_stats(),
+        }
+
+
+# Process-wide client so the connection pool and quota accounting are shared
+_alpha_vantage_client: Optional[AlphaVantageClient] = None
+
+
+def get_alpha_vantage_client() -> AlphaVantageClient:
+    """Get the shared AlphaVantageClient instance."""
+    global _alpha_vantage_client
+    if _alpha_vantage_client is None:
+        _alpha_vantage_client = AlphaVantageClient()
+    return _alpha_vantage_client
+
+
+async def close_alpha_vantage_client() -> None:
+    """Close the shared client's HTTP session (call on application shutdown)."""
+    if _alpha_vantage_client is not None:
+        await _alpha_vantage_client.close()
 
 
 class MarketDataService:
@@ -163,18 +375,28 @@ class MarketDataService:
     Service for fetching and storing market data using Alpha Vantage.
     """
 
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, quality_gate: Optional[PriceQualityGate] = None):
         self.db = db
-        self.client = AlphaVantageClient()
+        self.client = get_alpha_vantage_client()
+        self.quality_gate = quality_gate or PriceQualityGate()
         self.market_data_crud = BaseRepository(Security)
 
-    async def update_security_data(self, security_id: str, force_refresh: bool = False) -> bool:
+    async def update_security_data(
+        self,
+        security_id: str,
+        force_refresh: bool = False,
+        plan: Optional[RefreshPlan] = None,
+    ) -> bool:
         """
         Update market data for a specific securities.
 
+        Requests the smallest output size that covers the gap since the last
+        stored price date and writes only the sessions after it.
+
         Args:
             security_id: SecurityMaster ID to update
-            force_refresh: Force refresh even if data exists
+            force_refresh: Fetch even if stored prices are up to date
+            plan: Refresh plan computed by the caller, to avoid re-querying
         """
         # Get securities details
         security = self.db.query(Security).filter(Security.id == security_id).first()
@@ -182,123 +404,128 @@ class MarketDataService:
             logger.error(f"SecurityMaster {security_id} not found")
             return False
 
-        # Check if we need to update data
-        if not force_refresh:
-            latest_data = (
-                self.db.query(SecurityPrice)
-                .filter(SecurityPrice.security_id == security_id)
-                .order_by(SecurityPrice.date.desc())
-                .first()
-            )
+        if plan is None:
+            plan = price_refresh_planner.plan(self.db, [security])[0]
 
-            if latest_data and latest_data.date >= datetime.now().date() - timedelta(days=1):
+        # Check if we need to update data
+        if plan.bucket == RefreshBucket.UP_TO_DATE and not plan.force_refresh:
+            if not force_refresh:
                 logger.info(f"Market data for {security.symbol} is up to date")
                 return True
+            plan = plan._replace(start_date=plan.last_price_date, force_refresh=True)
 
         # Fetch new data based on securities type
         try:
-            if security.type == "cryptocurrency":
-                data = await self.client.fetch_crypto_data(security.symbol)
-                return await self._process_crypto_data(security, data)
+            if security.security_type == "cryptocurrency":
+                data = await self.client.fetch_crypto_data(
+                    security.symbol, refresh=plan.force_refresh
+                )
+                return self._process_time_series(
+                    security,
+                    data,
+                    series_key="Time Series (Digital Currency Daily)",
+                    close_key="4a. close (USD)",
+                    volume_key="5. volume",
+                    after=plan.store_after,
+                    upsert=plan.force_refresh,
+                )
             else:
-                data = await self.client.fetch_daily_data(security.symbol)
-                return await self._process_stock_data(security, data)
+                data = await self.client.fetch_daily_data(
+                    security.symbol,
+                    outputsize=plan.alphavantage_outputsize,
+                    refresh=plan.force_refresh,
+                )
+                return self._process_time_series(
+                    security,
+                    data,
+                    series_key="Time Series (Daily)",
+                    close_key="4. close",
+                    volume_key="6. volume",
+                    after=plan.store_after,
+                    upsert=plan.force_refresh,
+                )
 
         except Exception as e:
             logger.error(f"Failed to update data for {security.symbol}: {str(e)}")
             return False
 
-    async def _process_stock_data(self, security: Security, data: Optional[Dict[str, Any]]) -> bool:
-        """Process and store stock/ETF market data."""
-        if not data or "Time Series (Daily)" not in data:
-            logger.error(f"Invalid stock data format for {security.symbol}")
-            return False
-
-        time_series = data["Time Series (Daily)"]
-
-        for date_str, price_data in time_series.items():
-            try:
-                date = datetime.strptime(date_str, "%Y-%m-%d").date()
-
-                # Check if data already exists
-                existing = (
-                    self.db.query(SecurityPrice)
-                    .filter(SecurityPrice.security_id == security.id, SecurityPrice.date == date)
-                    .first()
-                )
-
-                if existing:
-                    continue
-
-                # Create new market data entry
-                market_data = SecurityPrice(
-                    security_id=security.id,
-                    date=date,
-                    open=float(price_data["1. open"]),
-                    high=float(price_data["2. high"]),
-                    low=float(price_data["3. low"]),
-                    close=float(price_data["4. close"]),
-                    adjusted_close=float(price_data["5. adjusted close"]),
-                    volume=int(price_data["6. volume"]),
-                    currency=security.currency,
-                    source="alphavantage",
-                )
-
-                self.db.add(market_data)
-
-            except (ValueError, KeyError) as e:
-                logger.error(f"Error processing data for {date_str}: {str(e)}")
-                continue
-
-        self.db.commit()
-        logger.info(f"Updated market data for {security.symbol}")
-        return True
-
-    async def _process_crypto_data(
-        self, security: Security, data: Optional[Dict[str, Any]]
+    def _process_time_series(
+        self,
+        security: Security,
+        data: Optional[Dict[str, Any]],
+        *,
+        series_key: str,
+        close_key: str,
+        volume_key: str,
+        after: Optional[date],
+        upsert: bool = False,
     ) -> bool:
-        """Process and store cryptocurrency market data."""
-        if not data or "Time Series (Digital Currency Daily)" not in data:
-            logger.error(f"Invalid crypto data format for {security.symbol}")
-            return False
+        """
+        Store the sessions in an Alpha Vantage daily time series newer than `after`.
 
-        time_series = data["Time Series (Digital Currency Daily)"]
+        With `upsert` (forced refreshes) stored rows on the same dates are overwritten.
+        """
+        if not data or series_key not in data:
+            logger.error(f"Invalid time series data format for {security.symbol}")
+            return False
 
-        for date_str, price_data in time_series.items():
+        records = []
+        for date_str, price_data in data[series_key].items():
             try:
-                date = datetime.strptime(date_str, "%Y-%m-%d").date()
-
-                # Check if data already exists
-                existing = (
-                    self.db.query(SecurityPrice)
-                    .filter(SecurityPrice.security_id == security.id, SecurityPrice.date == date)
-                    .first()
+                records.append(
+                    {
+                        "price_date": datetime.strptime(date_str, "%Y-%m-%d").date(),
+                        "close_price": float(price_data[close_key]),
+                        "volume": int(float(price_data[volume_key])),
+                    }
                 )
-
-                if existing:
-                    continue
-
-                # Create new market data entry
-                market_data = SecurityPrice(
-                    security_id=security.id,
-                    date=date,
-                    open=float(price_data["1a. open (USD)"]),
-                    high=float(price_data["2a. high (USD)"]),
-                    low=float(price_data["3a. low (USD)"]),
-                    close=float(price_data["4a. close (USD)"]),
-                    volume=float(price_data["5. volume"]),
-                    currency="USD",  # Crypto prices in USD
-                    source="alphavantage",
-                )
-
-                self.db.add(market_data)
-
             except (ValueError, KeyError) as e:
-                logger.error(f"Error processing crypto data for {date_str}: {str(e)}")
+                logger.error(f"Error processing data for {date_str}: {str(e)}")
                 continue
 
+        if not records:
+            logger.info(f"No usable market data records for {security.symbol}")
+            return True
+
+        # Only sessions we do not have yet, and only those passing the quality checks
+        accepted = self.quality_gate.screen(
+            self.db, security, pd.DataFrame(records), data_source="alphavantage", after=after
+        )
+        new_rows = [
+            SecurityPrice(
+                security_id=security.id,
+                price_date=row.price_date,
+                close_price=row.close_price,
+                volume=int(row.volume),
+                data_source="alphavantage",
+            )
+            for row in accepted.itertuples(index=False)
+        ]
+
+        if upsert:
+            market_data_crud.bulk_create_or_update(
+                self.db,
+                market_data_list=[
+                    {
+                        "security_id": row.security_id,
+                        "price_date": row.price_date,
+                        "close_price": row.close_price,
+                        "volume": row.volume,
+                        "data_source": row.data_source,
+                    }
+                    for row in new_rows
+                ],
+            )
+        else:
+            price_partition_manager.ensure_partitions(
+                self.db, (row.price_date for row in new_rows)
+            )
+            self.db.add_all(new_rows)
         self.db.commit()
-        logger.info(f"Updated crypto data for {security.symbol}")
+        if new_rows:
+            latest_price_cache.invalidate([security.id])
+            invalidate_summaries(row.price_date for row in new_rows)
+        logger.info(f"Added {len(new_rows)} market data records for {security.symbol}")
         return True
 
     async def bulk_update_securities(
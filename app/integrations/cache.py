@@ -0,0 +1,232 @@
+"""
+Persistent response cache for market data providers.
+
+Caches raw provider responses keyed by (provider, function, params) so repeat
+fetches of company overviews, symbol searches and daily series during
+enrichment and backfill do not spend provider quota. Responses are stored in
+Redis when available and in JSON files on local disk otherwise.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Union
+from zoneinfo import ZoneInfo
+
+from app.core.config import settings
+from app.core.redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+# US equity market close used to expire end-of-day series
+MARKET_TIMEZONE = ZoneInfo("America/New_York")
+MARKET_CLOSE_HOUR = 16
+# Providers publish the final daily bar a little after the close
+MARKET_CLOSE_SETTLE_MINUTES = 30
+
+MINUTE = 60
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+
+
+def seconds_until_next_market_close(now: Optional[datetime] = None) -> int:
+    """
+    Seconds until the next weekday market close (plus settle time).
+
+    End-of-day series cannot change before the next close, so this is the
+    natural expiry for cached daily data. Exchange holidays are ignored; an
+    entry then simply expires one day early.
+    """
+    now = (now or datetime.now(MARKET_TIMEZONE)).astimezone(MARKET_TIMEZONE)
+    close = now.replace(hour=MARKET_CLOSE_HOUR, minute=0, second=0, microsecond=0) + timedelta(
+        minutes=MARKET_CLOSE_SETTLE_MINUTES
+    )
+    if now >= close:
+        close += timedelta(days=1)
+    while close.weekday() >= 5:  # Saturday/Sunday
+        close += timedelta(days=1)
+    return max(MINUTE, int((close - now).total_seconds()))
+
+
+TTLPolicy = Union[int, Callable[[], int]]
+
+# Per-endpoint time-to-live, by provider and function name
+DEFAULT_TTL_POLICY: Dict[str, Dict[str, TTLPolicy]] = {
+    "alphavantage": {
+        "OVERVIEW": settings.PROVIDER_CACHE_OVERVIEW_TTL_DAYS * DAY,
+        "SYMBOL_SEARCH": DAY,
+        "TIME_SERIES_DAILY": seconds_until_next_market_close,
+        "TIME_SERIES_DAILY_ADJUSTED": seconds_until_next_market_close,
+        "DIGITAL_CURRENCY_DAILY": seconds_until_next_market_close,
+        "FX_DAILY": seconds_until_next_market_close,
+        "TIME_SERIES_INTRADAY": MINUTE,
+    },
+    "yfinance": {
+        "info": settings.PROVIDER_CACHE_OVERVIEW_TTL_DAYS * DAY,
+        "history": seconds_until_next_market_close,
+    },
+}
+DEFAULT_TTL_SECONDS = HOUR
+
+
+class ProviderResponseCache:
+    """Redis-backed provider response cache with a local disk fallback."""
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        ttl_policy: Optional[Dict[str, Dict[str, TTLPolicy]]] = None,
+        key_prefix: str = "provider_cache",
+        enabled: Optional[bool] = None,
+    ):
+        self.cache_dir = Path(cache_dir or settings.PROVIDER_CACHE_DIR)
+        self.ttl_policy = ttl_policy or DEFAULT_TTL_POLICY
+        self.key_prefix = key_prefix
+        self.enabled = settings.PROVIDER_CACHE_ENABLED if enabled is None else enabled
+
+        self._hits: Dict[str, int] = defaultdict(int)
+        self._misses: Dict[str, int] = defaultdict(int)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def build_key(self, provider: str, function: str, params: Dict[str, Any]) -> str:
+        """Build a stable cache key; parameter order does not matter."""
+        canonical = json.dumps(
+            {k: str(v) for k, v in params.items() if k != "apikey"}, sort_keys=True
+        )
+        digest = hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:32]
+        return f"{self.key_prefix}:{provider}:{function}:{digest}"
+
+    def ttl_for(self, provider: str, function: str) -> int:
+        """Resolve the time-to-live in seconds for an endpoint."""
+        policy = self.ttl_policy.get(provider, {}).get(function, DEFAULT_TTL_SECONDS)
+        return int(policy() if callable(policy) else policy)
+
+    def get(self, provider: str, function: str, params: Dict[str, Any]) -> Optional[Any]:
+        """Return a cached response, or None on miss or expiry."""
+        if not self.enabled:
+            return None
+
+        key = self.build_key(provider, function, params)
+        value = self._redis_get(key) if redis_client.is_available() else self._disk_get(key)
+
+        counter = f"{provider}:{function}"
+        if value is None:
+            self._misses[counter] += 1
+        else:
+            self._hits[counter] += 1
+        return value
+
+    def set(
+        self,
+        provider: str,
+        function: str,
+        params: Dict[str, Any],
+        value: Any,
+        ttl: Optional[int] = None,
+    ) -> bool:
+        """Store a response under the endpoint TTL (or an explicit one)."""
+        if not self.enabled or value is None:
+            return False
+
+        key = self.build_key(provider, function, params)
+        ttl = ttl if ttl is not None else self.ttl_for(provider, function)
+
+        try:
+            payload = json.dumps(value, default=str)
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Response for {provider}:{function} is not cacheable: {e}")
+            return False
+
+        if redis_client.is_available():
+            return redis_client.setex(key, ttl, payload)
+        return self._disk_set(key, payload, ttl)
+
+    def invalidate(self, provider: str, function: str, params: Dict[str, Any]) -> None:
+        """Remove a cached response."""
+        key = self.build_key(provider, function, params)
+        redis_client.delete(key)
+        try:
+            self._disk_path(key).unlink(missing_ok=True)
+        except OSError as e:
+            logger.debug(f"Failed to remove disk cache entry {key}: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters, overall and per endpoint."""
+        endpoints = sorted(set(self._hits) | set(self._misses))
+        hits = sum(self._hits.values())
+        misses = sum(self._misses.values())
+        return {
+            "backend": "redis" if redis_client.is_available() else "disk",
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            "by_endpoint": {
+                name: {"hits": self._hits[name], "misses": self._misses[name]}
+                for name in endpoints
+            },
+        }
+
+    # ------------------------------------------------------------------
+    # Storage backends
+    # ------------------------------------------------------------------
+
+    def _redis_get(self, key: str) -> Optional[Any]:
+        raw = redis_client.get(key)
+        if raw is None:
+            return None
+        try:
+            return json.loads(raw)
+        except ValueError:
+            redis_client.delete(key)
+            return None
+
+    def _disk_path(self, key: str) -> Path:
+        return self.cache_dir / f"{hashlib.sha256(key.encode('utf-8')).hexdigest()}.json"
+
+    def _disk_get(self, key: str) -> Optional[Any]:
+        path = self._disk_path(key)
+        try:
+            with path.open("r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.debug(f"Discarding unreadable disk cache entry {path}: {e}")
+            path.unlink(missing_ok=True)
+            return None
+
+        if entry.get("expires_at", 0) <= time.time():
+            path.unlink(missing_ok=True)
+            return None
+        return json.loads(entry["value"])
+
+    def _disk_set(self, key: str, payload: str, ttl: int) -> bool:
+        path = self._disk_path(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            with tmp_path.open("w", encoding="utf-8") as f:
+                json.dump({"key": key, "expires_at": time.time() + ttl, "value": payload}, f)
+            os.replace(tmp_path, path)  # Atomic so readers never see partial files
+            return True
+        except OSError as e:
+            logger.warning(f"Failed to write disk cache entry for {key}: {e}")
+            tmp_path.unlink(missing_ok=True)
+            return False
+
+
+# Global provider cache instance
+provider_cache = ProviderResponseCache()
+
+
+def get_provider_cache() -> ProviderResponseCache:
+    """Dependency injection for the provider response cache."""
+    return provider_cache
@@ -0,0 +1,9 @@
+from enum import Enum
+
+
+class CircuitState(str, Enum):
+    """Circuit breaker state of a market data provider"""
+
+    CLOSED = "closed"  # Healthy; calls flow normally
+    OPEN = "open"  # Failing; calls are skipped until the cooldown ends
+    HALF_OPEN = "half_open"  # Cooldown over; the next call decides
@@ -0,0 +1,164 @@
+"""
+Health-based routing between market data providers.
+
+Every provider call is recorded with its outcome and latency. Providers are
+tried in order of a score built from their recent success rate (per security
+type once there are enough samples) and mean latency, with the provider that
+last served the security first while it is healthy. A circuit breaker skips a
+provider after consecutive failures until a cooldown has passed; the first
+call after the cooldown closes or re-opens it.
+"""
+
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+from app.integrations.enums import CircuitState
+
+logger = logging.getLogger(__name__)
+
+# Names SecurityProvider rows may use for the providers we can route to
+PROVIDER_ALIASES = {
+    "yfinance": "yfinance",
+    "alphavantage": "alphavantage",
+    "alpha_vantage": "alphavantage",
+}
+
+# Samples needed before a per-security-type success rate replaces the overall one
+MIN_TYPE_SAMPLES = 5
+
+
+def normalize_provider(name: Optional[str]) -> Optional[str]:
+    return PROVIDER_ALIASES.get((name or "").lower())
+
+
+class _Circuit:
+    def __init__(self):
+        self.state = CircuitState.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+
+
+class ProviderRouter:
+    """Tracks provider health and decides the order providers are tried in."""
+
+    def __init__(
+        self,
+        providers: Sequence[str],
+        window: Optional[int] = None,
+        failure_threshold: Optional[int] = None,
+        cooldown_seconds: Optional[int] = None,
+    ):
+        self.providers = list(providers)
+        self.window = window or settings.PROVIDER_HEALTH_WINDOW
+        self.failure_threshold = failure_threshold or settings.PROVIDER_FAILURE_THRESHOLD
+        self.cooldown_seconds = cooldown_seconds or settings.PROVIDER_CIRCUIT_COOLDOWN_SECONDS
+
+        # (provider, security_type or None) -> recent (success, latency) samples
+        self._samples: Dict[Tuple[str, Optional[str]], deque] = defaultdict(
+            lambda: deque(maxlen=self.window)
+        )
+        self._circuits: Dict[str, _Circuit] = {p: _Circuit() for p in self.providers}
+        self._lock = threading.Lock()
+
+    def order(
+        self, security_type: Optional[str] = None, preferred: Optional[str] = None
+    ) -> List[str]:
+        """
+        Providers to try, best first; providers with an open circuit are left out.
+
+        `preferred` (the provider that last served the security) goes first
+        unless its circuit is open.
+        """
+        with self._lock:
+            available = [p for p in self.providers if self._is_available(p)]
+            ranked = sorted(available, key=lambda p: -self._score(p, security_type))
+
+        preferred = normalize_provider(preferred)
+        if preferred in ranked:
+            ranked.remove(preferred)
+            ranked.insert(0, preferred)
+        return ranked
+
+    def record(
+        self, provider: str, security_type: Optional[str], success: bool, latency: float
+    ) -> None:
+        """Record the outcome of one provider call."""
+        with self._lock:
+            sample = (success, latency)
+            self._samples[(provider, None)].append(sample)
+            if security_type:
+                self._samples[(provider, security_type)].append(sample)
+
+            circuit = self._circuits.setdefault(provider, _Circuit())
+            if success:
+                if circuit.state != CircuitState.CLOSED:
+                    logger.info(f"Provider {provider} recovered; closing circuit")
+                circuit.state = CircuitState.CLOSED
+                circuit.consecutive_failures = 0
+                return
+
+            circuit.consecutive_failures += 1
+            if (
+                circuit.state == CircuitState.HALF_OPEN
+                or circuit.consecutive_failures >= self.failure_threshold
+            ):
+                if circuit.state != CircuitState.OPEN:
+                    logger.warning(
+                        f"Opening circuit for provider {provider} after "
+                        f"{circuit.consecutive_failures} consecutive failures"
+                    )
+                circuit.state = CircuitState.OPEN
+                circuit.opened_at = time.monotonic()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._samples.clear()
+            self._circuits = {p: _Circuit() for p in self.providers}
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = {}
+            for provider in self.providers:
+                samples = self._samples.get((provider, None), ())
+                success_rate, latency = self._rates(samples)
+                stats[provider] = {
+                    "circuit": self._circuits[provider].state.value,
+                    "consecutive_failures": self._circuits[provider].consecutive_failures,
+                    "calls": len(samples),
+                    "success_rate": round(success_rate, 4),
+                    "avg_latency_seconds": round(latency, 3),
+                }
+            return stats
+
+    def _is_available(self, provider: str) -> bool:
+        circuit = self._circuits[provider]
+        if circuit.state == CircuitState.OPEN:
+            if time.monotonic() - circuit.opened_at < self.cooldown_seconds:
+                return False
+            circuit.state = CircuitState.HALF_OPEN
+        return True
+
+    def _score(self, provider: str, security_type: Optional[str]) -> float:
+        samples = self._samples.get((provider, security_type), ())
+        if len(samples) < MIN_TYPE_SAMPLES:
+            samples = self._samples.get((provider, None), ())
+        success_rate, latency = self._rates(samples)
+        # Fast and reliable first; a provider 2x slower needs a clearly better success rate
+        return success_rate / (1.0 + latency)
+
+    @staticmethod
+    def _rates(samples: Any) -> Tuple[float, float]:
+        if not samples:
+            # Optimistic prior so untried providers get traffic
+            return 1.0, 0.0
+        successes = sum(1 for success, _ in samples if success)
+        latency = sum(latency for _, latency in samples) / len(samples)
+        return successes / len(samples), latency
+
+
+# Create instance
+provider_router = ProviderRouter(["yfinance", "alphavantage"])
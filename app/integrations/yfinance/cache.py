@@ -0,0 +1,302 @@
+"""
+Process-wide cache of yfinance ticker metadata.
+
+yfinance `Ticker` objects are cheap, but `info` and `history` are slow HTTP
+calls. One bounded LRU shared by every service instance keeps, per symbol,
+the Ticker, its info dict, a snapshot of fast_info and the last history
+frame fetched, each with its own time-to-live. Info and history misses fall
+through to the provider response cache (Redis or disk) before hitting
+Yahoo, so other workers' fetches are reused too.
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, Optional, Tuple
+
+import pandas as pd
+import yfinance as yf
+
+from app.core.config import settings
+from app.integrations.cache import provider_cache
+
+logger = logging.getLogger(__name__)
+
+# fast_info fields snapshotted; all come from the same short price request
+FAST_INFO_FIELDS = (
+    "currency",
+    "exchange",
+    "last_price",
+    "previous_close",
+    "open",
+    "day_high",
+    "day_low",
+    "last_volume",
+)
+
+# Rough per-entry overhead of the Ticker object and bookkeeping
+ENTRY_OVERHEAD_BYTES = 2048
+
+
+class _TickerEntry:
+    def __init__(self, ticker: yf.Ticker):
+        self.ticker = ticker
+        self.info: Optional[Dict[str, Any]] = None
+        self.info_at = 0.0
+        self.fast_info: Optional[Dict[str, Any]] = None
+        self.fast_info_at = 0.0
+        self.history: Optional[pd.DataFrame] = None
+        self.history_key: Optional[Tuple] = None
+        self.history_at = 0.0
+        self.nbytes = ENTRY_OVERHEAD_BYTES
+
+
+class TickerCache:
+    """Bounded LRU of yfinance tickers and their metadata, with per-field TTLs."""
+
+    def __init__(
+        self,
+        max_size: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        info_ttl_seconds: Optional[int] = None,
+        fast_info_ttl_seconds: Optional[int] = None,
+        history_ttl_seconds: Optional[int] = None,
+    ):
+        self.max_size = max_size or settings.YFINANCE_TICKER_CACHE_SIZE
+        self.max_bytes = max_bytes or settings.YFINANCE_TICKER_CACHE_MAX_MB * 1024 * 1024
+        self.info_ttl_seconds = info_ttl_seconds or settings.YFINANCE_INFO_TTL_SECONDS
+        self.fast_info_ttl_seconds = (
+            fast_info_ttl_seconds or settings.YFINANCE_FAST_INFO_TTL_SECONDS
+        )
+        self.history_ttl_seconds = history_ttl_seconds or settings.YFINANCE_HISTORY_TTL_SECONDS
+
+        self._entries: "OrderedDict[str, _TickerEntry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits: Dict[str, int] = defaultdict(int)
+        self._misses: Dict[str, int] = defaultdict(int)
+        self._evictions = 0
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def get_ticker(self, symbol: str) -> yf.Ticker:
+        """Shared Ticker object for a symbol."""
+        with self._lock:
+            return self._entry(symbol).ticker
+
+    def get_info(self, symbol: str) -> Dict[str, Any]:
+        """Ticker info dict; empty when yfinance knows nothing about the symbol."""
+        symbol = symbol.upper()
+        with self._lock:
+            entry = self._entry(symbol)
+            if entry.info is not None and self._is_fresh(entry.info_at, self.info_ttl_seconds):
+                self._hits["info"] += 1
+                return entry.info
+            ticker = entry.ticker
+        self._misses["info"] += 1
+
+        params = {"symbol": symbol}
+        info = provider_cache.get("yfinance", "info", params)
+        if info is None:
+            info = ticker.info or {}
+            if info:
+                provider_cache.set("yfinance", "info", params, info)
+
+        with self._lock:
+            entry = self._entry(symbol)
+            entry.info = info
+            entry.info_at = time.monotonic()
+            self._resize(entry)
+        return info
+
+    def get_fast_info(self, symbol: str) -> Dict[str, Any]:
+        """Snapshot of the quote-like fast_info fields (missing fields are None)."""
+        symbol = symbol.upper()
+        with self._lock:
+            entry = self._entry(symbol)
+            if entry.fast_info is not None and self._is_fresh(
+                entry.fast_info_at, self.fast_info_ttl_seconds
+            ):
+                self._hits["fast_info"] += 1
+                return entry.fast_info
+            ticker = entry.ticker
+        self._misses["fast_info"] += 1
+
+        fast_info = ticker.fast_info
+        snapshot: Dict[str, Any] = {}
+        for field in FAST_INFO_FIELDS:
+            try:
+                snapshot[field] = fast_info[field]
+            except Exception:
+                snapshot[field] = None
+
+        with self._lock:
+            entry = self._entry(symbol)
+            entry.fast_info = snapshot
+            entry.fast_info_at = time.monotonic()
+            self._resize(entry)
+        return snapshot
+
+    def get_history(self, symbol: str, refresh: bool = False, **kwargs: Any) -> pd.DataFrame:
+        """
+        Price history for the given yfinance arguments.
+
+        Only the last frame per symbol is kept in memory, so a repeat of the
+        same request (the common probe-then-store pattern) is served locally.
+        `refresh` skips both cache tiers and refetches, storing the new frame.
+        """
+        symbol = symbol.upper()
+        key = tuple(sorted((k, str(v)) for k, v in kwargs.items()))
+        with self._lock:
+            entry = self._entry(symbol)
+            if (
+                not refresh
+                and entry.history is not None
+                and entry.history_key == key
+                and self._is_fresh(entry.history_at, self.history_ttl_seconds)
+            ):
+                self._hits["history"] += 1
+                return entry.history.copy()
+            ticker = entry.ticker
+        self._misses["history"] += 1
+
+        hist = None if refresh else self._history_from_provider_cache(symbol, kwargs)
+        if hist is None:
+            hist = ticker.history(**kwargs)
+            if not hist.empty:
+                self._history_to_provider_cache(symbol, kwargs, hist)
+
+        with self._lock:
+            entry = self._entry(symbol)
+            entry.history = hist
+            entry.history_key = key
+            entry.history_at = time.monotonic()
+            self._resize(entry)
+        return hist.copy()
+
+    def invalidate(self, symbol: str) -> None:
+        with self._lock:
+            entry = self._entries.pop(symbol.upper(), None)
+            if entry is not None:
+                self._bytes -= entry.nbytes
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit ratios per field and the approximate memory footprint."""
+        with self._lock:
+            kinds = sorted(set(self._hits) | set(self._misses))
+            hits = sum(self._hits.values())
+            misses = sum(self._misses.values())
+            return {
+                "entries": len(self._entries),
+                "max_size": self.max_size,
+                "approx_bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": hits,
+                "misses": misses,
+                "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+                "evictions": self._evictions,
+                "by_field": {
+                    kind: {
+                        "hits": self._hits[kind],
+                        "misses": self._misses[kind],
+                        "hit_ratio": round(
+                            self._hits[kind] / (self._hits[kind] + self._misses[kind]), 4
+                        ),
+                    }
+                    for kind in kinds
+                },
+            }
+
+    # ------------------------------------------------------------------
+    # Internals (callers hold the lock)
+    # ------------------------------------------------------------------
+
+    def _entry(self, symbol: str) -> _TickerEntry:
+        symbol = symbol.upper()
+        entry = self._entries.get(symbol)
+        if entry is None:
+            entry = _TickerEntry(yf.Ticker(symbol))
+            self._entries[symbol] = entry
+            self._bytes += entry.nbytes
+            self._evict()
+        else:
+            self._entries.move_to_end(symbol)
+        return entry
+
+    def _resize(self, entry: _TickerEntry) -> None:
+        nbytes = ENTRY_OVERHEAD_BYTES
+        if entry.info:
+            nbytes += len(json.dumps(entry.info, default=str))
+        if entry.fast_info:
+            nbytes += len(json.dumps(entry.fast_info, default=str))
+        if entry.history is not None:
+            nbytes += int(entry.history.memory_usage(index=True, deep=True).sum())
+
+        self._bytes += nbytes - entry.nbytes
+        entry.nbytes = nbytes
+        self._evict()
+
+    def _evict(self) -> None:
+        # Always keep the most recent entry, even if it alone exceeds the byte budget
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_size or self._bytes > self.max_bytes
+        ):
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.nbytes
+            self._evictions += 1
+
+    @staticmethod
+    def _is_fresh(fetched_at: float, ttl_seconds: int) -> bool:
+        return time.monotonic() - fetched_at < ttl_seconds
+
+    # ------------------------------------------------------------------
+    # Provider response cache tier
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _history_from_provider_cache(
+        symbol: str, kwargs: Dict[str, Any]
+    ) -> Optional[pd.DataFrame]:
+        cached = provider_cache.get("yfinance", "history", {"symbol": symbol, **kwargs})
+        if cached is None:
+            return None
+        return pd.DataFrame(
+            cached["data"],
+            index=pd.to_datetime(cached["index"]),
+            columns=cached["columns"],
+        )
+
+    @staticmethod
+    def _history_to_provider_cache(
+        symbol: str, kwargs: Dict[str, Any], hist: pd.DataFrame
+    ) -> None:
+        # Keep exchange-local wall-clock timestamps so cached bars keep their dates
+        index = hist.index.tz_localize(None) if hist.index.tz is not None else hist.index
+        provider_cache.set(
+            "yfinance",
+            "history",
+            {"symbol": symbol, **kwargs},
+            {
+                "index": [ts.isoformat() for ts in index],
+                "columns": list(hist.columns),
+                "data": hist.astype(object).where(hist.notna(), None).values.tolist(),
+            },
+        )
+
+
+# Create instance
+ticker_cache = TickerCache()
+
+
+def get_ticker_cache() -> TickerCache:
+    """Process-wide yfinance ticker cache."""
+    return ticker_cache
@@ -0,0 +1,236 @@
+"""
+Dates x currencies FX matrix with triangulation through a pivot currency.
+
+Every currency is stored as units per one unit of the pivot currency, so the
+rate for any pair is a ratio of two columns and converting an array of
+amounts is a single vectorized multiply. Converting a currency into itself is
+always 1.0; a rate older than the fill limit falls back to the last known one
+and is reported as stale instead of NaN.
+"""
+
+import logging
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# (from_currency, to_currency, rate, rate_date)
+RateRow = Tuple[str, str, float, date]
+
+
+class FxRateMatrix:
+    """Daily FX rates for many currencies, expressed against one pivot currency."""
+
+    def __init__(
+        self,
+        pivot_rates: pd.DataFrame,
+        pivot_currency: str,
+        last_known: Optional[pd.DataFrame] = None,
+    ):
+        """
+        Args:
+            pivot_rates: Calendar-day DatetimeIndex x currency columns, holding
+                units of each currency per one unit of the pivot currency
+            pivot_currency: ISO code of the pivot currency
+            last_known: Same shape, carried forward without a limit; used (and
+                flagged stale) where pivot_rates has run out
+        """
+        self.pivot_currency = pivot_currency
+        self.frame = pivot_rates
+        self._dates = pivot_rates.index.values.astype("datetime64[D]")
+        self._values = pivot_rates.to_numpy(dtype=float)
+        self._last_values = (last_known if last_known is not None else pivot_rates).to_numpy(
+            dtype=float
+        )
+        self._columns = {currency: i for i, currency in enumerate(pivot_rates.columns)}
+
+    @classmethod
+    def from_rates(
+        cls,
+        rows: Iterable[RateRow],
+        pivot_currency: str,
+        start_date: date,
+        end_date: date,
+        max_fill_days: Optional[int] = None,
+    ) -> "FxRateMatrix":
+        """
+        Build the matrix from stored pair rates.
+
+        Pairs quoted against the pivot are used directly (inverting when the
+        pivot is the quote currency); cross pairs are triangulated through a
+        currency already expressed against the pivot. Rates are carried
+        forward over weekends and holidays, up to max_fill_days.
+        """
+        frame = pd.DataFrame(rows, columns=["from_currency", "to_currency", "rate", "rate_date"])
+        index = pd.date_range(start_date, end_date, freq="D")
+
+        if frame.empty:
+            return cls(pd.DataFrame({pivot_currency: 1.0}, index=index), pivot_currency)
+
+        frame["rate"] = frame["rate"].astype(float)
+        frame["rate_date"] = pd.to_datetime(frame["rate_date"])
+        frame = frame[frame["rate"] > 0]
+
+        # Pair quotes as a (rate_date x "FROM/TO") grid
+        quotes = frame.pivot_table(
+            index="rate_date",
+            columns=["from_currency", "to_currency"],
+            values="rate",
+            aggfunc="last",
+        )
+
+        per_pivot: Dict[str, pd.Series] = {pivot_currency: pd.Series(1.0, index=quotes.index)}
+
+        # Resolve currencies breadth-first from the pivot through available pairs
+        pairs = list(quotes.columns)
+        resolved_any = True
+        while resolved_any:
+            resolved_any = False
+            for from_currency, to_currency in pairs:
+                pair_rate = quotes[(from_currency, to_currency)]
+                if from_currency in per_pivot and to_currency not in per_pivot:
+                    per_pivot[to_currency] = per_pivot[from_currency] * pair_rate
+                    resolved_any = True
+                elif to_currency in per_pivot and from_currency not in per_pivot:
+                    per_pivot[from_currency] = per_pivot[to_currency] / pair_rate
+                    resolved_any = True
+                elif from_currency in per_pivot and to_currency in per_pivot:
+                    # Fill dates the first path left empty
+                    implied = per_pivot[from_currency] * pair_rate
+                    per_pivot[to_currency] = per_pivot[to_currency].fillna(implied)
+
+        unresolved = {c for pair in pairs for c in pair} - set(per_pivot)
+        if unresolved:
+            logger.warning(
+                f"FX rates for {sorted(unresolved)} cannot be linked to {pivot_currency}"
+            )
+
+        pivot_rates = pd.DataFrame(per_pivot).sort_index()
+        pivot_rates = pivot_rates.reindex(pivot_rates.index.union(index))
+        last_known = pivot_rates.ffill()
+        pivot_rates = pivot_rates.ffill(limit=max_fill_days)
+        # The pivot is 1.0 on every date, not only around its quotes
+        pivot_rates[pivot_currency] = 1.0
+        last_known[pivot_currency] = 1.0
+        return cls(pivot_rates.loc[index], pivot_currency, last_known.loc[index])
+
+    @property
+    def currencies(self) -> List[str]:
+        return list(self._columns)
+
+    @property
+    def start_date(self) -> date:
+        return self.frame.index[0].date()
+
+    @property
+    def end_date(self) -> date:
+        return self.frame.index[-1].date()
+
+    def covers(self, start_date: date, end_date: date) -> bool:
+        """Whether the matrix spans the given date range."""
+        return self.start_date <= start_date and end_date <= self.end_date
+
+    def _row_indices(self, dates: Sequence[date]) -> np.ndarray:
+        positions = np.searchsorted(
+            self._dates, np.asarray(dates, dtype="datetime64[D]"), side="right"
+        )
+        # Dates past the end reuse the last row; dates before the start have no rate
+        return np.where(positions > 0, positions - 1, -1)
+
+    def _column_indices(self, currencies: Sequence[str]) -> np.ndarray:
+        return np.array([self._columns.get((c or "").upper(), -1) for c in currencies], dtype=int)
+
+    def _lookup(self, rows: np.ndarray, columns: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Pivot values, falling back to the last known rate, and where that fallback was used."""
+        valid = (rows >= 0) & (columns >= 0)
+        rows, columns = np.clip(rows, 0, None), np.clip(columns, 0, None)
+        fresh = np.where(valid, self._values[rows, columns], np.nan)
+        last = np.where(valid, self._last_values[rows, columns], np.nan)
+        stale = np.isnan(fresh) & ~np.isnan(last)
+        return np.where(stale, last, fresh), stale
+
+    def _pivot_values(self, rows: np.ndarray, columns: np.ndarray) -> np.ndarray:
+        return self._lookup(rows, columns)[0]
+
+    def rate(self, from_currency: str, to_currency: str, as_of: date) -> Optional[float]:
+        """Units of to_currency per one unit of from_currency on a date."""
+        value = self.rates(from_currency, [to_currency], as_of)[0]
+        return None if np.isnan(value) else float(value)
+
+    def rates(self, from_currency: str, to_currencies: Sequence[str], as_of: date) -> np.ndarray:
+        """Rates from one currency into many on a date (NaN where unavailable)."""
+        rows = np.repeat(self._row_indices([as_of]), len(to_currencies) + 1)
+        columns = self._column_indices([from_currency, *to_currencies])
+        values = self._pivot_values(rows, columns)
+        identity = np.array([c.upper() == from_currency.upper() for c in to_currencies], bool)
+        return np.where(identity, 1.0, values[1:] / values[0])
+
+    def conversion_factors(
+        self,
+        currencies: Sequence[str],
+        base_currency: str,
+        as_of: Optional[date] = None,
+        dates: Optional[Sequence[date]] = None,
+    ) -> np.ndarray:
+        """
+        Factors converting amounts in `currencies` into `base_currency`.
+
+        Pass `as_of` to use one date for every amount, or `dates` (aligned
+        with `currencies`) to convert each amount at its own date.
+        """
+        return self.conversion_factors_with_staleness(
+            currencies, base_currency, as_of=as_of, dates=dates
+        )[0]
+
+    def conversion_factors_with_staleness(
+        self,
+        currencies: Sequence[str],
+        base_currency: str,
+        as_of: Optional[date] = None,
+        dates: Optional[Sequence[date]] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Conversion factors and whether each relies on a rate past the fill limit."""
+        if dates is None:
+            dates = [as_of or self.end_date] * len(currencies)
+
+        rows = self._row_indices(dates)
+        source, source_stale = self._lookup(rows, self._column_indices(currencies))
+        target, target_stale = self._lookup(
+            rows, self._column_indices([base_currency] * len(currencies))
+        )
+        identity = np.array(
+            [c is not None and c.upper() == base_currency.upper() for c in currencies], bool
+        )
+        factors = np.where(identity, 1.0, target / source)
+        return factors, ~identity & (source_stale | target_stale)
+
+    def convert(
+        self,
+        amounts: Sequence[float],
+        currencies: Sequence[str],
+        base_currency: str,
+        as_of: Optional[date] = None,
+        dates: Optional[Sequence[date]] = None,
+    ) -> np.ndarray:
+        """Convert amounts into base_currency in one vectorized multiply."""
+        factors = self.conversion_factors(currencies, base_currency, as_of=as_of, dates=dates)
+        return np.asarray(amounts, dtype=float) * factors
+
+    def convert_frame(
+        self, values: pd.DataFrame, currencies: Sequence[str], base_currency: str
+    ) -> pd.DataFrame:
+        """
+        Convert a dates x instruments frame (e.g. a price history) into base_currency.
+
+        `currencies` gives the currency of each column.
+        """
+        rows = self._row_indices(values.index.values.astype("datetime64[D]"))[:, None]
+        source = self._pivot_values(rows, self._column_indices(currencies)[None, :])
+        target = self._pivot_values(rows, self._column_indices([base_currency])[None, :])
+        identity = np.array(
+            [c is not None and c.upper() == base_currency.upper() for c in currencies], bool
+        )
+        return values * np.where(identity[None, :], 1.0, target / source)
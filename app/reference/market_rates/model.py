@@ -0,0 +1,62 @@
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import DECIMAL, Date, Index, String, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.model import BaseModel
+
+
+class MarketRate(BaseModel):
+    """
+    Daily market rates such as FX rates.
+
+    One row per rate type, currency pair and date. FX rows store how many
+    units of to_currency one unit of from_currency buys on rate_date and are
+    the source for multi-currency valuation and reporting.
+    """
+
+    __tablename__ = "market_rates"
+
+    rate_type: Mapped[str] = mapped_column(
+        String(20), nullable=False, comment="Type of rate: fx, interest"
+    )
+
+    from_currency: Mapped[str] = mapped_column(
+        String(3), nullable=False, comment="ISO 4217 base currency code"
+    )
+
+    to_currency: Mapped[str] = mapped_column(
+        String(3), nullable=False, comment="ISO 4217 quote currency code"
+    )
+
+    rate: Mapped[Decimal] = mapped_column(
+        DECIMAL(12, 8), nullable=False, comment="Units of to_currency per unit of from_currency"
+    )
+
+    rate_date: Mapped[date] = mapped_column(
+        Date, nullable=False, comment="Date this rate applies to"
+    )
+
+    data_source: Mapped[str] = mapped_column(
+        String(50), default="calculated", nullable=False, comment="Source of this rate"
+    )
+
+    __table_args__ = (
+        UniqueConstraint(
+            "rate_type",
+            "from_currency",
+            "to_currency",
+            "rate_date",
+            name="uq_market_rates_type_pair_date",
+        ),
+        Index(
+            "idx_market_rates_type_currencies_date",
+            "rate_type",
+            "from_currency",
+            "to_currency",
+            "rate_date",
+        ),
+        Index("idx_market_rates_type_date", "rate_type", "rate_date"),
+        {"comment": "Daily FX and other market rates"},
+    )
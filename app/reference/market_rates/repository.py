@@ -0,0 +1,101 @@
+import logging
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, func, or_, select, union
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.account.master.model import Account
+from app.reference.market_rates.model import MarketRate
+from app.security.master.model import Security
+
+logger = logging.getLogger(__name__)
+
+FX_RATE_TYPE = "fx"
+
+
+class MarketRateRepository:
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_fx_rates(
+        self,
+        start_date: date,
+        end_date: date,
+        currencies: Optional[List[str]] = None,
+    ) -> List[Tuple[str, str, float, date]]:
+        """Get FX rates between two dates as (from, to, rate, date) tuples."""
+        try:
+            stmt = select(
+                MarketRate.from_currency,
+                MarketRate.to_currency,
+                MarketRate.rate,
+                MarketRate.rate_date,
+            ).where(
+                and_(
+                    MarketRate.rate_type == FX_RATE_TYPE,
+                    MarketRate.rate_date >= start_date,
+                    MarketRate.rate_date <= end_date,
+                    MarketRate.deleted_at.is_(None),
+                )
+            )
+
+            if currencies:
+                stmt = stmt.where(
+                    or_(
+                        MarketRate.from_currency.in_(currencies),
+                        MarketRate.to_currency.in_(currencies),
+                    )
+                )
+
+            result = await self.db.execute(stmt.order_by(MarketRate.rate_date))
+            return [tuple(row) for row in result.all()]
+
+        except Exception as e:
+            logger.error(f"Failed to get FX rates from {start_date} to {end_date}: {str(e)}")
+            raise
+
+    async def get_currencies_in_use(self) -> List[str]:
+        """Distinct currencies of active accounts and securities."""
+        stmt = union(
+            select(func.upper(Account.currency)).where(Account.deleted_at.is_(None)),
+            select(func.upper(Security.currency)).where(
+                Security.deleted_at.is_(None), Security.currency.is_not(None)
+            ),
+        )
+        result = await self.db.execute(stmt)
+        return sorted(currency for currency in result.scalars() if currency)
+
+    async def upsert_fx_rates(self, rates: List[Dict[str, Any]]) -> int:
+        """
+        Insert or update FX rates.
+
+        Each item needs from_currency, to_currency, rate and rate_date, and
+        may carry data_source.
+        """
+        if not rates:
+            return 0
+
+        try:
+            values = [{"rate_type": FX_RATE_TYPE, **rate} for rate in rates]
+            stmt = pg_insert(MarketRate).values(values)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[
+                    MarketRate.rate_type,
+                    MarketRate.from_currency,
+                    MarketRate.to_currency,
+                    MarketRate.rate_date,
+                ],
+                set_={"rate": stmt.excluded.rate, "data_source": stmt.excluded.data_source},
+            )
+
+            await self.db.execute(stmt)
+            await self.db.commit()
+            return len(values)
+
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"Failed to upsert FX rates: {str(e)}")
+            raise
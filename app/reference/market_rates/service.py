@@ -0,0 +1,223 @@
+import asyncio
+import logging
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.integrations.alphavantage.service import get_alpha_vantage_client
+from app.reference.market_rates.fx import FxRateMatrix
+from app.reference.market_rates.repository import MarketRateRepository
+
+logger = logging.getLogger(__name__)
+
+
+class FxRateError(Exception):
+    """Custom exception for FX rate errors."""
+
+    pass
+
+
+class _FxMatrixCache:
+    """Process-wide cache of the most recently loaded FX matrix."""
+
+    def __init__(self):
+        self.matrix: Optional[FxRateMatrix] = None
+        self.loaded_at = 0.0
+        self.lock = asyncio.Lock()
+
+    def get(self, start_date: date, end_date: date) -> Optional[FxRateMatrix]:
+        if self.matrix is None:
+            return None
+        if time.monotonic() - self.loaded_at > settings.FX_MATRIX_CACHE_SECONDS:
+            return None
+        return self.matrix if self.matrix.covers(start_date, end_date) else None
+
+    def set(self, matrix: FxRateMatrix) -> None:
+        self.matrix = matrix
+        self.loaded_at = time.monotonic()
+
+    def clear(self) -> None:
+        self.matrix = None
+
+
+_matrix_cache = _FxMatrixCache()
+
+
+class FxRateService:
+    """FX rate lookup, conversion and refresh backed by the market_rates table."""
+
+    def __init__(self, db: AsyncSession):
+        self.repo = MarketRateRepository(db)
+        self.pivot_currency = settings.FX_PIVOT_CURRENCY
+
+    async def get_matrix(
+        self, start_date: Optional[date] = None, end_date: Optional[date] = None
+    ) -> FxRateMatrix:
+        """
+        Get a dates x currencies rate matrix covering the given range.
+
+        The matrix is loaded with one query and reused across requests until
+        it expires, new rates are stored, or a wider range is requested.
+        """
+        end_date = end_date or date.today()
+        start_date = start_date or end_date
+
+        matrix = _matrix_cache.get(start_date, end_date)
+        if matrix is not None:
+            return matrix
+
+        async with _matrix_cache.lock:
+            matrix = _matrix_cache.get(start_date, end_date)
+            if matrix is not None:
+                return matrix
+
+            # Load a wide window so most later requests are served from cache,
+            # plus a lead-in so the first dates can carry earlier rates forward
+            load_end = max(end_date, date.today())
+            load_start = min(
+                start_date, load_end - timedelta(days=settings.FX_MATRIX_HISTORY_DAYS)
+            )
+            rows = await self.repo.get_fx_rates(
+                load_start - timedelta(days=settings.FX_MAX_FILL_DAYS), load_end
+            )
+
+            matrix = FxRateMatrix.from_rates(
+                rows,
+                self.pivot_currency,
+                load_start,
+                load_end,
+                max_fill_days=settings.FX_MAX_FILL_DAYS,
+            )
+            _matrix_cache.set(matrix)
+            logger.debug(
+                f"Loaded FX matrix {load_start}..{load_end} "
+                f"with {len(matrix.currencies)} currencies"
+            )
+            return matrix
+
+    async def get_rate(
+        self, base_currency: str, quote_currency: str, as_of: Optional[date] = None
+    ) -> Optional[float]:
+        """Units of quote_currency per one unit of base_currency."""
+        if base_currency.upper() == quote_currency.upper():
+            return 1.0
+        as_of = as_of or date.today()
+        matrix = await self.get_matrix(as_of, as_of)
+        return matrix.rate(base_currency.upper(), quote_currency.upper(), as_of)
+
+    async def get_rates(
+        self,
+        base_currency: str,
+        quote_currencies: Optional[Sequence[str]] = None,
+        as_of: Optional[date] = None,
+    ) -> Dict[str, Optional[float]]:
+        """Rates from base_currency into each quote currency (all known ones by default)."""
+        as_of = as_of or date.today()
+        matrix = await self.get_matrix(as_of, as_of)
+
+        base_currency = base_currency.upper()
+        if quote_currencies is None:
+            quote_currencies = [c for c in matrix.currencies if c != base_currency]
+        quotes = [c.upper() for c in quote_currencies]
+
+        values = matrix.rates(base_currency, quotes, as_of)
+        return {
+            currency: (None if np.isnan(value) else float(value))
+            for currency, value in zip(quotes, values)
+        }
+
+    async def conversion_factors(
+        self, currencies: Sequence[str], base_currency: str, as_of: Optional[date] = None
+    ) -> np.ndarray:
+        """Multipliers converting amounts in each currency into base_currency (NaN if no rate)."""
+        as_of = as_of or date.today()
+        matrix = await self.get_matrix(as_of, as_of)
+        return matrix.conversion_factors(
+            [c.upper() for c in currencies], base_currency.upper(), as_of=as_of
+        )
+
+    async def conversion_factors_with_staleness(
+        self, currencies: Sequence[str], base_currency: str, as_of: Optional[date] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Conversion factors plus a mask of those relying on a rate past the fill limit."""
+        as_of = as_of or date.today()
+        matrix = await self.get_matrix(as_of, as_of)
+        return matrix.conversion_factors_with_staleness(
+            [c.upper() for c in currencies], base_currency.upper(), as_of=as_of
+        )
+
+    async def convert(
+        self,
+        amounts: Sequence[float],
+        currencies: Sequence[str],
+        base_currency: str,
+        as_of: Optional[date] = None,
+    ) -> np.ndarray:
+        """Convert amounts held in various currencies into base_currency (NaN if no rate)."""
+        as_of = as_of or date.today()
+        matrix = await self.get_matrix(as_of, as_of)
+        return matrix.convert(
+            amounts, [c.upper() for c in currencies], base_currency.upper(), as_of=as_of
+        )
+
+    async def refresh_rates(self, pairs: List[Tuple[str, str]]) -> int:
+        """
+        Fetch daily rates for currency pairs from Alpha Vantage and store them.
+
+        Returns the number of rates stored.
+        """
+        client = get_alpha_vantage_client()
+        rates = []
+
+        for from_currency, to_currency in pairs:
+            data = await client.fetch_fx_rate(from_currency.upper(), to_currency.upper())
+            series = (data or {}).get("Time Series FX (Daily)")
+            if not series:
+                logger.warning(f"No FX data returned for {from_currency}/{to_currency}")
+                continue
+
+            for date_str, values in series.items():
+                try:
+                    rates.append(
+                        {
+                            "from_currency": from_currency.upper(),
+                            "to_currency": to_currency.upper(),
+                            "rate": float(values["4. close"]),
+                            "rate_date": datetime.strptime(date_str, "%Y-%m-%d").date(),
+                            "data_source": "alphavantage",
+                        }
+                    )
+                except (KeyError, ValueError) as e:
+                    logger.error(f"Error processing FX data for {date_str}: {str(e)}")
+
+        try:
+            stored = await self.repo.upsert_fx_rates(rates)
+        except Exception as e:
+            raise FxRateError(f"Failed to store FX rates: {str(e)}")
+
+        if stored:
+            self.invalidate_cache()
+        logger.info(f"Stored {stored} FX rates for {len(pairs)} currency pairs")
+        return stored
+
+    async def refresh_rates_in_use(self) -> int:
+        """Refresh the pivot pairs of every account and security currency; returns rates stored."""
+        currencies = await self.repo.get_currencies_in_use()
+        pairs = [(self.pivot_currency, c) for c in currencies if c != self.pivot_currency]
+        if not pairs:
+            return 0
+        return await self.refresh_rates(pairs)
+
+    @staticmethod
+    def invalidate_cache() -> None:
+        """Drop the cached matrix so the next lookup reloads stored rates."""
+        _matrix_cache.clear()
+
+
+def get_fx_rate_service(db: AsyncSession) -> FxRateService:
+    """Get FxRateService instance with database session."""
+    return FxRateService(db)
@@ -0,0 +1,346 @@
+"""
+Corporate-action price adjustments.
+
+Only raw closes are stored in security_prices. Adjusted series are derived on
+request by multiplying the raw closes with cumulative adjustment factors built
+from the splits and cash dividends in security_actions, so history never has
+to be rewritten or re-downloaded when a new action is recorded. Cached
+schedules are dropped when a session that wrote corporate actions commits.
+
+For a close on date t the adjustment factor is the product of the factors of
+every action with ex_date > t:
+
+    split:     1 / ratio                      (ratio = new_shares / old_shares)
+    dividend:  1 - amount / previous close    (previous close = last close before ex_date)
+"""
+
+import logging
+import threading
+from datetime import date
+from typing import Any, Dict, Iterable, NamedTuple, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+
+from app.security.actions.enums import CorporateActionType
+from app.security.actions.model import CorporateAction
+from app.security.prices.model import SecurityPrice
+
+logger = logging.getLogger(__name__)
+
+SPLIT_ACTION_TYPES = (CorporateActionType.SPLIT.value, CorporateActionType.REVERSE_SPLIT.value)
+DIVIDEND_ACTION_TYPES = (CorporateActionType.DIVIDEND.value,)
+
+
+class ActionSchedule(NamedTuple):
+    """Adjusting actions for one security, sorted by ex_date"""
+
+    split_dates: np.ndarray  # datetime64[D]
+    split_ratios: np.ndarray  # new_shares / old_shares
+    dividend_dates: np.ndarray  # datetime64[D]
+    dividend_amounts: np.ndarray  # cash per share
+
+
+EMPTY_SCHEDULE = ActionSchedule(
+    np.array([], dtype="datetime64[D]"),
+    np.array([], dtype=float),
+    np.array([], dtype="datetime64[D]"),
+    np.array([], dtype=float),
+)
+
+
+def parse_split_ratio(
+    action_details: Optional[Dict[str, Any]], amount: Any = None
+) -> Optional[float]:
+    """
+    Shares held after the split per share held before it.
+
+    Reads new_shares/old_shares, falling back to a "new:old" split_ratio string
+    and finally to the amount column.
+    """
+    details = action_details or {}
+    try:
+        if details.get("new_shares") and details.get("old_shares"):
+            return float(details["new_shares"]) / float(details["old_shares"])
+        if details.get("split_ratio"):
+            new_shares, old_shares = str(details["split_ratio"]).split(":")
+            return float(new_shares) / float(old_shares)
+        if amount is not None:
+            return float(amount)
+    except (TypeError, ValueError, ZeroDivisionError):
+        pass
+    return None
+
+
+def _suffix_products(factors: np.ndarray) -> np.ndarray:
+    """
+    Cumulative products from the right, with a trailing 1.
+
+    Element i is the product of factors[i:], i.e. the adjustment for prices
+    before the i-th event; the final element covers prices after every event.
+    """
+    return np.append(np.cumprod(factors[::-1])[::-1], 1.0)
+
+
+def adjustment_factors(
+    price_dates: np.ndarray,
+    closes: np.ndarray,
+    schedule: ActionSchedule,
+    include_dividends: bool = True,
+) -> np.ndarray:
+    """
+    Cumulative adjustment factor for each price.
+
+    Args:
+        price_dates: Sorted datetime64[D] dates of the raw closes
+        closes: Raw closes aligned with price_dates
+        schedule: Adjusting actions for the security
+        include_dividends: Apply dividend factors (total return) as well as splits
+    """
+    factors = np.ones(len(price_dates), dtype=float)
+    if len(price_dates) == 0:
+        return factors
+
+    if len(schedule.split_dates):
+        split_factors = _suffix_products(1.0 / schedule.split_ratios)
+        # First split strictly after each price date
+        factors *= split_factors[np.searchsorted(schedule.split_dates, price_dates, side="right")]
+
+    if include_dividends and len(schedule.dividend_dates):
+        # Last close strictly before each ex-date
+        prev_idx = np.searchsorted(price_dates, schedule.dividend_dates, side="left") - 1
+        prev_close = np.where(prev_idx >= 0, closes[np.clip(prev_idx, 0, None)], np.nan)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            dividend_factors = 1.0 - schedule.dividend_amounts / prev_close
+        # Dividends without a prior close (or larger than it) cannot be applied
+        dividend_factors = np.where(
+            np.isfinite(dividend_factors) & (dividend_factors > 0), dividend_factors, 1.0
+        )
+        dividend_factors = _suffix_products(dividend_factors)
+        factors *= dividend_factors[
+            np.searchsorted(schedule.dividend_dates, price_dates, side="right")
+        ]
+
+    return factors
+
+
+def unadjust_splits(
+    price_dates: np.ndarray,
+    closes: np.ndarray,
+    split_dates: np.ndarray,
+    split_ratios: np.ndarray,
+) -> np.ndarray:
+    """
+    Raw closes from closes a provider already split-adjusted.
+
+    Providers such as Yahoo scale every close before a split by 1 / ratio;
+    multiplying the split factors back out restores the traded prices that
+    security_prices stores, so adjustment_factors() is applied only once.
+    """
+    schedule = ActionSchedule(
+        np.asarray(split_dates, dtype="datetime64[D]"),
+        np.asarray(split_ratios, dtype=float),
+        EMPTY_SCHEDULE.dividend_dates,
+        EMPTY_SCHEDULE.dividend_amounts,
+    )
+    return closes / adjustment_factors(price_dates, closes, schedule, include_dividends=False)
+
+
+class CorporateActionAdjuster:
+    """Builds and caches per-security action schedules and produces adjusted series."""
+
+    def __init__(self):
+        self._schedules: Dict[str, ActionSchedule] = {}
+        self._lock = threading.Lock()
+
+    def get_schedule(self, db: Session, security_id: str) -> ActionSchedule:
+        """Splits and dividends for a security, loaded once and cached."""
+        key = str(security_id)
+        schedule = self._schedules.get(key)
+        if schedule is not None:
+            return schedule
+
+        schedule = self._load_schedule(db, key)
+        with self._lock:
+            self._schedules[key] = schedule
+        return schedule
+
+    def invalidate(self, security_id: Optional[str] = None) -> None:
+        """Drop the cached schedule for one security (e.g. after a new action), or all."""
+        with self._lock:
+            if security_id is None:
+                self._schedules.clear()
+            else:
+                self._schedules.pop(str(security_id), None)
+
+    def adjust(
+        self,
+        db: Session,
+        security_id: str,
+        price_dates: Sequence[date],
+        closes: Sequence[float],
+        include_dividends: bool = True,
+    ) -> np.ndarray:
+        """Adjusted closes for raw closes sorted by date."""
+        dates = np.asarray(price_dates, dtype="datetime64[D]")
+        raw = np.asarray(closes, dtype=float)
+        schedule = self.get_schedule(db, security_id)
+        return raw * adjustment_factors(dates, raw, schedule, include_dividends)
+
+    def get_adjusted_prices(
+        self,
+        db: Session,
+        security_id: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        include_dividends: bool = True,
+    ) -> pd.DataFrame:
+        """
+        Raw and adjusted closes for a security, indexed by price_date.
+
+        A dividend factor needs the last close before its ex-date, so reading
+        starts at the last close before `start_date`; the frame is trimmed to
+        the requested window afterwards.
+        """
+        stmt = (
+            select(SecurityPrice.price_date, SecurityPrice.close_price)
+            .where(SecurityPrice.security_id == security_id)
+            .order_by(SecurityPrice.price_date)
+        )
+        if start_date:
+            previous_close_date = (
+                select(func.max(SecurityPrice.price_date))
+                .where(
+                    SecurityPrice.security_id == security_id,
+                    SecurityPrice.price_date < start_date,
+                )
+                .scalar_subquery()
+            )
+            stmt = stmt.where(
+                SecurityPrice.price_date >= func.coalesce(previous_close_date, start_date)
+            )
+        if end_date:
+            stmt = stmt.where(SecurityPrice.price_date <= end_date)
+
+        rows = db.execute(stmt).all()
+        if not rows:
+            return pd.DataFrame(columns=["close_price", "adjustment_factor", "adjusted_close"])
+
+        dates = np.array([row.price_date for row in rows], dtype="datetime64[D]")
+        closes = np.array([float(row.close_price) for row in rows], dtype=float)
+        factors = adjustment_factors(
+            dates, closes, self.get_schedule(db, security_id), include_dividends
+        )
+
+        frame = pd.DataFrame(
+            {
+                "close_price": closes,
+                "adjustment_factor": factors,
+                "adjusted_close": closes * factors,
+            },
+            index=pd.DatetimeIndex(dates, name="price_date"),
+        )
+        if start_date:
+            frame = frame.loc[frame.index >= pd.Timestamp(start_date)]
+        return frame
+
+    async def get_schedules_async(
+        self, db: AsyncSession, security_ids: Sequence[str]
+    ) -> Dict[str, ActionSchedule]:
+        """Schedules for many securities; uncached ones are loaded with one query."""
+        keys = [str(security_id) for security_id in security_ids]
+        missing = [key for key in keys if key not in self._schedules]
+
+        if missing:
+            result = await db.execute(_actions_query(missing))
+            rows_by_security: Dict[str, list] = {key: [] for key in missing}
+            for action in result:
+                rows_by_security[str(action.security_id)].append(action)
+
+            with self._lock:
+                for key, rows in rows_by_security.items():
+                    self._schedules[key] = _build_schedule(key, rows)
+
+        return {key: self._schedules.get(key, EMPTY_SCHEDULE) for key in keys}
+
+    @staticmethod
+    def _load_schedule(db: Session, security_id: str) -> ActionSchedule:
+        return _build_schedule(security_id, db.execute(_actions_query([security_id])).all())
+
+
+def _actions_query(security_ids: Sequence[str]):
+    """Adjusting actions for the given securities, in ex_date order."""
+    return (
+        select(
+            CorporateAction.security_id,
+            CorporateAction.action_type,
+            CorporateAction.ex_date,
+            CorporateAction.amount,
+            CorporateAction.action_details,
+        )
+        .where(
+            CorporateAction.security_id.in_(security_ids),
+            CorporateAction.action_type.in_(SPLIT_ACTION_TYPES + DIVIDEND_ACTION_TYPES),
+            CorporateAction.deleted_at.is_(None),
+        )
+        .order_by(CorporateAction.ex_date)
+    )
+
+
+def _build_schedule(security_id: str, actions: Iterable[Any]) -> ActionSchedule:
+    """Turn action rows into an ActionSchedule, skipping unusable ones."""
+    split_dates, split_ratios, dividend_dates, dividend_amounts = [], [], [], []
+    for action in actions:
+        if action.action_type in SPLIT_ACTION_TYPES:
+            ratio = parse_split_ratio(action.action_details, action.amount)
+            if ratio is None or ratio <= 0:
+                logger.warning(
+                    f"Ignoring split for {security_id} on {action.ex_date}: no usable ratio"
+                )
+                continue
+            split_dates.append(action.ex_date)
+            split_ratios.append(ratio)
+        elif action.amount is not None and action.amount > 0:
+            dividend_dates.append(action.ex_date)
+            dividend_amounts.append(float(action.amount))
+
+    if not split_dates and not dividend_dates:
+        return EMPTY_SCHEDULE
+
+    return ActionSchedule(
+        np.array(split_dates, dtype="datetime64[D]"),
+        np.array(split_ratios, dtype=float),
+        np.array(dividend_dates, dtype="datetime64[D]"),
+        np.array(dividend_amounts, dtype=float),
+    )
+
+
+# Create instance
+corporate_action_adjuster = CorporateActionAdjuster()
+
+# Session.info key collecting securities whose actions changed in the transaction
+_CHANGED_ACTIONS = "corporate_action_changes"
+
+
+@event.listens_for(CorporateAction, "after_insert")
+@event.listens_for(CorporateAction, "after_update")
+@event.listens_for(CorporateAction, "after_delete")
+def _record_action_change(mapper: Any, connection: Any, action: CorporateAction) -> None:
+    session = object_session(action)
+    if session is not None:
+        session.info.setdefault(_CHANGED_ACTIONS, set()).add(str(action.security_id))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_schedules(session: Session) -> None:
+    # After the commit, so a concurrent read cannot re-cache the old schedule
+    for security_id in session.info.pop(_CHANGED_ACTIONS, ()):
+        corporate_action_adjuster.invalidate(security_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_action_changes(session: Session) -> None:
+    session.info.pop(_CHANGED_ACTIONS, None)
@@ -114,7 +114,7 @@ class CorporateAction(BaseModel):
     # Relationships
     security_master: Mapped["Security"] = relationship(
         "Security",
-        back_populates="security_actions",
+        back_populates="corporate_actions",
     )
 
     __table_args__ = (
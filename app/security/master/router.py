@@ -1,7 +1,11 @@
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
 from typing import List, Optional
 
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_db
+from app.reference.market_rates.service import FxRateService
 
 router = APIRouter()
 
@@ -47,30 +51,49 @@ async def get_exchange_rates(
     *,
     base_currency: str = Query("USD", description="Base currency"),
     target_currencies: Optional[List[str]] = Query(None, description="Target currencies"),
+    as_of: Optional[date] = Query(None, description="Rate date (defaults to today)"),
+    db: AsyncSession = Depends(get_db),
 ):
     """
-    Get current exchange rates.
+    Get exchange rates from a base currency, triangulated through the pivot currency.
     """
     if target_currencies is None:
         target_currencies = ["EUR", "GBP", "JPY", "CAD"]
 
+    rates = await FxRateService(db).get_rates(base_currency, target_currencies, as_of=as_of)
+
     return {
-        "base_currency": base_currency,
-        "rates": {"EUR": 0.85, "GBP": 0.73, "JPY": 110.25, "CAD": 1.25},
+        "base_currency": base_currency.upper(),
+        "rates": rates,
+        "as_of": as_of or date.today(),
         "last_updated": datetime.now(timezone.utc).isoformat(),
     }
 
 
 @router.get("/exchange-rates/{base}/{quote}")
-async def get_specific_exchange_rate(*, base: str, quote: str):
+async def get_specific_exchange_rate(
+    *,
+    base: str,
+    quote: str,
+    as_of: Optional[date] = Query(None, description="Rate date (defaults to today)"),
+    db: AsyncSession = Depends(get_db),
+):
     """
     Get exchange rate for a specific currency pair.
     """
+    rate = await FxRateService(db).get_rate(base, quote, as_of=as_of)
+    if rate is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No exchange rate available for {base.upper()}/{quote.upper()}",
+        )
+
     return {
         "base_currency": base.upper(),
         "quote_currency": quote.upper(),
-        "rate": 0.85,
-        "inverse_rate": 1.18,
+        "rate": rate,
+        "inverse_rate": 1 / rate if rate else None,
+        "as_of": as_of or date.today(),
         "last_updated": datetime.now(timezone.utc).isoformat(),
     }
 
@@ -3,11 +3,11 @@ import re
 from typing import Any, Dict, Optional
 
 import pandas as pd
-import yfinance as yf
 from rapidfuzz import fuzz, process
 from sqlalchemy import or_
 from sqlalchemy.orm import Session
 
+from app.integrations.yfinance.cache import ticker_cache
 from app.security.master.model import Security
 from app.security.master.repository import security_crud
 from app.security.master.schemas import SecurityCreate
@@ -221,8 +221,7 @@ class SecurityMatcher:
 
         try:
             # Try to fetch from yfinance first
-            ticker = yf.Ticker(identifier)
-            info = ticker.info
+            info = ticker_cache.get_info(identifier)
 
             if info and info.get("symbol"):
                 security = self._create_security_from_yfinance_data(identifier, info, result)
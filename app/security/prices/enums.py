@@ -0,0 +1,60 @@
+from enum import Enum
+
+
+class RefreshBucket(str, Enum):
+    """How much price history a securities needs to catch up"""
+
+    UP_TO_DATE = "up_to_date"  # Nothing to fetch
+    INCREMENTAL = "incremental"  # A few missing sessions, fetched by start date
+    COMPACT = "compact"  # Gap fits in a provider's compact window (~100 sessions)
+    FULL = "full"  # No stored history or a gap beyond the compact window
+
+
+class PriceInterval(str, Enum):
+    """Bar size for price history; each maps to a PostgreSQL date_trunc unit"""
+
+    DAILY = "daily"
+    WEEKLY = "weekly"
+    MONTHLY = "monthly"
+    QUARTERLY = "quarterly"
+    YEARLY = "yearly"
+
+    @property
+    def trunc_unit(self) -> str:
+        return {
+            PriceInterval.DAILY: "day",
+            PriceInterval.WEEKLY: "week",
+            PriceInterval.MONTHLY: "month",
+            PriceInterval.QUARTERLY: "quarter",
+            PriceInterval.YEARLY: "year",
+        }[self]
+
+
+class HistoryFormat(str, Enum):
+    """Encodings for streamed price history"""
+
+    JSON = "json"
+    CSV = "csv"
+    ARROW = "arrow"
+
+
+class ExportFormat(str, Enum):
+    """Columnar file formats for price and return matrices"""
+
+    PARQUET = "parquet"
+    ARROW = "arrow"  # Arrow IPC stream
+
+
+class ExportMatrix(str, Enum):
+    """Which matrix an export contains"""
+
+    PRICES = "prices"  # Adjusted closes
+    RAW_PRICES = "raw_prices"  # Closes as stored
+    RETURNS = "returns"  # Daily simple returns of adjusted closes
+
+
+class MarketDataJobType(str, Enum):
+    """Work items processed by the market data orchestrator"""
+
+    REFRESH_PRICES = "refresh_prices"
+    ENRICH = "enrich"
@@ -0,0 +1,250 @@
+"""
+Columnar export of price and return matrices.
+
+Usage:
+    python -m app.security.prices.export AAPL MSFT --start 2015-01-01 --end 2024-12-31 \
+        --matrix returns --out returns.parquet
+
+Closes are read with PostgreSQL COPY straight into column arrays (no ORM
+rows), pivoted to a dates x symbols matrix, adjusted for corporate actions
+and written as Parquet or an Arrow IPC stream. Requires the optional pyarrow
+package.
+"""
+
+import argparse
+import asyncio
+import io
+import logging
+import uuid
+from datetime import date
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import AsyncSessionLocal
+from app.security.actions.adjustments import adjustment_factors, corporate_action_adjuster
+from app.security.master.model import Security
+from app.security.prices.enums import ExportFormat, ExportMatrix
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+# Rows (dates) per Arrow record batch when streaming
+EXPORT_BATCH_ROWS = 256
+
+MEDIA_TYPES = {
+    ExportFormat.PARQUET: "application/vnd.apache.parquet",
+    ExportFormat.ARROW: "application/vnd.apache.arrow.stream",
+}
+
+# asyncpg wraps this in COPY (...) TO STDOUT itself
+PRICE_COPY_QUERY = """
+    SELECT security_id, price_date, close_price
+    FROM security_prices
+    WHERE security_id = ANY($1::uuid[])
+      AND price_date BETWEEN $2 AND $3
+    ORDER BY security_id, price_date
+"""
+
+
+class ExportError(Exception):
+    """Custom exception for export errors."""
+
+    pass
+
+
+def export_available() -> bool:
+    return pa is not None
+
+
+class PriceMatrixExporter:
+    """Builds aligned price/return matrices and encodes them as Parquet or Arrow."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def resolve_symbols(self, symbols: Sequence[str]) -> Dict[str, str]:
+        """Map security id -> symbol for the known, non-deleted symbols."""
+        result = await self.db.execute(
+            select(Security.id, Security.symbol).where(
+                Security.symbol.in_([s.upper() for s in symbols]),
+                Security.deleted_at.is_(None),
+            )
+        )
+        return {str(row.id): row.symbol for row in result}
+
+    async def load_closes(
+        self, security_ids: Sequence[str], start_date: date, end_date: date
+    ) -> pd.DataFrame:
+        """Long frame of (security_id, price_date, close_price) read via COPY."""
+        # COPY takes no bind parameters, so asyncpg inlines the arguments as quoted
+        # literals; the date bounds stay constants the planner can prune partitions with
+        buffer = io.BytesIO()
+        connection = await self.db.connection()
+        raw = await connection.get_raw_connection()
+        await raw.driver_connection.copy_from_query(
+            PRICE_COPY_QUERY,
+            [uuid.UUID(str(s)) for s in security_ids],
+            start_date,
+            end_date,
+            output=buffer,
+            format="csv",
+        )
+        if not buffer.getbuffer().nbytes:
+            return pd.DataFrame(columns=["security_id", "price_date", "close_price"])
+        buffer.seek(0)
+
+        return pd.read_csv(
+            buffer,
+            names=["security_id", "price_date", "close_price"],
+            dtype={"security_id": str, "close_price": float},
+            parse_dates=["price_date"],
+            engine="pyarrow" if pa is not None else "c",
+        )
+
+    async def build_matrix(
+        self,
+        symbols: Sequence[str],
+        start_date: date,
+        end_date: date,
+        matrix: ExportMatrix = ExportMatrix.PRICES,
+    ) -> pd.DataFrame:
+        """
+        Dates x symbols matrix; dates are the union of trading dates in the range.
+
+        Adjusted prices apply the splits and dividends recorded within the range.
+        """
+        symbols_by_id = await self.resolve_symbols(symbols)
+        if not symbols_by_id:
+            raise ExportError("None of the requested symbols are known")
+
+        closes = await self.load_closes(list(symbols_by_id), start_date, end_date)
+        wide = closes.pivot(index="price_date", columns="security_id", values="close_price")
+
+        if matrix != ExportMatrix.RAW_PRICES and not wide.empty:
+            schedules = await corporate_action_adjuster.get_schedules_async(
+                self.db, list(wide.columns)
+            )
+            dates = wide.index.values.astype("datetime64[D]")
+            for security_id in wide.columns:
+                column = wide[security_id].to_numpy(copy=True)
+                present = ~np.isnan(column)
+                factors = adjustment_factors(
+                    dates[present], column[present], schedules[security_id]
+                )
+                column[present] = column[present] * factors
+                wide[security_id] = column
+
+        if matrix == ExportMatrix.RETURNS:
+            # No fill across gaps: a missing close gives missing returns
+            wide = wide.pct_change(fill_method=None).iloc[1:]
+
+        wide = wide.rename(columns=symbols_by_id).sort_index(axis=1)
+        wide.index.name = "date"
+        wide.columns.name = None
+
+        missing = sorted({s.upper() for s in symbols} - set(symbols_by_id.values()))
+        if missing:
+            logger.warning(f"Export skipped {len(missing)} unknown symbols: {missing[:10]}")
+        return wide
+
+
+def _to_table(matrix: pd.DataFrame) -> "pa.Table":
+    if pa is None:
+        raise ExportError("pyarrow is required for Parquet/Arrow export")
+    return pa.Table.from_pandas(matrix.reset_index(), preserve_index=False)
+
+
+def write_matrix(matrix: pd.DataFrame, path: Path, fmt: ExportFormat) -> Path:
+    """Write a matrix to a local file."""
+    table = _to_table(matrix)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    if fmt == ExportFormat.PARQUET:
+        pq.write_table(table, path, compression="zstd")
+    else:
+        with pa.OSFile(str(path), "wb") as sink, pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table, max_chunksize=EXPORT_BATCH_ROWS)
+    return path
+
+
+def iter_matrix_bytes(matrix: pd.DataFrame, fmt: ExportFormat) -> Iterator[bytes]:
+    """
+    Encode a matrix for an HTTP response.
+
+    Arrow streams are yielded batch by batch; Parquet needs its footer, so the
+    file is built in memory and yielded in chunks.
+    """
+    table = _to_table(matrix)
+
+    if fmt == ExportFormat.PARQUET:
+        sink = pa.BufferOutputStream()
+        pq.write_table(table, sink, compression="zstd")
+        data = sink.getvalue()
+        chunk_size = 1 << 20
+        for offset in range(0, data.size, chunk_size):
+            yield data[offset : offset + chunk_size].to_pybytes()
+        return
+
+    buffer = io.BytesIO()
+    with pa.ipc.new_stream(buffer, table.schema) as writer:
+        for batch in table.to_batches(max_chunksize=EXPORT_BATCH_ROWS):
+            writer.write_batch(batch)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+async def export_matrix(
+    symbols: List[str],
+    start_date: date,
+    end_date: date,
+    out: Path,
+    matrix: ExportMatrix = ExportMatrix.PRICES,
+    fmt: Optional[ExportFormat] = None,
+) -> Path:
+    """
+    Main entry point for file exports.
+
+    The format defaults from the file suffix (.parquet or .arrow).
+    """
+    if fmt is None:
+        fmt = ExportFormat.ARROW if out.suffix in (".arrow", ".arrows") else ExportFormat.PARQUET
+
+    async with AsyncSessionLocal() as session:
+        frame = await PriceMatrixExporter(session).build_matrix(
+            symbols, start_date, end_date, matrix
+        )
+
+    write_matrix(frame, out, fmt)
+    logger.info(f"Exported {frame.shape[0]} dates x {frame.shape[1]} securities to {out}")
+    return out
+
+
+if __name__ == "__main__":
+    # Configure logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+
+    parser = argparse.ArgumentParser(description="Export price or return matrices")
+    parser.add_argument("symbols", nargs="+")
+    parser.add_argument("--start", type=date.fromisoformat, required=True)
+    parser.add_argument("--end", type=date.fromisoformat, default=date.today())
+    parser.add_argument("--matrix", type=ExportMatrix, default=ExportMatrix.PRICES)
+    parser.add_argument("--out", type=Path, required=True)
+    args = parser.parse_args()
+
+    asyncio.run(export_matrix(args.symbols, args.start, args.end, args.out, args.matrix))
@@ -0,0 +1,295 @@
+"""
+Price history reads for the API.
+
+Bars are aggregated in PostgreSQL with date_trunc: open and close are the
+first and last closes in the period, high and low the extreme closes, and
+volume the sum. Pages are keyed on the period start so deep pages cost the
+same as the first one, and long ranges can be streamed through a
+server-side cursor as JSON, CSV or Arrow IPC.
+"""
+
+import csv
+import hashlib
+import io
+import json
+from datetime import date
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import Date, Select, cast, func, literal_column, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by, array_agg
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import AsyncSessionLocal
+from app.security.actions.adjustments import (
+    ActionSchedule,
+    adjustment_factors,
+    corporate_action_adjuster,
+)
+from app.security.prices.enums import HistoryFormat, PriceInterval
+from app.security.prices.model import SecurityPrice
+
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+
+STREAM_BATCH_ROWS = 5000
+
+HISTORY_COLUMNS = ["date", "open", "high", "low", "close", "adjusted_close", "volume"]
+
+MEDIA_TYPES = {
+    HistoryFormat.JSON: "application/json",
+    HistoryFormat.CSV: "text/csv",
+    HistoryFormat.ARROW: "application/vnd.apache.arrow.stream",
+}
+
+
+def arrow_available() -> bool:
+    return pa is not None
+
+
+def history_query(
+    security_id: Any,
+    interval: PriceInterval,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    after: Optional[date] = None,
+) -> Select:
+    """Bars for one security in period order, optionally starting after a period."""
+    price_date = SecurityPrice.price_date
+    close = SecurityPrice.close_price
+
+    if interval == PriceInterval.DAILY:
+        period = price_date
+    else:
+        period = cast(func.date_trunc(interval.trunc_unit, price_date), Date)
+
+    stmt = select(
+        period.label("period"),
+        array_agg(aggregate_order_by(close, price_date.asc()))[1].label("open"),
+        func.max(close).label("high"),
+        func.min(close).label("low"),
+        array_agg(aggregate_order_by(close, price_date.desc()))[1].label("close"),
+        func.sum(SecurityPrice.volume).label("volume"),
+        func.max(price_date).label("last_date"),
+    ).where(SecurityPrice.security_id == security_id)
+
+    if start_date:
+        stmt = stmt.where(price_date >= start_date)
+    if end_date:
+        stmt = stmt.where(price_date <= end_date)
+    if after:
+        # The price_date bound lets the index prune; the period bound is exact
+        stmt = stmt.where(price_date > after, period > after)
+
+    return stmt.group_by(period).order_by(period)
+
+
+def _bars(rows: Sequence[Any], schedule: ActionSchedule) -> List[dict]:
+    """Row dicts with a split-adjusted close for each bar."""
+    if not rows:
+        return []
+
+    closes = np.array([float(row.close) for row in rows], dtype=float)
+    # Dividend factors need closes outside the page, so only splits are applied
+    factors = adjustment_factors(
+        np.array([row.last_date for row in rows], dtype="datetime64[D]"),
+        closes,
+        schedule,
+        include_dividends=False,
+    )
+
+    return [
+        {
+            "date": row.period.isoformat(),
+            "open": float(row.open),
+            "high": float(row.high),
+            "low": float(row.low),
+            "close": close,
+            "adjusted_close": round(close * factor, 6),
+            "volume": int(row.volume) if row.volume is not None else None,
+        }
+        for row, close, factor in zip(rows, closes, factors)
+    ]
+
+
+class PriceHistoryService:
+    """Paged and streamed price history for one security."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_page(
+        self,
+        security_id: Any,
+        interval: PriceInterval,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        after: Optional[date] = None,
+        limit: int = 500,
+    ) -> Dict[str, Any]:
+        """
+        One page of bars; `next_after` is the period to continue from, or None.
+        """
+        stmt = history_query(security_id, interval, start_date, end_date, after)
+        result = await self.db.execute(stmt.limit(limit + 1))
+        rows = result.all()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        schedule = await self.get_schedule(security_id)
+
+        return {
+            "prices": _bars(rows, schedule),
+            "next_after": rows[-1].period if has_more else None,
+        }
+
+    async def get_etag(
+        self,
+        security_id: Any,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        *variant: Any,
+    ) -> str:
+        """
+        Validator for a history response, derived from the stored closes in
+        range and the split schedule, so rewritten or backfilled closes change it.
+
+        `variant` holds the request parameters that shape the body.
+        """
+        row_text = func.concat(
+            SecurityPrice.price_date, ":", SecurityPrice.close_price, ":", SecurityPrice.volume
+        )
+        stmt = select(
+            func.md5(
+                func.string_agg(
+                    row_text, aggregate_order_by(literal_column("','"), SecurityPrice.price_date)
+                )
+            )
+        ).where(SecurityPrice.security_id == security_id)
+        if start_date:
+            stmt = stmt.where(SecurityPrice.price_date >= start_date)
+        if end_date:
+            stmt = stmt.where(SecurityPrice.price_date <= end_date)
+        prices_digest = (await self.db.execute(stmt)).scalar()
+        schedule = await self.get_schedule(security_id)
+
+        digest = hashlib.sha1(str(prices_digest).encode())
+        digest.update(schedule.split_dates.tobytes())
+        digest.update(schedule.split_ratios.tobytes())
+        digest.update(json.dumps(variant, default=str).encode())
+        return f'"{digest.hexdigest()}"'
+
+    async def get_schedule(self, security_id: Any) -> ActionSchedule:
+        schedules = await corporate_action_adjuster.get_schedules_async(self.db, [security_id])
+        return schedules[str(security_id)]
+
+
+async def stream_history(
+    security_id: Any,
+    interval: PriceInterval,
+    fmt: HistoryFormat,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> AsyncIterator[bytes]:
+    """
+    Encode the full range in batches read through a server-side cursor.
+
+    Uses its own session because the response body is produced after the
+    request's session has been released.
+    """
+    async with AsyncSessionLocal() as session:
+        service = PriceHistoryService(session)
+        schedule = await service.get_schedule(security_id)
+
+        stmt = history_query(security_id, interval, start_date, end_date).execution_options(
+            yield_per=STREAM_BATCH_ROWS
+        )
+        result = await session.stream(stmt)
+
+        encoder = _ENCODERS[fmt]()
+        yield encoder.start()
+        async for rows in result.partitions():
+            chunk = encoder.encode(_bars(rows, schedule))
+            if chunk:
+                yield chunk
+        yield encoder.finish()
+
+
+class _JsonEncoder:
+    def __init__(self):
+        self.first = True
+
+    def start(self) -> bytes:
+        return b'{"prices":['
+
+    def encode(self, bars: List[dict]) -> bytes:
+        if not bars:
+            return b""
+        body = ",".join(json.dumps(bar) for bar in bars)
+        prefix = "" if self.first else ","
+        self.first = False
+        return (prefix + body).encode()
+
+    def finish(self) -> bytes:
+        return b"]}"
+
+
+class _CsvEncoder:
+    def start(self) -> bytes:
+        return (",".join(HISTORY_COLUMNS) + "\n").encode()
+
+    def encode(self, bars: List[dict]) -> bytes:
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=HISTORY_COLUMNS, lineterminator="\n")
+        writer.writerows(bars)
+        return buffer.getvalue().encode()
+
+    def finish(self) -> bytes:
+        return b""
+
+
+class _ArrowEncoder:
+    def __init__(self):
+        if pa is None:
+            raise RuntimeError("pyarrow is required for Arrow output")
+        self.schema = pa.schema(
+            [
+                ("date", pa.string()),
+                ("open", pa.float64()),
+                ("high", pa.float64()),
+                ("low", pa.float64()),
+                ("close", pa.float64()),
+                ("adjusted_close", pa.float64()),
+                ("volume", pa.int64()),
+            ]
+        )
+        self.buffer = io.BytesIO()
+        self.writer = pa.ipc.new_stream(self.buffer, self.schema)
+
+    def start(self) -> bytes:
+        return self._drain()
+
+    def encode(self, bars: List[dict]) -> bytes:
+        if bars:
+            self.writer.write_batch(pa.RecordBatch.from_pylist(bars, schema=self.schema))
+        return self._drain()
+
+    def finish(self) -> bytes:
+        self.writer.close()
+        return self._drain()
+
+    def _drain(self) -> bytes:
+        # Hand over what has been written so far; the stream format needs no seeking
+        data = self.buffer.getvalue()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return data
+
+
+_ENCODERS = {
+    HistoryFormat.JSON: _JsonEncoder,
+    HistoryFormat.CSV: _CsvEncoder,
+    HistoryFormat.ARROW: _ArrowEncoder,
+}
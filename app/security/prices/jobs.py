@@ -0,0 +1,179 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Dict, NamedTuple, Optional, Set
+
+from app.core.redis import redis_client
+from app.security.prices.enums import MarketDataJobType
+
+logger = logging.getLogger(__name__)
+
+# A queued or running job blocks duplicates for at most this long
+PENDING_TTL_SECONDS = 6 * 3600
+# A claimed job whose lease expires is assumed lost with its worker and requeued
+LEASE_SECONDS = 900
+
+
+class MarketDataJob(NamedTuple):
+    """One refresh or enrichment of one security"""
+
+    job_type: MarketDataJobType
+    security_id: str
+    force: bool = False
+    enqueued_at: float = 0.0
+
+    @property
+    def key(self) -> str:
+        return f"{self.job_type.value}:{self.security_id}"
+
+    def to_json(self) -> str:
+        return json.dumps({**self._asdict(), "job_type": self.job_type.value})
+
+    @classmethod
+    def from_json(cls, raw: str) -> "MarketDataJob":
+        data = json.loads(raw)
+        return cls(**{**data, "job_type": MarketDataJobType(data["job_type"])})
+
+
+class MarketDataJobQueue:
+    """
+    FIFO job queue with in-flight deduplication.
+
+    Uses a Redis list plus one expiring pending key per queued or running job
+    so several worker processes can share the work. Workers claim jobs by
+    moving them onto a processing list under a lease; requeue_stalled puts
+    back jobs whose worker died before completing them. Falls back to an
+    in-process asyncio.Queue when Redis is unavailable.
+    """
+
+    def __init__(self, key_prefix: str = "market_data_jobs"):
+        self.queue_key = f"{key_prefix}:queue"
+        self.processing_key = f"{key_prefix}:processing"
+        self.pending_prefix = f"{key_prefix}:pending"
+        self.lease_prefix = f"{key_prefix}:lease"
+
+        self._local_queue: "asyncio.Queue[MarketDataJob]" = asyncio.Queue()
+        self._local_pending: Set[str] = set()
+
+        # Raw payload of each job claimed by this process, for removal on completion
+        self._claimed: Dict[str, str] = {}
+        # Unleased processing entries seen by the previous reaper pass
+        self._unleased: Set[str] = set()
+
+    @property
+    def _redis(self) -> Optional[Any]:
+        return redis_client.get_client() if redis_client.is_available() else None
+
+    def enqueue(self, job: MarketDataJob) -> bool:
+        """Add a job unless the same job is already queued or running."""
+        job = job._replace(enqueued_at=job.enqueued_at or time.time())
+        client = self._redis
+
+        if client is not None:
+            if not client.set(
+                f"{self.pending_prefix}:{job.key}", 1, nx=True, ex=PENDING_TTL_SECONDS
+            ):
+                return False
+            client.lpush(self.queue_key, job.to_json())
+            return True
+
+        if job.key in self._local_pending:
+            return False
+        self._local_pending.add(job.key)
+        self._local_queue.put_nowait(job)
+        return True
+
+    async def dequeue(self, timeout: float = 1.0) -> Optional[MarketDataJob]:
+        """Next job, or None after `timeout` seconds without one."""
+        client = self._redis
+        if client is not None:
+            # Blocking move in a thread so the event loop keeps running; the job
+            # stays on the processing list until completed or reaped
+            raw = await asyncio.to_thread(
+                client.blmove,
+                self.queue_key,
+                self.processing_key,
+                max(1, int(timeout)),
+                "RIGHT",
+                "LEFT",
+            )
+            if raw is None:
+                return None
+            try:
+                job = MarketDataJob.from_json(raw)
+            except (KeyError, TypeError, ValueError) as e:
+                logger.error(f"Dropping malformed market data job {raw!r}: {e}")
+                client.lrem(self.processing_key, 1, raw)
+                return None
+            client.set(f"{self.lease_prefix}:{job.key}", 1, ex=LEASE_SECONDS)
+            self._claimed[job.key] = raw
+            return job
+
+        try:
+            return await asyncio.wait_for(self._local_queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def complete(self, job: MarketDataJob) -> None:
+        """Release the job key so the security can be enqueued again."""
+        client = self._redis
+        if client is not None:
+            raw = self._claimed.pop(job.key, None)
+            if raw is not None:
+                client.lrem(self.processing_key, 1, raw)
+            client.delete(f"{self.pending_prefix}:{job.key}", f"{self.lease_prefix}:{job.key}")
+        else:
+            self._local_pending.discard(job.key)
+
+    def requeue_stalled(self) -> int:
+        """
+        Move claimed jobs whose lease expired back onto the queue.
+
+        An entry is only requeued once two consecutive passes found it without
+        a lease, so a job claimed just before its lease was set is left alone.
+        """
+        client = self._redis
+        if client is None:
+            return 0
+
+        unleased = set()
+        for raw in client.lrange(self.processing_key, 0, -1):
+            try:
+                job = MarketDataJob.from_json(raw)
+            except (KeyError, TypeError, ValueError):
+                client.lrem(self.processing_key, 1, raw)
+                continue
+            if not client.exists(f"{self.lease_prefix}:{job.key}"):
+                unleased.add(raw)
+
+        requeued = 0
+        for raw in unleased & self._unleased:
+            if client.lrem(self.processing_key, 1, raw):
+                job = MarketDataJob.from_json(raw)
+                client.set(f"{self.pending_prefix}:{job.key}", 1, ex=PENDING_TTL_SECONDS)
+                client.rpush(self.queue_key, raw)
+                requeued += 1
+        self._unleased = unleased - self._unleased
+
+        if requeued:
+            logger.warning(f"Requeued {requeued} stalled market data jobs")
+        return requeued
+
+    def depth(self) -> int:
+        client = self._redis
+        if client is not None:
+            return int(client.llen(self.queue_key))
+        return self._local_queue.qsize()
+
+    def get_stats(self) -> Dict[str, Any]:
+        client = self._redis
+        return {
+            "backend": "redis" if client is not None else "memory",
+            "depth": self.depth(),
+            "in_flight": (
+                int(client.llen(self.processing_key))
+                if client is not None
+                else len(self._local_pending) - self._local_queue.qsize()
+            ),
+        }
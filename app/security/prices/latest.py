@@ -0,0 +1,164 @@
+"""
+Latest close per security, shared by everything that values positions.
+
+Misses are loaded in bulk: the last two sessions per security in one ranked
+query over recent partitions, so the previous close for the day change comes
+with it. Writers of security_prices call invalidate() after their commit; each
+invalidation bumps a per-security version shared through Redis, so entries
+cached by other processes and the caches built on top of them are dropped too.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import desc, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.versions import SharedVersions
+from app.security.prices.model import SecurityPrice
+
+logger = logging.getLogger(__name__)
+
+
+class LatestPrice(NamedTuple):
+    """Most recent stored close of a security"""
+
+    security_id: str
+    price_date: date
+    close: float
+    previous_close: Optional[float]
+
+
+def latest_prices_query(security_ids: List[Any], since: Optional[date] = None):
+    """The last two closes per security, ranked 1 (latest) and 2."""
+    rank = (
+        func.row_number()
+        .over(partition_by=SecurityPrice.security_id, order_by=desc(SecurityPrice.price_date))
+        .label("rank")
+    )
+    ranked = select(
+        SecurityPrice.security_id, SecurityPrice.price_date, SecurityPrice.close_price, rank
+    ).where(SecurityPrice.security_id.in_(security_ids))
+    if since is not None:
+        # Lets the planner prune the yearly partitions
+        ranked = ranked.where(SecurityPrice.price_date >= since)
+    ranked = ranked.subquery()
+    return select(ranked).where(ranked.c.rank <= 2)
+
+
+class LatestPriceCache:
+    """
+    In-process map of security id to LatestPrice with a TTL and LRU bound.
+
+    Entries are only served while their shared version is unchanged.
+    """
+
+    def __init__(self, max_size: Optional[int] = None, ttl_seconds: Optional[int] = None):
+        self.max_size = max_size or settings.LATEST_PRICE_CACHE_SIZE
+        self.ttl_seconds = ttl_seconds or settings.LATEST_PRICE_TTL_SECONDS
+
+        # security id -> (expires at, version, price or None when the security has no prices)
+        self._prices: "OrderedDict[str, Tuple[float, int, Optional[LatestPrice]]]" = (
+            OrderedDict()
+        )
+        self._versions = SharedVersions("latest_price_version")
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    async def get_many(
+        self, db: AsyncSession, security_ids: Iterable[Any]
+    ) -> Dict[str, LatestPrice]:
+        """Latest prices for the securities that have any, loading misses in bulk."""
+        now = time.monotonic()
+        found: Dict[str, LatestPrice] = {}
+        missing: List[str] = []
+        # Read before loading, so an invalidation racing the load wins next time
+        versions = self._versions.get_many({str(s) for s in security_ids})
+
+        with self._lock:
+            for security_id, version in versions.items():
+                entry = self._prices.get(security_id)
+                if entry is not None and entry[0] > now and entry[1] == version:
+                    self._prices.move_to_end(security_id)
+                    self._hits += 1
+                    if entry[2] is not None:
+                        found[security_id] = entry[2]
+                else:
+                    self._misses += 1
+                    missing.append(security_id)
+
+        if missing:
+            loaded = await self._load(db, missing)
+            found.update(loaded)
+            with self._lock:
+                expires = time.monotonic() + self.ttl_seconds
+                for security_id in missing:
+                    self._prices[security_id] = (
+                        expires,
+                        versions[security_id],
+                        loaded.get(security_id),
+                    )
+                    self._prices.move_to_end(security_id)
+                while len(self._prices) > self.max_size:
+                    self._prices.popitem(last=False)
+        return found
+
+    def invalidate(self, security_ids: Iterable[Any]) -> None:
+        """Drop cached prices, here and in other processes, after new closes were stored."""
+        security_ids = {str(s) for s in security_ids}
+        with self._lock:
+            for security_id in security_ids:
+                self._prices.pop(security_id, None)
+        self._versions.bump(security_ids)
+
+    def versions(self, security_ids: Iterable[Any]) -> Dict[str, int]:
+        """Bumped on every invalidation of the securities."""
+        return self._versions.get_many(security_ids)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._prices.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self._hits + self._misses
+        return {
+            "size": len(self._prices),
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_ratio": round(self._hits / lookups, 4) if lookups else None,
+        }
+
+    async def _load(self, db: AsyncSession, security_ids: List[str]) -> Dict[str, LatestPrice]:
+        since = date.today() - timedelta(days=settings.LATEST_PRICE_LOOKBACK_DAYS)
+        rows = list(await db.execute(latest_prices_query(security_ids, since)))
+
+        # Securities without a recent close are looked up over the full history
+        stale = set(security_ids) - {str(row.security_id) for row in rows}
+        if stale:
+            rows.extend(await db.execute(latest_prices_query(sorted(stale))))
+
+        closes: Dict[str, Dict[int, Any]] = {}
+        for row in rows:
+            closes.setdefault(str(row.security_id), {})[row.rank] = row
+
+        prices = {}
+        for security_id, ranked in closes.items():
+            latest = ranked[1]
+            previous = ranked.get(2)
+            prices[security_id] = LatestPrice(
+                security_id,
+                latest.price_date,
+                float(latest.close_price),
+                float(previous.close_price) if previous is not None else None,
+            )
+        return prices
+
+
+# Create instance
+latest_price_cache = LatestPriceCache()
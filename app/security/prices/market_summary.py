@@ -0,0 +1,232 @@
+"""
+Market breadth summary for a trading date.
+
+Each security's close and previous close come from a single query using
+LAG() over the price history partitioned by security. Summaries for closed
+trading days rarely change, so they are cached in Redis (or in process when
+Redis is unavailable) for a long time; the current day is cached briefly.
+Writers of past closes (backfills, forced refreshes, quarantine releases)
+call invalidate_summaries for the dates they wrote.
+"""
+
+import json
+import logging
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+import pandas as pd
+from sqlalchemy import Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.redis import redis_client
+from app.integrations.cache import (
+    MARKET_CLOSE_HOUR,
+    MARKET_CLOSE_SETTLE_MINUTES,
+    MARKET_TIMEZONE,
+)
+from app.security.master.model import Security
+from app.security.prices.model import SecurityPrice
+
+logger = logging.getLogger(__name__)
+
+# Calendar days searched for the previous close (covers long weekends and holidays)
+PREVIOUS_CLOSE_LOOKBACK_DAYS = 10
+TOP_MOVERS = 10
+
+CLOSED_DAY_TTL_SECONDS = 30 * 24 * 3600
+OPEN_DAY_TTL_SECONDS = 300
+LOCAL_CACHE_SIZE = 64
+
+_local_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+
+def market_summary_query(target_date: date) -> Select:
+    """Close and previous close per security on target_date, in one windowed query."""
+    windowed = (
+        select(
+            SecurityPrice.security_id,
+            SecurityPrice.price_date,
+            SecurityPrice.close_price,
+            func.lag(SecurityPrice.close_price)
+            .over(partition_by=SecurityPrice.security_id, order_by=SecurityPrice.price_date)
+            .label("previous_close"),
+        )
+        .where(
+            SecurityPrice.price_date.between(
+                target_date - timedelta(days=PREVIOUS_CLOSE_LOOKBACK_DAYS), target_date
+            )
+        )
+        .subquery()
+    )
+
+    return (
+        select(
+            windowed.c.security_id,
+            Security.symbol,
+            Security.security_name,
+            Security.sector,
+            Security.exchange,
+            windowed.c.close_price,
+            windowed.c.previous_close,
+        )
+        .join(Security, Security.id == windowed.c.security_id)
+        .where(windowed.c.price_date == target_date)
+    )
+
+
+def summarize_market(rows: List[Any], target_date: date) -> Dict[str, Any]:
+    """Breadth statistics, top movers and sector/exchange breakdowns from query rows."""
+    if not rows:
+        return {"date": target_date.isoformat(), "message": "No market data available"}
+
+    frame = pd.DataFrame(
+        [tuple(row) for row in rows],
+        columns=[
+            "security_id",
+            "symbol",
+            "name",
+            "sector",
+            "exchange",
+            "close_price",
+            "previous_close",
+        ],
+    )
+    frame["security_id"] = frame["security_id"].astype(str)
+    frame["close_price"] = frame["close_price"].astype(float)
+    frame["previous_close"] = frame["previous_close"].astype(float)
+    frame["sector"] = frame["sector"].fillna("Unknown")
+    frame["exchange"] = frame["exchange"].fillna("Unknown")
+
+    valid = frame["previous_close"] > 0
+    frame["change_pct"] = (frame["close_price"] / frame["previous_close"].where(valid) - 1) * 100
+    changed = frame.dropna(subset=["change_pct"])
+
+    def breadth(group: pd.DataFrame) -> Dict[str, Any]:
+        changes = group["change_pct"].dropna()
+        return {
+            "securities": int(len(group)),
+            "gainers": int((changes > 0).sum()),
+            "losers": int((changes < 0).sum()),
+            "unchanged": int(len(group) - (changes > 0).sum() - (changes < 0).sum()),
+            "avg_change": round(float(changes.mean()), 4) if len(changes) else 0.0,
+            "median_change": round(float(changes.median()), 4) if len(changes) else 0.0,
+        }
+
+    def movers(ordered: pd.DataFrame) -> List[Dict[str, Any]]:
+        return [
+            {
+                "security_id": row.security_id,
+                "symbol": row.symbol,
+                "name": row.name,
+                "close_price": row.close_price,
+                "change_pct": round(row.change_pct, 4),
+            }
+            for row in ordered.head(TOP_MOVERS).itertuples(index=False)
+        ]
+
+    overall = breadth(frame)
+    return {
+        "date": target_date.isoformat(),
+        "total_securities": overall["securities"],
+        "securities_with_changes": int(len(changed)),
+        "gainers": overall["gainers"],
+        "losers": overall["losers"],
+        "unchanged": overall["unchanged"],
+        "avg_change": overall["avg_change"],
+        "median_change": overall["median_change"],
+        "top_gainers": movers(changed.sort_values("change_pct", ascending=False)),
+        "top_losers": movers(changed.sort_values("change_pct", ascending=True)),
+        "by_sector": {sector: breadth(group) for sector, group in frame.groupby("sector")},
+        "by_exchange": {exchange: breadth(group) for exchange, group in frame.groupby("exchange")},
+    }
+
+
+def _is_closed_day(target_date: date) -> bool:
+    """Whether target_date's session has closed, making its summary immutable."""
+    now = datetime.now(MARKET_TIMEZONE)
+    if target_date < now.date():
+        return True
+    close = now.replace(hour=MARKET_CLOSE_HOUR, minute=0, second=0, microsecond=0) + timedelta(
+        minutes=MARKET_CLOSE_SETTLE_MINUTES
+    )
+    return target_date == now.date() and now >= close
+
+
+def _cache_key(target_date: date) -> str:
+    return f"market_summary:{target_date.isoformat()}"
+
+
+def get_cached_summary(target_date: date) -> Optional[Dict[str, Any]]:
+    key = _cache_key(target_date)
+    if redis_client.is_available():
+        raw = redis_client.get(key)
+        return json.loads(raw) if raw else None
+    return _local_cache.get(key)
+
+
+def cache_summary(target_date: date, summary: Dict[str, Any]) -> None:
+    key = _cache_key(target_date)
+    closed = _is_closed_day(target_date)
+
+    if redis_client.is_available():
+        ttl = CLOSED_DAY_TTL_SECONDS if closed else OPEN_DAY_TTL_SECONDS
+        redis_client.setex(key, ttl, json.dumps(summary, default=str))
+    elif closed:
+        # Without Redis only immutable days are kept, in a small LRU
+        _local_cache[key] = summary
+        _local_cache.move_to_end(key)
+        while len(_local_cache) > LOCAL_CACHE_SIZE:
+            _local_cache.popitem(last=False)
+
+
+def invalidate_summaries(price_dates: Iterable[date]) -> int:
+    """
+    Drop cached summaries that prices written on these dates can change.
+
+    A close is also the previous close of the sessions within the lookback
+    after it, so those days are dropped too. Returns the keys dropped.
+    """
+    days = set()
+    for price_date in set(price_dates):
+        days.update(price_date + timedelta(days=i) for i in range(PREVIOUS_CLOSE_LOOKBACK_DAYS + 1))
+    keys = [_cache_key(day) for day in sorted(days)]
+
+    for key in keys:
+        _local_cache.pop(key, None)
+    if redis_client.is_available():
+        for start in range(0, len(keys), 1000):
+            redis_client.delete(*keys[start : start + 1000])
+    return len(keys)
+
+
+def get_market_summary(db: Session, target_date: Optional[date] = None) -> Dict[str, Any]:
+    """Market summary for a trading date (sync session)."""
+    target_date = target_date or date.today()
+    cached = get_cached_summary(target_date)
+    if cached is not None:
+        return cached
+
+    rows = db.execute(market_summary_query(target_date)).all()
+    summary = summarize_market(rows, target_date)
+    if rows:
+        cache_summary(target_date, summary)
+    return summary
+
+
+async def get_market_summary_async(
+    db: AsyncSession, target_date: Optional[date] = None
+) -> Dict[str, Any]:
+    """Market summary for a trading date (async session)."""
+    target_date = target_date or date.today()
+    cached = get_cached_summary(target_date)
+    if cached is not None:
+        return cached
+
+    result = await db.execute(market_summary_query(target_date))
+    rows = result.all()
+    summary = summarize_market(rows, target_date)
+    if rows:
+        cache_summary(target_date, summary)
+    return summary
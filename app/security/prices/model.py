@@ -1,13 +1,15 @@
+import uuid
 from datetime import date
 from decimal import Decimal
 from typing import TYPE_CHECKING, Optional
 from uuid import UUID
 
-from sqlalchemy import DECIMAL, BigInteger, Date, ForeignKey, String
+from sqlalchemy import DECIMAL, BigInteger, Date, ForeignKey, Index, String, event
 from sqlalchemy.dialects.postgresql import UUID as PGUUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.model import BaseModel
+from app.security.prices.partitions import create_partition_support
 
 if TYPE_CHECKING:
     from app.security.master.model import Security
@@ -20,20 +22,30 @@ class SecurityPrice(BaseModel):
     Time series price data essential for account valuation,
     performance calculation, and market analytics. Supports
     both end-of-day and intraday pricing models.
+
+    The table is range-partitioned by price_date (one partition per year),
+    so the primary key is (security_id, price_date) and `id` is a plain
+    surrogate column.
     """
 
     __tablename__ = "security_prices"
 
+    id: Mapped[uuid.UUID] = mapped_column(
+        PGUUID(as_uuid=True),
+        default=uuid.uuid4,
+        nullable=False,
+        comment="Surrogate identifier for the record",
+    )
+
     security_id: Mapped[UUID] = mapped_column(
         PGUUID(as_uuid=True),
         ForeignKey("security_master.id", ondelete="CASCADE"),
-        nullable=False,
-        index=True,
+        primary_key=True,
         comment="Reference to the security being priced",
     )
 
     price_date: Mapped[date] = mapped_column(
-        Date, nullable=False, index=True, comment="Date for this price observation"
+        Date, primary_key=True, comment="Date for this price observation (partition key)"
     )
 
     close_price: Mapped[Decimal] = mapped_column(
@@ -51,5 +63,15 @@ class SecurityPrice(BaseModel):
     # Relationships
     security_master: Mapped["Security"] = relationship("Security", back_populates="security_prices")
 
-    # Composite unique constraint on security_id + price_date
-    __table_args__ = ({"comment": "Daily market prices for account valuation"},)
+    __table_args__ = (
+        # Cross-security reads of one date (market summary, screens); backfills
+        # insert whole histories out of date order, so this is a b-tree, not BRIN
+        Index("idx_security_prices_date", "price_date"),
+        {
+            "postgresql_partition_by": "RANGE (price_date)",
+            "comment": "Daily market prices for account valuation, partitioned by year",
+        },
+    )
+
+
+event.listen(SecurityPrice.__table__, "after_create", create_partition_support)
@@ -0,0 +1,349 @@
+"""
+Scheduled market data refresh and enrichment.
+
+Usage:
+    python -m app.security.prices.orchestrator
+
+A scheduler periodically enqueues price refreshes for securities with stale
+prices and enrichments for securities missing reference data, requeues jobs
+lost with a crashed worker, and refreshes the FX rates of the currencies in
+use. A pool of async workers drains the queue with per-provider concurrency
+caps, records each outcome on the security's SecurityProvider row and keeps
+throughput metrics that outlive the individual MarketDataService instances.
+
+MarketDataService still does some synchronous database work on the event
+loop, so the orchestrator runs as its own process rather than inside the API.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import Counter, deque
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, SessionLocal
+from app.core.redis import redis_client
+from app.integrations.provider_router import normalize_provider
+from app.reference.market_rates.service import FxRateService
+from app.security.master.model import Security
+from app.security.prices.enums import MarketDataJobType
+from app.security.prices.jobs import MarketDataJob, MarketDataJobQueue
+from app.security.prices.repository import market_data_crud
+from app.security.prices.service import MarketDataService
+from app.security.providers.model import SecurityProvider
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROVIDER = "yfinance"
+MANUAL_PROVIDER = "manual"
+
+THROUGHPUT_WINDOW_SECONDS = 300
+METRICS_KEY = "market_data_jobs:metrics"
+
+
+class OrchestratorMetrics:
+    """Process-wide job counters and throughput."""
+
+    def __init__(self):
+        self.counters: Counter = Counter()
+        self.sources: Counter = Counter()
+        self.service_stats: Counter = Counter()
+        self.total_seconds = 0.0
+        self._completed_at: deque = deque()
+
+    def record(self, job: MarketDataJob, success: bool, source: str, seconds: float) -> None:
+        self.counters[f"{job.job_type.value}_{'succeeded' if success else 'failed'}"] += 1
+        self.sources[source] += 1
+        self.total_seconds += seconds
+
+        now = time.monotonic()
+        self._completed_at.append(now)
+        while self._completed_at and now - self._completed_at[0] > THROUGHPUT_WINDOW_SECONDS:
+            self._completed_at.popleft()
+
+    def merge_service_stats(self, stats: Dict[str, Any]) -> None:
+        self.service_stats.update(
+            {key: value for key, value in stats.items() if isinstance(value, int)}
+        )
+
+    def as_dict(self) -> Dict[str, Any]:
+        completed = sum(
+            count
+            for key, count in self.counters.items()
+            if key.endswith("_succeeded") or key.endswith("_failed")
+        )
+        return {
+            **self.counters,
+            "completed": completed,
+            "jobs_per_minute": round(
+                len(self._completed_at) * 60 / THROUGHPUT_WINDOW_SECONDS, 2
+            ),
+            "avg_job_seconds": round(self.total_seconds / completed, 3) if completed else 0.0,
+            "sources": dict(self.sources),
+            "provider_calls": dict(self.service_stats),
+        }
+
+
+class MarketDataOrchestrator:
+    """Schedules market data jobs and runs the worker pool."""
+
+    def __init__(
+        self,
+        queue: Optional[MarketDataJobQueue] = None,
+        workers: Optional[int] = None,
+        provider_concurrency: Optional[Dict[str, int]] = None,
+    ):
+        self.queue = queue or MarketDataJobQueue()
+        self.workers = workers or settings.MARKET_DATA_WORKERS
+        self.metrics = OrchestratorMetrics()
+
+        concurrency = provider_concurrency or {
+            "yfinance": settings.MARKET_DATA_YFINANCE_CONCURRENCY,
+            "alphavantage": settings.MARKET_DATA_ALPHAVANTAGE_CONCURRENCY,
+        }
+        self._provider_slots = {
+            provider: asyncio.Semaphore(limit) for provider, limit in concurrency.items()
+        }
+        self._tasks: List[asyncio.Task] = []
+
+    # --- Scheduling ---
+
+    def enqueue(
+        self, job_type: MarketDataJobType, security_ids: List[str], force: bool = False
+    ) -> int:
+        """Enqueue jobs, skipping securities already queued or in flight."""
+        added = 0
+        for security_id in security_ids:
+            if self.queue.enqueue(MarketDataJob(job_type, str(security_id), force)):
+                added += 1
+        self.metrics.counters[f"{job_type.value}_enqueued"] += added
+        self.metrics.counters["deduplicated"] += len(security_ids) - added
+        return added
+
+    def schedule_due(self, batch_size: Optional[int] = None) -> Dict[str, int]:
+        """Enqueue stale price refreshes and missing enrichments; returns counts added."""
+        batch_size = batch_size or settings.MARKET_DATA_SCHEDULE_BATCH
+        with SessionLocal() as db:
+            stale = market_data_crud.get_securities_needing_update(db, limit=batch_size)
+            unenriched = self._securities_needing_enrichment(db, batch_size)
+            manual = self._manual_security_ids(db, stale + unenriched)
+
+        scheduled = {
+            MarketDataJobType.REFRESH_PRICES.value: self.enqueue(
+                MarketDataJobType.REFRESH_PRICES, [s for s in stale if s not in manual]
+            ),
+            MarketDataJobType.ENRICH.value: self.enqueue(
+                MarketDataJobType.ENRICH, [s for s in unenriched if s not in manual]
+            ),
+        }
+        logger.info(f"Scheduled market data jobs: {scheduled}")
+        return scheduled
+
+    @staticmethod
+    def _securities_needing_enrichment(db: Session, limit: int) -> List[str]:
+        stmt = (
+            select(Security.id)
+            .where(
+                Security.deleted_at.is_(None),
+                Security.symbol.is_not(None),
+                or_(Security.sector.is_(None), Security.industry.is_(None)),
+            )
+            .limit(limit)
+        )
+        return [str(security_id) for security_id in db.execute(stmt).scalars().all()]
+
+    @staticmethod
+    def _manual_security_ids(db: Session, security_ids: List[str]) -> set:
+        if not security_ids:
+            return set()
+        stmt = select(SecurityProvider.security_id).where(
+            SecurityProvider.security_id.in_(security_ids),
+            SecurityProvider.provider_name == MANUAL_PROVIDER,
+        )
+        return {str(security_id) for security_id in db.execute(stmt).scalars().all()}
+
+    # --- Workers ---
+
+    def start(self) -> None:
+        """Start the worker pool and the periodic scheduler on the running loop."""
+        if self._tasks:
+            return
+        self._tasks = [
+            asyncio.create_task(self._worker(n), name=f"market-data-worker-{n}")
+            for n in range(self.workers)
+        ]
+        self._tasks.append(asyncio.create_task(self._scheduler(), name="market-data-scheduler"))
+        self._tasks.append(asyncio.create_task(self._fx_scheduler(), name="fx-rate-scheduler"))
+        logger.info(f"Market data orchestrator started with {self.workers} workers")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def run_forever(self) -> None:
+        self.start()
+        try:
+            await asyncio.gather(*self._tasks)
+        finally:
+            await self.stop()
+
+    async def _scheduler(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.queue.requeue_stalled)
+                await asyncio.to_thread(self.schedule_due)
+            except Exception as e:
+                logger.error(f"Market data scheduling failed: {str(e)}")
+            await asyncio.sleep(settings.MARKET_DATA_SCHEDULE_SECONDS)
+
+    async def _fx_scheduler(self) -> None:
+        while True:
+            try:
+                async with AsyncSessionLocal() as session:
+                    stored = await FxRateService(session).refresh_rates_in_use()
+                self.metrics.counters["fx_rates_stored"] += stored
+            except Exception as e:
+                logger.error(f"FX rate refresh failed: {str(e)}")
+            await asyncio.sleep(settings.FX_REFRESH_SECONDS)
+
+    async def _worker(self, number: int) -> None:
+        while True:
+            job = await self.queue.dequeue()
+            if job is None:
+                continue
+            try:
+                await self.process(job)
+            except Exception as e:
+                logger.error(f"Worker {number} failed on {job.key}: {str(e)}")
+            finally:
+                self.queue.complete(job)
+
+    async def process(self, job: MarketDataJob) -> bool:
+        """Run one job under its provider's concurrency cap and record the outcome."""
+        started = time.monotonic()
+        with SessionLocal() as db:
+            claimed = await asyncio.to_thread(self._claim, db, job)
+            if claimed is None:
+                self.metrics.counters["skipped"] += 1
+                return False
+            security, provider = claimed
+
+            service = MarketDataService(db)
+            async with self._provider_slots[provider]:
+                try:
+                    if job.job_type == MarketDataJobType.REFRESH_PRICES:
+                        success, source = await service.update_market_data(
+                            job.security_id, force_refresh=job.force
+                        )
+                    else:
+                        success, source = await service.enrich_security_data(
+                            security, force_refresh=job.force
+                        )
+                    error = None if success else f"{job.job_type.value} failed ({source})"
+                except Exception as e:
+                    await asyncio.to_thread(db.rollback)
+                    success, source, error = False, "failed", str(e)
+
+            await asyncio.to_thread(
+                self._record_sync,
+                db,
+                job.security_id,
+                provider,
+                "success" if success else "error",
+                error,
+            )
+
+        self.metrics.merge_service_stats(service.get_stats())
+        self.metrics.record(job, success, source, time.monotonic() - started)
+        self._publish_metrics()
+        return success
+
+    def _claim(self, db: Session, job: MarketDataJob) -> Optional[Tuple[Security, str]]:
+        """Load the job's security and mark its sync in progress; None if it is gone."""
+        security = db.get(Security, job.security_id)
+        if security is None or security.deleted_at is not None:
+            return None
+
+        provider = (
+            normalize_provider(
+                security.security_provider.provider_name if security.security_provider else None
+            )
+            or DEFAULT_PROVIDER
+        )
+        self._record_sync(db, job.security_id, provider, "in_progress")
+        return security, provider
+
+    @staticmethod
+    def _record_sync(
+        db: Session,
+        security_id: str,
+        provider: str,
+        status: str,
+        error: Optional[str] = None,
+    ) -> None:
+        """Upsert sync progress on the security's SecurityProvider row."""
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        values: Dict[str, Any] = {"last_sync_status": status}
+        if status == "success":
+            values["last_sync_at"] = now
+        elif status == "error":
+            values.update(last_error_message=error, last_error_at=now)
+
+        stmt = pg_insert(SecurityProvider).values(
+            security_id=security_id,
+            provider_name=provider,
+            **values,
+        )
+        db.execute(stmt.on_conflict_do_update(index_elements=["security_id"], set_=values))
+        db.commit()
+
+    def _publish_metrics(self) -> None:
+        """Share a snapshot so the API and other processes can read it."""
+        if redis_client.is_available():
+            redis_client.setex(METRICS_KEY, 24 * 3600, json.dumps(self.get_metrics()))
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {**self.metrics.as_dict(), "queue": self.queue.get_stats()}
+
+
+_orchestrator: Optional[MarketDataOrchestrator] = None
+
+
+def get_market_data_orchestrator() -> MarketDataOrchestrator:
+    """Process-wide MarketDataOrchestrator."""
+    global _orchestrator
+    if _orchestrator is None:
+        _orchestrator = MarketDataOrchestrator()
+    return _orchestrator
+
+
+def get_published_metrics() -> Optional[Dict[str, Any]]:
+    """Latest metrics snapshot published by any orchestrator process."""
+    if _orchestrator is not None:
+        return _orchestrator.get_metrics()
+    raw = redis_client.get(METRICS_KEY) if redis_client.is_available() else None
+    return json.loads(raw) if raw else None
+
+
+async def run_orchestrator() -> None:
+    """Main entry point for a standalone worker process."""
+    await get_market_data_orchestrator().run_forever()
+
+
+if __name__ == "__main__":
+    # Configure logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+
+    asyncio.run(run_orchestrator())
@@ -0,0 +1,161 @@
+"""
+Partition management for the security_prices table.
+
+security_prices is range-partitioned by price_date with one partition per
+calendar year (see alembic/003_partition_security_prices.sql). Partitions are
+created on demand before prices are written, and retention drops whole
+partitions rather than deleting rows. Databases built with
+Base.metadata.create_all get the partition function and a default partition
+when the table is created.
+"""
+
+import logging
+import re
+from datetime import date
+from typing import Any, Dict, Iterable, List, NamedTuple, Set
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "security_prices"
+PARTITION_NAME_PATTERN = re.compile(r"^security_prices_y(\d{4})$")
+
+# Session.info key collecting years whose partition was ensured in the transaction
+_ENSURED_YEARS = "security_prices_partition_years"
+
+# Same function as alembic/003_partition_security_prices.sql
+ENSURE_PARTITION_FUNCTION = """
+CREATE OR REPLACE FUNCTION ensure_security_prices_partition(p_date DATE)
+RETURNS TEXT AS $$
+DECLARE
+    v_year           INTEGER := EXTRACT(YEAR FROM p_date)::INTEGER;
+    v_partition_name TEXT    := format('security_prices_y%s', v_year);
+BEGIN
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF security_prices FOR VALUES FROM (%L) TO (%L)',
+        v_partition_name,
+        make_date(v_year, 1, 1),
+        make_date(v_year + 1, 1, 1)
+    );
+    RETURN v_partition_name;
+END;
+$$
+LANGUAGE plpgsql
+"""
+
+# Catches rows written without ensure_partitions() instead of failing the insert
+DEFAULT_PARTITION = (
+    f"CREATE TABLE IF NOT EXISTS {PARENT_TABLE}_default PARTITION OF {PARENT_TABLE} DEFAULT"
+)
+
+
+class PricePartition(NamedTuple):
+    """One yearly partition of security_prices"""
+
+    name: str
+    start_date: date  # Inclusive
+    end_date: date  # Exclusive
+
+
+class PricePartitionManager:
+    """Creates, lists and drops yearly security_prices partitions."""
+
+    def __init__(self):
+        # Years known to have a partition in this process
+        self._known_years: Set[int] = set()
+
+    def ensure_partitions(self, db: Session, dates: Iterable[date]) -> int:
+        """
+        Make sure a partition exists for every year in `dates`.
+
+        The partitions are created in the caller's transaction, so the years
+        are only remembered once it commits. Returns the number of years that
+        had to be checked against the database.
+        """
+        pending = db.info.setdefault(_ENSURED_YEARS, set())
+        missing = sorted({d.year for d in dates} - self._known_years - pending)
+        for year in missing:
+            db.execute(
+                text("SELECT ensure_security_prices_partition(:partition_date)"),
+                {"partition_date": date(year, 1, 1)},
+            )
+            pending.add(year)
+
+        if missing:
+            logger.debug(f"Ensured security_prices partitions for {missing}")
+        return len(missing)
+
+    def list_partitions(self, db: Session) -> List[PricePartition]:
+        """List yearly partitions ordered by date."""
+        result = db.execute(
+            text(
+                """
+                SELECT child.relname AS name
+                FROM pg_inherits
+                JOIN pg_class parent ON pg_inherits.inhparent = parent.oid
+                JOIN pg_class child ON pg_inherits.inhrelid = child.oid
+                WHERE parent.relname = :parent_table
+                """
+            ),
+            {"parent_table": PARENT_TABLE},
+        )
+
+        partitions = []
+        for row in result:
+            match = PARTITION_NAME_PATTERN.match(row.name)
+            if match:
+                year = int(match.group(1))
+                partitions.append(PricePartition(row.name, date(year, 1, 1), date(year + 1, 1, 1)))
+
+        return sorted(partitions, key=lambda p: p.start_date)
+
+    def drop_partitions_before(self, db: Session, cutoff_date: date) -> Dict[str, int]:
+        """
+        Drop every partition that lies entirely before `cutoff_date`.
+
+        Returns the rows removed per dropped partition. The partition
+        containing the cutoff itself is kept, so up to one year of extra
+        history may be retained.
+        """
+        dropped: Dict[str, int] = {}
+        for partition in self.list_partitions(db):
+            if partition.end_date > cutoff_date:
+                continue
+
+            # Detach first so concurrent readers never see a half-dropped table
+            db.execute(text(f'ALTER TABLE {PARENT_TABLE} DETACH PARTITION "{partition.name}"'))
+            rows = db.execute(text(f'SELECT count(*) FROM "{partition.name}"')).scalar_one()
+            db.execute(text(f'DROP TABLE "{partition.name}"'))
+            self._known_years.discard(partition.start_date.year)
+            dropped[partition.name] = rows
+
+        if dropped:
+            db.commit()
+            logger.info(
+                "Dropped security_prices partitions: "
+                + ", ".join(f"{name} ({rows} rows)" for name, rows in dropped.items())
+            )
+        return dropped
+
+
+# Create instance
+price_partition_manager = PricePartitionManager()
+
+
+@event.listens_for(Session, "after_commit")
+def _remember_ensured_years(session: Session) -> None:
+    price_partition_manager._known_years.update(session.info.pop(_ENSURED_YEARS, ()))
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_ensured_years(session: Session) -> None:
+    # The CREATE TABLE ... PARTITION OF statements were rolled back too
+    session.info.pop(_ENSURED_YEARS, None)
+
+
+def create_partition_support(table: Any, connection: Any, **kw: Any) -> None:
+    """after_create hook of security_prices for schemas built without the migrations."""
+    connection.exec_driver_sql(ENSURE_PARTITION_FUNCTION)
+    connection.exec_driver_sql(DEFAULT_PARTITION)
@@ -0,0 +1,137 @@
+"""
+Incremental price refresh planning.
+
+Looks up each security's last stored price date in a single grouped query and
+works out the smallest window of history that has to be fetched from a
+provider to bring it up to date.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.security.master.model import Security
+from app.security.prices.enums import RefreshBucket
+from app.security.prices.repository import market_data_crud
+
+logger = logging.getLogger(__name__)
+
+# Gaps up to this many sessions are fetched by start date
+INCREMENTAL_MAX_SESSIONS = 5
+# Alpha Vantage "compact" output covers the latest 100 sessions
+COMPACT_MAX_SESSIONS = 100
+
+
+def last_trading_day(as_of: Optional[date] = None) -> date:
+    """Most recent weekday on or before the given date (holidays are not modelled)."""
+    day = as_of or date.today()
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return day
+
+
+def missing_sessions(last_price_date: date, as_of: date) -> int:
+    """Number of weekday sessions after last_price_date up to and including as_of."""
+    if last_price_date >= as_of:
+        return 0
+    return int(np.busday_count(last_price_date + timedelta(days=1), as_of + timedelta(days=1)))
+
+
+class RefreshPlan(NamedTuple):
+    """What to fetch for one securities"""
+
+    security_id: str
+    symbol: Optional[str]
+    last_price_date: Optional[date]
+    start_date: Optional[date]  # First missing date; None when fetching full history
+    missing_sessions: Optional[int]
+    bucket: RefreshBucket
+    force_refresh: bool = False  # Refetch from the last stored date and overwrite it
+
+    @property
+    def alphavantage_outputsize(self) -> str:
+        """Smallest Alpha Vantage output size that covers the gap."""
+        return "full" if self.bucket == RefreshBucket.FULL else "compact"
+
+    @property
+    def store_after(self) -> Optional[date]:
+        """Rows dated after this are stored; None stores (and overwrites) the whole window."""
+        return None if self.force_refresh else self.last_price_date
+
+
+class PriceRefreshPlanner:
+    """Buckets securities by the size of the gap in their stored price history."""
+
+    def __init__(
+        self,
+        incremental_max_sessions: int = INCREMENTAL_MAX_SESSIONS,
+        compact_max_sessions: int = COMPACT_MAX_SESSIONS,
+    ):
+        self.incremental_max_sessions = incremental_max_sessions
+        self.compact_max_sessions = compact_max_sessions
+
+    def plan(
+        self, db: Session, securities: Iterable[Security], *, as_of: Optional[date] = None
+    ) -> List[RefreshPlan]:
+        """Build refresh plans for the given securities."""
+        securities = list(securities)
+        if not securities:
+            return []
+
+        target = last_trading_day(as_of)
+        last_dates = market_data_crud.get_last_price_dates(
+            db, security_ids=[str(s.id) for s in securities]
+        )
+
+        return [
+            self.plan_one(
+                str(security.id),
+                security.symbol,
+                last_dates.get(str(security.id)),
+                as_of=target,
+            )
+            for security in securities
+        ]
+
+    def plan_one(
+        self,
+        security_id: str,
+        symbol: Optional[str],
+        last_price_date: Optional[date],
+        *,
+        as_of: Optional[date] = None,
+    ) -> RefreshPlan:
+        """Build the refresh plan for one securities from its last stored price date."""
+        target = last_trading_day(as_of)
+
+        if last_price_date is None:
+            return RefreshPlan(security_id, symbol, None, None, None, RefreshBucket.FULL)
+
+        gap = missing_sessions(last_price_date, target)
+        if gap == 0:
+            bucket = RefreshBucket.UP_TO_DATE
+        elif gap <= self.incremental_max_sessions:
+            bucket = RefreshBucket.INCREMENTAL
+        elif gap <= self.compact_max_sessions:
+            bucket = RefreshBucket.COMPACT
+        else:
+            bucket = RefreshBucket.FULL
+
+        start_date = last_price_date + timedelta(days=1) if gap else None
+        return RefreshPlan(security_id, symbol, last_price_date, start_date, gap, bucket)
+
+    @staticmethod
+    def group_by_bucket(plans: Iterable[RefreshPlan]) -> Dict[RefreshBucket, List[RefreshPlan]]:
+        """Group plans by bucket, e.g. to log or dispatch them per provider."""
+        grouped: Dict[RefreshBucket, List[RefreshPlan]] = defaultdict(list)
+        for plan in plans:
+            grouped[plan.bucket].append(plan)
+        return dict(grouped)
+
+
+# Create instance
+price_refresh_planner = PriceRefreshPlanner()
@@ -1,16 +1,32 @@
 from datetime import date, timedelta
+from decimal import Decimal
 from typing import Any, Dict, List, Optional
 
-from sqlalchemy import and_, desc, func
+from sqlalchemy import and_, desc, func, or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 
 from app.core.repository import BaseRepository
+from app.security.actions.adjustments import corporate_action_adjuster
 from app.security.master.model import Security
+from app.security.prices.market_summary import get_market_summary
 from app.security.prices.model import SecurityPrice
+from app.security.prices.partitions import price_partition_manager
 from app.security.prices.schemas import (
     MarketDataCreate,
     MarketDataUpdate,
 )
+from app.security.returns.calculations import (
+    TRAILING_PERIODS,
+    VOLATILITY_WINDOWS,
+    annualized_volatility,
+    trailing_returns,
+)
+from app.security.returns.model import SecurityReturnSummary
+
+
+def _optional_float(value: Optional[Decimal]) -> Optional[float]:
+    return float(value) if value is not None else None
 
 
 class MarketDataRepository(BaseRepository[SecurityPrice, MarketDataCreate, MarketDataUpdate]):
@@ -38,7 +54,7 @@ class MarketDataRepository(BaseRepository[SecurityPrice, MarketDataCreate, Marke
             query = query.limit(limit)
         return query.scalars().all()
 
-    def get_latest_price(self, db: Session, *, security_id: str) -> Optional[MarketData]:
+    def get_latest_price(self, db: Session, *, security_id: str) -> Optional[SecurityPrice]:
         """Get the latest price for a securities."""
         return (
             db.query(SecurityPrice)
@@ -115,177 +131,149 @@ class MarketDataRepository(BaseRepository[SecurityPrice, MarketDataCreate, Marke
         start_date = date.today() - timedelta(days=days)
         return self.get_by_security(db, security_id=security_id, start_date=start_date)
 
+    def get_return_summary(
+        self, db: Session, *, security_id: str
+    ) -> Optional[SecurityReturnSummary]:
+        """Get the materialized return summary for a securities."""
+        stmt = select(SecurityReturnSummary).where(
+            SecurityReturnSummary.security_id == security_id
+        )
+        return db.execute(stmt).scalar_one_or_none()
+
     def calculate_returns(
         self, db: Session, *, security_id: str, periods: Optional[List[int]] = None
     ) -> Dict[str, Optional[float]]:
-        """Calculate returns for various periods."""
+        """
+        Split- and dividend-adjusted returns for various periods, as of the last price date.
+
+        Served from the materialized summary when it holds every requested
+        period; otherwise computed from the adjusted price history.
+        """
         if periods is None:
-            periods = [1, 7, 30, 90, 365]
-        current_price = self.get_latest_price(db, security_id=security_id)
-        if not current_price:
+            periods = list(TRAILING_PERIODS)
+
+        if set(periods) <= set(TRAILING_PERIODS):
+            summary = self.get_return_summary(db, security_id=security_id)
+            if summary is not None:
+                return {
+                    f"return_{p}d": _optional_float(getattr(summary, f"return_{p}d"))
+                    for p in periods
+                }
+
+        prices = corporate_action_adjuster.get_adjusted_prices(
+            db, security_id, start_date=date.today() - timedelta(days=max(periods) + 7)
+        )
+        if prices.empty:
             return {f"return_{p}d": None for p in periods}
 
-        returns = {}
-        current_close = float(current_price.close_price)
-
-        for period in periods:
-            historical_date = date.today() - timedelta(days=period)
-            historical_price = self.get_price_on_date(
-                db, security_id=security_id, target_date=historical_date
-            )
-
-            if historical_price:
-                historical_close = float(historical_price.close_price)
-                if historical_close > 0:
-                    return_pct = ((current_close - historical_close) / historical_close) * 100
-                    returns[f"return_{period}d"] = return_pct
-                else:
-                    returns[f"return_{period}d"] = None
-            else:
-                returns[f"return_{period}d"] = None
-
-        return returns
+        returns = trailing_returns(prices["adjusted_close"], periods)
+        return {f"return_{p}d": r for p, r in returns.items()}
 
     def get_volatility(self, db: Session, *, security_id: str, days: int = 30) -> Optional[float]:
-        """Calculate volatility over the specified period."""
-        price_data = self.get_price_history(db, security_id=security_id, days=days)
-
-        if len(price_data) < 2:
+        """Annualized volatility (%) of adjusted daily returns over the specified period."""
+        if days in VOLATILITY_WINDOWS:
+            summary = self.get_return_summary(db, security_id=security_id)
+            if summary is not None:
+                return _optional_float(getattr(summary, f"volatility_{days}d"))
+
+        prices = corporate_action_adjuster.get_adjusted_prices(
+            db, security_id, start_date=date.today() - timedelta(days=days)
+        )
+        if prices.empty:
             return None
+        return annualized_volatility(prices["adjusted_close"], [days])[days]
 
-        # Calculate daily returns
-        returns = []
-        for i in range(1, len(price_data)):
-            prev_price = float(price_data[i].close_price)
-            curr_price = float(price_data[i - 1].close_price)  # Note: data is in desc order
+    def get_last_price_dates(
+        self, db: Session, *, security_ids: Optional[List[str]] = None
+    ) -> Dict[str, date]:
+        """
+        Get the last stored price date per securities in one grouped query.
 
-            if prev_price > 0:
-                daily_return = (curr_price - prev_price) / prev_price
-                returns.append(daily_return)
+        Securities without any stored prices are absent from the result.
+        """
+        stmt = select(
+            SecurityPrice.security_id,
+            func.max(SecurityPrice.price_date).label("last_price_date"),
+        ).group_by(SecurityPrice.security_id)
 
-        if not returns:
-            return None
+        if security_ids is not None:
+            stmt = stmt.where(SecurityPrice.security_id.in_(security_ids))
 
-        # Calculate standard deviation and annualize
-        import math
-        import statistics
-
-        volatility = statistics.stdev(returns) * math.sqrt(252)  # Annualized
-        return volatility * 100  # Convert to percentage
+        result = db.execute(stmt)
+        return {str(row.security_id): row.last_price_date for row in result}
 
     def get_securities_needing_update(
         self, db: Session, *, max_age_days: int = 1, limit: int = 100
     ) -> List[str]:
         """Get securities IDs that need market data updates."""
         cutoff_date = date.today() - timedelta(days=max_age_days)
-
-        # Get securities with old or missing data
-        subquery = (
-            db.query(SecurityPrice.security_id)
-            .filter(SecurityPrice.price_date >= cutoff_date)
-            .subquery()
-        )
-
-        securities_needing_update = (
-            db.query(Security.id)
-            .filter(and_(Security.is_active, ~Security.id.in_(subquery)))
+        last_price_date = func.max(SecurityPrice.price_date)
+
+        # Securities with old or missing data; grouped join instead of NOT IN
+        stmt = (
+            select(Security.id)
+            .outerjoin(SecurityPrice, SecurityPrice.security_id == Security.id)
+            .where(Security.deleted_at.is_(None))
+            .group_by(Security.id)
+            .having(or_(last_price_date.is_(None), last_price_date < cutoff_date))
+            .order_by(last_price_date.asc().nulls_first())
             .limit(limit)
-            .all()
         )
 
-        return [str(s.id) for s in securities_needing_update]
+        result = db.execute(stmt)
+        return [str(security_id) for security_id in result.scalars().all()]
 
     def bulk_create_or_update(
         self, db: Session, *, market_data_list: List[Dict[str, Any]]
     ) -> List[SecurityPrice]:
-        """Bulk create or update market data records."""
-        created_records = []
-
-        for data in market_data_list:
-            try:
-                # Check if record exists
-                existing = (
-                    db.query(SecurityPrice)
-                    .filter(
-                        and_(
-                            SecurityPrice.security_id == data["security_id"],
-                            SecurityPrice.price_date == data["price_date"],
-                        )
-                    )
-                    .first()
-                )
+        """Bulk upsert market data records on (security_id, price_date)."""
+        if not market_data_list:
+            return []
 
-                if existing:
-                    # Update existing record
-                    for key, value in data.items():
-                        if key not in ["id", "security_id", "price_date", "created_at"]:
-                            setattr(existing, key, value)
-                    db.add(existing)
-                    created_records.append(existing)
-                else:
-                    # Create new record
-                    record = self.create_from_dict(db, obj_in=data)
-                    created_records.append(record)
+        price_partition_manager.ensure_partitions(
+            db, (data["price_date"] for data in market_data_list)
+        )
 
-            except Exception as e:
-                print(f"Error processing market data: {e}")
-                continue
+        stmt = pg_insert(SecurityPrice).values(market_data_list)
+        update_columns = {
+            column: stmt.excluded[column]
+            for column in market_data_list[0]
+            if column not in ["id", "security_id", "price_date", "created_at"]
+        }
+        if update_columns:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[SecurityPrice.security_id, SecurityPrice.price_date],
+                set_=update_columns,
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(
+                index_elements=[SecurityPrice.security_id, SecurityPrice.price_date]
+            )
 
-        return created_records
+        result = db.scalars(stmt.returning(SecurityPrice))
+        return list(result.all())
 
     def get_market_summary(
         self, db: Session, *, target_date: Optional[date] = None
     ) -> Dict[str, Any]:
-        """Get market summary for a specific date."""
-        if not target_date:
-            target_date = date.today()
-
-        # Get all market data for the date
-        market_data = db.query(SecurityPrice).filter(SecurityPrice.price_date == target_date).all()
+        """
+        Get market summary for a specific date.
 
-        if not market_data:
-            return {"date": target_date, "message": "No market data available"}
-
-        total_securities = len(market_data)
-
-        # Calculate price changes (vs previous day)
-        previous_date = target_date - timedelta(days=1)
-        price_changes = []
-
-        for data in market_data:
-            prev_data = self.get_price_on_date(
-                db, security_id=data.security_id, target_date=previous_date
-            )
-
-            if prev_data:
-                current_price = float(data.close_price)
-                prev_price = float(prev_data.close_price)
-
-                if prev_price > 0:
-                    change_pct = ((current_price - prev_price) / prev_price) * 100
-                    price_changes.append(change_pct)
-
-        # Summary statistics
-        gainers = [c for c in price_changes if c > 0]
-        losers = [c for c in price_changes if c < 0]
-
-        return {
-            "date": target_date,
-            "total_securities": total_securities,
-            "securities_with_changes": len(price_changes),
-            "gainers": len(gainers),
-            "losers": len(losers),
-            "unchanged": total_securities - len(price_changes),
-            "avg_change": (sum(price_changes) / len(price_changes) if price_changes else 0),
-        }
+        Previous closes come from a LAG() window in the same query, and the
+        result is cached per trading date (see market_summary).
+        """
+        return get_market_summary(db, target_date)
 
     def delete_old_data(self, db: Session, *, older_than_days: int = 730) -> int:  # 2 years
-        """Delete market data older than specified days."""
+        """
+        Delete price history older than the cutoff by dropping whole yearly partitions.
+
+        Returns the number of rows deleted. Rows in the partition that contains
+        the cutoff are kept until that whole year ages out.
+        """
         cutoff_date = date.today() - timedelta(days=older_than_days)
+        return sum(price_partition_manager.drop_partitions_before(db, cutoff_date).values())
 
-        deleted_count = (
-            db.query(SecurityPrice).filter(SecurityPrice.price_date < cutoff_date).delete()
-        )
 
-        db.commit()
-        return deleted_count
+# Create instance
+market_data_crud = MarketDataRepository(SecurityPrice)
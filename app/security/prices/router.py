@@ -1,66 +1,231 @@
-from datetime import date, datetime, timezone
+from datetime import date
 from typing import Optional
 
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_db
+from app.core.pagination import decode_cursor, encode_cursor
+from app.reference.market_rates.service import FxRateService
+from app.security.master.model import Security
+from app.security.prices.enums import HistoryFormat, PriceInterval
+from app.security.prices.export import MEDIA_TYPES as EXPORT_MEDIA_TYPES
+from app.security.prices.export import (
+    ExportError,
+    PriceMatrixExporter,
+    export_available,
+    iter_matrix_bytes,
+)
+from app.security.prices.history import (
+    MEDIA_TYPES,
+    PriceHistoryService,
+    arrow_available,
+    stream_history,
+)
+from app.security.prices.market_summary import get_market_summary_async
+from app.security.prices.orchestrator import get_published_metrics
+from app.security.prices.schemas import PriceExportRequest
+from app.security.quotes.market_hours import market_hours
+from app.security.quotes.service import get_live_quote_service
 
 router = APIRouter()
 
+# Cache lifetimes for price history responses (seconds); past closes can still be
+# corrected or backfilled, so clients revalidate against the ETag afterwards
+CLOSED_MAX_AGE = 3600
+RECENT_MAX_AGE = 300
+
+
+@router.get("/market/summary")
+async def get_market_summary(
+    *,
+    db: AsyncSession = Depends(get_db),
+    target_date: Optional[date] = Query(None, description="Trading date (defaults to today)"),
+):
+    """
+    Get market breadth, top movers and sector/exchange breakdowns for a trading date.
+    """
+    return await get_market_summary_async(db, target_date)
+
+
+@router.get("/market-data/jobs/metrics")
+async def get_market_data_job_metrics():
+    """
+    Get queue depth and throughput of the market data refresh orchestrator.
+    """
+    metrics = get_published_metrics()
+    if metrics is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="No orchestrator metrics available"
+        )
+    return metrics
+
+
+@router.post("/prices/export")
+async def export_price_matrix(
+    *, db: AsyncSession = Depends(get_db), export_in: PriceExportRequest
+):
+    """
+    Export an aligned dates x symbols price or return matrix as Parquet or Arrow IPC.
+    """
+    if not export_available():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Parquet/Arrow export is not available on this server",
+        )
+    if export_in.end_date < export_in.start_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="end_date is before start_date"
+        )
+
+    try:
+        matrix = await PriceMatrixExporter(db).build_matrix(
+            export_in.symbols, export_in.start_date, export_in.end_date, export_in.matrix
+        )
+    except ExportError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+    filename = (
+        f"{export_in.matrix.value}_{export_in.start_date}_{export_in.end_date}"
+        f".{export_in.format.value}"
+    )
+    return StreamingResponse(
+        iter_matrix_bytes(matrix, export_in.format),
+        media_type=EXPORT_MEDIA_TYPES[export_in.format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
 
 @router.get("/securities/{symbol}/price")
 async def get_current_price(
-    *, symbol: str, currency: str = Query("USD", description="Target currency")
+    *,
+    db: AsyncSession = Depends(get_db),
+    symbol: str,
+    currency: str = Query("USD", description="Target currency"),
 ):
     """
-    Get current price for a securities.
+    Get current price for a securities from the live quote cache.
     """
+    security = await _get_security(db, symbol)
+
+    quote = await get_live_quote_service().get_quote(
+        security.symbol, currency=security.currency, exchange=security.exchange
+    )
+    if quote is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No live quote available for {security.symbol}",
+        )
+
+    rate = await FxRateService(db).get_rate(quote.currency, currency)
+    if rate is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No exchange rate available for {quote.currency}/{currency.upper()}",
+        )
+
+    await market_hours.ensure_loaded(db)
     return {
-        "symbol": symbol.upper(),
-        "current_price": 175.50,
-        "previous_close": 174.20,
-        "price_change": 1.30,
-        "price_change_percent": 0.75,
-        "currency": currency,
-        "last_updated": datetime.now(timezone.utc).isoformat(),
-        "volume": 45123000,
-        "market_status": "closed",
+        "symbol": security.symbol,
+        "current_price": quote.price * rate,
+        "previous_close": quote.previous_close * rate if quote.previous_close else None,
+        "price_change": quote.change * rate if quote.change is not None else None,
+        "price_change_percent": quote.change_percent,
+        "currency": currency.upper(),
+        "last_updated": quote.quoted_at,
+        "volume": quote.volume,
+        "market_status": market_hours.market_status(security.exchange),
     }
 
 
 @router.get("/securities/{symbol}/history")
 async def get_price_history(
     *,
+    db: AsyncSession = Depends(get_db),
+    request: Request,
     symbol: str,
     start_date: Optional[date] = Query(None, description="Start date"),
     end_date: Optional[date] = Query(None, description="End date"),
-    interval: str = Query("daily", description="Price interval (daily, weekly, monthly)"),
+    interval: PriceInterval = Query(PriceInterval.DAILY, description="Price interval"),
+    cursor: Optional[str] = Query(None, description="Cursor from a previous page"),
+    limit: int = Query(500, ge=1, le=5000, description="Bars per page"),
+    output_format: Optional[HistoryFormat] = Query(
+        None, alias="format", description="Stream the whole range as json, csv or arrow"
+    ),
 ):
     """
     Get historical price data for a securities.
+
+    Returns pages of bars by default; with `format` the whole range is streamed.
     """
-    return {
-        "symbol": symbol.upper(),
-        "interval": interval,
-        "start_date": start_date.isoformat() if start_date else "2024-01-01",
-        "end_date": end_date.isoformat() if end_date else "2024-12-31",
-        "data_points": 252,
-        "prices": [
-            {
-                "date": "2024-01-02",
-                "open": 185.64,
-                "high": 186.95,
-                "low": 185.00,
-                "close": 185.64,
-                "volume": 47471600,
-                "adjusted_close": 185.64,
-            },
-            {
-                "date": "2024-01-03",
-                "open": 184.35,
-                "high": 185.40,
-                "low": 182.13,
-                "close": 184.25,
-                "volume": 58414100,
-                "adjusted_close": 184.25,
-            },
-        ],
-    }
+    security = await _get_security(db, symbol)
+
+    after = None
+    if cursor and output_format is None:
+        try:
+            after = date.fromisoformat(decode_cursor(cursor)["after"])
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    if output_format == HistoryFormat.ARROW and not arrow_available():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Arrow output is not available on this server",
+        )
+
+    history = PriceHistoryService(db)
+    etag = await history.get_etag(
+        security.id,
+        start_date,
+        end_date,
+        interval.value,
+        output_format.value if output_format else None,
+        after,
+        limit,
+    )
+    # Bars for closed periods rarely change
+    max_age = CLOSED_MAX_AGE if end_date is not None and end_date < date.today() else RECENT_MAX_AGE
+    headers = {"Cache-Control": f"public, max-age={max_age}", "ETag": etag}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    if output_format is not None:
+        return StreamingResponse(
+            stream_history(security.id, interval, output_format, start_date, end_date),
+            media_type=MEDIA_TYPES[output_format],
+            headers=headers,
+        )
+
+    page = await history.get_page(
+        security.id, interval, start_date, end_date, after=after, limit=limit
+    )
+    next_after = page["next_after"]
+
+    return JSONResponse(
+        content={
+            "symbol": security.symbol,
+            "interval": interval.value,
+            "start_date": start_date.isoformat() if start_date else None,
+            "end_date": end_date.isoformat() if end_date else None,
+            "data_points": len(page["prices"]),
+            "prices": page["prices"],
+            "next_cursor": (
+                encode_cursor({"after": next_after.isoformat()}) if next_after else None
+            ),
+        },
+        headers=headers,
+    )
+
+
+async def _get_security(db: AsyncSession, symbol: str) -> Security:
+    result = await db.execute(
+        select(Security).where(Security.symbol == symbol.upper(), Security.deleted_at.is_(None))
+    )
+    security = result.scalars().first()
+    if security is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail=f"Security {symbol.upper()} not found"
+        )
+    return security
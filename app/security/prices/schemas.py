@@ -1,10 +1,12 @@
 from datetime import date, datetime
 from decimal import Decimal
-from typing import Optional
+from typing import List, Optional
 from uuid import UUID
 
 from pydantic import BaseModel, ConfigDict, Field
 
+from app.security.prices.enums import ExportFormat, ExportMatrix
+
 
 # --- DB-aligned Market Data Schemas ---
 class MarketDataBase(BaseModel):
@@ -40,3 +42,12 @@ class MarketDataResponse(MarketDataBase):
 
     id: UUID
     created_at: datetime
+
+
+# --- Export Schemas ---
+class PriceExportRequest(BaseModel):
+    symbols: List[str] = Field(..., min_length=1, max_length=10000)
+    start_date: date
+    end_date: date
+    matrix: ExportMatrix = ExportMatrix.PRICES
+    format: ExportFormat = ExportFormat.PARQUET
@@ -1,25 +1,43 @@
 import asyncio
 import logging
-from datetime import datetime, timedelta
+import time
+from datetime import date
 from typing import Any, Dict, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
-import yfinance as yf
 from sqlalchemy.orm import Session
 
 from app.integrations.alphavantage.service import MarketDataService as AlphaVantageService
+from app.integrations.cache import provider_cache
+from app.integrations.provider_router import normalize_provider, provider_router
+from app.integrations.yfinance.cache import ticker_cache
+from app.security.actions.adjustments import unadjust_splits
 from app.security.master.model import Security
 from app.security.master.repository import security_crud
 from app.security.master.schemas import SecurityCreate, SecurityUpdate
+from app.security.prices.enums import RefreshBucket
+from app.security.prices.latest import latest_price_cache
+from app.security.prices.market_summary import invalidate_summaries
 from app.security.prices.model import SecurityPrice
+from app.security.prices.partitions import price_partition_manager
+from app.security.prices.refresh import RefreshPlan, price_refresh_planner
+from app.security.prices.repository import market_data_crud
+from app.security.providers.model import SecurityProvider
+from app.security.quality.service import PriceQualityGate
 
 logger = logging.getLogger(__name__)
 
+# security_prices holds traded closes and adjusts on read (app.security.actions),
+# so yfinance must not adjust for dividends; its Close stays split-adjusted and
+# the "Stock Splits" column from actions=True lets _raw_closes undo that
+YFINANCE_HISTORY_ARGS = {"auto_adjust": False, "actions": True}
+
 
 class MarketDataService:
     """
-    Unified market data service that uses yfinance as primary source
-    and Alpha Vantage as fallback. Provides securities enrichment and market data updates.
+    Unified market data service that routes between yfinance and Alpha Vantage
+    by provider health. Provides securities enrichment and market data updates.
 
     This service coordinates between multiple data providers to ensure
     the best possible data quality and availability.
@@ -27,10 +45,8 @@ class MarketDataService:
 
     def __init__(self, db: Session):
         self.db = db
-        self.alpha_vantage_service = AlphaVantageService(db)
-
-        # Cache for yfinance ticker objects to avoid recreating
-        self._ticker_cache: Dict[str, yf.Ticker] = {}
+        self.quality_gate = PriceQualityGate()
+        self.alpha_vantage_service = AlphaVantageService(db, quality_gate=self.quality_gate)
 
         # Performance tracking
         self._stats = {
@@ -46,9 +62,8 @@ class MarketDataService:
         Search for a securities by symbol and create it if found.
 
         Priority:
-        1. yfinance lookup and creation
-        2. Alpha Vantage lookup and creation
-        3. Minimal securities creation
+        1. Healthy providers (yfinance, Alpha Vantage), best scoring first
+        2. Minimal securities creation
 
         Args:
             symbol: SecurityMaster symbol to search for
@@ -60,32 +75,20 @@ class MarketDataService:
         symbol = symbol.strip().upper()
         logger.info(f"Creating securities for symbol: {symbol}")
 
-        # Try yfinance first
-        try:
-            security, source = await self._create_security_from_yfinance(symbol)
-            if security:
-                self._stats["yfinance_success"] += 1
-                logger.info(f"Successfully created {symbol} using yfinance")
-                return security, source
-            else:
-                self._stats["yfinance_failed"] += 1
-        except Exception as e:
-            self._stats["yfinance_failed"] += 1
-            logger.warning(f"yfinance creation failed for {symbol}: {str(e)}")
+        creators = {
+            "yfinance": self._create_security_from_yfinance,
+            "alphavantage": self._create_security_from_alphavantage,
+        }
+        security_type = self._infer_category_from_symbol(symbol)
 
-        # Fallback to Alpha Vantage
-        try:
-            logger.info(f"Trying Alpha Vantage for {symbol}")
-            security, source = await self._create_security_from_alphavantage(symbol)
+        for provider in provider_router.order(security_type):
+            security, source = await self._call_provider(
+                provider, security_type, creators[provider], symbol
+            )
             if security:
-                self._stats["alphavantage_success"] += 1
-                logger.info(f"Successfully created {symbol} using Alpha Vantage")
+                logger.info(f"Successfully created {symbol} using {provider}")
+                self._remember_provider(security, provider)
                 return security, source
-            else:
-                self._stats["alphavantage_failed"] += 1
-        except Exception as e:
-            self._stats["alphavantage_failed"] += 1
-            logger.warning(f"Alpha Vantage creation failed for {symbol}: {str(e)}")
 
         # Last resort: create minimal securities
         try:
@@ -118,21 +121,18 @@ class MarketDataService:
             logger.debug(f"SecurityMaster {security.symbol} already has good data")
             return True, "cached"
 
-        # Try yfinance first
-        try:
-            success, source = await self._enrich_with_yfinance(security)
-            if success:
-                return True, source
-        except Exception as e:
-            logger.warning(f"yfinance enrichment failed for {security.symbol}: {e}")
-
-        # Fallback to Alpha Vantage
-        try:
-            success, source = await self._enrich_with_alphavantage(security)
+        enrichers = {
+            "yfinance": self._enrich_with_yfinance,
+            "alphavantage": self._enrich_with_alphavantage,
+        }
+        providers = provider_router.order(security.security_type, self._last_provider(security))
+        for provider in providers:
+            success, source = await self._call_provider(
+                provider, security.security_type, enrichers[provider], security
+            )
             if success:
+                self._remember_provider(security, provider)
                 return True, source
-        except Exception as e:
-            logger.warning(f"Alpha Vantage enrichment failed for {security.symbol}: {e}")
 
         return False, "failed"
 
@@ -142,9 +142,11 @@ class MarketDataService:
         """
         Update market data (prices, volumes) for a securities.
 
+        Only the sessions after the last stored price date are requested.
+
         Args:
             security_id: SecurityMaster ID to update
-            force_refresh: Force refresh even if recent data exists
+            force_refresh: Re-request from the last stored date even if up to date
 
         Returns:
             Tuple of (success: bool, source: str)
@@ -156,28 +158,133 @@ class MarketDataService:
             logger.error(f"SecurityMaster {security_id} not found")
             return False, "not_found"
 
-        # Check if we need to update (skip if recent data exists)
-        if not force_refresh and self._has_recent_market_data(security):
-            logger.debug(f"Recent market data exists for {security.symbol}")
-            return True, "cached"
+        plan = price_refresh_planner.plan(self.db, [security])[0]
+        return await self._refresh_security(security, plan, force_refresh=force_refresh)
 
-        # Try yfinance first
-        try:
-            success, source = await self._update_market_data_yfinance(security)
+    async def refresh_market_data(
+        self, security_ids: List[str], max_concurrent: int = 5
+    ) -> Dict[str, Tuple[bool, str]]:
+        """
+        Bring stored prices up to date for many securities.
+
+        Last stored dates for all securities are read in one grouped query,
+        securities already up to date are skipped, and the rest fetch only
+        their missing window.
+
+        Args:
+            security_ids: List of securities IDs to refresh
+            max_concurrent: Maximum concurrent operations
+
+        Returns:
+            Dict mapping security_id to (success, source) tuple
+        """
+
+        securities = self.db.query(Security).filter(Security.id.in_(security_ids)).all()
+        plans = price_refresh_planner.plan(self.db, securities)
+
+        grouped = price_refresh_planner.group_by_bucket(plans)
+        logger.info(
+            "Price refresh plan: "
+            + ", ".join(f"{bucket.value}={len(items)}" for bucket, items in grouped.items())
+        )
+
+        securities_by_id = {str(s.id): s for s in securities}
+        refresh_results: Dict[str, Tuple[bool, str]] = {
+            sid: (False, "not_found") for sid in security_ids if sid not in securities_by_id
+        }
+
+        semaphore = asyncio.Semaphore(max_concurrent)
+
+        async def refresh_with_semaphore(plan: RefreshPlan) -> Tuple[str, Tuple[bool, str]]:
+            async with semaphore:
+                security = securities_by_id[plan.security_id]
+                return plan.security_id, await self._refresh_security(security, plan)
+
+        results = await asyncio.gather(
+            *(refresh_with_semaphore(plan) for plan in plans), return_exceptions=True
+        )
+
+        for result in results:
+            if isinstance(result, tuple):
+                security_id, outcome = result
+                refresh_results[security_id] = outcome
+            else:
+                logger.error(f"Refresh task failed: {result}")
+
+        self.quality_gate.log_metrics("Price refresh")
+        return refresh_results
+
+    async def _refresh_security(
+        self, security: Security, plan: RefreshPlan, force_refresh: bool = False
+    ) -> Tuple[bool, str]:
+        """Fetch the window described by the plan, yfinance first then Alpha Vantage."""
+
+        if plan.bucket == RefreshBucket.UP_TO_DATE:
+            if not force_refresh:
+                logger.debug(f"Market data for {security.symbol} is up to date")
+                return True, "cached"
+            plan = plan._replace(start_date=plan.last_price_date, force_refresh=True)
+
+        refreshers = {
+            "yfinance": self._update_market_data_yfinance,
+            "alphavantage": self._update_market_data_alphavantage,
+        }
+        providers = provider_router.order(security.security_type, self._last_provider(security))
+        for provider in providers:
+            success, source = await self._call_provider(
+                provider, security.security_type, refreshers[provider], security, plan
+            )
             if success:
+                self._remember_provider(security, provider)
                 return True, source
-        except Exception as e:
-            logger.warning(f"yfinance market data update failed for {security.symbol}: {e}")
 
-        # Fallback to Alpha Vantage
+        return False, "failed"
+
+    async def _update_market_data_alphavantage(
+        self, security: Security, plan: RefreshPlan
+    ) -> Tuple[bool, str]:
+        success = await self.alpha_vantage_service.update_security_data(
+            str(security.id), plan=plan
+        )
+        return success, "alphavantage" if success else "alphavantage_error"
+
+    async def _call_provider(
+        self, provider: str, security_type: Optional[str], call: Any, *args: Any
+    ) -> Tuple[Any, str]:
+        """
+        Run one provider attempt and record its outcome with the provider router.
+
+        Exceptions and *_error sources count against the provider's health;
+        "not found"/"no data" answers do not, since the provider responded.
+        """
+        started = time.monotonic()
         try:
-            success = await self.alpha_vantage_service.update_security_data(
-                str(security_id), force_refresh
-            )
-            return success, "alphavantage" if success else "failed"
+            result, source = await call(*args)
+            healthy = not source.endswith("_error")
         except Exception as e:
-            logger.error(f"Alpha Vantage market data update failed for {security.symbol}: {e}")
-            return False, "failed"
+            logger.warning(f"{provider} call failed for {args[0]}: {str(e)}")
+            result, source, healthy = None, f"{provider}_error", False
+
+        provider_router.record(provider, security_type, healthy, time.monotonic() - started)
+        self._stats[f"{provider}_success" if result else f"{provider}_failed"] += 1
+        return result, source
+
+    @staticmethod
+    def _last_provider(security: Security) -> Optional[str]:
+        provider = security.security_provider
+        return provider.provider_name if provider is not None else None
+
+    def _remember_provider(self, security: Security, provider: str) -> None:
+        """Record on SecurityProvider which provider last served the security."""
+        current = security.security_provider
+        if current is None:
+            self.db.add(SecurityProvider(security_id=security.id, provider_name=provider))
+        elif normalize_provider(current.provider_name) not in (None, provider):
+            current.provider_name = provider
+        else:
+            # Manual/other providers, or already recorded
+            return
+        self.db.commit()
 
     async def bulk_enrich_securities(
         self, security_ids: List[str], max_concurrent: int = 5
@@ -226,15 +333,17 @@ class MarketDataService:
         """Create a new securities using yfinance data."""
 
         try:
-            ticker = self._get_ticker(symbol)
-
             # Get basic info
-            info = ticker.info
+            info = await self._get_ticker_info(symbol)
 
             if not info or not info.get("symbol") or info.get("symbol") == symbol:
                 # Sometimes yfinance returns the search symbol even when not found
-                # Double-check by trying to get some price data
-                hist = ticker.history(period="5d")
+                # Double-check by trying to get some price data. A new security
+                # has no stored prices, so the initial update requests the full
+                # history; probing with the same request lets it hit the cache.
+                hist = await self._get_ticker_history(
+                    symbol, period="max", **YFINANCE_HISTORY_ARGS
+                )
                 if hist.empty:
                     logger.debug(f"No yfinance data available for {symbol}")
                     return None, "yfinance_no_data"
@@ -264,8 +373,7 @@ class MarketDataService:
         """Enrich securities using yfinance data."""
 
         try:
-            ticker = self._get_ticker(security.symbol)
-            info = ticker.info
+            info = await self._get_ticker_info(security.symbol)
 
             if not info or not info.get("symbol"):
                 logger.debug(f"No yfinance info available for {security.symbol}")
@@ -289,70 +397,50 @@ class MarketDataService:
             logger.error(f"yfinance enrichment failed for {security.symbol}: {str(e)}")
             return False, "yfinance_error"
 
-    async def _update_market_data_yfinance(self, security: Security) -> Tuple[bool, str]:
-        """Update market data using yfinance."""
+    async def _update_market_data_yfinance(
+        self, security: Security, plan: Optional[RefreshPlan] = None
+    ) -> Tuple[bool, str]:
+        """Fetch the missing price window from yfinance and store the new sessions."""
 
         try:
-            ticker = self._get_ticker(security.symbol)
-
-            # Get recent price data (last 30 days to ensure we get some data)
-            hist = ticker.history(period="30d")
+            if plan is None:
+                plan = price_refresh_planner.plan(self.db, [security])[0]
+
+            if plan.start_date is not None:
+                hist = await self._get_ticker_history(
+                    security.symbol,
+                    refresh=plan.force_refresh,
+                    start=plan.start_date.isoformat(),
+                    **YFINANCE_HISTORY_ARGS,
+                )
+            else:
+                # No stored history yet: backfill everything available
+                hist = await self._get_ticker_history(
+                    security.symbol,
+                    refresh=plan.force_refresh,
+                    period="max",
+                    **YFINANCE_HISTORY_ARGS,
+                )
 
             if hist.empty:
                 logger.debug(f"No yfinance price data for {security.symbol}")
                 return False, "yfinance_no_data"
 
-            records_added = 0
-
-            # Process and store the price data
-            for date_index, row in hist.iterrows():
-                try:
-                    market_date = date_index.date()
-
-                    # Check if data already exists
-                    existing = (
-                        self.db.query(SecurityPrice)
-                        .filter(
-                            SecurityPrice.security_id == security.id,
-                            SecurityPrice.date == market_date,
-                        )
-                        .first()
-                    )
-
-                    if existing:
-                        continue
-
-                    # Validate data quality
-                    if pd.isna(row["Close"]) or row["Close"] <= 0:
-                        continue
-
-                    # Create new market data entry
-                    market_data = SecurityPrice(
-                        security_id=security.id,
-                        date=market_date,
-                        open=float(row["Open"]) if not pd.isna(row["Open"]) else None,
-                        high=float(row["High"]) if not pd.isna(row["High"]) else None,
-                        low=float(row["Low"]) if not pd.isna(row["Low"]) else None,
-                        close=float(row["Close"]),
-                        adjusted_close=float(
-                            row["Close"]
-                        ),  # yfinance already provides adjusted data
-                        volume=int(row["Volume"]) if not pd.isna(row["Volume"]) else 0,
-                        currency=security.currency or "USD",
-                        source="yfinance",
-                    )
-
-                    self.db.add(market_data)
-                    records_added += 1
-
-                except Exception as e:
-                    logger.warning(
-                        f"Failed to process market data for {security.symbol} on {date_index}: {e}"
-                    )
-                    continue
+            records_added = self._store_new_prices(
+                security,
+                dates=[ts.date() for ts in hist.index],
+                closes=self._raw_closes(hist),
+                volumes=hist["Volume"].tolist() if "Volume" in hist else None,
+                after=plan.store_after,
+                upsert=plan.force_refresh,
+                data_source="yfinance",
+            )
 
+            # Commit even when nothing was added so quarantined rows are kept
+            self.db.commit()
             if records_added > 0:
-                self.db.commit()
+                latest_price_cache.invalidate([security.id])
+                invalidate_summaries(ts.date() for ts in hist.index)
                 logger.info(
                     f"Added {records_added} market data records for {security.symbol} using yfinance"
                 )
@@ -365,6 +453,54 @@ class MarketDataService:
             logger.error(f"yfinance market data update failed for {security.symbol}: {str(e)}")
             return False, "yfinance_error"
 
+    def _store_new_prices(
+        self,
+        security: Security,
+        *,
+        dates: List[date],
+        closes: List[Any],
+        volumes: Optional[List[Any]],
+        after: Optional[date],
+        data_source: str,
+        upsert: bool = False,
+    ) -> int:
+        """
+        Add price rows dated after the last stored session; returns the number added.
+
+        Rows go through the quality gate first, which quarantines suspect ones.
+        With `upsert` (forced refreshes) stored rows on the same dates are overwritten.
+        """
+
+        prices = pd.DataFrame(
+            {
+                "price_date": dates,
+                "close_price": pd.to_numeric(pd.Series(closes), errors="coerce"),
+                "volume": volumes if volumes is not None else None,
+            }
+        )
+        accepted = self.quality_gate.screen(
+            self.db, security, prices, data_source=data_source, after=after
+        )
+
+        records = [
+            {
+                "security_id": security.id,
+                "price_date": row.price_date,
+                "close_price": float(row.close_price),
+                "volume": int(row.volume) if not pd.isna(row.volume) else None,
+                "data_source": data_source,
+            }
+            for row in accepted.itertuples(index=False)
+        ]
+        if upsert:
+            market_data_crud.bulk_create_or_update(self.db, market_data_list=records)
+            return len(records)
+
+        new_rows = [SecurityPrice(**record) for record in records]
+        price_partition_manager.ensure_partitions(self.db, (row.price_date for row in new_rows))
+        self.db.add_all(new_rows)
+        return len(new_rows)
+
     def _extract_security_create_data_from_yfinance(
         self, symbol: str, yf_data: Dict[str, Any]
     ) -> Optional[SecurityCreate]:
@@ -616,11 +752,30 @@ class MarketDataService:
             logger.error(f"Failed to create minimal securities for {symbol}: {str(e)}")
             return None
 
-    def _get_ticker(self, symbol: str) -> yf.Ticker:
-        """Get yfinance ticker with caching."""
-        if symbol not in self._ticker_cache:
-            self._ticker_cache[symbol] = yf.Ticker(symbol)
-        return self._ticker_cache[symbol]
+    async def _get_ticker_info(self, symbol: str) -> Dict[str, Any]:
+        """Get yfinance ticker info from the process-wide ticker cache."""
+        # yfinance does blocking HTTP, so misses run off the event loop
+        return await asyncio.to_thread(ticker_cache.get_info, symbol)
+
+    @staticmethod
+    def _raw_closes(hist: pd.DataFrame) -> List[float]:
+        """Traded closes from a yfinance frame, with Yahoo's split adjustment undone."""
+        dates = np.array([ts.date() for ts in hist.index], dtype="datetime64[D]")
+        closes = hist["Close"].to_numpy(dtype=float)
+        if "Stock Splits" not in hist:
+            return closes.tolist()
+        splits = hist["Stock Splits"].fillna(0).to_numpy(dtype=float) > 0
+        return unadjust_splits(
+            dates, closes, dates[splits], hist["Stock Splits"].to_numpy(dtype=float)[splits]
+        ).tolist()
+
+    async def _get_ticker_history(
+        self, symbol: str, refresh: bool = False, **kwargs: Any
+    ) -> pd.DataFrame:
+        """Get yfinance price history from the process-wide ticker cache."""
+        return await asyncio.to_thread(
+            ticker_cache.get_history, symbol, refresh=refresh, **kwargs
+        )
 
     def _security_has_good_data(self, security: Security) -> bool:
         """Check if securities already has comprehensive data."""
@@ -635,17 +790,8 @@ class MarketDataService:
 
     def _has_recent_market_data(self, security: Security) -> bool:
         """Check if securities has market data from the last trading day."""
-
-        # Check for data within the last 3 days to account for weekends
-        recent_date = datetime.now().date() - timedelta(days=3)
-
-        recent_data = (
-            self.db.query(SecurityPrice)
-            .filter(SecurityPrice.security_id == security.id, SecurityPrice.date >= recent_date)
-            .first()
-        )
-
-        return recent_data is not None
+        plan = price_refresh_planner.plan(self.db, [security])[0]
+        return plan.bucket == RefreshBucket.UP_TO_DATE
 
     def _infer_category_from_symbol(self, symbol: str) -> str:
         """Infer securities security_type from symbol patterns."""
@@ -692,13 +838,19 @@ class MarketDataService:
         # Default to USD
         return "USD"
 
-    def get_stats(self) -> Dict[str, int]:
+    def get_stats(self) -> Dict[str, Any]:
         """Get performance statistics."""
-        return self._stats.copy()
+        return {
+            **self._stats,
+            "response_cache": provider_cache.get_stats(),
+            "ticker_cache": ticker_cache.get_stats(),
+            "providers": provider_router.get_stats(),
+            "price_quality": self.quality_gate.get_metrics(),
+        }
 
     def clear_cache(self) -> None:
-        """Clear internal caches."""
-        self._ticker_cache.clear()
+        """Clear cached ticker metadata (shared by all service instances)."""
+        ticker_cache.clear()
         logger.debug("Market data service cache cleared")
 
 
@@ -0,0 +1,152 @@
+"""
+Vectorized quality checks for batches of provider closes.
+
+The checks run on a frame holding one or more securities' recent stored
+closes (context) followed by the newly fetched ones, sorted by security and
+date. Every statistic is computed column-wise per security, so a batch costs
+a handful of pandas operations regardless of its size.
+"""
+
+import numpy as np
+import pandas as pd
+
+from app.security.quality.enums import PriceIssue
+
+# Jumps within this relative distance of a split ratio look like unit/split glitches
+SPLIT_RATIOS = np.array([2.0, 3.0, 4.0, 5.0, 8.0, 10.0, 20.0, 50.0, 100.0])
+SPLIT_TOLERANCE = 0.03
+
+# Robust z-score of the log return against the prior closes
+Z_SCORE_LIMIT = 10.0
+MIN_OUTLIER_MOVE = 0.25  # Log return (~28%) below which nothing is an outlier
+MIN_RETURN_SCALE = 0.005  # Floor for the MAD-based scale of very quiet series
+REFERENCE_WINDOW = 5  # Prior closes whose median is the reference level
+
+# A run of this many outliers that agree with each other is a genuine level shift
+LEVEL_SHIFT_SESSIONS = 3
+LEVEL_SHIFT_TOLERANCE = 0.05  # Largest log distance between closes of one run
+
+STALE_RUN_SESSIONS = 5
+DIVERGENCE_LIMIT = 0.05
+
+# Consulted in order; the first matching issue is reported
+ISSUE_PRIORITY = (
+    PriceIssue.NON_POSITIVE,
+    PriceIssue.SPLIT_GLITCH,
+    PriceIssue.PROVIDER_DIVERGENCE,
+    PriceIssue.RETURN_OUTLIER,
+    PriceIssue.STALE,
+)
+
+
+def flag_prices(frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    Flag suspect new closes.
+
+    Args:
+        frame: Columns security_id, price_date, close_price, is_new (False for
+            stored context rows), has_split (a split is recorded on that date)
+            and optionally provider_reference (another provider's close) and
+            quarantined (context row still held as a pending return outlier).
+            Must be sorted by security_id then price_date.
+
+    Returns:
+        The new rows with added issue (PriceIssue value or None),
+        reference_price and score columns.
+    """
+    close = frame["close_price"].astype(float)
+    by_security = close.groupby(frame["security_id"], sort=False)
+    has_split = frame["has_split"].astype(bool)
+    quarantined = (
+        frame["quarantined"].fillna(False).astype(bool)
+        if "quarantined" in frame
+        else pd.Series(False, index=frame.index)
+    )
+
+    # Reference level: median of the prior trusted closes, so a single bad tick
+    # does not make the following good close look like a jump back
+    reference = close.where(~quarantined).groupby(frame["security_id"], sort=False).transform(
+        lambda s: s.shift().rolling(REFERENCE_WINDOW, min_periods=1).median()
+    )
+    valid = close > 0
+    comparable = valid & (reference > 0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_move = np.log(close / reference).where(comparable)
+        daily = np.log(close / by_security.shift()).where(comparable)
+
+    # Split glitch: a jump of (almost) exactly a split ratio with no recorded split
+    jump = np.exp(log_move.abs())
+    split_distance = np.abs(jump.to_numpy()[:, None] / SPLIT_RATIOS - 1).min(axis=1)
+    split_glitch = pd.Series(split_distance < SPLIT_TOLERANCE, index=frame.index) & ~has_split
+
+    # Return outlier: robust z-score using the median absolute deviation of daily returns
+    daily_by_security = daily.groupby(frame["security_id"], sort=False)
+    center = daily_by_security.transform("median")
+    mad = (daily - center).abs().groupby(frame["security_id"], sort=False).transform("median")
+    scale = (1.4826 * mad).clip(lower=MIN_RETURN_SCALE)
+    z_score = (log_move - center) / scale
+    outlier = (z_score.abs() > Z_SCORE_LIMIT) & (log_move.abs() > MIN_OUTLIER_MOVE) & ~has_split
+
+    # Level shift: the outlier closes the previous sessions (held back or new)
+    # all sit at the same new level, so the reference is re-anchored there
+    off_level = (outlier | quarantined).astype(float)
+    level_shift = outlier.copy()
+    for lag in range(1, LEVEL_SHIFT_SESSIONS):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            drift = np.log(close / by_security.shift(lag)).abs()
+        level_shift &= (
+            off_level.groupby(frame["security_id"], sort=False).shift(lag).eq(1.0)
+            & (drift <= LEVEL_SHIFT_TOLERANCE)
+        )
+    outlier &= ~level_shift
+
+    # Staleness: position within a run of identical closes
+    new_run = (close != by_security.shift()) | (
+        frame["security_id"] != frame["security_id"].shift()
+    )
+    run_length = frame.groupby(new_run.cumsum(), sort=False).cumcount() + 1
+    stale = valid & (run_length >= STALE_RUN_SESSIONS)
+
+    # Cross-provider divergence
+    provider_reference = frame.get("provider_reference")
+    if provider_reference is None:
+        provider_reference = pd.Series(np.nan, index=frame.index)
+    provider_reference = provider_reference.astype(float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        divergence_gap = (close / provider_reference - 1).abs()
+    divergent = valid & (provider_reference > 0) & (divergence_gap > DIVERGENCE_LIMIT)
+
+    masks = {
+        PriceIssue.NON_POSITIVE: ~valid,
+        PriceIssue.SPLIT_GLITCH: split_glitch,
+        PriceIssue.PROVIDER_DIVERGENCE: divergent,
+        PriceIssue.RETURN_OUTLIER: outlier,
+        PriceIssue.STALE: stale,
+    }
+    scores = {
+        PriceIssue.NON_POSITIVE: pd.Series(np.nan, index=frame.index),
+        PriceIssue.SPLIT_GLITCH: jump,
+        PriceIssue.PROVIDER_DIVERGENCE: divergence_gap,
+        PriceIssue.RETURN_OUTLIER: z_score,
+        PriceIssue.STALE: run_length.astype(float),
+    }
+    references = {
+        PriceIssue.PROVIDER_DIVERGENCE: provider_reference,
+    }
+
+    conditions = [masks[issue].fillna(False).to_numpy(dtype=bool) for issue in ISSUE_PRIORITY]
+    issues = np.select(conditions, [issue.value for issue in ISSUE_PRIORITY], default="")
+
+    result = frame.copy()
+    result["issue"] = pd.Series(issues, index=frame.index, dtype=object).where(issues != "", None)
+    result["score"] = np.select(
+        conditions, [scores[issue].to_numpy() for issue in ISSUE_PRIORITY], default=np.nan
+    )
+    result["reference_price"] = np.select(
+        conditions,
+        [references.get(issue, reference).to_numpy() for issue in ISSUE_PRIORITY],
+        default=np.nan,
+    )
+    return result.loc[frame["is_new"].astype(bool)]
+
@@ -0,0 +1,19 @@
+from enum import Enum
+
+
+class PriceIssue(str, Enum):
+    """Reasons a provider price is held back from security_prices"""
+
+    NON_POSITIVE = "non_positive"  # Missing, zero or negative close
+    SPLIT_GLITCH = "split_glitch"  # Jump matching a split ratio with no recorded split
+    RETURN_OUTLIER = "return_outlier"  # Log return far outside the security's normal range
+    STALE = "stale"  # Close repeated for too many consecutive sessions
+    PROVIDER_DIVERGENCE = "provider_divergence"  # Disagrees with another provider's close
+
+
+class QuarantineStatus(str, Enum):
+    """Review state of a quarantined price"""
+
+    PENDING = "pending"
+    RELEASED = "released"  # Confirmed good and written to security_prices
+    REJECTED = "rejected"
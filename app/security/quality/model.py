@@ -0,0 +1,86 @@
+import uuid
+from datetime import date
+from decimal import Decimal
+from typing import TYPE_CHECKING, Optional
+
+from sqlalchemy import (
+    DECIMAL,
+    BigInteger,
+    Date,
+    Float,
+    ForeignKey,
+    Index,
+    String,
+    UniqueConstraint,
+)
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.core.model import BaseModel
+
+if TYPE_CHECKING:
+    from app.security.master.model import Security
+
+
+class PriceQuarantine(BaseModel):
+    """
+    Provider prices held back by the ingestion quality checks.
+
+    Suspect rows (bad ticks, split glitches, stale repeats, provider
+    disagreements) are written here instead of security_prices so they never
+    reach returns, risk or valuation until reviewed and released.
+    """
+
+    __tablename__ = "security_price_quarantine"
+
+    security_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("security_master.id", ondelete="CASCADE"),
+        nullable=False,
+        comment="Reference to the security being priced",
+    )
+
+    price_date: Mapped[date] = mapped_column(
+        Date, nullable=False, comment="Date of the suspect price observation"
+    )
+
+    close_price: Mapped[Optional[Decimal]] = mapped_column(
+        DECIMAL(15, 4), nullable=True, comment="Close reported by the provider"
+    )
+
+    volume: Mapped[Optional[int]] = mapped_column(
+        BigInteger, nullable=True, comment="Volume reported by the provider"
+    )
+
+    reference_price: Mapped[Optional[Decimal]] = mapped_column(
+        DECIMAL(15, 4), nullable=True, comment="Previous close or other provider's close"
+    )
+
+    score: Mapped[Optional[float]] = mapped_column(
+        Float, nullable=True, comment="Check statistic (z-score, jump ratio, run length, gap)"
+    )
+
+    issue: Mapped[str] = mapped_column(
+        String(30), nullable=False, comment="PriceIssue that triggered the quarantine"
+    )
+
+    data_source: Mapped[str] = mapped_column(
+        String(50), nullable=False, comment="Provider that reported the price"
+    )
+
+    status: Mapped[str] = mapped_column(
+        String(20), default="pending", nullable=False, comment="QuarantineStatus review state"
+    )
+
+    # Relationships
+    security_master: Mapped["Security"] = relationship("Security")
+
+    __table_args__ = (
+        # One held-back row per provider close, so refetches do not pile up duplicates
+        UniqueConstraint(
+            "security_id", "price_date", "data_source", name="uq_price_quarantine_source"
+        ),
+        Index("idx_price_quarantine_security_date", "security_id", "price_date"),
+        Index("idx_price_quarantine_status", "status"),
+        {"comment": "Suspect provider prices awaiting review"},
+    )
@@ -0,0 +1,324 @@
+import logging
+import time
+from collections import Counter
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.security.actions.adjustments import corporate_action_adjuster
+from app.security.master.model import Security
+from app.security.prices.latest import latest_price_cache
+from app.security.prices.market_summary import invalidate_summaries
+from app.security.prices.model import SecurityPrice
+from app.security.prices.repository import market_data_crud
+from app.security.quality.checks import DIVERGENCE_LIMIT, flag_prices
+from app.security.quality.enums import PriceIssue, QuarantineStatus
+from app.security.quality.model import PriceQuarantine
+
+logger = logging.getLogger(__name__)
+
+# Calendar days of stored closes loaded ahead of a batch (~30 sessions)
+CONTEXT_DAYS = 45
+
+
+class PriceQualityMetrics:
+    """Counters for one ingestion run."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.securities = 0
+        self.checked = 0
+        self.accepted = 0
+        self.quarantined = 0
+        self.issues: Counter = Counter()
+        self.elapsed_seconds = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "securities": self.securities,
+            "checked": self.checked,
+            "accepted": self.accepted,
+            "quarantined": self.quarantined,
+            "quarantine_rate": (
+                round(self.quarantined / self.checked, 6) if self.checked else 0.0
+            ),
+            "issues": dict(self.issues),
+            "elapsed_seconds": round(self.elapsed_seconds, 3),
+        }
+
+
+class PriceQualityGate:
+    """
+    Screens provider prices before they are written to security_prices.
+
+    Suspect rows are inserted into security_price_quarantine in the caller's
+    transaction and left out of the returned frame; metrics accumulate until
+    reset.
+    """
+
+    def __init__(self):
+        self.metrics = PriceQualityMetrics()
+
+    def screen(
+        self,
+        db: Session,
+        security: Security,
+        prices: pd.DataFrame,
+        *,
+        data_source: str,
+        after: Optional[date] = None,
+        provider_reference: Optional[pd.Series] = None,
+    ) -> pd.DataFrame:
+        """
+        Return the prices dated after `after` that pass every check.
+
+        Args:
+            db: Database session
+            security: Security the prices belong to
+            prices: Columns price_date, close_price and volume
+            data_source: Provider that reported the prices
+            after: Last stored price date; earlier rows are only compared
+                against the stored closes of other providers
+            provider_reference: Another provider's closes indexed by price_date
+        """
+        started = time.perf_counter()
+        prices = prices.sort_values("price_date").drop_duplicates("price_date", keep="last")
+        is_new = (
+            prices["price_date"] > after
+            if after is not None
+            else pd.Series(True, index=prices.index)
+        )
+        new_prices = prices.loc[is_new]
+        overlap = prices.loc[~is_new]
+
+        if new_prices.empty and overlap.empty:
+            return new_prices
+
+        # Only recent overlapping rows are compared, so full-history refetches stay cheap
+        anchor = (
+            new_prices["price_date"].min() if not new_prices.empty else overlap["price_date"].max()
+        )
+        window_start = anchor - timedelta(days=CONTEXT_DAYS)
+        overlap = overlap.loc[overlap["price_date"] >= window_start]
+        stored = self._load_context(db, security.id, window_start)
+
+        quarantine: List[Dict[str, Any]] = []
+        accepted = new_prices
+
+        if not new_prices.empty:
+            held = self._load_held_outliers(db, security.id, window_start)
+            frame = self._build_frame(db, security, stored, held, new_prices, provider_reference)
+            flagged = flag_prices(frame)
+            suspect = flagged["issue"].notna()
+
+            accepted = new_prices.loc[~suspect.to_numpy()]
+            quarantine.extend(
+                self._quarantine_rows(security, flagged.loc[suspect], new_prices, data_source)
+            )
+
+        if not overlap.empty and not stored.empty:
+            quarantine.extend(self._check_overlap(security, overlap, stored, data_source))
+
+        if quarantine:
+            # Closes already held back from an earlier fetch keep their review state
+            db.execute(insert(PriceQuarantine).on_conflict_do_nothing(), quarantine)
+            logger.warning(
+                f"Quarantined {len(quarantine)} {data_source} prices for {security.symbol}: "
+                + ", ".join(f"{k}={v}" for k, v in Counter(r["issue"] for r in quarantine).items())
+            )
+
+        self.metrics.securities += 1
+        self.metrics.checked += len(new_prices) + len(overlap)
+        self.metrics.accepted += len(accepted)
+        self.metrics.quarantined += len(quarantine)
+        self.metrics.issues.update(row["issue"] for row in quarantine)
+        self.metrics.elapsed_seconds += time.perf_counter() - started
+        return accepted
+
+    def release(self, db: Session, quarantine_ids: List[str]) -> int:
+        """Write reviewed quarantined prices to security_prices; returns the number released."""
+        rows = (
+            db.execute(
+                select(PriceQuarantine).where(
+                    PriceQuarantine.id.in_(quarantine_ids),
+                    PriceQuarantine.status == QuarantineStatus.PENDING.value,
+                    PriceQuarantine.close_price.is_not(None),
+                    PriceQuarantine.close_price > 0,
+                )
+            )
+            .scalars()
+            .all()
+        )
+        if not rows:
+            return 0
+
+        market_data_crud.bulk_create_or_update(
+            db,
+            market_data_list=[
+                {
+                    "security_id": row.security_id,
+                    "price_date": row.price_date,
+                    "close_price": row.close_price,
+                    "volume": row.volume,
+                    "data_source": row.data_source,
+                }
+                for row in rows
+            ],
+        )
+        db.execute(
+            update(PriceQuarantine)
+            .where(PriceQuarantine.id.in_([row.id for row in rows]))
+            .values(status=QuarantineStatus.RELEASED.value)
+        )
+        db.commit()
+        latest_price_cache.invalidate({row.security_id for row in rows})
+        invalidate_summaries(row.price_date for row in rows)
+        return len(rows)
+
+    def log_metrics(self, label: str = "Price ingestion") -> None:
+        logger.info(f"{label} quality: {self.metrics.as_dict()}")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return self.metrics.as_dict()
+
+    def reset_metrics(self) -> None:
+        self.metrics.reset()
+
+    @staticmethod
+    def _load_context(db: Session, security_id: Any, start: date) -> pd.DataFrame:
+        """Stored closes from `start` on: the lead-in to the batch and any overlapping dates."""
+        rows = db.execute(
+            select(SecurityPrice.price_date, SecurityPrice.close_price, SecurityPrice.data_source)
+            .where(
+                SecurityPrice.security_id == security_id,
+                SecurityPrice.price_date >= start,
+            )
+            .order_by(SecurityPrice.price_date)
+        ).all()
+        return pd.DataFrame(rows, columns=["price_date", "close_price", "data_source"])
+
+    @staticmethod
+    def _load_held_outliers(db: Session, security_id: Any, start: date) -> pd.DataFrame:
+        """Pending return outliers from `start` on, which may mark the start of a level shift."""
+        rows = db.execute(
+            select(PriceQuarantine.price_date, PriceQuarantine.close_price)
+            .where(
+                PriceQuarantine.security_id == security_id,
+                PriceQuarantine.price_date >= start,
+                PriceQuarantine.issue == PriceIssue.RETURN_OUTLIER.value,
+                PriceQuarantine.status == QuarantineStatus.PENDING.value,
+                PriceQuarantine.close_price.is_not(None),
+            )
+            .order_by(PriceQuarantine.price_date)
+        ).all()
+        return pd.DataFrame(rows, columns=["price_date", "close_price"]).drop_duplicates(
+            "price_date", keep="last"
+        )
+
+    @staticmethod
+    def _build_frame(
+        db: Session,
+        security: Security,
+        stored: pd.DataFrame,
+        held: pd.DataFrame,
+        new_prices: pd.DataFrame,
+        provider_reference: Optional[pd.Series],
+    ) -> pd.DataFrame:
+        first_date = new_prices["price_date"].min()
+        context = stored.loc[stored["price_date"] < first_date, ["price_date", "close_price"]]
+        held = held.loc[
+            (held["price_date"] < first_date) & ~held["price_date"].isin(context["price_date"])
+        ]
+
+        frame = pd.concat(
+            [
+                context.assign(is_new=False, quarantined=False),
+                held.assign(is_new=False, quarantined=True),
+                new_prices[["price_date", "close_price"]].assign(is_new=True, quarantined=False),
+            ],
+            ignore_index=True,
+        ).sort_values("price_date", kind="stable", ignore_index=True)
+        frame["security_id"] = str(security.id)
+        frame["close_price"] = pd.to_numeric(frame["close_price"], errors="coerce")
+
+        split_dates = corporate_action_adjuster.get_schedule(db, str(security.id)).split_dates
+        frame["has_split"] = np.isin(
+            frame["price_date"].to_numpy(dtype="datetime64[D]"), split_dates
+        )
+        if provider_reference is not None:
+            frame["provider_reference"] = frame["price_date"].map(provider_reference)
+        return frame
+
+    @staticmethod
+    def _quarantine_rows(
+        security: Security, flagged: pd.DataFrame, new_prices: pd.DataFrame, data_source: str
+    ) -> List[Dict[str, Any]]:
+        volumes = new_prices.set_index("price_date")["volume"] if "volume" in new_prices else None
+        return [
+            {
+                "security_id": security.id,
+                "price_date": row.price_date,
+                "close_price": _finite_or_none(row.close_price),
+                "volume": (
+                    int(volumes[row.price_date])
+                    if volumes is not None and pd.notna(volumes[row.price_date])
+                    else None
+                ),
+                "reference_price": _finite_or_none(row.reference_price),
+                "score": _finite_or_none(row.score),
+                "issue": row.issue,
+                "data_source": data_source,
+                "status": QuarantineStatus.PENDING.value,
+            }
+            for row in flagged.itertuples(index=False)
+        ]
+
+    @staticmethod
+    def _check_overlap(
+        security: Security, overlap: pd.DataFrame, stored: pd.DataFrame, data_source: str
+    ) -> List[Dict[str, Any]]:
+        """Compare re-fetched closes with stored closes from other providers."""
+        merged = overlap.merge(stored, on="price_date", suffixes=("", "_stored"))
+        merged = merged.loc[merged["data_source"] != data_source]
+        if merged.empty:
+            return []
+
+        close = pd.to_numeric(merged["close_price"], errors="coerce")
+        stored_close = merged["close_price_stored"].astype(float)
+        gap = (close / stored_close - 1).abs()
+        divergent = merged.loc[(stored_close > 0) & (gap > DIVERGENCE_LIMIT)]
+
+        return [
+            {
+                "security_id": security.id,
+                "price_date": row.price_date,
+                "close_price": _finite_or_none(row.close_price),
+                "volume": None,
+                "reference_price": float(row.close_price_stored),
+                "score": float(gap.loc[index]),
+                "issue": PriceIssue.PROVIDER_DIVERGENCE.value,
+                "data_source": data_source,
+                "status": QuarantineStatus.PENDING.value,
+            }
+            for index, row in divergent.iterrows()
+        ]
+
+
+def _finite_or_none(value: Any) -> Optional[float]:
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if np.isfinite(value) else None
+
+
+def get_price_quality_gate() -> PriceQualityGate:
+    """Get a PriceQualityGate with fresh metrics."""
+    return PriceQualityGate()
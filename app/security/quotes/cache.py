@@ -0,0 +1,146 @@
+import json
+import logging
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from app.core.config import settings
+from app.core.redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class Quote(NamedTuple):
+    """Latest intraday quote for a security"""
+
+    symbol: str
+    price: float
+    previous_close: Optional[float]
+    volume: Optional[int]  # Volume traded so far in the session
+    currency: str
+    exchange: Optional[str]
+    quoted_at: str  # Timestamp of the latest bar, ISO 8601 in exchange time
+    fetched_at: float  # Epoch seconds when the quote was retrieved
+    source: str
+
+    @property
+    def change(self) -> Optional[float]:
+        if self.previous_close is None:
+            return None
+        return self.price - self.previous_close
+
+    @property
+    def change_percent(self) -> Optional[float]:
+        if not self.previous_close:
+            return None
+        return (self.price / self.previous_close - 1) * 100
+
+
+class QuoteCache:
+    """
+    Two-tier cache of live quotes.
+
+    A bounded in-process LRU answers most lookups; Redis shares quotes
+    between workers. Access counts (decayed on every read of the hot set)
+    identify the symbols worth refreshing in the background.
+    """
+
+    def __init__(
+        self,
+        max_size: Optional[int] = None,
+        ttl_seconds: Optional[int] = None,
+        key_prefix: str = "live_quote",
+    ):
+        self.max_size = max_size or settings.LIVE_QUOTE_CACHE_SIZE
+        self.ttl_seconds = ttl_seconds or settings.LIVE_QUOTE_TTL_SECONDS
+        self.key_prefix = key_prefix
+
+        self._quotes: "OrderedDict[str, Quote]" = OrderedDict()
+        self._access: Counter = Counter()
+        self._lock = threading.Lock()
+        self._stats = {"local_hits": 0, "redis_hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, symbol: str) -> Optional[Quote]:
+        """Fresh quote for a symbol, from memory or Redis."""
+        with self._lock:
+            quote = self._quotes.get(symbol)
+            if quote is not None and self._is_fresh(quote):
+                self._quotes.move_to_end(symbol)
+                self._stats["local_hits"] += 1
+                return quote
+
+        quote = self._redis_get(symbol)
+        if quote is not None and self._is_fresh(quote):
+            self._store_local(quote)
+            self._stats["redis_hits"] += 1
+            return quote
+
+        self._stats["misses"] += 1
+        return None
+
+    def get_stale(self, symbol: str) -> Optional[Quote]:
+        """Last known quote regardless of age (used when a refresh fails)."""
+        with self._lock:
+            return self._quotes.get(symbol)
+
+    def set(self, quote: Quote) -> None:
+        self._store_local(quote)
+        if redis_client.is_available():
+            redis_client.setex(
+                self._key(quote.symbol), self.ttl_seconds, json.dumps(quote._asdict())
+            )
+
+    def record_access(self, symbol: str) -> None:
+        with self._lock:
+            self._access[symbol] += 1
+
+    def hot_symbols(self, limit: int) -> List[str]:
+        """Most requested symbols; counts are halved so interest fades over time."""
+        with self._lock:
+            hot = [symbol for symbol, _ in self._access.most_common(limit)]
+            self._access = Counter(
+                {symbol: count // 2 for symbol, count in self._access.items() if count > 1}
+            )
+        return hot
+
+    def clear(self) -> None:
+        with self._lock:
+            self._quotes.clear()
+            self._access.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self._stats["local_hits"] + self._stats["redis_hits"] + self._stats["misses"]
+        hits = self._stats["local_hits"] + self._stats["redis_hits"]
+        return {
+            **self._stats,
+            "size": len(self._quotes),
+            "max_size": self.max_size,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def _is_fresh(self, quote: Quote) -> bool:
+        return time.time() - quote.fetched_at < self.ttl_seconds
+
+    def _store_local(self, quote: Quote) -> None:
+        with self._lock:
+            self._quotes[quote.symbol] = quote
+            self._quotes.move_to_end(quote.symbol)
+            while len(self._quotes) > self.max_size:
+                self._quotes.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def _redis_get(self, symbol: str) -> Optional[Quote]:
+        if not redis_client.is_available():
+            return None
+        raw = redis_client.get(self._key(symbol))
+        if not raw:
+            return None
+        try:
+            return Quote(**json.loads(raw))
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Discarding unreadable cached quote for {symbol}: {e}")
+            return None
+
+    def _key(self, symbol: str) -> str:
+        return f"{self.key_prefix}:{symbol}"
@@ -0,0 +1,83 @@
+import logging
+import time as clock
+from datetime import datetime, time
+from typing import Dict, NamedTuple, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.reference.exchanges.model import ReferenceExchange
+
+logger = logging.getLogger(__name__)
+
+# Exchange hours are reference data; reload them once a day
+RELOAD_SECONDS = 24 * 3600
+
+
+class ExchangeHours(NamedTuple):
+    """Regular trading session of an exchange in its local time"""
+
+    timezone: ZoneInfo
+    market_open: time
+    market_close: time
+
+
+DEFAULT_HOURS = ExchangeHours(ZoneInfo("America/New_York"), time(9, 30), time(16, 0))
+
+
+class MarketHours:
+    """Trading sessions per exchange code, loaded from reference_exchanges."""
+
+    def __init__(self):
+        self._hours: Dict[str, ExchangeHours] = {}
+        self._loaded_at: Optional[float] = None
+
+    async def ensure_loaded(self, db: AsyncSession) -> None:
+        """Load exchange hours if they were never loaded or are a day old."""
+        if self._loaded_at is not None and clock.monotonic() - self._loaded_at < RELOAD_SECONDS:
+            return
+
+        result = await db.execute(
+            select(
+                ReferenceExchange.exchange_code,
+                ReferenceExchange.timezone,
+                ReferenceExchange.market_open,
+                ReferenceExchange.market_close,
+            ).where(ReferenceExchange.is_active.is_(True))
+        )
+
+        hours = {}
+        for row in result:
+            if row.market_open is None or row.market_close is None:
+                continue
+            try:
+                hours[row.exchange_code.upper()] = ExchangeHours(
+                    ZoneInfo(row.timezone), row.market_open, row.market_close
+                )
+            except ZoneInfoNotFoundError:
+                logger.warning(f"Unknown timezone {row.timezone} for {row.exchange_code}")
+
+        self._hours = hours
+        self._loaded_at = clock.monotonic()
+        logger.debug(f"Loaded trading hours for {len(hours)} exchanges")
+
+    def hours_for(self, exchange_code: Optional[str]) -> ExchangeHours:
+        if not exchange_code:
+            return DEFAULT_HOURS
+        return self._hours.get(exchange_code.upper(), DEFAULT_HOURS)
+
+    def is_open(self, exchange_code: Optional[str], now: Optional[datetime] = None) -> bool:
+        """Whether the exchange is inside its regular weekday session."""
+        hours = self.hours_for(exchange_code)
+        local = (now or datetime.now(hours.timezone)).astimezone(hours.timezone)
+        if local.weekday() >= 5:
+            return False
+        return hours.market_open <= local.time() < hours.market_close
+
+    def market_status(self, exchange_code: Optional[str]) -> str:
+        return "open" if self.is_open(exchange_code) else "closed"
+
+
+# Create instance
+market_hours = MarketHours()
@@ -0,0 +1,265 @@
+"""
+Live intraday quotes.
+
+Quotes come from Alpha Vantage intraday bars and are kept in a QuoteCache;
+they are never written to security_prices, which only holds daily closes.
+While LIVE_QUOTES_ENABLED is set, a background scheduler refreshes the most
+requested symbols whose exchange is currently in session, spending at most
+LIVE_QUOTE_DAILY_REQUESTS of the Alpha Vantage daily quota.
+"""
+
+import asyncio
+import logging
+import math
+import time
+from datetime import date, datetime, timezone
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.integrations.alphavantage.service import AlphaVantageClient, get_alpha_vantage_client
+from app.security.quotes.cache import Quote, QuoteCache
+from app.security.quotes.market_hours import MarketHours, market_hours
+
+logger = logging.getLogger(__name__)
+
+
+def parse_intraday_quote(
+    symbol: str,
+    data: Optional[Dict[str, Any]],
+    *,
+    interval: str,
+    currency: str,
+    exchange: Optional[str],
+) -> Optional[Quote]:
+    """
+    Build a quote from an Alpha Vantage TIME_SERIES_INTRADAY response.
+
+    The price is the latest bar's close, volume is summed over that bar's
+    session and the previous close is the last bar of the prior session.
+    """
+    series = (data or {}).get(f"Time Series ({interval})")
+    if not series:
+        return None
+
+    timestamps = sorted(series)
+    latest = timestamps[-1]
+    session_date = latest[:10]
+
+    try:
+        price = float(series[latest]["4. close"])
+        volume = sum(
+            int(float(series[ts]["5. volume"])) for ts in timestamps if ts[:10] == session_date
+        )
+        previous = [ts for ts in timestamps if ts[:10] < session_date]
+        previous_close = float(series[previous[-1]]["4. close"]) if previous else None
+    except (KeyError, ValueError) as e:
+        logger.error(f"Error parsing intraday data for {symbol}: {str(e)}")
+        return None
+
+    return Quote(
+        symbol=symbol,
+        price=price,
+        previous_close=previous_close,
+        volume=volume,
+        currency=currency,
+        exchange=exchange,
+        quoted_at=datetime.strptime(latest, "%Y-%m-%d %H:%M:%S").isoformat(),
+        fetched_at=time.time(),
+        source="alphavantage",
+    )
+
+
+class LiveQuoteService:
+    """Serves the latest intraday quote per symbol through a QuoteCache."""
+
+    def __init__(
+        self,
+        cache: Optional[QuoteCache] = None,
+        client: Optional[AlphaVantageClient] = None,
+        interval: Optional[str] = None,
+    ):
+        self.cache = cache or QuoteCache()
+        self.client = client or get_alpha_vantage_client()
+        self.interval = interval or settings.LIVE_QUOTE_INTERVAL
+
+        # Currency and exchange per symbol, remembered for background refreshes
+        self._listings: Dict[str, Tuple[str, Optional[str]]] = {}
+
+    async def get_quote(
+        self,
+        symbol: str,
+        *,
+        currency: Optional[str] = None,
+        exchange: Optional[str] = None,
+        refresh: bool = False,
+    ) -> Optional[Quote]:
+        """
+        Latest quote for a symbol.
+
+        Falls back to the last known quote when the provider cannot be reached.
+        """
+        symbol = symbol.upper()
+        if currency:
+            self._listings[symbol] = (currency.upper(), exchange)
+
+        if not refresh:
+            # Only caller demand counts towards the hot set, not background refreshes
+            self.cache.record_access(symbol)
+            quote = self.cache.get(symbol)
+            if quote is not None:
+                return quote
+
+        currency, exchange = self._listings.get(symbol, ("USD", exchange))
+        try:
+            data = await self.client.fetch_intraday_data(symbol, interval=self.interval)
+        except Exception as e:
+            logger.warning(f"Intraday quote fetch failed for {symbol}: {e}")
+            data = None
+
+        quote = parse_intraday_quote(
+            symbol, data, interval=self.interval, currency=currency, exchange=exchange
+        )
+        if quote is None:
+            return self.cache.get_stale(symbol)
+
+        self.cache.set(quote)
+        return quote
+
+    async def get_quotes(
+        self, listings: Iterable[Tuple[str, Optional[str], Optional[str]]], refresh: bool = False
+    ) -> Dict[str, Quote]:
+        """
+        Quotes for many (symbol, currency, exchange) listings.
+
+        Cached quotes are returned directly; the rest are fetched concurrently
+        (the Alpha Vantage client enforces the request quota).
+        """
+        listings = list(listings)
+        quotes = await asyncio.gather(
+            *(
+                self.get_quote(symbol, currency=currency, exchange=exchange, refresh=refresh)
+                for symbol, currency, exchange in listings
+            )
+        )
+        return {
+            symbol.upper(): quote
+            for (symbol, _, _), quote in zip(listings, quotes)
+            if quote is not None
+        }
+
+    def exchange_for(self, symbol: str) -> Optional[str]:
+        return self._listings.get(symbol, ("USD", None))[1]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"quotes": self.cache.get_stats(), "tracked_symbols": len(self._listings)}
+
+
+class QuoteRefreshScheduler:
+    """
+    Periodically refreshes hot symbols whose exchange is in session.
+
+    Each refresh costs one provider request per symbol, so the cycle size and
+    interval are stretched until a day of cycles fits the daily request budget.
+    """
+
+    def __init__(
+        self,
+        service: LiveQuoteService,
+        hours: MarketHours,
+        interval_seconds: Optional[int] = None,
+        hot_symbols: Optional[int] = None,
+        daily_requests: Optional[int] = None,
+    ):
+        self.service = service
+        self.hours = hours
+        self.daily_requests = max(daily_requests or settings.LIVE_QUOTE_DAILY_REQUESTS, 1)
+        self.hot_symbols = min(hot_symbols or settings.LIVE_QUOTE_HOT_SYMBOLS, self.daily_requests)
+        self.interval_seconds = max(
+            interval_seconds or settings.LIVE_QUOTE_REFRESH_SECONDS,
+            math.ceil(86400 * self.hot_symbols / self.daily_requests),
+        )
+        self._task: Optional[asyncio.Task] = None
+
+        # Requests spent on the current UTC day
+        self._budget_day: Optional[date] = None
+        self._spent = 0
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            logger.info(
+                f"Live quote refresh started ({self.hot_symbols} symbols every "
+                f"{self.interval_seconds}s, {self.daily_requests} requests/day)"
+            )
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def refresh_once(self) -> int:
+        """Refresh the hot symbols that are trading; returns the number refreshed."""
+        async with AsyncSessionLocal() as session:
+            await self.hours.ensure_loaded(session)
+
+        today = datetime.now(timezone.utc).date()
+        if today != self._budget_day:
+            self._budget_day, self._spent = today, 0
+        remaining = self.daily_requests - self._spent
+        if remaining <= 0:
+            return 0
+
+        symbols = [
+            symbol
+            for symbol in self.service.cache.hot_symbols(self.hot_symbols)
+            if self.hours.is_open(self.service.exchange_for(symbol))
+        ][:remaining]
+        if not symbols:
+            return 0
+        self._spent += len(symbols)
+
+        quotes = await self.service.get_quotes(
+            ((symbol, None, None) for symbol in symbols), refresh=True
+        )
+        logger.debug(f"Refreshed {len(quotes)}/{len(symbols)} live quotes")
+        return len(quotes)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh_once()
+            except Exception as e:
+                logger.error(f"Live quote refresh failed: {str(e)}")
+            await asyncio.sleep(self.interval_seconds)
+
+
+_live_quote_service: Optional[LiveQuoteService] = None
+_scheduler: Optional[QuoteRefreshScheduler] = None
+
+
+def get_live_quote_service() -> LiveQuoteService:
+    """Process-wide LiveQuoteService."""
+    global _live_quote_service
+    if _live_quote_service is None:
+        _live_quote_service = LiveQuoteService()
+    return _live_quote_service
+
+
+def start_quote_scheduler() -> None:
+    """Start refreshing hot symbols in the background (when enabled)."""
+    global _scheduler
+    if not settings.LIVE_QUOTES_ENABLED:
+        return
+    if _scheduler is None:
+        _scheduler = QuoteRefreshScheduler(get_live_quote_service(), market_hours)
+    _scheduler.start()
+
+
+async def stop_quote_scheduler() -> None:
+    if _scheduler is not None:
+        await _scheduler.stop()
@@ -0,0 +1,87 @@
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+TRAILING_PERIODS = (1, 7, 30, 90, 365)
+VOLATILITY_WINDOWS = (30, 90)
+MONTHLY_HISTORY_MONTHS = 24
+TRADING_DAYS_PER_YEAR = 252
+
+# Calendar days of history needed for every statistic above
+HISTORY_DAYS = MONTHLY_HISTORY_MONTHS * 31 + 31
+
+
+def trailing_returns(
+    adjusted: pd.Series, periods: Sequence[int] = TRAILING_PERIODS
+) -> Dict[int, Optional[float]]:
+    """
+    Percent return from the close on or before (last date - period days) to the last close.
+    """
+    as_of = adjusted.index[-1]
+    targets = pd.DatetimeIndex([as_of - pd.Timedelta(days=p) for p in periods])
+
+    positions = adjusted.index.searchsorted(targets, side="right") - 1
+    values = adjusted.to_numpy(dtype=float)
+    base = np.where(positions >= 0, values[np.clip(positions, 0, None)], np.nan)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = (values[-1] / base - 1) * 100
+
+    return {
+        period: (float(r) if np.isfinite(r) else None) for period, r in zip(periods, returns)
+    }
+
+
+def annualized_volatility(
+    adjusted: pd.Series, windows: Sequence[int] = VOLATILITY_WINDOWS
+) -> Dict[int, Optional[float]]:
+    """Annualized percent volatility of daily returns within each trailing calendar window."""
+    daily_returns = adjusted.pct_change().dropna()
+    as_of = adjusted.index[-1]
+
+    volatility = {}
+    for window in windows:
+        in_window = daily_returns[daily_returns.index > as_of - pd.Timedelta(days=window)]
+        volatility[window] = (
+            float(in_window.std() * np.sqrt(TRADING_DAYS_PER_YEAR) * 100)
+            if len(in_window) >= 2
+            else None
+        )
+    return volatility
+
+
+def monthly_returns(
+    adjusted: pd.Series, months: int = MONTHLY_HISTORY_MONTHS
+) -> Dict[str, float]:
+    """Calendar month percent returns keyed by YYYY-MM (the current month is month-to-date)."""
+    month_end = adjusted.resample("ME").last().dropna()
+    returns = (month_end.pct_change().dropna() * 100).tail(months)
+    return {ts.strftime("%Y-%m"): round(float(r), 6) for ts, r in returns.items()}
+
+
+def summarize_returns(closes: pd.Series, adjusted: pd.Series) -> Optional[Dict[str, Any]]:
+    """
+    Return statistics for one security.
+
+    Args:
+        closes: Raw closes indexed by date
+        adjusted: Corporate-action adjusted closes on the same index
+    """
+    adjusted = adjusted.dropna()
+    adjusted = adjusted[adjusted > 0]
+    if adjusted.empty:
+        return None
+
+    returns = trailing_returns(adjusted)
+    volatility = annualized_volatility(adjusted)
+
+    summary = {
+        "as_of_date": adjusted.index[-1].date(),
+        "last_close": float(closes.loc[adjusted.index[-1]]),
+        "observations": int(len(adjusted)),
+        "monthly_returns": monthly_returns(adjusted),
+    }
+    summary.update({f"return_{p}d": r for p, r in returns.items()})
+    summary.update({f"volatility_{w}d": v for w, v in volatility.items()})
+    return summary
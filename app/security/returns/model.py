@@ -0,0 +1,87 @@
+import uuid
+from datetime import date
+from decimal import Decimal
+from typing import TYPE_CHECKING, Dict, Optional
+
+from sqlalchemy import DECIMAL, JSON, Date, ForeignKey, Integer
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.core.model import BaseModel
+
+if TYPE_CHECKING:
+    from app.security.master.model import Security
+
+
+class SecurityReturnSummary(BaseModel):
+    """
+    Pre-aggregated return statistics per security.
+
+    Materialized nightly from corporate-action adjusted closes so security
+    detail pages and screening queries read one row instead of recomputing
+    returns and volatility from the price history. Values are as of the
+    security's last stored price date.
+    """
+
+    __tablename__ = "security_return_summary"
+
+    security_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("security_master.id", ondelete="CASCADE"),
+        nullable=False,
+        unique=True,
+        comment="Reference to the summarized security",
+    )
+
+    as_of_date: Mapped[date] = mapped_column(
+        Date, nullable=False, index=True, comment="Last price date included in the summary"
+    )
+
+    last_close: Mapped[Decimal] = mapped_column(
+        DECIMAL(15, 4), nullable=False, comment="Raw close on as_of_date"
+    )
+
+    observations: Mapped[int] = mapped_column(
+        Integer, nullable=False, comment="Number of prices used for the statistics"
+    )
+
+    # Trailing total returns (percent)
+    return_1d: Mapped[Optional[Decimal]] = mapped_column(
+        DECIMAL(12, 6), nullable=True, comment="Return over the last day (%)"
+    )
+
+    return_7d: Mapped[Optional[Decimal]] = mapped_column(
+        DECIMAL(12, 6), nullable=True, comment="Return over the last 7 days (%)"
+    )
+
+    return_30d: Mapped[Optional[Decimal]] = mapped_column(
+        DECIMAL(12, 6), nullable=True, comment="Return over the last 30 days (%)"
+    )
+
+    return_90d: Mapped[Optional[Decimal]] = mapped_column(
+        DECIMAL(12, 6), nullable=True, comment="Return over the last 90 days (%)"
+    )
+
+    return_365d: Mapped[Optional[Decimal]] = mapped_column(
+        DECIMAL(12, 6), nullable=True, comment="Return over the last 365 days (%)"
+    )
+
+    # Annualized volatility of daily returns (percent)
+    volatility_30d: Mapped[Optional[Decimal]] = mapped_column(
+        DECIMAL(12, 6), nullable=True, comment="Annualized 30-day volatility (%)"
+    )
+
+    volatility_90d: Mapped[Optional[Decimal]] = mapped_column(
+        DECIMAL(12, 6), nullable=True, comment="Annualized 90-day volatility (%)"
+    )
+
+    monthly_returns: Mapped[Optional[Dict[str, float]]] = mapped_column(
+        JSON,
+        nullable=True,
+        comment="Calendar month returns (%) keyed by YYYY-MM, most recent 24 months",
+    )
+
+    # Relationships
+    security_master: Mapped["Security"] = relationship("Security")
+
+    __table_args__ = ({"comment": "Materialized per-security returns and volatility"},)
@@ -0,0 +1,173 @@
+"""
+Nightly materialization of per-security returns.
+
+Usage:
+    python -m app.security.returns.service
+
+Only securities with prices newer than their stored summary are recomputed,
+in batches that each load prices and corporate actions with one query.
+"""
+
+import asyncio
+import logging
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import delete, func, or_, select, true
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import AsyncSessionLocal
+from app.security.actions.adjustments import adjustment_factors, corporate_action_adjuster
+from app.security.master.model import Security
+from app.security.prices.model import SecurityPrice
+from app.security.returns.calculations import HISTORY_DAYS, summarize_returns
+from app.security.returns.model import SecurityReturnSummary
+
+logger = logging.getLogger(__name__)
+
+
+class SecurityReturnService:
+    """Computes and stores SecurityReturnSummary rows."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_stale_security_ids(self) -> List[str]:
+        """
+        Securities with prices newer than their summary, or without a summary.
+
+        The latest price date per security is a LATERAL max() over the
+        (security_id, price_date) primary key, one index probe per security
+        instead of a scan of the whole price table.
+        """
+        latest = (
+            select(func.max(SecurityPrice.price_date).label("price_date"))
+            .where(SecurityPrice.security_id == Security.id)
+            .lateral("latest")
+        )
+        stmt = (
+            select(Security.id)
+            .join(latest, true())
+            .outerjoin(SecurityReturnSummary, SecurityReturnSummary.security_id == Security.id)
+            .where(
+                latest.c.price_date.is_not(None),
+                or_(
+                    SecurityReturnSummary.as_of_date.is_(None),
+                    latest.c.price_date > SecurityReturnSummary.as_of_date,
+                ),
+            )
+        )
+        result = await self.db.execute(stmt)
+        return [str(security_id) for security_id in result.scalars().all()]
+
+    async def refresh(
+        self, security_ids: Optional[List[str]] = None, batch_size: int = 500
+    ) -> int:
+        """
+        Recompute summaries for the given securities (stale ones by default).
+
+        Returns the number of summaries written.
+        """
+        if security_ids is None:
+            security_ids = await self.get_stale_security_ids()
+
+        written = 0
+        for start in range(0, len(security_ids), batch_size):
+            batch = security_ids[start : start + batch_size]
+            summaries = await self._compute_batch(batch)
+            written += await self._upsert(summaries)
+            logger.info(
+                f"Security returns: {written} summaries written "
+                f"({min(start + batch_size, len(security_ids))}/{len(security_ids)})"
+            )
+
+        return written
+
+    async def invalidate(self, security_id: str) -> None:
+        """Drop a summary (e.g. after a new corporate action) so the next refresh rebuilds it."""
+        corporate_action_adjuster.invalidate(security_id)
+        await self.db.execute(
+            delete(SecurityReturnSummary).where(SecurityReturnSummary.security_id == security_id)
+        )
+        await self.db.commit()
+
+    async def _compute_batch(self, security_ids: List[str]) -> List[Dict[str, Any]]:
+        cutoff = date.today() - timedelta(days=HISTORY_DAYS)
+        result = await self.db.execute(
+            select(SecurityPrice.security_id, SecurityPrice.price_date, SecurityPrice.close_price)
+            .where(
+                SecurityPrice.security_id.in_(security_ids),
+                SecurityPrice.price_date >= cutoff,
+            )
+            .order_by(SecurityPrice.security_id, SecurityPrice.price_date)
+        )
+        prices = pd.DataFrame(result.all(), columns=["security_id", "price_date", "close_price"])
+        if prices.empty:
+            return []
+
+        prices["security_id"] = prices["security_id"].astype(str)
+        prices["close_price"] = prices["close_price"].astype(float)
+        schedules = await corporate_action_adjuster.get_schedules_async(self.db, security_ids)
+
+        summaries = []
+        for security_id, rows in prices.groupby("security_id", sort=False):
+            dates = pd.DatetimeIndex(rows["price_date"])
+            closes = pd.Series(rows["close_price"].to_numpy(), index=dates)
+            factors = adjustment_factors(
+                dates.values.astype("datetime64[D]"),
+                closes.to_numpy(),
+                schedules[security_id],
+            )
+
+            summary = summarize_returns(closes, closes * factors)
+            if summary is not None:
+                summaries.append({"security_id": security_id, **summary})
+
+        return summaries
+
+    async def _upsert(self, summaries: List[Dict[str, Any]]) -> int:
+        if not summaries:
+            return 0
+
+        # NaN is not valid JSON/numeric for the database
+        for summary in summaries:
+            for key, value in summary.items():
+                if isinstance(value, float) and np.isnan(value):
+                    summary[key] = None
+
+        stmt = pg_insert(SecurityReturnSummary).values(summaries)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[SecurityReturnSummary.security_id],
+            set_={
+                column: stmt.excluded[column]
+                for column in summaries[0]
+                if column != "security_id"
+            },
+        )
+        await self.db.execute(stmt)
+        await self.db.commit()
+        return len(summaries)
+
+
+async def refresh_security_returns() -> int:
+    """
+    Main entry point for the nightly refresh.
+
+    Returns:
+        Number of summaries written
+    """
+    async with AsyncSessionLocal() as session:
+        return await SecurityReturnService(session).refresh()
+
+
+if __name__ == "__main__":
+    # Configure logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+
+    asyncio.run(refresh_security_returns())
@@ -105,6 +105,24 @@ async def health_check():
     return {"status": "healthy", "database": db_status, "redis": redis_status}
 
 
+@app.on_event("startup")
+async def start_background_refresh():
+    """Start live quote refreshes (when enabled)."""
+    from app.security.quotes.service import start_quote_scheduler
+
+    start_quote_scheduler()
+
+
+@app.on_event("shutdown")
+async def close_http_clients():
+    """Stop background refreshes and close pooled HTTP sessions held by market data clients."""
+    from app.integrations.alphavantage.service import close_alpha_vantage_client
+    from app.security.quotes.service import stop_quote_scheduler
+
+    await stop_quote_scheduler()
+    await close_alpha_vantage_client()
+
+
 # Root endpoint
 @app.get("/")
 async def root():
@@ -92,6 +92,8 @@ async def create_tables() -> bool:
         import app.models
 
         async with engine.begin() as conn:
+            # Trigram indexes (gin_trgm_ops) need the extension before their tables
+            await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
             await conn.run_sync(Base.metadata.create_all)
 
         logger.info("✅ Database tables created/verified")
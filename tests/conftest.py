@@ -90,6 +90,7 @@ async def test_engine(test_settings):
     # Create all tables
     try:
         async with engine.begin() as conn:
+            await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
             await conn.run_sync(Base.metadata.create_all)
     except Exception as e:
         await engine.dispose()
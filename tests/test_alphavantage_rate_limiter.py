@@ -0,0 +1,109 @@
+"""Token buckets and throttling notices of the Alpha Vantage client."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.integrations.alphavantage import rate_limiter as rate_limiter_module
+from app.integrations.alphavantage.rate_limiter import (
+    AlphaVantageQuotaExceeded,
+    AlphaVantageRateLimiter,
+    TokenBucket,
+)
+from app.integrations.alphavantage.service import _is_daily_quota_notice, _throttle_message
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter_module, "time", SimpleNamespace(monotonic=clock))
+    return clock
+
+
+def test_bucket_starts_full_and_empties(clock):
+    bucket = TokenBucket(capacity=3, refill_period_seconds=60)
+
+    assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+
+
+def test_bucket_refills_continuously_up_to_capacity(clock):
+    bucket = TokenBucket(capacity=3, refill_period_seconds=60)
+    for _ in range(3):
+        bucket.try_acquire()
+
+    clock.now += 20
+    assert bucket.available == pytest.approx(1.0)
+    clock.now += 3600
+    assert bucket.available == pytest.approx(3.0)
+
+
+def test_drain_empties_the_bucket(clock):
+    bucket = TokenBucket(capacity=5, refill_period_seconds=60)
+    bucket.drain()
+
+    assert not bucket.try_acquire()
+
+
+async def test_acquire_waits_for_the_next_token():
+    bucket = TokenBucket(capacity=1, refill_period_seconds=0.05)
+    await bucket.acquire()
+
+    started = asyncio.get_running_loop().time()
+    await bucket.acquire()
+    assert asyncio.get_running_loop().time() - started >= 0.04
+
+
+async def test_limiter_raises_once_the_day_bucket_is_empty():
+    limiter = AlphaVantageRateLimiter(requests_per_minute=10, requests_per_day=2)
+    await limiter.wait_if_needed()
+    await limiter.wait_if_needed()
+
+    with pytest.raises(AlphaVantageQuotaExceeded):
+        await limiter.wait_if_needed()
+
+
+async def test_reported_daily_quota_fails_fast_until_the_next_day():
+    limiter = AlphaVantageRateLimiter(requests_per_minute=10, requests_per_day=500)
+    limiter.on_daily_quota_exhausted()
+
+    with pytest.raises(AlphaVantageQuotaExceeded):
+        await limiter.wait_if_needed()
+    assert limiter.get_stats()["exhausted_until"] is not None
+
+
+MINUTE_NOTE = (
+    "Thank you for using Alpha Vantage! Our standard API call frequency is "
+    "5 calls per minute and 500 calls per day."
+)
+DAILY_INFORMATION = (
+    "Thank you for using Alpha Vantage! Our standard API rate limit is 25 requests per day. "
+    "Please subscribe to any of the premium plans to instantly remove all daily rate limits."
+)
+
+
+def test_per_minute_note_is_throttling_not_quota():
+    message = _throttle_message({"Note": MINUTE_NOTE})
+
+    assert message == MINUTE_NOTE
+    assert not _is_daily_quota_notice(message)
+
+
+def test_daily_information_is_a_quota_notice():
+    message = _throttle_message({"Information": DAILY_INFORMATION})
+
+    assert message == DAILY_INFORMATION
+    assert _is_daily_quota_notice(message)
+
+
+def test_other_information_is_not_throttling():
+    assert _throttle_message({"Information": "This is a premium endpoint."}) is None
+    assert _throttle_message({"Time Series (Daily)": {}}) is None
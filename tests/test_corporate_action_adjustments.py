@@ -0,0 +1,103 @@
+"""Adjustment factors are applied once, to traded closes."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.security.actions.adjustments import (
+    EMPTY_SCHEDULE,
+    ActionSchedule,
+    adjustment_factors,
+    parse_split_ratio,
+    unadjust_splits,
+)
+from app.security.prices.service import MarketDataService
+
+DATES = np.array(["2024-06-03", "2024-06-04", "2024-06-05", "2024-06-06"], dtype="datetime64[D]")
+
+
+def schedule(splits=(), dividends=()):
+    return ActionSchedule(
+        np.array([d for d, _ in splits], dtype="datetime64[D]"),
+        np.array([r for _, r in splits], dtype=float),
+        np.array([d for d, _ in dividends], dtype="datetime64[D]"),
+        np.array([a for _, a in dividends], dtype=float),
+    )
+
+
+def test_no_actions_leave_closes_unchanged():
+    closes = np.array([100.0, 101.0, 102.0, 103.0])
+    assert adjustment_factors(DATES, closes, EMPTY_SCHEDULE).tolist() == [1.0] * 4
+
+
+def test_split_scales_closes_before_the_ex_date():
+    closes = np.array([200.0, 202.0, 101.0, 102.0])
+    factors = adjustment_factors(DATES, closes, schedule(splits=[("2024-06-05", 2.0)]))
+
+    assert factors.tolist() == [0.5, 0.5, 1.0, 1.0]
+    assert (closes * factors).tolist() == [100.0, 101.0, 101.0, 102.0]
+
+
+def test_splits_compound():
+    closes = np.array([400.0, 200.0, 100.0, 100.0])
+    factors = adjustment_factors(
+        DATES, closes, schedule(splits=[("2024-06-04", 2.0), ("2024-06-05", 2.0)])
+    )
+    assert factors.tolist() == [0.25, 0.5, 1.0, 1.0]
+
+
+def test_dividend_uses_the_previous_close():
+    closes = np.array([100.0, 100.0, 98.0, 98.0])
+    factors = adjustment_factors(DATES, closes, schedule(dividends=[("2024-06-05", 2.0)]))
+
+    assert factors[:2] == pytest.approx([0.98, 0.98])
+    assert factors[2:].tolist() == [1.0, 1.0]
+    assert adjustment_factors(
+        DATES, closes, schedule(dividends=[("2024-06-05", 2.0)]), include_dividends=False
+    ).tolist() == [1.0] * 4
+
+
+def test_dividend_without_a_prior_close_is_ignored():
+    closes = np.array([100.0, 100.0, 98.0, 98.0])
+    factors = adjustment_factors(DATES, closes, schedule(dividends=[("2024-06-01", 2.0)]))
+    assert factors.tolist() == [1.0] * 4
+
+
+def test_unadjust_splits_restores_traded_closes():
+    traded = np.array([200.0, 202.0, 101.0, 102.0])
+    split = schedule(splits=[("2024-06-05", 2.0)])
+    provider_adjusted = traded * adjustment_factors(DATES, traded, split)
+
+    raw = unadjust_splits(DATES, provider_adjusted, split.split_dates, split.split_ratios)
+    assert raw.tolist() == traded.tolist()
+
+
+def test_yfinance_frame_is_stored_unadjusted_and_adjusted_once():
+    # auto_adjust=False, actions=True: Close is split-adjusted, splits are reported
+    hist = pd.DataFrame(
+        {
+            "Close": [100.0, 101.0, 101.0, 102.0],
+            "Volume": [10, 10, 20, 20],
+            "Stock Splits": [0.0, 0.0, 2.0, 0.0],
+        },
+        index=pd.DatetimeIndex(DATES.astype("datetime64[ns]")).tz_localize("America/New_York"),
+    )
+
+    stored = np.array(MarketDataService._raw_closes(hist))
+    assert stored.tolist() == [200.0, 202.0, 101.0, 102.0]
+
+    adjusted = stored * adjustment_factors(DATES, stored, schedule(splits=[("2024-06-05", 2.0)]))
+    assert adjusted.tolist() == hist["Close"].tolist()
+
+
+@pytest.mark.parametrize(
+    "details, amount, expected",
+    [
+        ({"new_shares": 4, "old_shares": 1}, None, 4.0),
+        ({"split_ratio": "1:10"}, None, 0.1),
+        (None, 3, 3.0),
+        ({"split_ratio": "bad"}, None, None),
+    ],
+)
+def test_parse_split_ratio(details, amount, expected):
+    assert parse_split_ratio(details, amount) == expected
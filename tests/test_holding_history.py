@@ -0,0 +1,105 @@
+"""Bucketing and downsampling of holding history."""
+
+from datetime import date, timedelta
+from types import SimpleNamespace
+from uuid import uuid4
+
+import numpy as np
+
+from app.account.holdings.enums import HoldingHistoryBucket
+from app.account.holdings.history import HoldingHistoryService, lttb_indices
+
+
+def test_lttb_keeps_everything_under_the_threshold():
+    x = np.arange(5, dtype=float)
+    assert lttb_indices(x, x, 10).tolist() == [0, 1, 2, 3, 4]
+    assert lttb_indices(x, x, 2).tolist() == [0, 1, 2, 3, 4]
+
+
+def test_lttb_keeps_endpoints_and_extremes():
+    x = np.arange(100, dtype=float)
+    y = np.zeros(100)
+    y[37], y[71] = 50.0, -50.0
+
+    kept = lttb_indices(x, y, 10)
+
+    assert len(kept) == 10
+    assert kept[0] == 0 and kept[-1] == 99
+    assert 37 in kept and 71 in kept
+    assert (np.diff(kept) > 0).all()
+
+
+def snapshot(account, as_of_date, quantity, market_value, period=None):
+    return SimpleNamespace(
+        portfolio_id=account,
+        as_of_date=as_of_date,
+        period=period or as_of_date,
+        quantity=quantity,
+        market_value=market_value,
+        cost_basis=None,
+        currency="USD",
+    )
+
+
+class FakeHoldingRepository:
+    def __init__(self, rows, opening=()):
+        self.rows, self.opening = rows, list(opening)
+
+    async def get_holding_history(self, portfolio_ids, security_id, bucket, start, end):
+        return self.rows
+
+    async def get_opening_holdings(self, portfolio_ids, security_id, start_date):
+        return self.opening
+
+
+def history_service(rows, opening=()):
+    service = HoldingHistoryService(None)
+    service.repo = FakeHoldingRepository(rows, opening)
+    return service
+
+
+async def test_accounts_without_a_snapshot_carry_forward():
+    a, b = uuid4(), uuid4()
+    january, february = date(2024, 1, 1), date(2024, 2, 1)
+    rows = [
+        snapshot(a, date(2024, 1, 31), 10, 100.0, january),
+        snapshot(b, date(2024, 1, 31), 5, 50.0, january),
+        snapshot(a, date(2024, 2, 29), 12, 130.0, february),
+    ]
+
+    history = await history_service(rows).get_history(
+        [a, b], uuid4(), HoldingHistoryBucket.MONTHLY
+    )
+
+    assert history["currency"] == "USD"
+    assert history["date"] == ["2024-01-31", "2024-02-29"]
+    assert history["quantity"] == [15.0, 17.0]
+    assert history["market_value"] == [150.0, 180.0]
+    assert history["cost_basis"] == [None, None]
+
+
+async def test_opening_holdings_count_from_the_first_bucket():
+    a, b = uuid4(), uuid4()
+    opening = [snapshot(b, date(2023, 12, 29), 5, 50.0)]
+    rows = [snapshot(a, date(2024, 1, 2), 10, 100.0)]
+
+    history = await history_service(rows, opening).get_history(
+        [a, b], uuid4(), start_date=date(2024, 1, 1)
+    )
+
+    assert history["date"] == ["2024-01-02"]
+    assert history["market_value"] == [150.0]
+
+
+async def test_lttb_bucket_thins_the_daily_series():
+    account = uuid4()
+    start = date(2024, 1, 1)
+    rows = [snapshot(account, start + timedelta(days=i), 1, float(i % 7)) for i in range(60)]
+
+    history = await history_service(rows).get_history(
+        [account], uuid4(), HoldingHistoryBucket.LTTB, points=12
+    )
+
+    assert history["count"] == 12
+    assert history["date"][0] == "2024-01-01"
+    assert history["date"][-1] == (start + timedelta(days=59)).isoformat()
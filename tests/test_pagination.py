@@ -0,0 +1,38 @@
+"""Opaque keyset cursors."""
+
+import base64
+from datetime import date
+
+import pytest
+
+from app.core.pagination import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    values = {"after": "2024-06-03", "id": "5b8e", "n": 3}
+
+    assert decode_cursor(encode_cursor(values)) == values
+
+
+def test_cursor_is_url_safe_and_unpadded():
+    cursor = encode_cursor({"after": "2024-06-03?&/+"})
+
+    assert "=" not in cursor
+    assert set(cursor) <= set("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_")
+
+
+def test_non_json_values_are_stringified():
+    assert decode_cursor(encode_cursor({"after": date(2024, 6, 3)})) == {"after": "2024-06-03"}
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not a cursor!",
+        base64.urlsafe_b64encode(b"{broken").decode(),
+        base64.urlsafe_b64encode(b"[1, 2]").decode(),
+    ],
+)
+def test_malformed_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
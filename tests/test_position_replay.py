@@ -0,0 +1,86 @@
+"""Average-cost positions replayed from transactions."""
+
+from datetime import date
+from decimal import Decimal
+from types import SimpleNamespace
+
+from app.account.positions.service import Position, apply_transaction, replay_positions
+
+
+def row(security_id, transaction_type, trade_date, quantity, price=None, amount=0, fees=0):
+    return SimpleNamespace(
+        security_id=security_id,
+        transaction_type=transaction_type,
+        trade_date=trade_date,
+        quantity=None if quantity is None else Decimal(quantity),
+        price=None if price is None else Decimal(price),
+        amount=Decimal(amount),
+        fees=Decimal(fees),
+        currency="USD",
+    )
+
+
+EMPTY = Position("a", Decimal("0"), Decimal("0"), "USD")
+
+
+def test_buy_adds_shares_and_cost_with_fees():
+    position = apply_transaction(EMPTY, row("a", "buy", date(2024, 1, 2), "10", "20", fees="5"))
+
+    assert position.quantity == Decimal("10")
+    assert position.cost_basis == Decimal("205.00")
+    assert position.last_trade_date == date(2024, 1, 2)
+
+
+def test_buy_without_a_price_uses_the_amount():
+    position = apply_transaction(EMPTY, row("a", "buy", date(2024, 1, 2), "10", amount="-150"))
+
+    assert position.cost_basis == Decimal("150.00")
+
+
+def test_sell_relieves_average_cost():
+    position = Position("a", Decimal("10"), Decimal("200.00"), "USD")
+    position = apply_transaction(position, row("a", "sell", date(2024, 2, 1), "4", "30"))
+
+    assert position.quantity == Decimal("6")
+    assert position.cost_basis == Decimal("120.00")
+    assert position.average_cost == Decimal("20")
+
+
+def test_selling_everything_closes_the_position():
+    position = Position("a", Decimal("10"), Decimal("200.00"), "USD")
+    position = apply_transaction(position, row("a", "sell", date(2024, 2, 1), "10", "30"))
+
+    assert position.quantity == 0 and position.cost_basis == 0
+    assert position.average_cost is None
+
+
+def test_split_adds_shares_at_the_same_cost():
+    position = Position("a", Decimal("10"), Decimal("200.00"), "USD")
+    position = apply_transaction(position, row("a", "split", date(2024, 3, 1), "10"))
+
+    assert position.quantity == Decimal("20")
+    assert position.cost_basis == Decimal("200.00")
+
+
+def test_other_types_and_missing_quantities_are_ignored():
+    position = Position("a", Decimal("10"), Decimal("200.00"), "USD")
+
+    assert apply_transaction(position, row("a", "dividend", date(2024, 3, 1), "0")) is position
+    assert apply_transaction(position, row("a", "buy", date(2024, 3, 1), None)) is position
+
+
+def test_replay_groups_by_security_and_keeps_untouched_positions():
+    start = {"c": Position("c", Decimal("1"), Decimal("50.00"), "EUR")}
+    rows = [
+        row("a", "buy", date(2024, 1, 2), "10", "20"),
+        row("a", "sell", date(2024, 1, 5), "5", "25"),
+        row("b", "buy", date(2024, 1, 3), "2", "100"),
+    ]
+
+    positions = replay_positions(rows, start)
+
+    assert positions["a"].quantity == Decimal("5")
+    assert positions["a"].cost_basis == Decimal("100.00")
+    assert positions["b"].cost_basis == Decimal("200.00")
+    assert positions["c"] == start["c"]
+    assert "a" not in start
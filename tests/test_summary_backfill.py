@@ -0,0 +1,108 @@
+"""Daily account values built by the summary backfill."""
+
+from datetime import date
+from decimal import Decimal
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.account.positions.service import Position
+from app.analytics.summary.backfill import SummaryBackfill, _position_matrices
+
+DAYS = pd.date_range("2024-06-01", "2024-06-04", freq="D")
+
+
+class SameCurrencyFx:
+    """Converts only amounts already in the target currency."""
+
+    def convert_frame(self, values, currencies, base_currency):
+        known = np.array([c == base_currency for c in currencies])
+        return values * np.where(known, 1.0, np.nan)[None, :]
+
+
+def trade(transaction_type, trade_date, quantity, price, currency="USD"):
+    return SimpleNamespace(
+        security_id="a",
+        transaction_type=transaction_type,
+        trade_date=trade_date,
+        quantity=Decimal(quantity),
+        price=Decimal(price),
+        amount=Decimal(quantity) * Decimal(price),
+        fees=Decimal("0"),
+        currency=currency,
+    )
+
+
+def cash(*movements):
+    return pd.DataFrame(
+        [("p", pd.Timestamp(day), "USD", amount, 0.0) for day, amount in movements],
+        columns=["portfolio_id", "day", "currency", "amount", "flow"],
+    )
+
+
+def summarize(quantity, cost, held, closes, cash_frame):
+    return SummaryBackfill(None)._summarize(
+        DAYS,
+        "USD",
+        quantity,
+        cost,
+        held,
+        closes,
+        pd.DataFrame({"a": closes.index}, index=closes.index).where(closes.notna()),
+        {},
+        cash_frame,
+        SameCurrencyFx(),
+    )
+
+
+def test_position_matrices_follow_trades():
+    start = [Position("a", Decimal("10"), Decimal("100.00"), "USD")]
+    rows = [
+        trade("buy", date(2024, 6, 3), "5", "30"),
+        trade("sell", date(2024, 6, 4), "15", "40"),
+    ]
+
+    quantity, cost, held = _position_matrices(DAYS, start, rows)
+
+    assert quantity["a"].tolist() == [10, 10, 15, 0]
+    assert cost["a"].tolist() == [100, 100, 250, 0]
+    assert held == {"a": "USD"}
+
+
+def test_position_matrices_without_positions():
+    quantity, cost, held = _position_matrices(DAYS, [], [])
+
+    assert quantity.empty and cost.empty and held == {}
+
+
+def test_position_without_a_close_is_carried_at_cost():
+    quantity, cost, held = _position_matrices(
+        DAYS, [], [trade("buy", date(2024, 6, 3), "10", "50")]
+    )
+    closes = pd.DataFrame({"a": [np.nan, np.nan, np.nan, 52.0]}, index=DAYS)
+
+    summary = summarize(
+        quantity, cost, held, closes, cash(("2024-06-01", 1000.0), ("2024-06-03", -500.0))
+    )
+
+    assert summary["market_value"].tolist() == [0, 500, 520]
+    assert summary["cash_balance"].tolist() == [1000, 500, 500]
+    assert summary["daily_return"].tolist() == pytest.approx([0.0, 0.0, 2.0])
+
+
+def test_no_return_when_a_position_cannot_be_valued():
+    quantity, cost, held = _position_matrices(
+        DAYS, [], [trade("buy", date(2024, 6, 3), "10", "50", currency="EUR")]
+    )
+    closes = pd.DataFrame({"a": [50.0, 50.0, 50.0, 50.0]}, index=DAYS)
+
+    summary = summarize(
+        quantity, cost, held, closes, cash(("2024-06-01", 1000.0), ("2024-06-03", -500.0))
+    )
+
+    # No EUR rate: the position is left out and the day it appears has no return
+    assert summary["market_value"].tolist() == [0, 0, 0]
+    assert np.isnan(summary["daily_return"].iloc[1])
+    assert summary["daily_return"].iloc[2] == 0.0
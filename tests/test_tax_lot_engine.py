@@ -0,0 +1,117 @@
+"""Lot-method ordering of the tax-lot replay."""
+
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+
+from app.account.lots.engine import OpenLots, holding_term, replay_security
+from app.account.lots.enums import HoldingTerm, LotMethod
+
+
+def row(id, transaction_type, trade_date, quantity, price, fees=0):
+    return SimpleNamespace(
+        id=id,
+        transaction_type=transaction_type,
+        trade_date=trade_date,
+        quantity=quantity,
+        price=price,
+        amount=quantity * price,
+        fees=fees,
+        currency="USD",
+    )
+
+
+# Three lots at 10, 30 and 20 a share, then a sale of 15 shares at 25
+TRANSACTIONS = [
+    row("b1", "buy", date(2023, 1, 10), 10, 10.0),
+    row("b2", "buy", date(2023, 6, 10), 10, 30.0),
+    row("b3", "buy", date(2024, 3, 10), 10, 20.0),
+    row("s1", "sell", date(2024, 6, 10), 15, 25.0),
+]
+
+
+def relieved(result):
+    return [(record.open_transaction_id, record.quantity) for record in result.realized]
+
+
+@pytest.mark.parametrize(
+    "method, expected",
+    [
+        (LotMethod.FIFO, [("b1", 10), ("b2", 5)]),
+        (LotMethod.LIFO, [("b3", 10), ("b2", 5)]),
+        (LotMethod.HIFO, [("b2", 10), ("b3", 5)]),
+        (LotMethod.SPECIFIC_ID, [("b1", 10), ("b2", 5)]),  # No designations: FIFO
+    ],
+)
+def test_sale_relieves_lots_in_method_order(method, expected):
+    result = replay_security("sec", TRANSACTIONS, method)
+
+    assert relieved(result) == expected
+    assert result.unmatched_quantity == 0
+    assert sum(record.proceeds for record in result.realized) == pytest.approx(375.0)
+
+
+def test_realized_cost_and_term():
+    result = replay_security("sec", TRANSACTIONS, LotMethod.FIFO)
+    first, second = result.realized
+
+    assert first.cost_basis == pytest.approx(100.0)
+    assert first.term == HoldingTerm.LONG_TERM
+    assert second.cost_basis == pytest.approx(150.0)
+    assert second.term == HoldingTerm.SHORT_TERM
+    assert [lot.remaining_quantity for lot in result.lots] == [0, 5, 10]
+    assert result.lots[0].closed_date == date(2024, 6, 10)
+
+
+def test_designated_shares_first_then_fifo_fallback():
+    result = replay_security("sec", TRANSACTIONS, LotMethod.SPECIFIC_ID, {"s1": {"b3": 10}})
+
+    assert relieved(result) == [("b3", 10), ("b1", 5)]
+    # Only the user's choice is marked; the fallback is recomputed on rebuild
+    assert [record.designated for record in result.realized] == [True, False]
+
+
+def test_fallback_follows_back_dated_buys():
+    back_dated = row("b0", "buy", date(2022, 5, 1), 10, 5.0)
+    designations = {"s1": {"b3": 10}}
+
+    result = replay_security(
+        "sec", [back_dated] + TRANSACTIONS, LotMethod.SPECIFIC_ID, designations
+    )
+    assert relieved(result) == [("b3", 10), ("b0", 5)]
+
+
+def test_split_rescales_open_lots():
+    transactions = [
+        row("b1", "buy", date(2024, 1, 10), 10, 20.0),
+        row("x1", "split", date(2024, 2, 1), 10, 0.0),
+        row("s1", "sell", date(2024, 3, 1), 5, 12.0),
+    ]
+    result = replay_security("sec", transactions, LotMethod.FIFO)
+
+    assert result.lots[0].quantity == pytest.approx(20)
+    assert result.lots[0].unit_cost == pytest.approx(10.0)
+    assert result.realized[0].cost_basis == pytest.approx(50.0)
+
+
+def test_oversell_is_reported_unmatched():
+    lots = OpenLots(LotMethod.FIFO)
+    lots.open("b1", date(2024, 1, 10), 10, 100.0)
+
+    taken, left = lots.relieve(12, date(2024, 2, 1))
+    assert taken == [(0, 10, False)]
+    assert left == pytest.approx(2)
+
+
+@pytest.mark.parametrize(
+    "open_date, close_date, term",
+    [
+        (date(2023, 1, 10), date(2024, 1, 10), HoldingTerm.SHORT_TERM),
+        (date(2023, 1, 10), date(2024, 1, 11), HoldingTerm.LONG_TERM),
+        (date(2024, 2, 29), date(2025, 3, 1), HoldingTerm.SHORT_TERM),
+        (date(2024, 2, 29), date(2025, 3, 2), HoldingTerm.LONG_TERM),
+    ],
+)
+def test_holding_term(open_date, close_date, term):
+    assert holding_term(open_date, close_date) == term
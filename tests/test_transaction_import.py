@@ -0,0 +1,89 @@
+"""Bulk imports skip rows that were already imported."""
+
+from collections import Counter
+from datetime import date
+from decimal import Decimal
+
+import pytest
+import pytest_asyncio
+
+from app.account.master.model import Account
+from app.account.transactions.repository import (
+    IMPORT_KEY_PREFIX,
+    TransactionImportError,
+    TransactionRepository,
+    _import_record,
+)
+
+
+def deposit(account_id, amount="100.00", **extra):
+    return {
+        "portfolio_id": str(account_id),
+        "transaction_type": "deposit",
+        "amount": amount,
+        "currency": "USD",
+        "trade_date": "2024-03-01",
+        **extra,
+    }
+
+
+def test_rows_without_a_provider_id_get_a_content_key():
+    account_id = "00000000-0000-0000-0000-0000000000aa"
+    occurrences = Counter()
+
+    first = _import_record(deposit(account_id), 1, occurrences)[-1]
+    repeat = _import_record(deposit(account_id, amount="100.0"), 2, occurrences)[-1]
+    other = _import_record(deposit(account_id, amount="250.00"), 3, occurrences)[-1]
+
+    assert first.startswith(IMPORT_KEY_PREFIX)
+    # The same contents twice in one file are two transactions
+    assert repeat != first
+    assert other != first
+    # Uploading the file again yields the same keys
+    assert _import_record(deposit(account_id), 1, Counter())[-1] == first
+
+
+def test_provider_id_is_kept():
+    record = _import_record(
+        deposit("00000000-0000-0000-0000-0000000000aa", external_transaction_id="tx-1"),
+        1,
+        Counter(),
+    )
+    assert record[-1] == "tx-1"
+    assert record[7] == Decimal("100.00")
+    assert record[10] == date(2024, 3, 1)
+
+
+def test_invalid_row_names_its_line():
+    with pytest.raises(TransactionImportError, match="Row 4"):
+        _import_record({"transaction_type": "deposit"}, 4, Counter())
+
+
+@pytest_asyncio.fixture
+async def import_account(test_db_session, ensure_test_user):
+    account = Account(
+        user_id=ensure_test_user.id,
+        account_name="Import Test Account",
+        account_type="brokerage",
+        currency="USD",
+    )
+    test_db_session.add(account)
+    await test_db_session.flush()
+    return account
+
+
+async def test_reimporting_a_file_inserts_nothing(test_db_session, import_account):
+    rows = [
+        deposit(import_account.id),
+        deposit(import_account.id),
+        deposit(import_account.id, external_transaction_id="tx-1"),
+    ]
+    repository = TransactionRepository(test_db_session)
+
+    first = await repository.bulk_import_transactions(rows)
+    again = await repository.bulk_import_transactions(rows)
+
+    assert (first["received"], first["imported"], first["skipped"]) == (3, 3, 0)
+    assert (again["received"], again["imported"], again["skipped"]) == (3, 0, 3)
+    listed = await repository.get_by_account(import_account.id)
+    assert len(listed["transactions"]) == 3
@@ -0,0 +1,99 @@
+"""Transaction listing: soft deletes and keyset pages."""
+
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from uuid import uuid4
+
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+
+from app.account.master.model import Account
+from app.account.transactions.model import AccountTransaction
+from app.account.transactions.repository import TransactionRepository
+from app.account.transactions.router import _decode_after, _encode_after
+
+
+@pytest_asyncio.fixture
+async def listed_account(test_db_session, ensure_test_user):
+    """An account with three deposits, the middle one deleted."""
+    account = Account(
+        user_id=ensure_test_user.id,
+        account_name="Listing Test Account",
+        account_type="brokerage",
+        currency="USD",
+    )
+    test_db_session.add(account)
+    await test_db_session.flush()
+
+    transactions = [
+        AccountTransaction(
+            portfolio_id=account.id,
+            transaction_type="deposit",
+            amount=Decimal("100.00"),
+            fees=Decimal("0"),
+            currency="USD",
+            trade_date=date(2024, 3, day),
+            deleted_at=datetime.now(timezone.utc) if day == 2 else None,
+        )
+        for day in (1, 2, 3)
+    ]
+    test_db_session.add_all(transactions)
+    await test_db_session.flush()
+    return account, transactions
+
+
+async def test_get_skips_deleted(test_db_session, listed_account):
+    _, (first, deleted, _) = listed_account
+    repository = TransactionRepository(test_db_session)
+
+    assert (await repository.get(first.id)).id == first.id
+    assert await repository.get(deleted.id) is None
+
+
+async def test_listing_skips_deleted(test_db_session, ensure_test_user, listed_account):
+    account, (first, deleted, last) = listed_account
+    repository = TransactionRepository(test_db_session)
+
+    by_account = await repository.get_by_account(account.id)
+    by_user = {t.id for t in (await repository.get_by_user(ensure_test_user.id))["transactions"]}
+
+    assert [t.id for t in by_account["transactions"]] == [last.id, first.id]
+    assert {first.id, last.id} <= by_user
+    assert deleted.id not in by_user
+
+
+async def test_delete_hides_the_transaction(test_db_session, listed_account):
+    _, (first, _, _) = listed_account
+    repository = TransactionRepository(test_db_session)
+
+    assert await repository.delete(first.id)
+    assert await repository.get(first.id) is None
+    assert not await repository.delete(first.id)
+
+
+async def test_pages_follow_the_cursor(test_db_session, listed_account):
+    account, (first, _, last) = listed_account
+    repository = TransactionRepository(test_db_session)
+
+    page = await repository.get_by_account(account.id, limit=1)
+    assert [t.id for t in page["transactions"]] == [last.id]
+
+    after = _decode_after(_encode_after(page["next_after"]))
+    page = await repository.get_by_account(account.id, limit=1, after=after)
+    assert [t.id for t in page["transactions"]] == [first.id]
+    assert page["next_after"] is None
+
+
+def test_transaction_cursor_round_trip():
+    key = (date(2024, 3, 1), datetime(2024, 3, 1, 12, 30, tzinfo=timezone.utc), uuid4())
+
+    assert _decode_after(_encode_after(key)) == key
+    assert _decode_after(None) is None and _encode_after(None) is None
+
+
+def test_invalid_transaction_cursor_is_a_bad_request():
+    with pytest.raises(HTTPException) as error:
+        _decode_after("bm90LWEta2V5")
+
+    assert error.value.status_code == 400
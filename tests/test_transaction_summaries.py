@@ -0,0 +1,77 @@
+"""Transaction summaries leave soft-deleted transactions out."""
+
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+import pytest_asyncio
+
+from app.account.master.model import Account
+from app.account.transactions.model import AccountTransaction
+from app.account.transactions.repository import TransactionRepository
+
+
+@pytest_asyncio.fixture
+async def summary_account(test_db_session, ensure_test_user):
+    """An account with a buy, a dividend and a deleted buy."""
+    account = Account(
+        user_id=ensure_test_user.id,
+        account_name="Summary Test Account",
+        account_type="brokerage",
+        currency="USD",
+    )
+    test_db_session.add(account)
+    await test_db_session.flush()
+
+    def transaction(transaction_type, amount, trade_date, deleted=False):
+        return AccountTransaction(
+            portfolio_id=account.id,
+            transaction_type=transaction_type,
+            amount=Decimal(amount),
+            fees=Decimal("1.00"),
+            currency="USD",
+            trade_date=trade_date,
+            deleted_at=datetime.now(timezone.utc) if deleted else None,
+        )
+
+    test_db_session.add_all(
+        [
+            transaction("buy", "1000.00", date(2024, 1, 15)),
+            transaction("dividend", "25.00", date(2024, 2, 15)),
+            transaction("buy", "5000.00", date(2024, 2, 20), deleted=True),
+        ]
+    )
+    await test_db_session.flush()
+    return account
+
+
+async def test_transaction_summary_skips_deleted(test_db_session, summary_account):
+    summary = await TransactionRepository(test_db_session).get_transaction_summary(
+        summary_account.id
+    )
+
+    assert summary["total_transactions"] == 2
+    assert summary["total_invested"] == Decimal("1000.00")
+    assert summary["total_fees"] == Decimal("2.00")
+    assert summary["by_category"] == {"buy": 1, "dividend": 1}
+    assert len(summary["recent_transactions"]) == 2
+
+
+async def test_portfolio_summary_skips_deleted(
+    test_db_session, ensure_test_user, summary_account
+):
+    summary = await TransactionRepository(test_db_session).get_portfolio_summary(
+        ensure_test_user.id
+    )
+
+    by_account = summary["by_account"][str(summary_account.id)]
+    assert by_account["transactions"] == 2
+    assert by_account["invested"] == Decimal("1000.00")
+
+
+async def test_monthly_activity_skips_deleted(test_db_session, summary_account):
+    activity = await TransactionRepository(test_db_session).get_monthly_activity(
+        summary_account.id, 2024
+    )
+
+    assert activity["monthly_data"]["2024-02"]["transactions"] == 1
+    assert activity["monthly_data"]["2024-02"]["invested"] == Decimal("0")